@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Análises Vetorizadas
+Interações pessoa-objeto e atividades calculadas com NumPy sobre todas as
+caixas de uma vez: índice espacial em grade uniforme para cenas muito cheias
+e tabela de atividades pré-computada a partir das regras determinísticas
+"""
+
+import numpy as np
+
+# Acima deste número de pares pessoa x objeto, usa a grade uniforme em vez da matriz completa
+LIMITE_MATRIZ_COMPLETA = 250000
+
+# Atividades pela proporção altura/largura da caixa
+ATIVIDADES_PROPORCAO = ('agachado_ou_sentado', 'posicao_normal', 'em_pe')
+
+
+# Códigos das características categóricas (valores recebidos por DetectorAvancado._inferir_atividade)
+MOVIMENTOS_CABECA = ('olhando_direita', 'olhando_esquerda', 'cabeca_alta', 'cabeca_baixa', 'olhando_frente')
+POSTURAS = ('em_pe_ereto', 'em_pe_relaxado', 'sentado', 'agachado_ou_deitado')
+MOVIMENTOS_MAOS = ('digitando', 'maos_no_colo', 'gesticulando', 'apontando', 'maos_ao_lado',
+                   'segurando_objeto', 'maos_quietas')
+
+# Resolução assumida pela direção da cabeça
+LARGURA_TELA_PADRAO = 1920
+ALTURA_TELA_PADRAO = 1080
+
+
+def caixas_deteccoes(deteccoes):
+    """Caixas N x 4 (x, y, largura, altura) em float64 a partir das detecções (DeteccoesQuadro ou dicionários)"""
+    if hasattr(deteccoes, 'caixas'):
+        return deteccoes.caixas.astype(np.float64)
+    return np.array([
+        [d['posicao']['x'], d['posicao']['y'], d['posicao']['largura'], d['posicao']['altura']]
+        for d in deteccoes
+    ], dtype=np.float64).reshape(-1, 4)
+
+
+def atividades_por_proporcao(caixas):
+    """Índices em ATIVIDADES_PROPORCAO para cada caixa (proporção > 2.0 em pé, < 1.5 agachado)"""
+    largura, altura = caixas[:, 2], caixas[:, 3]
+    proporcao = np.divide(altura, largura, out=np.zeros_like(altura), where=largura > 0)
+    return np.where(proporcao > 2.0, 2, np.where(proporcao < 1.5, 0, 1))
+
+
+def _centros_raios(caixas):
+    """Centros (como no cálculo original, com divisão inteira) e meia-diagonal de cada caixa"""
+    centros = caixas[:, :2] + np.floor_divide(caixas[:, 2:], 2)
+    raios = np.hypot(caixas[:, 2], caixas[:, 3]) / 2
+    return centros, raios
+
+
+def _sobreposicao(caixas_p, caixas_o):
+    """Fração da área de cada objeto coberta pela caixa da pessoa (pares alinhados)"""
+    x1 = np.maximum(caixas_p[:, 0], caixas_o[:, 0])
+    y1 = np.maximum(caixas_p[:, 1], caixas_o[:, 1])
+    x2 = np.minimum(caixas_p[:, 0] + caixas_p[:, 2], caixas_o[:, 0] + caixas_o[:, 2])
+    y2 = np.minimum(caixas_p[:, 1] + caixas_p[:, 3], caixas_o[:, 1] + caixas_o[:, 3])
+    intersecao = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    return intersecao / np.maximum(caixas_o[:, 2] * caixas_o[:, 3], 1)
+
+
+def _pares_matriz(centros_p, raios_p, centros_o, raios_o, fator):
+    distancias = np.hypot(centros_p[:, None, 0] - centros_o[None, :, 0],
+                          centros_p[:, None, 1] - centros_o[None, :, 1])
+    limiares = fator * (raios_p[:, None] + raios_o[None, :])
+    i, j = np.nonzero(distancias < limiares)
+    return i, j, distancias[i, j]
+
+
+def _pares_grade(centros_p, raios_p, centros_o, raios_o, fator):
+    """Mesmo resultado de _pares_matriz, comparando só objetos das células vizinhas"""
+    # Nenhum par pode estar a mais de 'celula' de distância
+    celula = max(fator * (raios_p.max() + raios_o.max()), 1.0)
+    celulas_p = np.floor(centros_p / celula).astype(np.int64)
+    celulas_o = np.floor(centros_o / celula).astype(np.int64)
+
+    # Célula -> chave linear, com uma célula de folga em volta para os vizinhos não darem a volta
+    origem = np.minimum(celulas_p.min(axis=0), celulas_o.min(axis=0)) - 1
+    linhas = max(celulas_p[:, 1].max(), celulas_o[:, 1].max()) - origem[1] + 2
+    chaves_p = (celulas_p[:, 0] - origem[0]) * linhas + (celulas_p[:, 1] - origem[1])
+    chaves_o = (celulas_o[:, 0] - origem[0]) * linhas + (celulas_o[:, 1] - origem[1])
+    ordem = np.argsort(chaves_o, kind='stable')
+    chaves_ordenadas = chaves_o[ordem]
+
+    # Intervalo de objetos (na ordem por chave) de cada uma das 9 células vizinhas de cada pessoa
+    deslocamentos = np.array([dx * linhas + dy for dx in (-1, 0, 1) for dy in (-1, 0, 1)])
+    vizinhas = (chaves_p[:, None] + deslocamentos).ravel()
+    inicio = np.searchsorted(chaves_ordenadas, vizinhas, side='left')
+    contagem = np.searchsorted(chaves_ordenadas, vizinhas, side='right') - inicio
+
+    # Expande os intervalos em pares candidatos (pessoa, objeto)
+    total = int(contagem.sum())
+    i = np.repeat(np.arange(len(chaves_p)).repeat(len(deslocamentos)), contagem)
+    posicoes = np.arange(total) + np.repeat(inicio - (np.cumsum(contagem) - contagem), contagem)
+    j = ordem[posicoes]
+
+    distancias = np.hypot(centros_o[j, 0] - centros_p[i, 0], centros_o[j, 1] - centros_p[i, 1])
+    perto = distancias < fator * (raios_p[i] + raios_o[j])
+    i, j, distancias = i[perto], j[perto], distancias[perto]
+    ordem_pares = np.lexsort((j, i))
+    return i[ordem_pares], j[ordem_pares], distancias[ordem_pares]
+
+
+def pares_interacao(caixas_p, caixas_o, fator_distancia=1.0):
+    """
+    Todos os pares pessoa-objeto próximos ou sobrepostos
+
+    Um par interage quando a distância entre centros é menor que
+    fator_distancia x (meia-diagonal da pessoa + meia-diagonal do objeto),
+    ou seja, um limiar relativo ao tamanho das caixas, em vez de pixels fixos.
+
+    Returns:
+        tuple: (índices das pessoas, índices dos objetos, distâncias, sobreposições),
+            ordenados por pessoa e depois por objeto
+    """
+    if not len(caixas_p) or not len(caixas_o):
+        return np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0), np.empty(0)
+
+    centros_p, raios_p = _centros_raios(caixas_p)
+    centros_o, raios_o = _centros_raios(caixas_o)
+    if len(caixas_p) * len(caixas_o) <= LIMITE_MATRIZ_COMPLETA:
+        i, j, distancias = _pares_matriz(centros_p, raios_p, centros_o, raios_o, fator_distancia)
+    else:
+        i, j, distancias = _pares_grade(centros_p, raios_p, centros_o, raios_o, fator_distancia)
+    return i, j, distancias, _sobreposicao(caixas_p[i], caixas_o[j])
+
+
+def codigos_atividade(caixas):
+    """
+    Códigos (cabeça, postura, mãos) de todas as pessoas de uma vez
+
+    Única fonte das regras: cabeça pela posição na tela, postura pela
+    proporção altura/largura e mãos pela postura; a primeira condição
+    verdadeira de cada np.select vence.
+
+    Returns:
+        tuple: Três arrays de índices em MOVIMENTOS_CABECA, POSTURAS e MOVIMENTOS_MAOS
+    """
+    x, y, largura, altura = caixas[:, 0], caixas[:, 1], caixas[:, 2], caixas[:, 3]
+
+    cabeca = np.select(
+        [x < LARGURA_TELA_PADRAO * 0.3, x > LARGURA_TELA_PADRAO * 0.7,
+         y < ALTURA_TELA_PADRAO * 0.3, y > ALTURA_TELA_PADRAO * 0.7],
+        [0, 1, 2, 3], default=4
+    )
+
+    proporcao = np.divide(altura, largura, out=np.full_like(altura, 1.5), where=largura > 0)
+    postura = np.select([proporcao > 2.2, proporcao > 1.8, proporcao > 1.3], [0, 1, 2], default=3)
+
+    sentado = postura == 2
+    em_pe = postura <= 1
+    maos = np.select(
+        [sentado & (largura > altura * 0.8), sentado,
+         em_pe & (altura > largura * 2), em_pe & (y < 300), em_pe,
+         postura == 3],
+        [0, 1, 2, 3, 4, 5], default=6
+    )
+    return cabeca, postura, maos
+
+
+def construir_tabela_atividades(regra):
+    """
+    Tabela [cabeça, postura, mãos] -> atividade, avaliando a regra em todas as combinações
+
+    Args:
+        regra (callable): regra(movimento_cabeca, postura, movimento_maos) -> atividade
+    """
+    tabela = np.empty((len(MOVIMENTOS_CABECA), len(POSTURAS), len(MOVIMENTOS_MAOS)), dtype=object)
+    for c, cabeca in enumerate(MOVIMENTOS_CABECA):
+        for p, postura in enumerate(POSTURAS):
+            for m, maos in enumerate(MOVIMENTOS_MAOS):
+                tabela[c, p, m] = regra(cabeca, postura, maos)
+    return tabela
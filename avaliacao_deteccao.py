@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Avaliação de Modos de Detecção
+Relatórios de compromisso velocidade x recall sobre capturas gravadas (replay)
+"""
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+
+from detector_avancado import DetectorAvancado
+from fontes_frames import FonteReplay
+from preprocessamento import TAMANHOS_ENTRADA
+
+
+def caixas_resultado(resultado):
+    """Extrai (caixas N x 4 em xyxy, tipos) de pessoas e objetos de um resultado"""
+    deteccoes = resultado.get('deteccoes', {})
+    itens = list(deteccoes.get('pessoas', [])) + list(deteccoes.get('objetos', []))
+    caixas = np.array([
+        [d['posicao']['x'], d['posicao']['y'],
+         d['posicao']['x'] + d['posicao']['largura'], d['posicao']['y'] + d['posicao']['altura']]
+        for d in itens
+    ], dtype=np.float32).reshape(-1, 4)
+    return caixas, [d['tipo'] for d in itens]
+
+
+def iou_matriz(a, b):
+    """IoU entre todas as caixas de a (N x 4) e b (M x 4), em xyxy"""
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    intersecao = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return intersecao / np.maximum(area_a[:, None] + area_b[None, :] - intersecao, 1e-6)
+
+
+def comparar_resultados(referencia, teste, limiar_iou=0.5):
+    """
+    Compara as detecções de um modo com as de referência (mesma classe, IoU >= limiar)
+
+    Returns:
+        tuple: (verdadeiros_positivos, total_referencia, total_teste)
+    """
+    caixas_ref, tipos_ref = caixas_resultado(referencia)
+    caixas_teste, tipos_teste = caixas_resultado(teste)
+    if not len(caixas_ref) or not len(caixas_teste):
+        return 0, len(caixas_ref), len(caixas_teste)
+
+    iou = iou_matriz(caixas_ref, caixas_teste)
+    mesma_classe = np.array(tipos_ref)[:, None] == np.array(tipos_teste)[None, :]
+    iou[~mesma_classe] = 0
+
+    # Casamento guloso pela maior IoU
+    acertos = 0
+    usados = np.zeros(len(caixas_teste), dtype=bool)
+    for i in np.argsort(-iou.max(axis=1)):
+        candidatos = np.where(~usados & (iou[i] >= limiar_iou))[0]
+        if len(candidatos):
+            usados[candidatos[np.argmax(iou[i, candidatos])]] = True
+            acertos += 1
+    return acertos, len(caixas_ref), len(caixas_teste)
+
+
+def executar_modo(detector, frames):
+    """Roda o detector em todos os frames; retorna (resultados, latências em ms)"""
+    resultados, latencias = [], []
+    for frame in frames:
+        inicio = time.perf_counter()
+        resultados.append(detector.detectar_frame(frame))
+        latencias.append((time.perf_counter() - inicio) * 1000)
+    return resultados, latencias
+
+
+def resumir_modo(resultados, latencias, referencia):
+    """Métricas de velocidade e concordância de um modo com a referência"""
+    acertos = total_ref = total_teste = 0
+    for ref, teste in zip(referencia, resultados):
+        a, r, t = comparar_resultados(ref, teste)
+        acertos += a
+        total_ref += r
+        total_teste += t
+    latencias = np.asarray(latencias)
+    return {
+        'latencia_media_ms': round(float(latencias.mean()), 2),
+        'latencia_p95_ms': round(float(np.percentile(latencias, 95)), 2),
+        'fps_estimado': round(1000.0 / max(float(latencias.mean()), 1e-6), 2),
+        'recall_vs_referencia': round(acertos / total_ref, 3) if total_ref else None,
+        'precisao_vs_referencia': round(acertos / total_teste, 3) if total_teste else None,
+        'deteccoes': total_teste
+    }
+
+
+def avaliar_tamanhos_entrada(frames, tamanhos=TAMANHOS_ENTRADA, config=None):
+    """
+    Mede velocidade e recall de cada tamanho de entrada
+
+    A referência é o maior tamanho avaliado (modo mais preciso); sem rótulos
+    manuais, o recall indica quanto de cada modo concorda com ele.
+    """
+    tamanhos = sorted(tamanhos)
+    detector = DetectorAvancado(dict(config or {}, tamanho_entrada=tamanhos[-1]))
+
+    # Modelo exportado com entrada fixa: só esse tamanho pode ser avaliado
+    fixo = detector.backend.tamanho_fixo if detector.backend is not None else None
+    ignorados = [t for t in tamanhos if fixo and t != fixo]
+    if ignorados:
+        print(f"⚠️ Modelo com entrada fixa {fixo}, ignorando tamanhos {ignorados}")
+        tamanhos = [fixo]
+
+    por_tamanho = {}
+    for tamanho in reversed(tamanhos):
+        detector.definir_tamanho_entrada(tamanho)
+        executar_modo(detector, frames[:2])  # aquecimento
+        por_tamanho[tamanho] = executar_modo(detector, frames)
+
+    referencia = por_tamanho[tamanhos[-1]][0]
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'modelo_carregado': detector.modelo_carregado,
+        'frames_avaliados': len(frames),
+        'referencia': f"tamanho_entrada={tamanhos[-1]}",
+        'tamanhos_ignorados': ignorados,
+        'tamanhos': {
+            str(t): resumir_modo(*por_tamanho[t], referencia) for t in tamanhos
+        }
+    }
+
+
+def avaliar_precisao_int8(frames, config=None):
+    """
+    Compara o modelo INT8 com o float nos mesmos frames
+
+    A referência é o modelo float; o recall mostra quanto das detecções
+    float o modelo quantizado mantém.
+    """
+    config = dict(config or {}, backend='onnxruntime')
+    por_precisao = {}
+    for precisao in ('fp32', 'int8'):
+        detector = DetectorAvancado(dict(config, precisao=precisao))
+        if not detector.modelo_carregado or detector.precisao != precisao:
+            raise RuntimeError(f"Modelo {precisao} não carregado")
+        executar_modo(detector, frames[:2])  # aquecimento
+        por_precisao[precisao] = executar_modo(detector, frames)
+
+    referencia = por_precisao['fp32'][0]
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'frames_avaliados': len(frames),
+        'referencia': 'precisao=fp32',
+        'precisoes': {
+            p: resumir_modo(*por_precisao[p], referencia) for p in por_precisao
+        }
+    }
+
+
+def _carregar_frames(pastas, limite):
+    fonte = FonteReplay(pastas, repetir=False, limite=limite)
+    return list(fonte)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Avaliação velocidade x recall dos modos de detecção")
+    parser.add_argument('--replay', nargs='+', default=None, help="Pastas/arquivos de capturas gravadas")
+    parser.add_argument('--limite', type=int, default=200, help="Máximo de frames avaliados")
+    parser.add_argument('--tamanhos', nargs='+', type=int, default=list(TAMANHOS_ENTRADA))
+    parser.add_argument('--int8', action='store_true', help="Compara o modelo INT8 com o float")
+    parser.add_argument('--saida', default=None, help="Arquivo JSON de saída")
+    args = parser.parse_args(argv)
+
+    frames = _carregar_frames(args.replay, args.limite)
+    if not frames:
+        print("❌ Nenhuma captura encontrada para avaliação")
+        return None
+
+    if args.int8:
+        print(f"🧪 Comparando modelo INT8 com o float em {len(frames)} frames...")
+        relatorio = avaliar_precisao_int8(frames)
+        itens, prefixo = relatorio['precisoes'], 'avaliacao_int8'
+    else:
+        print(f"🧪 Avaliando tamanhos de entrada {args.tamanhos} em {len(frames)} frames...")
+        relatorio = avaliar_tamanhos_entrada(frames, args.tamanhos)
+        itens, prefixo = relatorio['tamanhos'], 'avaliacao_tamanhos'
+
+    for nome, metricas in itens.items():
+        print(f"   {nome:>4}: {metricas['latencia_media_ms']} ms | "
+              f"{metricas['fps_estimado']} FPS | recall {metricas['recall_vs_referencia']}")
+
+    caminho = args.saida or os.path.join(
+        'relatorios', f"{prefixo}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(relatorio, f, indent=2, ensure_ascii=False)
+    print(f"📄 Relatório salvo: {caminho}")
+    return relatorio
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,457 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Backends de Inferência
+OpenCV DNN, ONNX Runtime (CPU) e Ultralytics atrás de uma interface comum,
+com decodificação e pós-processamento (letterbox reverso + NMS) compartilhados
+"""
+
+import os
+
+import cv2
+import numpy as np
+
+from preprocessamento import desfazer_letterbox
+
+# Níveis de otimização de grafo aceitos na configuração
+NIVEIS_OTIMIZACAO = ('desativado', 'basico', 'estendido', 'completo')
+
+# Precisões de modelo aceitas na configuração
+PRECISOES = ('fp32', 'int8')
+
+
+# Nomes das 80 classes COCO, na ordem dos índices dos modelos YOLO
+CLASSES_COCO = (
+    'person', 'bicycle', 'car', 'motorbike', 'aeroplane', 'bus', 'train', 'truck',
+    'boat', 'traffic light', 'fire hydrant', 'stop sign', 'parking meter', 'bench',
+    'bird', 'cat', 'dog', 'horse', 'sheep', 'cow', 'elephant', 'bear', 'zebra',
+    'giraffe', 'backpack', 'umbrella', 'handbag', 'tie', 'suitcase', 'frisbee',
+    'skis', 'snowboard', 'sports ball', 'kite', 'baseball bat', 'baseball glove',
+    'skateboard', 'surfboard', 'tennis racket', 'bottle', 'wine glass', 'cup',
+    'fork', 'knife', 'spoon', 'bowl', 'banana', 'apple', 'sandwich', 'orange',
+    'broccoli', 'carrot', 'hot dog', 'pizza', 'donut', 'cake', 'chair', 'sofa',
+    'pottedplant', 'bed', 'diningtable', 'toilet', 'tvmonitor', 'laptop', 'mouse',
+    'remote', 'keyboard', 'cell phone', 'microwave', 'oven', 'toaster', 'sink',
+    'refrigerator', 'book', 'clock', 'vase', 'scissors', 'teddy bear', 'hair drier',
+    'toothbrush'
+)
+
+
+def nome_classe(class_id, nomes=CLASSES_COCO):
+    """Nome da classe pelo índice, ou 'unknown_<id>' fora da tabela"""
+    if 0 <= class_id < len(nomes):
+        return nomes[class_id]
+    return f'unknown_{class_id}'
+
+
+class FiltroClasses:
+    def __init__(self, limiar_padrao, classes_permitidas=None, limiares_classe=None, nomes=CLASSES_COCO):
+        """
+        Lista de classes permitidas e limiares de confiança por classe
+
+        Aplicado na decodificação, antes do NMS: só as colunas das classes
+        permitidas entram no argmax e cada candidato é comparado com o limiar
+        da sua classe.
+
+        Args:
+            limiar_padrao (float): Limiar das classes sem limiar próprio
+            classes_permitidas (list): Nomes das classes mantidas (None = todas)
+            limiares_classe (dict): Nome da classe -> limiar de confiança
+            nomes (sequence): Tabela de nomes do modelo
+        """
+        self.limiar_padrao = limiar_padrao
+        self.nomes = tuple(nomes)
+        indice = {nome: i for i, nome in enumerate(self.nomes)}
+
+        desconhecidas = [c for c in list(classes_permitidas or []) + list(limiares_classe or {}) if c not in indice]
+        if desconhecidas:
+            print(f"⚠️ Classes desconhecidas ignoradas no filtro: {', '.join(sorted(set(desconhecidas)))}")
+
+        self.indices = None
+        self.limiares = np.full(len(self.nomes), limiar_padrao, dtype=np.float32)
+        if classes_permitidas is not None:
+            self.indices = np.array(sorted(indice[c] for c in set(classes_permitidas) if c in indice), dtype=np.int64)
+            self.limiares[:] = np.inf
+            self.limiares[self.indices] = limiar_padrao
+        for classe, limiar in (limiares_classe or {}).items():
+            if classe in indice and np.isfinite(self.limiares[indice[classe]]):
+                self.limiares[indice[classe]] = limiar
+        # Índices fora da tabela (modelos com mais classes) só passam sem lista de permitidas
+        self._limiar_fora = np.float32(limiar_padrao if self.indices is None else np.inf)
+
+    @classmethod
+    def como_filtro(cls, limiar):
+        """Aceita um FiltroClasses ou um limiar simples"""
+        return limiar if isinstance(limiar, cls) else cls(float(limiar))
+
+    @property
+    def limiar_minimo(self):
+        finitos = self.limiares[np.isfinite(self.limiares)]
+        return float(finitos.min()) if len(finitos) else float(self.limiar_padrao)
+
+    def com_limiar_maximo(self, limiar):
+        """Cópia com todos os limiares limitados a 'limiar' (classes bloqueadas continuam bloqueadas)"""
+        copia = object.__new__(FiltroClasses)
+        copia.__dict__.update(self.__dict__)
+        copia.limiares = np.where(np.isfinite(self.limiares), np.minimum(self.limiares, limiar), np.inf).astype(np.float32)
+        copia._limiar_fora = np.float32(min(self._limiar_fora, limiar))
+        return copia
+
+    def limiar_de(self, classes):
+        """Limiar de cada candidato pelo índice da classe"""
+        classes = np.asarray(classes, dtype=np.int64)
+        dentro = classes < len(self.limiares)
+        return np.where(dentro, self.limiares[np.minimum(classes, len(self.limiares) - 1)], self._limiar_fora)
+
+    def selecionar(self, scores):
+        """
+        Melhor classe permitida de cada linha de scores (N x C)
+
+        Returns:
+            tuple: (classes, confiancas, mascara dos candidatos acima do limiar da classe)
+        """
+        if self.indices is not None:
+            indices = self.indices[self.indices < scores.shape[1]]
+            parcial = scores[:, indices]
+            melhor = parcial.argmax(axis=1) if len(indices) else np.zeros(len(scores), np.int64)
+            confiancas = parcial[np.arange(len(melhor)), melhor] if len(indices) else np.zeros(len(scores), np.float32)
+            classes = indices[melhor] if len(indices) else melhor
+        else:
+            classes = scores.argmax(axis=1)
+            confiancas = scores[np.arange(len(classes)), classes]
+        return classes, confiancas, confiancas > self.limiar_de(classes)
+
+    def filtrar(self, caixas, confiancas, classes):
+        """Aplica limiares por classe a detecções já decodificadas"""
+        manter = confiancas >= self.limiar_de(classes)
+        return caixas[manter], confiancas[manter], classes[manter]
+
+
+def decodificar_yolov4(saida, tamanho, limiar):
+    """
+    Decodifica saídas Darknet (linhas [cx, cy, w, h normalizados, obj, classes...])
+
+    Args:
+        limiar (float | FiltroClasses): Limiar único ou filtro de classes
+
+    Returns:
+        tuple: (caixas xyxy na entrada, confiancas, classes)
+    """
+    classes, confiancas, mascara = FiltroClasses.como_filtro(limiar).selecionar(saida[:, 5:])
+    cx, cy, w, h = (saida[mascara, :4] * tamanho).T
+    caixas = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+    return caixas, confiancas[mascara], classes[mascara]
+
+
+def decodificar_yolov8(saida, limiar):
+    """
+    Decodifica a saída YOLOv8 exportada (84 x A: cx, cy, w, h em pixels + 80 classes)
+
+    Args:
+        limiar (float | FiltroClasses): Limiar único ou filtro de classes
+
+    Returns:
+        tuple: (caixas xyxy na entrada, confiancas, classes)
+    """
+    saida = saida.T
+    classes, confiancas, mascara = FiltroClasses.como_filtro(limiar).selecionar(saida[:, 4:])
+    cx, cy, w, h = saida[mascara, :4].T
+    caixas = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+    return caixas, confiancas[mascara], classes[mascara]
+
+
+def pos_processar(candidatos, parametros, limiar_nms):
+    """
+    Etapa comum a todos os backends: volta ao espaço da imagem e aplica NMS
+
+    Args:
+        candidatos (list): Por imagem, (caixas xyxy na entrada, confiancas, classes),
+            já filtrados pelo limiar de confiança na decodificação
+        parametros (list): Por imagem, (escala, pad_x, pad_y) do letterbox
+
+    Returns:
+        list: Por imagem, (caixas xywh int32, confiancas float32, classes int32)
+    """
+    resultados = []
+    for (caixas, confiancas, classes), (escala, pad_x, pad_y) in zip(candidatos, parametros):
+        if not len(caixas):
+            resultados.append((np.empty((0, 4), np.int32), np.empty(0, np.float32), np.empty(0, np.int32)))
+            continue
+
+        caixas = desfazer_letterbox(np.asarray(caixas, dtype=np.float32).copy(), escala, pad_x, pad_y)
+        xywh = np.column_stack([caixas[:, :2], caixas[:, 2:] - caixas[:, :2]])
+        indices = cv2.dnn.NMSBoxes(xywh.tolist(), np.asarray(confiancas, dtype=float).tolist(),
+                                   0.0, limiar_nms)
+        indices = np.array(indices, dtype=np.int64).flatten()
+        resultados.append((
+            xywh[indices].astype(np.int32),
+            np.asarray(confiancas, dtype=np.float32)[indices],
+            np.asarray(classes, dtype=np.int32)[indices]
+        ))
+    return resultados
+
+
+def nms_entre_tiles(caixas, confiancas, classes, limiar_nms, limiar_contencao=0.8):
+    """
+    NMS por classe sobre detecções de vários tiles já no espaço do quadro
+
+    Depois do NMS por IoU, descarta também caixas quase contidas em outra
+    mais confiável da mesma classe (fragmentos de objetos cortados na borda
+    de um tile, que têm IoU baixo com a caixa inteira).
+
+    Args:
+        caixas (ndarray): N x 4 em xywh
+        limiar_contencao (float): Fração da área da caixa menor coberta pela maior
+
+    Returns:
+        tuple: (caixas xywh int32, confiancas float32, classes int32)
+    """
+    if not len(caixas):
+        return caixas.astype(np.int32), confiancas.astype(np.float32), classes.astype(np.int32)
+
+    indices = cv2.dnn.NMSBoxesBatched(caixas.tolist(), confiancas.astype(float).tolist(),
+                                      classes.astype(int).tolist(), 0.0, limiar_nms)
+    indices = np.array(indices, dtype=np.int64).flatten()
+    indices = indices[np.argsort(-confiancas[indices], kind='stable')]
+    caixas, confiancas, classes = caixas[indices], confiancas[indices], classes[indices]
+
+    # Contenção: interseção / área da caixa menor, só contra caixas mais confiáveis
+    x1, y1 = caixas[:, 0], caixas[:, 1]
+    x2, y2 = x1 + caixas[:, 2], y1 + caixas[:, 3]
+    largura = np.clip(np.minimum(x2[:, None], x2[None, :]) - np.maximum(x1[:, None], x1[None, :]), 0, None)
+    altura = np.clip(np.minimum(y2[:, None], y2[None, :]) - np.maximum(y1[:, None], y1[None, :]), 0, None)
+    area = np.maximum(caixas[:, 2] * caixas[:, 3], 1)
+    contencao = (largura * altura) / area[:, None]
+    contida = np.triu(contencao.T >= limiar_contencao, k=1) & (classes[:, None] == classes[None, :])
+    manter = ~contida.any(axis=0)
+    return caixas[manter].astype(np.int32), confiancas[manter].astype(np.float32), classes[manter].astype(np.int32)
+
+
+class BackendInferencia:
+    """Interface comum: recebe o lote já em letterbox e devolve candidatos por imagem"""
+    nome = 'base'
+    yolo_version = 0
+    suporta_lote = False
+    tamanho_fixo = None
+    nomes_classes = None
+    precisao = 'fp32'
+
+    def inferir(self, canvas, blob, limiar_confianca):
+        """
+        Args:
+            canvas (ndarray): N x S x S x 3 (BGR, uint8) após letterbox
+            blob (ndarray): N x 3 x S x S (RGB, 0..1, float32)
+            limiar_confianca (float | FiltroClasses): Descarta candidatos abaixo do limiar
+                (da classe) e de classes fora da lista de permitidas
+
+        Returns:
+            list: Por imagem, (caixas xyxy na entrada, confiancas, classes) antes do NMS
+        """
+        raise NotImplementedError
+
+    def fechar(self):
+        pass
+
+
+class BackendOpenCVDNN(BackendInferencia):
+    nome = 'opencv'
+
+    def __init__(self, modelo, config=None, num_threads=0):
+        """
+        Rede carregada com cv2.dnn (Darknet .weights/.cfg ou YOLOv8 .onnx)
+
+        Args:
+            modelo (str): Arquivo de pesos (.weights) ou modelo .onnx
+            config (str): Arquivo .cfg do Darknet (não usado para .onnx)
+            num_threads (int): Threads do OpenCV (0 = padrão da biblioteca)
+        """
+        if num_threads:
+            cv2.setNumThreads(int(num_threads))
+        if modelo.endswith('.onnx'):
+            self.net = cv2.dnn.readNetFromONNX(modelo)
+            self.yolo_version = 8
+        else:
+            self.net = cv2.dnn.readNet(modelo, config)
+            self.yolo_version = 4
+        # Nomes direto do OpenCV: getUnconnectedOutLayers muda de formato entre
+        # versões (N x 1 / N) e não bate com os nomes de saída de redes ONNX
+        self.output_layers = list(self.net.getUnconnectedOutLayersNames())
+
+    def inferir(self, canvas, blob, limiar_confianca):
+        tamanho = blob.shape[-1]
+        candidatos = []
+        for i in range(len(blob)):
+            self.net.setInput(blob[i:i + 1])
+            outputs = self.net.forward(self.output_layers)
+            if self.yolo_version == 8:
+                candidatos.append(decodificar_yolov8(outputs[0][0], limiar_confianca))
+            else:
+                saidas = np.vstack([o.reshape(-1, o.shape[-1]) for o in outputs])
+                candidatos.append(decodificar_yolov4(saidas, tamanho, limiar_confianca))
+        return candidatos
+
+
+class BackendONNXRuntime(BackendInferencia):
+    nome = 'onnxruntime'
+    yolo_version = 8
+
+    def __init__(self, modelo, num_threads=0, otimizacao_grafo='completo', precisao='fp32'):
+        """
+        Modelo YOLOv8 exportado em ONNX rodando no CPUExecutionProvider
+
+        Args:
+            modelo (str): Caminho do .onnx
+            num_threads (int): Threads intra-operador (0 = padrão do ONNX Runtime)
+            otimizacao_grafo (str): 'desativado', 'basico', 'estendido' ou 'completo'
+            precisao (str): 'fp32' ou 'int8' (modelo QDQ gerado por quantizar_modelo.py);
+                a entrada e a saída continuam float, só os pesos/ativações internos mudam
+        """
+        import onnxruntime as ort
+
+        if otimizacao_grafo not in NIVEIS_OTIMIZACAO:
+            raise ValueError(f"Nível de otimização inválido: {otimizacao_grafo!r} (use {', '.join(NIVEIS_OTIMIZACAO)})")
+        niveis = {
+            'desativado': ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+            'basico': ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+            'estendido': ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+            'completo': ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+        }
+
+        opcoes = ort.SessionOptions()
+        opcoes.graph_optimization_level = niveis[otimizacao_grafo]
+        if num_threads:
+            opcoes.intra_op_num_threads = int(num_threads)
+            opcoes.inter_op_num_threads = 1
+
+        self.sessao = ort.InferenceSession(modelo, sess_options=opcoes, providers=['CPUExecutionProvider'])
+        entrada = self.sessao.get_inputs()[0]
+        self.nome_entrada = entrada.name
+        # Dimensões simbólicas (str/None) indicam lote ou tamanho dinâmicos
+        self.suporta_lote = not isinstance(entrada.shape[0], int)
+        self.tamanho_fixo = entrada.shape[2] if isinstance(entrada.shape[2], int) else None
+        self.net = self.sessao
+        self.precisao = precisao
+
+    def inferir(self, canvas, blob, limiar_confianca):
+        if self.suporta_lote:
+            saidas = self.sessao.run(None, {self.nome_entrada: blob})[0]
+        else:
+            saidas = np.concatenate([
+                self.sessao.run(None, {self.nome_entrada: blob[i:i + 1]})[0] for i in range(len(blob))
+            ])
+        return [decodificar_yolov8(saida, limiar_confianca) for saida in saidas]
+
+
+class BackendUltralytics(BackendInferencia):
+    nome = 'ultralytics'
+    yolo_version = 8
+    suporta_lote = True
+
+    def __init__(self, modelo):
+        """Modelo .pt carregado pelo pacote ultralytics"""
+        from ultralytics import YOLO
+        self.net = YOLO(modelo)
+        nomes = self.net.names
+        self.nomes_classes = [nomes[i] for i in sorted(nomes)] if isinstance(nomes, dict) else list(nomes)
+
+    def inferir(self, canvas, blob, limiar_confianca):
+        filtro = FiltroClasses.como_filtro(limiar_confianca)
+        classes = filtro.indices.tolist() if filtro.indices is not None else None
+        # O canvas já está no tamanho de entrada, então o letterbox interno não altera nada
+        resultados = self.net(list(canvas), imgsz=canvas.shape[1], conf=filtro.limiar_minimo,
+                              classes=classes, verbose=False)
+        candidatos = []
+        for resultado in resultados:
+            boxes = resultado.boxes
+            candidatos.append(filtro.filtrar(
+                boxes.xyxy.cpu().numpy(),
+                boxes.conf.cpu().numpy(),
+                boxes.cls.cpu().numpy().astype(np.int32)
+            ))
+        return candidatos
+
+
+def _ort_disponivel():
+    try:
+        import onnxruntime  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def criar_backend(config):
+    """
+    Cria o backend configurado em config['backend']
+
+    'auto' tenta, nesta ordem: ONNX Runtime (modelo .onnx), Ultralytics
+    (modelo .pt) e OpenCV DNN (Darknet YOLOv4/v3 ou o mesmo .onnx).
+    Com config['precisao'] == 'int8', o modelo quantizado vem antes de todos.
+    Retorna None se nenhum modelo puder ser carregado.
+    """
+    escolha = config.get('backend', 'auto')
+    num_threads = config.get('num_threads', 0)
+    modelo_onnx = config.get('modelo_onnx', 'yolov8n.onnx')
+    modelo_pt = config.get('modelo_pt', 'yolov8n.pt')
+    precisao = config.get('precisao', 'fp32')
+    if precisao not in PRECISOES:
+        raise ValueError(f"Precisão inválida: {precisao!r} (use {', '.join(PRECISOES)})")
+
+    tentativas = []
+    if precisao == 'int8':
+        # O modelo INT8 só roda no ONNX Runtime; sem ele, cai para o modelo float
+        modelo_int8 = config.get('modelo_int8', 'yolov8n_int8.onnx')
+        if escolha not in ('auto', 'onnxruntime'):
+            print(f"⚠️ Precisão int8 requer o backend onnxruntime, usando {escolha} em fp32")
+        elif not os.path.exists(modelo_int8):
+            print(f"⚠️ Modelo INT8 {modelo_int8} não encontrado (gere com quantizar_modelo.py), usando fp32")
+        else:
+            tentativas.append(('INT8 (ONNX Runtime)', lambda: BackendONNXRuntime(
+                modelo_int8, num_threads, config.get('otimizacao_grafo', 'completo'), 'int8')))
+    if escolha in ('auto', 'onnxruntime') and os.path.exists(modelo_onnx):
+        tentativas.append(('ONNX Runtime', lambda: BackendONNXRuntime(
+            modelo_onnx, num_threads, config.get('otimizacao_grafo', 'completo'))))
+    if escolha in ('auto', 'ultralytics') and os.path.exists(modelo_pt):
+        tentativas.append(('YOLOv8 (ultralytics)', lambda: BackendUltralytics(modelo_pt)))
+    if escolha in ('auto', 'opencv'):
+        for pesos, cfg in (('yolov4.weights', 'yolov4.cfg'), ('yolov3.weights', 'yolov3.cfg')):
+            if os.path.exists(pesos):
+                tentativas.append(('YOLO (OpenCV DNN)', lambda p=pesos, c=cfg: BackendOpenCVDNN(p, c, num_threads)))
+                break
+        if os.path.exists(modelo_onnx) and (escolha == 'opencv' or not _ort_disponivel()):
+            tentativas.append(('YOLOv8 ONNX (OpenCV DNN)', lambda: BackendOpenCVDNN(modelo_onnx, None, num_threads)))
+
+    for descricao, fabrica in tentativas:
+        try:
+            backend = fabrica()
+            print(f"✅ Modelo {descricao} carregado com sucesso")
+            return backend
+        except ImportError as e:
+            print(f"⚠️ {descricao} indisponível ({e}), tentando próximo backend...")
+        except Exception as e:
+            print(f"⚠️ Erro ao carregar {descricao}: {e}, tentando próximo backend...")
+    return None
+
+
+def criar_backend_modelo(modelo, config):
+    """
+    Backend para um arquivo de modelo específico (ex.: modelo secundário da cascata)
+
+    .pt usa Ultralytics; .onnx usa ONNX Runtime, ou OpenCV DNN se ele não
+    estiver instalado. Retorna None se o arquivo não existir ou não carregar.
+    """
+    if not modelo or not os.path.exists(modelo):
+        print(f"⚠️ Modelo {modelo} não encontrado")
+        return None
+    num_threads = config.get('num_threads', 0)
+    try:
+        if modelo.endswith('.pt'):
+            backend = BackendUltralytics(modelo)
+        elif _ort_disponivel():
+            backend = BackendONNXRuntime(modelo, num_threads, config.get('otimizacao_grafo', 'completo'))
+        else:
+            backend = BackendOpenCVDNN(modelo, None, num_threads)
+    except Exception as e:
+        print(f"⚠️ Erro ao carregar {modelo}: {e}")
+        return None
+    print(f"✅ Modelo {os.path.basename(modelo)} ({backend.nome}) carregado com sucesso")
+    return backend
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Barramento de Quadros em Memória Compartilhada
+Cada quadro é capturado uma vez e publicado num anel de slots; detector,
+gravador, GUI e prévias leem sem cópia, no mesmo processo ou em outros.
+Cada assinante tem o seu cursor; quem fica para trás perde quadros, e o
+publicador nunca espera por ninguém.
+
+Protocolo por slot: versão par = estável, ímpar = sendo escrito (seqlock).
+Cada assinante marca na sua linha da tabela de pinos os slots que está
+lendo e o publicador não escreve em slot pinado. As linhas são reservadas
+sob uma trava de arquivo entre processos; depois disso cada posição da
+tabela só é escrita pelo dono, então a contagem de referências (soma da
+coluna) não precisa de operações atômicas.
+"""
+
+import os
+import tempfile
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from pool_detectores import _abrir_memoria
+
+_MAGICO = 0x51554144  # 'QUAD'
+_TIPOS = ('|u1', '<u2', '<i2', '<f4', '<f8')
+
+# Posições do cabeçalho
+_SLOTS, _TAMANHO_SLOT, _MAX_ASSINANTES, _ULTIMO_SEQ, _PUBLICADOS, _DESCARTADOS = range(1, 7)
+
+
+def _layout(slots, tamanho_slot, max_assinantes):
+    """Regiões do segmento: lista de (nome, tipo, formato, deslocamento) e tamanho total"""
+    regioes = (
+        ('cabecalho', np.int64, (8,)),
+        ('versoes', np.uint64, (slots,)),
+        ('seqs', np.int64, (slots,)),
+        ('formatos', np.int32, (slots, 3)),
+        ('ndims', np.int32, (slots,)),
+        ('tipos', np.int32, (slots,)),
+        ('instantes', np.float64, (slots,)),
+        ('pids', np.int64, (max_assinantes,)),
+        ('cursores', np.int64, (max_assinantes,)),
+        ('perdidos', np.int64, (max_assinantes,)),
+        ('pinos', np.uint8, (max_assinantes, slots)),
+        ('dados', np.uint8, (slots, tamanho_slot)),
+    )
+    layout, deslocamento = [], 0
+    for nome, tipo, formato in regioes:
+        layout.append((nome, tipo, formato, deslocamento))
+        # Cada região alinhada a 64 bytes (linha de cache)
+        deslocamento += -(-np.dtype(tipo).itemsize * int(np.prod(formato)) // 64) * 64
+    return layout, deslocamento
+
+
+def _mapear(buffer, slots, tamanho_slot, max_assinantes):
+    layout, _ = _layout(slots, tamanho_slot, max_assinantes)
+    return {nome: np.ndarray(formato, dtype=tipo, buffer=buffer, offset=deslocamento)
+            for nome, tipo, formato, deslocamento in layout}
+
+
+def _caminho_trava(nome):
+    return os.path.join(tempfile.gettempdir(), f"barramento_{nome.lstrip('/')}.trava")
+
+
+def _travar(arquivo, bloquear=True):
+    """Trava exclusiva entre processos (e entre aberturas no mesmo processo); False se ocupada e bloquear=False"""
+    try:
+        if fcntl is not None:
+            fcntl.flock(arquivo, fcntl.LOCK_EX | (0 if bloquear else fcntl.LOCK_NB))
+        else:
+            arquivo.seek(0)
+            msvcrt.locking(arquivo.fileno(), msvcrt.LK_LOCK if bloquear else msvcrt.LK_NBLCK, 1)
+    except OSError:
+        if bloquear:
+            raise
+        return False
+    return True
+
+
+def _destravar(arquivo):
+    if fcntl is not None:
+        fcntl.flock(arquivo, fcntl.LOCK_UN)
+    else:
+        arquivo.seek(0)
+        msvcrt.locking(arquivo.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _processo_vivo(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class BarramentoQuadros:
+    def __init__(self, nome=None, slots=8, tamanho_slot=1920 * 1080 * 3, max_assinantes=8):
+        """
+        Lado do publicador: cria o segmento compartilhado
+
+        Args:
+            nome (str): Nome do segmento, para assinantes de outros processos (None = gerado)
+            slots (int): Quadros no anel; cada quadro em leitura fica preso até ser
+                liberado, então use mais slots que assinantes
+            tamanho_slot (int): Bytes por quadro (padrão: 1080p BGR)
+            max_assinantes (int): Assinantes simultâneos
+        """
+        _, tamanho = _layout(slots, tamanho_slot, max_assinantes)
+        self.memoria = shared_memory.SharedMemory(name=nome, create=True, size=tamanho)
+        self._mapa = _mapear(self.memoria.buf, slots, tamanho_slot, max_assinantes)
+        self._mapa['cabecalho'][:] = [_MAGICO, slots, tamanho_slot, max_assinantes, -1, 0, 0, 0]
+        self._mapa['seqs'][:] = -1
+        self.slots = slots
+        self.tamanho_slot = tamanho_slot
+        self.max_assinantes = max_assinantes
+        self._proximo_seq = 0
+        self._fechado = False
+        self._trava = open(_caminho_trava(self.nome), 'a+b')
+
+    @property
+    def nome(self):
+        return self.memoria.name
+
+    def _escolher_slot(self):
+        """Slot livre (sem pinos) com o quadro mais antigo; None se todos estiverem em leitura"""
+        m = self._mapa
+        livres = ~m['pinos'].any(axis=0)
+        if not livres.any():
+            # Pinos de assinantes que morreram sem liberar; a linha só é liberada sob a
+            # trava das reservas, e sem esperar por ela (o publicador nunca bloqueia)
+            if _travar(self._trava, bloquear=False):
+                try:
+                    for i, pid in enumerate(m['pids']):
+                        if pid and not _processo_vivo(int(pid)):
+                            m['pinos'][i] = 0
+                            m['pids'][i] = 0
+                finally:
+                    _destravar(self._trava)
+            livres = ~m['pinos'].any(axis=0)
+            if not livres.any():
+                return None
+        candidatos = np.flatnonzero(livres)
+        return int(candidatos[np.argmin(m['seqs'][candidatos])])
+
+    def publicar(self, imagem):
+        """
+        Copia o quadro para um slot do anel; nunca bloqueia
+
+        Returns:
+            int: Número de sequência do quadro, ou None se todos os slots estavam
+                em leitura e o quadro foi descartado
+        """
+        imagem = np.asarray(imagem)
+        if imagem.nbytes > self.tamanho_slot or imagem.ndim > 3:
+            raise ValueError(f"Quadro {imagem.shape} não cabe num slot de {self.tamanho_slot} bytes")
+        m = self._mapa
+
+        slot = self._escolher_slot()
+        while slot is not None:
+            m['versoes'][slot] += 1  # ímpar: escrevendo
+            if not m['pinos'][:, slot].any():
+                break
+            # Um assinante pinou o slot entre a escolha e a marcação: ele vai ver a versão ímpar e desistir
+            m['versoes'][slot] -= 1
+            slot = self._escolher_slot()
+        if slot is None:
+            m['cabecalho'][_DESCARTADOS] += 1
+            return None
+
+        destino = m['dados'][slot, :imagem.nbytes].view(imagem.dtype).reshape(imagem.shape)
+        np.copyto(destino, imagem)
+        seq = self._proximo_seq
+        m['seqs'][slot] = seq
+        m['formatos'][slot] = list(imagem.shape) + [1] * (3 - imagem.ndim)
+        m['ndims'][slot] = imagem.ndim
+        m['tipos'][slot] = _TIPOS.index(imagem.dtype.str)
+        m['instantes'][slot] = time.time()
+        m['versoes'][slot] += 1  # par: estável
+        m['cabecalho'][_ULTIMO_SEQ] = seq
+        m['cabecalho'][_PUBLICADOS] += 1
+        self._proximo_seq += 1
+        return seq
+
+    def assinar(self, mais_recente=False):
+        """Assinante no mesmo processo (lê o mesmo segmento, sem reabrir)"""
+        return Assinante(self, mais_recente)
+
+    def obter_estatisticas(self):
+        m = self._mapa
+        ultimo = int(m['cabecalho'][_ULTIMO_SEQ])
+        ativos = np.flatnonzero(m['pids'])
+        return {
+            'nome': self.nome,
+            'slots': self.slots,
+            'publicados': int(m['cabecalho'][_PUBLICADOS]),
+            'descartados': int(m['cabecalho'][_DESCARTADOS]),
+            'slots_em_leitura': int(m['pinos'].any(axis=0).sum()),
+            'assinantes': [{'indice': int(i), 'pid': int(m['pids'][i]), 'atraso': ultimo - int(m['cursores'][i]),
+                            'perdidos': int(m['perdidos'][i])} for i in ativos]
+        }
+
+    def fechar(self):
+        """Libera e apaga o segmento (assinantes de outros processos devem fechar antes)"""
+        if self._fechado:
+            return
+        self._fechado = True
+        self._mapa = None
+        self.memoria.close()
+        self.memoria.unlink()
+        self._trava.close()
+        try:
+            os.unlink(_caminho_trava(self.nome))
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.fechar()
+
+
+class QuadroCompartilhado:
+    """Quadro lido do barramento: imagem é uma visão somente leitura do slot, válida até liberar()"""
+
+    __slots__ = ('imagem', 'seq', 'instante', '_assinante', '_slot', '_versao')
+
+    def __init__(self, assinante, slot, versao, imagem, seq, instante):
+        self._assinante = assinante
+        self._slot = slot
+        self._versao = versao
+        self.imagem = imagem
+        self.seq = seq
+        self.instante = instante
+
+    def valido(self):
+        """True enquanto o slot não foi reescrito (só acontece com o pino já liberado)"""
+        return self._assinante is not None and self._assinante._mapa['versoes'][self._slot] == self._versao
+
+    def liberar(self):
+        if self._assinante is not None:
+            self._assinante._soltar(self._slot)
+            self._assinante = None
+            self.imagem = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.liberar()
+
+
+class Assinante:
+    def __init__(self, barramento, mais_recente=False):
+        """
+        Args:
+            barramento: BarramentoQuadros (mesmo processo) ou o nome do segmento (outro processo)
+            mais_recente (bool): True = sempre o quadro mais novo (prévia/GUI);
+                False = todos os quadros em ordem, pulando só os já sobrescritos (gravador)
+        """
+        self.mais_recente = mais_recente
+        if isinstance(barramento, BarramentoQuadros):
+            self._memoria = None
+            buffer = barramento.memoria.buf
+            nome = barramento.nome
+        else:
+            self._memoria = _abrir_memoria(barramento)
+            buffer = self._memoria.buf
+            nome = self._memoria.name
+        cabecalho = np.ndarray((8,), dtype=np.int64, buffer=buffer)
+        if cabecalho[0] != _MAGICO:
+            raise ValueError(f"{barramento!r} não é um barramento de quadros")
+        self.slots, tamanho_slot, max_assinantes = (int(v) for v in cabecalho[[_SLOTS, _TAMANHO_SLOT, _MAX_ASSINANTES]])
+        self._mapa = _mapear(buffer, self.slots, tamanho_slot, max_assinantes)
+
+        # Reserva uma linha na tabela de assinantes (o pid identifica o dono); a trava
+        # impede que dois assinantes iniciando ao mesmo tempo peguem a mesma linha
+        self.indice = None
+        with open(_caminho_trava(nome), 'a+b') as trava:
+            _travar(trava)
+            try:
+                livres = np.flatnonzero(self._mapa['pids'] == 0)
+                if len(livres):
+                    self.indice = int(livres[0])
+                    self._mapa['pids'][self.indice] = os.getpid()
+            finally:
+                _destravar(trava)
+        if self.indice is None:
+            self.fechar()
+            raise RuntimeError(f"Barramento sem vagas para assinantes ({max_assinantes})")
+        self._mapa['pinos'][self.indice] = 0
+        self._mapa['perdidos'][self.indice] = 0
+        # Começa pelo próximo quadro publicado
+        self._cursor = int(self._mapa['cabecalho'][_ULTIMO_SEQ])
+        self._mapa['cursores'][self.indice] = self._cursor
+
+    def _soltar(self, slot):
+        if self._mapa is not None:
+            self._mapa['pinos'][self.indice, slot] = 0
+
+    def _tentar_ler(self):
+        """Pina e valida o próximo quadro após o cursor; None se não houver quadro novo"""
+        m = self._mapa
+        ultimo = int(m['cabecalho'][_ULTIMO_SEQ])
+        if ultimo <= self._cursor:
+            return None
+        seqs = m['seqs']
+        if self.mais_recente:
+            alvo = ultimo
+        else:
+            # O seguinte ao cursor ou, se já foi sobrescrito, o mais antigo ainda no anel
+            disponiveis = seqs[seqs > self._cursor]
+            if not len(disponiveis):
+                return None
+            alvo = int(disponiveis.min())
+        slots = np.flatnonzero(seqs == alvo)
+        if not len(slots):
+            return None
+        slot = int(slots[0])
+
+        m['pinos'][self.indice, slot] = 1
+        versao = m['versoes'][slot]
+        if versao % 2 or m['seqs'][slot] != alvo:
+            m['pinos'][self.indice, slot] = 0  # reescrito entre a busca e o pino
+            return None
+
+        formato = tuple(int(v) for v in m['formatos'][slot][:m['ndims'][slot]])
+        tipo = np.dtype(_TIPOS[m['tipos'][slot]])
+        imagem = m['dados'][slot, :int(np.prod(formato)) * tipo.itemsize].view(tipo).reshape(formato)
+        imagem.flags.writeable = False
+
+        m['perdidos'][self.indice] += alvo - self._cursor - 1
+        self._cursor = alvo
+        m['cursores'][self.indice] = alvo
+        return QuadroCompartilhado(self, slot, versao, imagem, alvo, float(m['instantes'][slot]))
+
+    def proximo(self, timeout=None):
+        """
+        Próximo quadro (ver mais_recente), sem cópia; use com 'with' ou chame liberar()
+
+        Returns:
+            QuadroCompartilhado ou None se o tempo acabou
+        """
+        limite = None if timeout is None else time.monotonic() + timeout
+        espera = 0.0005
+        while True:
+            quadro = self._tentar_ler()
+            if quadro is not None:
+                return quadro
+            if limite is not None and time.monotonic() >= limite:
+                return None
+            time.sleep(espera)
+            espera = min(espera * 2, 0.005)
+
+    @property
+    def perdidos(self):
+        return int(self._mapa['perdidos'][self.indice])
+
+    def fechar(self):
+        if self._mapa is None:
+            return
+        if self.indice is not None:
+            self._mapa['pinos'][self.indice] = 0
+            self._mapa['pids'][self.indice] = 0
+        self._mapa = None
+        if self._memoria is not None:
+            self._memoria.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.fechar()
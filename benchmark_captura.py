@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark dos Backends de Captura
+Mede latência de captura, custo de conversão para BGR, alocações por frame
+e FPS sustentado de cada backend disponível no host; gera relatório JSON
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+from fontes_frames import FonteReplay, FonteDroidCamMJPEG
+
+TITULO_DROIDCAM = 'DroidCam Client'
+
+# Backends que não leem a tela X (dispensam DISPLAY/Xvfb)
+BACKENDS_SEM_TELA = ('printwindow', 'replay', 'droidcam_mjpeg')
+
+
+def _para_bgr_pil(imagem):
+    """Conversão usada pelos caminhos PIL/pyautogui (PIL RGB -> ndarray BGR)"""
+    return cv2.cvtColor(np.array(imagem), cv2.COLOR_RGB2BGR)
+
+
+def _decodificar_jpeg(dados):
+    return cv2.imdecode(np.frombuffer(dados, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+
+def _bbox_droidcam(regiao_padrao):
+    """Região (x, y, w, h) da janela DroidCam, ou a região padrão se não houver janela"""
+    try:
+        import pyautogui
+        janelas = pyautogui.getWindowsWithTitle(TITULO_DROIDCAM)
+        if janelas:
+            j = janelas[0]
+            return (j.left, j.top, j.width, j.height), 'janela_droidcam'
+    except Exception:
+        pass
+    return regiao_padrao, 'regiao_fixa'
+
+
+# Cada fábrica retorna (capturar, converter, descricao, finalizar) ou lança exceção com o motivo
+def _backend_printwindow(args):
+    if not sys.platform.startswith('win'):
+        raise RuntimeError("PrintWindow só existe no Windows")
+    from captura_continua import CapturaContinua, HAS_WIN32
+    if not HAS_WIN32:
+        raise RuntimeError("pywin32 não instalado")
+    if CapturaContinua._printwindow_pil(TITULO_DROIDCAM) is None:
+        raise RuntimeError(f"janela '{TITULO_DROIDCAM}' não encontrada")
+    return (lambda: CapturaContinua._printwindow_pil(TITULO_DROIDCAM), _para_bgr_pil,
+            'Win32 PrintWindow da janela DroidCam', None)
+
+
+def _backend_imagegrab_bbox(args):
+    from PIL import ImageGrab
+    (x, y, w, h), origem = _bbox_droidcam(args.regiao)
+    bbox = (x, y, x + w, y + h)
+    ImageGrab.grab(bbox=bbox)
+    return (lambda: ImageGrab.grab(bbox=bbox), _para_bgr_pil,
+            f'PIL ImageGrab.grab(bbox) [{origem} {w}x{h}]', None)
+
+
+def _backend_pyautogui_regiao(args):
+    import pyautogui
+    regiao, origem = _bbox_droidcam(args.regiao)
+    pyautogui.screenshot(region=regiao)
+    return (lambda: pyautogui.screenshot(region=regiao), _para_bgr_pil,
+            f'pyautogui.screenshot(region) [{origem} {regiao[2]}x{regiao[3]}]', None)
+
+
+def _backend_tela_cheia(args):
+    from PIL import ImageGrab
+    ImageGrab.grab()
+    return ImageGrab.grab, _para_bgr_pil, 'PIL ImageGrab.grab() tela inteira', None
+
+
+def _backend_x11_shm(args):
+    from captura_x11 import CapturaX11
+    captura = CapturaX11()
+    if captura.capturar_bgrx() is None:
+        captura.fechar()
+        raise RuntimeError("XShmGetImage falhou")
+    descricao = f"XShm tela inteira {captura.largura_tela}x{captura.altura_tela} (shm={captura.usa_shm})"
+    return captura.capturar_bgrx, captura.para_bgr, descricao, captura.fechar
+
+
+def _backend_x11_shm_regiao(args):
+    from captura_x11 import CapturaX11
+    captura = CapturaX11()
+    janela = captura.localizar_janela(TITULO_DROIDCAM)
+    regiao = captura.regiao_janela(janela) if janela else None
+    origem = 'janela_droidcam' if regiao else 'regiao_fixa'
+    regiao = regiao or args.regiao
+    if captura.capturar_bgrx(regiao) is None:
+        captura.fechar()
+        raise RuntimeError("região fora da tela")
+    return (lambda: captura.capturar_bgrx(regiao), captura.para_bgr,
+            f"XShm região [{origem} {regiao[2]}x{regiao[3]}]", captura.fechar)
+
+
+def _backend_replay(args):
+    fonte = FonteReplay(args.replay, repetir=True)
+    if not len(fonte):
+        raise RuntimeError("nenhuma captura gravada para replay")
+    return fonte.ler_jpeg, _decodificar_jpeg, f'Replay de {len(fonte)} capturas gravadas', None
+
+
+def _backend_droidcam_mjpeg(args):
+    if not args.url:
+        raise RuntimeError("informe --url do stream DroidCam")
+    fonte = FonteDroidCamMJPEG(args.url).iniciar()
+    if fonte.ler_jpeg(timeout=5.0) is None:
+        fonte.parar()
+        raise RuntimeError("stream sem frames")
+
+    def capturar():
+        # Só frames ainda não lidos: o FPS medido é o do stream, não o do JPEG em cache
+        jpeg = fonte.ler_jpeg(timeout=5.0, apenas_novo=True)
+        if jpeg is None:
+            raise RuntimeError("stream parou de enviar frames")
+        return jpeg
+
+    return capturar, _decodificar_jpeg, f'Stream MJPEG {args.url}', fonte.parar
+
+
+BACKENDS = {
+    'printwindow': _backend_printwindow,
+    'imagegrab_bbox': _backend_imagegrab_bbox,
+    'pyautogui_regiao': _backend_pyautogui_regiao,
+    'tela_cheia': _backend_tela_cheia,
+    'x11_shm': _backend_x11_shm,
+    'x11_shm_regiao': _backend_x11_shm_regiao,
+    'replay': _backend_replay,
+    'droidcam_mjpeg': _backend_droidcam_mjpeg,
+}
+
+
+def _resumo_tempos(amostras_s):
+    ms = np.asarray(amostras_s) * 1000.0
+    return {
+        'media_ms': round(float(ms.mean()), 3),
+        'p50_ms': round(float(np.percentile(ms, 50)), 3),
+        'p95_ms': round(float(np.percentile(ms, 95)), 3),
+        'max_ms': round(float(ms.max()), 3),
+    }
+
+
+def medir_backend(capturar, converter, iteracoes=100, duracao=3.0, aquecimento=5):
+    """Mede um backend: latências, alocações por frame e FPS sustentado"""
+    for _ in range(aquecimento):
+        converter(capturar())
+
+    # 1) Latência de captura e de conversão, separadas
+    tempos_captura, tempos_conversao = [], []
+    formato = None
+    for _ in range(iteracoes):
+        t0 = time.perf_counter()
+        bruto = capturar()
+        t1 = time.perf_counter()
+        bgr = converter(bruto)
+        t2 = time.perf_counter()
+        tempos_captura.append(t1 - t0)
+        tempos_conversao.append(t2 - t1)
+        formato = bgr.shape
+
+    # 2) Alocações por frame (memória rastreada pelo Python/NumPy)
+    amostras_alocacao = max(5, iteracoes // 10)
+    picos, blocos = [], []
+    tracemalloc.start()
+    try:
+        for _ in range(amostras_alocacao):
+            antes = tracemalloc.take_snapshot()
+            atual_antes, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            bgr = converter(capturar())
+            _, pico = tracemalloc.get_traced_memory()
+            depois = tracemalloc.take_snapshot()
+            picos.append(pico - atual_antes)
+            blocos.append(sum(max(0, s.count_diff) for s in depois.compare_to(antes, 'lineno')))
+            del bgr
+    finally:
+        tracemalloc.stop()
+
+    # 3) FPS sustentado (captura + conversão em laço fechado)
+    frames = 0
+    inicio = time.perf_counter()
+    while time.perf_counter() - inicio < duracao:
+        converter(capturar())
+        frames += 1
+    decorrido = time.perf_counter() - inicio
+
+    return {
+        'disponivel': True,
+        'resolucao': f"{formato[1]}x{formato[0]}" if formato else None,
+        'latencia_captura': _resumo_tempos(tempos_captura),
+        'conversao_bgr': _resumo_tempos(tempos_conversao),
+        'alocacoes_por_frame': {
+            'bytes_pico_medio': int(np.mean(picos)),
+            'blocos_novos_medio': round(float(np.mean(blocos)), 1),
+            'amostras': amostras_alocacao
+        },
+        'fps_sustentado': round(frames / decorrido, 2),
+        'frames_medidos': frames
+    }
+
+
+def iniciar_xvfb(display=':99', resolucao='1920x1080x24'):
+    """Inicia um Xvfb temporário e aponta DISPLAY para ele; retorna o processo ou None"""
+    if sys.platform.startswith('win') or not shutil.which('Xvfb'):
+        return None
+    processo = subprocess.Popen(['Xvfb', display, '-screen', '0', resolucao],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(1.0)
+    if processo.poll() is not None:
+        return None
+    os.environ['DISPLAY'] = display
+    return processo
+
+
+def parar_xvfb(processo):
+    """Encerra o Xvfb iniciado por iniciar_xvfb() e remove o DISPLAY apontado para ele"""
+    processo.terminate()
+    try:
+        processo.wait(timeout=5)
+    except subprocess.TimeoutExpired:
+        processo.kill()
+    os.environ.pop('DISPLAY', None)
+
+
+def informacoes_host():
+    return {
+        'hostname': socket.gethostname(),
+        'plataforma': platform.platform(),
+        'processador': platform.processor() or platform.machine(),
+        'cpus': os.cpu_count(),
+        'python': platform.python_version(),
+        'opencv': cv2.__version__,
+        'numpy': np.__version__,
+        'display': os.environ.get('DISPLAY'),
+    }
+
+
+def executar_benchmark(args):
+    relatorio = {
+        'timestamp': datetime.now().isoformat(),
+        'host': informacoes_host(),
+        'configuracao': {
+            'iteracoes': args.iteracoes,
+            'duracao_fps_segundos': args.duracao,
+            'regiao_padrao': list(args.regiao),
+            'backends_solicitados': args.backends
+        },
+        'observacao': ('alocacoes_por_frame cobre memória rastreada pelo tracemalloc '
+                       '(Python e NumPy); buffers nativos de PIL/Xlib não entram na conta'),
+        'backends': {}
+    }
+
+    for nome in args.backends:
+        print(f"⏱️ {nome}...", end=' ', flush=True)
+        finalizar = None
+        try:
+            capturar, converter, descricao, finalizar = BACKENDS[nome](args)
+        except Exception as e:
+            relatorio['backends'][nome] = {'disponivel': False, 'motivo': str(e)}
+            print(f"indisponível ({e})")
+            continue
+
+        try:
+            resultado = medir_backend(capturar, converter, args.iteracoes, args.duracao)
+            resultado['descricao'] = descricao
+            relatorio['backends'][nome] = resultado
+            print(f"{resultado['fps_sustentado']} FPS | captura p50 "
+                  f"{resultado['latencia_captura']['p50_ms']} ms | conversão p50 "
+                  f"{resultado['conversao_bgr']['p50_ms']} ms")
+        except Exception as e:
+            relatorio['backends'][nome] = {'disponivel': False, 'motivo': f"falha na medição: {e}"}
+            print(f"falhou ({e})")
+        finally:
+            if finalizar is not None:
+                finalizar()
+
+    return relatorio
+
+
+def _regiao(texto):
+    valores = [int(v) for v in texto.split(',')]
+    if len(valores) != 4:
+        raise argparse.ArgumentTypeError("use x,y,largura,altura")
+    return tuple(valores)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark dos backends de captura de tela")
+    parser.add_argument('--backends', nargs='+', choices=list(BACKENDS), default=list(BACKENDS),
+                        help="Backends a medir (padrão: todos; os indisponíveis são registrados)")
+    parser.add_argument('--iteracoes', type=int, default=100, help="Amostras de latência por backend")
+    parser.add_argument('--duracao', type=float, default=3.0, help="Segundos de medição do FPS sustentado")
+    parser.add_argument('--regiao', type=_regiao, default=(0, 0, 640, 480),
+                        help="Região x,y,w,h quando a janela DroidCam não existe")
+    parser.add_argument('--replay', nargs='+', default=None, help="Pastas/arquivos para o backend de replay")
+    parser.add_argument('--url', default=os.environ.get('DROIDCAM_URL'), help="URL do stream MJPEG do DroidCam")
+    parser.add_argument('--saida', default=None, help="Arquivo JSON de saída")
+    args = parser.parse_args(argv)
+
+    print("=== BENCHMARK DE CAPTURA ===")
+    xvfb = None
+    if not os.environ.get('DISPLAY') and set(args.backends) - set(BACKENDS_SEM_TELA):
+        xvfb = iniciar_xvfb()
+        if xvfb is not None:
+            print(f"🖥️ Sem DISPLAY: Xvfb temporário em {os.environ['DISPLAY']}")
+    try:
+        relatorio = executar_benchmark(args)
+        relatorio['host']['xvfb'] = xvfb is not None
+    finally:
+        if xvfb is not None:
+            parar_xvfb(xvfb)
+
+    caminho = args.saida
+    if caminho is None:
+        os.makedirs('relatorios', exist_ok=True)
+        caminho = os.path.join(
+            'relatorios',
+            f"benchmark_captura_{relatorio['host']['hostname']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        )
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(relatorio, f, indent=2, ensure_ascii=False)
+    print(f"📄 Relatório salvo: {caminho}")
+    return relatorio
+
+
+if __name__ == "__main__":
+    main()
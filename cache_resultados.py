@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache de Resultados por Assinatura de Quadro
+LRU indexado pelo hash perceptual (dHash) do quadro reduzido, para cenas
+que se repetem ao longo do dia (sala vazia, mesmo slide)
+"""
+
+import copy
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+# Pesos dos bits do dHash 8 x 8 (linha a linha, bit mais significativo primeiro)
+_PESOS_BITS = (1 << np.arange(63, -1, -1, dtype=np.uint64)).astype(np.uint64)
+
+
+def dhash(imagem):
+    """
+    Hash perceptual de 64 bits: compara pixels vizinhos do quadro reduzido a 9 x 8
+
+    Uma amostragem por vizinho mais próximo (288 x 256) vem antes da média por
+    área; reduzir direto o quadro 1080p a 9 x 8 com INTER_AREA custa ~7 ms.
+    """
+    amostra = cv2.resize(imagem, (288, 256), interpolation=cv2.INTER_NEAREST)
+    reduzida = cv2.resize(amostra, (9, 8), interpolation=cv2.INTER_AREA)
+    if reduzida.ndim == 3:
+        reduzida = cv2.cvtColor(reduzida, cv2.COLOR_BGR2GRAY)
+    bits = (reduzida[:, 1:] > reduzida[:, :-1]).flatten()
+    return int(_PESOS_BITS[bits].sum())
+
+
+def distancia_hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+class CacheResultados:
+    def __init__(self, capacidade=64, tolerancia_hamming=2, ttl=300.0):
+        """
+        Cache LRU de resultados de detecção (o detector guarda as detecções do modelo)
+
+        Args:
+            capacidade (int): Máximo de assinaturas guardadas
+            tolerancia_hamming (int): Bits diferentes aceitos entre assinaturas (0 = idênticas)
+            ttl (float): Segundos de validade de cada entrada
+        """
+        self.capacidade = capacidade
+        self.tolerancia_hamming = tolerancia_hamming
+        self.ttl = ttl
+        self._entradas = OrderedDict()  # assinatura -> (instante, resultado)
+
+        self.acertos = 0
+        self.falhas = 0
+        self.expirados = 0
+
+    def _procurar(self, assinatura):
+        if assinatura in self._entradas:
+            return assinatura
+        if self.tolerancia_hamming <= 0:
+            return None
+        # Mais recentes primeiro: é onde uma cena repetida costuma estar
+        melhor, menor = None, self.tolerancia_hamming + 1
+        for chave in reversed(self._entradas):
+            distancia = distancia_hamming(chave, assinatura)
+            if distancia < menor:
+                melhor, menor = chave, distancia
+                if distancia == 0:
+                    break
+        return melhor
+
+    def obter(self, assinatura):
+        """Resultado guardado para a assinatura (cópia), ou None"""
+        chave = self._procurar(assinatura)
+        if chave is not None:
+            instante, resultado = self._entradas[chave]
+            if time.monotonic() - instante <= self.ttl:
+                self._entradas.move_to_end(chave)
+                self.acertos += 1
+                return copy.deepcopy(resultado)
+            del self._entradas[chave]
+            self.expirados += 1
+        self.falhas += 1
+        return None
+
+    def guardar(self, assinatura, resultado):
+        self._entradas[assinatura] = (time.monotonic(), copy.deepcopy(resultado))
+        self._entradas.move_to_end(assinatura)
+        while len(self._entradas) > self.capacidade:
+            self._entradas.popitem(last=False)
+
+    def limpar(self):
+        self._entradas.clear()
+
+    def obter_estatisticas(self):
+        consultas = self.acertos + self.falhas
+        return {
+            'consultas': consultas,
+            'acertos': self.acertos,
+            'falhas': self.falhas,
+            'expirados': self.expirados,
+            'taxa_acerto': round(self.acertos / consultas, 3) if consultas else 0.0,
+            'taxa_falha': round(self.falhas / consultas, 3) if consultas else 0.0,
+            'entradas': len(self._entradas)
+        }
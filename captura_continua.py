@@ -6,10 +6,14 @@ Captura screenshots continuamente e processa com DetectorAvancado
 """
 
 import os
+import sys
 import time
 import json
 from datetime import datetime
 from detector_avancado import DetectorAvancado
+from controle_carga import ControleCarga, nivel_carga_maximo
+from fontes_frames import FonteDroidCamMJPEG
+from captura_x11 import CapturaX11, HAS_X11
 import pyautogui
 import cv2
 import numpy as np
@@ -26,17 +30,64 @@ except Exception:
     HAS_WIN32 = False
 
 class CapturaContinua:
-    def __init__(self, intervalo_captura=0.5, intervalo_relatorio=60):
+    def __init__(self, intervalo_captura=0.5, intervalo_relatorio=60, url_droidcam=None, config_detector=None,
+                 processos_deteccao=0, controle_carga=True, servidor_inferencia=None,
+                 trabalhadores_deteccao=None, barramento=None):
         """
         Inicializa o sistema de captura contínua
         
         Args:
             intervalo_captura (float): Intervalo entre capturas em segundos
             intervalo_relatorio (int): Intervalo entre relatórios em segundos
+            url_droidcam (str): URL do stream MJPEG do DroidCam (ex.: http://IP:4747/video);
+                quando informado, dispensa a captura da janela
+            config_detector (dict): Sobrescreve chaves de CONFIG_PADRAO do DetectorAvancado
+            processos_deteccao (int): Se > 0, a detecção roda num PoolDetectores com esse número
+                de processos, sem bloquear o laço de captura (0 = detector no próprio processo)
+            controle_carga (bool): Degrada a detecção (resolução, análises, quadros, modelo)
+                quando ela não acompanha intervalo_captura, e volta ao normal quando a carga cai
+            servidor_inferencia (str): Endereço de um ServidorInferencia ('http://127.0.0.1:8765'
+                ou 'unix:///caminho.sock'); quando informado, a detecção é feita por ele
+            trabalhadores_deteccao (list): Endereços de trabalhadores de deteccao_distribuida.py
+                ('host:porta' ou 'unix:///caminho'); os quadros são divididos entre eles
+            barramento (str): Nome de um segmento de memória compartilhada; cada quadro capturado
+                é publicado num BarramentoQuadros para gravador, GUI e prévias lerem sem cópia
         """
         self.intervalo_captura = intervalo_captura
         self.intervalo_relatorio = intervalo_relatorio
-        self.detector = DetectorAvancado()
+        self.pool = None
+        self.detector = None
+        # Cada modo de detecção só importa o próprio módulo
+        if trabalhadores_deteccao:
+            from deteccao_distribuida import CoordenadorDistribuido
+            self.pool = CoordenadorDistribuido(trabalhadores_deteccao)
+        elif servidor_inferencia:
+            from servidor_inferencia import ClienteInferencia
+            self.detector = ClienteInferencia(servidor_inferencia)
+        elif processos_deteccao > 0:
+            from pool_detectores import PoolDetectores
+            self.pool = PoolDetectores(processos_deteccao, config_detector)
+        else:
+            self.detector = DetectorAvancado(config_detector)
+        # Trabalhadores distribuídos usam a própria configuração: o degrau máximo vem deles, não de config_detector
+        self._nivel_maximo_remoto = bool(trabalhadores_deteccao)
+        nivel_maximo = self.pool.nivel_carga_maximo if self._nivel_maximo_remoto else nivel_carga_maximo(config_detector)
+        self.controle_carga = (ControleCarga(orcamento=intervalo_captura, nivel_maximo=nivel_maximo)
+                               if controle_carga else None)
+        self._envios = {}  # seq no pool -> instante do envio
+        self.fonte_droidcam = FonteDroidCamMJPEG(url_droidcam).iniciar() if url_droidcam else None
+        self.barramento = None
+        if barramento:
+            from barramento_quadros import BarramentoQuadros
+            self.barramento = BarramentoQuadros(barramento)
+        
+        # Captura XShm no Linux (buffer reutilizado, sem alocar imagem PIL por frame)
+        self.captura_x11 = None
+        if HAS_X11 and sys.platform.startswith('linux') and os.environ.get('DISPLAY'):
+            try:
+                self.captura_x11 = CapturaX11()
+            except Exception as e:
+                print(f"⚠️ Captura X11 indisponível: {e}")
         self.contador_capturas = 0
         self.ultimo_relatorio = time.time()
         self.estatisticas = {
@@ -68,8 +119,9 @@ class CapturaContinua:
             print(f"⚠️ Não foi possível obter a janela DroidCam Client: {e}")
         return None
 
-    def _capturar_droidcam_printwindow(self, titulo='DroidCam Client'):
-        """Captura o conteúdo da janela usando Win32 PrintWindow (funciona mesmo coberta e, em muitos casos, minimizada)."""
+    @staticmethod
+    def _printwindow_pil(titulo='DroidCam Client'):
+        """Captura o conteúdo da janela usando Win32 PrintWindow (funciona mesmo coberta e, em muitos casos, minimizada) e retorna uma imagem PIL."""
         if not HAS_WIN32:
             return None
         try:
@@ -130,20 +182,40 @@ class CapturaContinua:
             if result != 1:
                 return None
 
-            # Converter para BGR (OpenCV)
-            return cv2.cvtColor(np.array(img), cv2.COLOR_RGB2BGR)
+            return img
         except Exception as e:
             print(f"⚠️ Falha PrintWindow: {e}")
             return None
 
+    def _capturar_droidcam_printwindow(self, titulo='DroidCam Client'):
+        """Captura a janela via PrintWindow já convertida para BGR (OpenCV)"""
+        img = self._printwindow_pil(titulo)
+        if img is None:
+            return None
+        return cv2.cvtColor(np.array(img), cv2.COLOR_RGB2BGR)
+
     def capturar_tela(self):
-        """Captura somente a janela DroidCam Client, se disponível; caso contrário, captura a tela inteira."""
+        """Lê o stream do DroidCam se configurado; senão captura somente a janela DroidCam Client, se disponível; caso contrário, captura a tela inteira."""
         try:
+            # Preferência máxima: frame direto do stream MJPEG (sem captura de tela)
+            if self.fonte_droidcam is not None:
+                frame = self.fonte_droidcam.ler_frame(timeout=max(1.0, self.intervalo_captura * 4))
+                if frame is not None:
+                    return frame
+
             # Tentativa preferencial: captura por PrintWindow (funciona coberta/minimizada em muitos casos)
             img_bgr_pw = self._capturar_droidcam_printwindow()
             if img_bgr_pw is not None:
                 return img_bgr_pw
 
+            # Linux: janela DroidCam (ou tela inteira) via XShm, já em BGR
+            if self.captura_x11 is not None:
+                img_bgr_x11 = self.captura_x11.capturar_janela('DroidCam Client')
+                if img_bgr_x11 is None:
+                    img_bgr_x11 = self.captura_x11.capturar()
+                if img_bgr_x11 is not None:
+                    return img_bgr_x11
+
             # Fallback: captura por região na tela
             bbox = self._bbox_droidcam()
             if bbox:
@@ -180,7 +252,14 @@ class CapturaContinua:
         """Processa a captura com o DetectorAvancado"""
         try:
             resultado = self.detector.detectar_objetos_pessoas(caminho_imagem)
-            
+            return self.registrar_resultado(resultado)
+        except Exception as e:
+            print(f"❌ Erro ao processar captura: {e}")
+            return None
+    
+    def registrar_resultado(self, resultado):
+        """Atualiza estatísticas e atividades com o resultado de uma captura"""
+        try:
             if resultado:
                 # Atualizar estatísticas
                 pessoas = resultado.get('pessoas_detectadas', 0)
@@ -201,7 +280,7 @@ class CapturaContinua:
                 
                 return resultado
         except Exception as e:
-            print(f"❌ Erro ao processar captura: {e}")
+            print(f"❌ Erro ao registrar resultado: {e}")
             return None
     
     def exibir_progresso(self, resultado):
@@ -252,6 +331,7 @@ class CapturaContinua:
                         'media_objetos_por_captura': round(self.estatisticas['total_objetos'] / max(1, self.contador_capturas), 2)
                     },
                     'atividades_recentes': self.estatisticas['atividades_detectadas'][-20:],  # Últimas 20
+                    'controle_carga': self.controle_carga.obter_estatisticas() if self.controle_carga is not None else None,
                     'configuracao': {
                         'intervalo_captura_segundos': self.intervalo_captura,
                         'intervalo_relatorio_segundos': self.intervalo_relatorio
@@ -272,10 +352,31 @@ class CapturaContinua:
             except Exception as e:
                 print(f"❌ Erro ao salvar relatório: {e}")
     
+    def _ajustar_carga(self, latencia, fila=0):
+        """Registra a latência no controle de carga e aplica o degrau novo, se mudou"""
+        if self.controle_carga is None:
+            return
+        if self._nivel_maximo_remoto:
+            # Os trabalhadores informam o degrau máximo ao conectar (e de novo a cada reconexão)
+            self.controle_carga.nivel_maximo = self.pool.nivel_carga_maximo
+        nivel = self.controle_carga.registrar(latencia, fila)
+        if nivel is not None:
+            (self.pool if self.pool is not None else self.detector).aplicar_nivel_carga(nivel)
+    
+    def _tratar_prontos(self):
+        """Resultados do pool já concluídos, na ordem de envio"""
+        for seq, resultado in self.pool.prontos():
+            enviado = self._envios.pop(seq, None)
+            if enviado is not None:
+                self._ajustar_carga(time.monotonic() - enviado, max(0, self.pool.em_voo - self.pool.processos))
+            self.exibir_progresso(self.registrar_resultado(resultado))
+    
     def executar(self):
         """Executa o loop principal de captura contínua"""
         try:
             while True:
+                inicio = time.monotonic()
+                
                 # Capturar tela
                 imagem = self.capturar_tela()
                 
@@ -283,21 +384,40 @@ class CapturaContinua:
                     self.contador_capturas += 1
                     self.estatisticas['capturas_realizadas'] = self.contador_capturas
                     
+                    if self.barramento is not None:
+                        try:
+                            self.barramento.publicar(imagem)
+                        except ValueError as e:
+                            print(f"⚠️ Barramento desativado: {e}")
+                            self.barramento.fechar()
+                            self.barramento = None
+                    
+                    # Sob sobrecarga, o controle de carga descarta parte dos quadros
+                    processar = self.controle_carga is None or self.controle_carga.deve_processar()
+                    
                     # Salvar captura
-                    caminho_imagem = self.salvar_captura(imagem)
+                    caminho_imagem = self.salvar_captura(imagem) if processar else None
                     
-                    if caminho_imagem:
+                    if caminho_imagem and self.pool is not None:
+                        # Envia o quadro já em memória; os resultados são tratados abaixo
+                        self._envios[self.pool.enviar(imagem)] = time.monotonic()
+                    elif caminho_imagem:
                         # Processar com DetectorAvancado
+                        inicio_deteccao = time.monotonic()
                         resultado = self.processar_captura(caminho_imagem)
+                        self._ajustar_carga(time.monotonic() - inicio_deteccao)
                         
                         # Exibir progresso
                         self.exibir_progresso(resultado)
-                        
-                        # Salvar relatório periódico
-                        self.salvar_relatorio_periodico()
+                    
+                    if self.pool is not None:
+                        self._tratar_prontos()
+                    
+                    # Salvar relatório periódico
+                    self.salvar_relatorio_periodico()
                 
-                # Aguardar próxima captura
-                time.sleep(self.intervalo_captura)
+                # Aguardar próxima captura (descontando o tempo já gasto neste quadro)
+                time.sleep(max(0.0, self.intervalo_captura - (time.monotonic() - inicio)))
                 
         except KeyboardInterrupt:
             print("\n🛑 Captura interrompida pelo usuário")
@@ -311,6 +431,18 @@ class CapturaContinua:
         try:
             print("\n📊 Gerando relatório final...")
             
+            if self.fonte_droidcam is not None:
+                self.fonte_droidcam.parar()
+            
+            if self.pool is not None:
+                # Resultados ainda em processamento entram no relatório final
+                while self.pool.em_voo:
+                    resultado = self.pool.proximo(timeout=30)
+                    if resultado is None:
+                        break
+                    self.exibir_progresso(self.registrar_resultado(resultado))
+                self.pool.fechar()
+            
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             nome_relatorio_final = f"relatorios_continuas/relatorio_final_{timestamp}.json"
             
@@ -331,6 +463,11 @@ class CapturaContinua:
                     'capturas_por_minuto': round(self.contador_capturas / max(1, tempo_total.total_seconds() / 60), 2)
                 },
                 'todas_atividades': self.estatisticas['atividades_detectadas'],
+                'controle_carga': self.controle_carga.obter_estatisticas() if self.controle_carga is not None else None,
+                'barramento': self.barramento.obter_estatisticas() if self.barramento is not None else None,
+                'fonte_droidcam': self.fonte_droidcam.obter_estatisticas() if self.fonte_droidcam is not None else None,
+                'otimizacoes_detector': (self.pool.obter_estatisticas() if self.pool is not None
+                                         else self.detector.obter_estatisticas()),
                 'timestamp_relatorio': datetime.now().isoformat()
             }
             
@@ -343,11 +480,25 @@ class CapturaContinua:
             print(f"👥 Pessoas detectadas: {self.estatisticas['total_pessoas']}")
             print(f"📦 Objetos detectados: {self.estatisticas['total_objetos']}")
             
+            if self.barramento is not None:
+                self.barramento.fechar()
+            
         except Exception as e:
             print(f"❌ Erro ao finalizar sessão: {e}")
 
 if __name__ == "__main__":
     # Criar e executar sistema de captura contínua ULTRA-RÁPIDA
     # Captura a cada 0.5 segundos, relatório a cada 1 minuto (60 segundos)
-    captura = CapturaContinua(intervalo_captura=0.5, intervalo_relatorio=60)
+    # Defina DROIDCAM_URL (ex.: http://192.168.0.10:4747/video) para ler o stream direto
+    # e PROCESSOS_DETECCAO (ex.: 4) para detectar em vários processos, ou
+    # SERVIDOR_INFERENCIA (ex.: unix:///tmp/inferencia.sock) para usar um servidor_inferencia.py, ou
+    # TRABALHADORES_DETECCAO (ex.: 10.0.0.2:9100,10.0.0.3:9100) para dividir os quadros entre máquinas.
+    # BARRAMENTO_QUADROS (ex.: monitor_quadros) publica cada quadro para outros processos lerem sem cópia
+    captura = CapturaContinua(intervalo_captura=0.5, intervalo_relatorio=60,
+                              url_droidcam=os.environ.get('DROIDCAM_URL'),
+                              config_detector={'cache_resultados': True},
+                              processos_deteccao=int(os.environ.get('PROCESSOS_DETECCAO', 0)),
+                              servidor_inferencia=os.environ.get('SERVIDOR_INFERENCIA'),
+                              trabalhadores_deteccao=[e for e in os.environ.get('TRABALHADORES_DETECCAO', '').split(',') if e],
+                              barramento=os.environ.get('BARRAMENTO_QUADROS'))
     captura.executar()
\ No newline at end of file
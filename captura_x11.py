@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Captura X11 com Memória Compartilhada (XShm)
+Backend de captura para Linux: tela, região ou janela por título em buffer reutilizado
+"""
+
+import ctypes
+import ctypes.util
+import os
+import time
+
+import cv2
+import numpy as np
+
+# Carrega Xlib/XShm via ctypes (sem dependências extras)
+try:
+    _xlib = ctypes.CDLL(ctypes.util.find_library('X11') or 'libX11.so.6')
+    _xext = ctypes.CDLL(ctypes.util.find_library('Xext') or 'libXext.so.6')
+    _libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+    HAS_X11 = True
+except OSError:
+    HAS_X11 = False
+
+ZPixmap = 2
+ALL_PLANES = ctypes.c_ulong(~0 & 0xFFFFFFFFFFFFFFFF)
+IPC_PRIVATE = 0
+IPC_CREAT = 0o1000
+IPC_RMID = 0
+
+
+class XImage(ctypes.Structure):
+    """Parte inicial da struct XImage (somente os campos lidos aqui)"""
+    _fields_ = [
+        ('width', ctypes.c_int),
+        ('height', ctypes.c_int),
+        ('xoffset', ctypes.c_int),
+        ('format', ctypes.c_int),
+        ('data', ctypes.c_void_p),
+        ('byte_order', ctypes.c_int),
+        ('bitmap_unit', ctypes.c_int),
+        ('bitmap_bit_order', ctypes.c_int),
+        ('bitmap_pad', ctypes.c_int),
+        ('depth', ctypes.c_int),
+        ('bytes_per_line', ctypes.c_int),
+        ('bits_per_pixel', ctypes.c_int),
+    ]
+
+
+class XShmSegmentInfo(ctypes.Structure):
+    _fields_ = [
+        ('shmseg', ctypes.c_ulong),
+        ('shmid', ctypes.c_int),
+        ('shmaddr', ctypes.c_void_p),
+        ('readOnly', ctypes.c_int),
+    ]
+
+
+class XErrorEvent(ctypes.Structure):
+    _fields_ = [
+        ('type', ctypes.c_int),
+        ('display', ctypes.c_void_p),
+        ('resourceid', ctypes.c_ulong),
+        ('serial', ctypes.c_ulong),
+        ('error_code', ctypes.c_ubyte),
+        ('request_code', ctypes.c_ubyte),
+        ('minor_code', ctypes.c_ubyte),
+    ]
+
+
+if HAS_X11:
+    _Window = ctypes.c_ulong
+    _HANDLER_ERRO = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.POINTER(XErrorEvent))
+
+    _xlib.XOpenDisplay.argtypes = [ctypes.c_char_p]
+    _xlib.XOpenDisplay.restype = ctypes.c_void_p
+    _xlib.XCloseDisplay.argtypes = [ctypes.c_void_p]
+    _xlib.XDefaultScreen.argtypes = [ctypes.c_void_p]
+    _xlib.XRootWindow.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    _xlib.XRootWindow.restype = _Window
+    _xlib.XDefaultVisual.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    _xlib.XDefaultVisual.restype = ctypes.c_void_p
+    _xlib.XDefaultDepth.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    _xlib.XDisplayWidth.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    _xlib.XDisplayHeight.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    _xlib.XSync.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    _xlib.XFree.argtypes = [ctypes.c_void_p]
+    _xlib.XDestroyImage.argtypes = [ctypes.POINTER(XImage)]
+    _xlib.XSetErrorHandler.argtypes = [_HANDLER_ERRO]
+    _xlib.XSetErrorHandler.restype = ctypes.c_void_p
+    _xlib.XFetchName.argtypes = [ctypes.c_void_p, _Window, ctypes.POINTER(ctypes.c_char_p)]
+    _xlib.XQueryTree.argtypes = [ctypes.c_void_p, _Window, ctypes.POINTER(_Window), ctypes.POINTER(_Window),
+                                 ctypes.POINTER(ctypes.POINTER(_Window)), ctypes.POINTER(ctypes.c_uint)]
+    _xlib.XGetGeometry.argtypes = [ctypes.c_void_p, _Window, ctypes.POINTER(_Window),
+                                   ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int),
+                                   ctypes.POINTER(ctypes.c_uint), ctypes.POINTER(ctypes.c_uint),
+                                   ctypes.POINTER(ctypes.c_uint), ctypes.POINTER(ctypes.c_uint)]
+    _xlib.XTranslateCoordinates.argtypes = [ctypes.c_void_p, _Window, _Window, ctypes.c_int, ctypes.c_int,
+                                            ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int),
+                                            ctypes.POINTER(_Window)]
+    _xlib.XGetImage.argtypes = [ctypes.c_void_p, _Window, ctypes.c_int, ctypes.c_int,
+                                ctypes.c_uint, ctypes.c_uint, ctypes.c_ulong, ctypes.c_int]
+    _xlib.XGetImage.restype = ctypes.POINTER(XImage)
+
+    _xext.XShmQueryExtension.argtypes = [ctypes.c_void_p]
+    _xext.XShmCreateImage.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int,
+                                      ctypes.c_void_p, ctypes.POINTER(XShmSegmentInfo),
+                                      ctypes.c_uint, ctypes.c_uint]
+    _xext.XShmCreateImage.restype = ctypes.POINTER(XImage)
+    _xext.XShmAttach.argtypes = [ctypes.c_void_p, ctypes.POINTER(XShmSegmentInfo)]
+    _xext.XShmDetach.argtypes = [ctypes.c_void_p, ctypes.POINTER(XShmSegmentInfo)]
+    _xext.XShmGetImage.argtypes = [ctypes.c_void_p, _Window, ctypes.POINTER(XImage),
+                                   ctypes.c_int, ctypes.c_int, ctypes.c_ulong]
+
+    _libc.shmget.argtypes = [ctypes.c_int, ctypes.c_size_t, ctypes.c_int]
+    _libc.shmat.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_int]
+    _libc.shmat.restype = ctypes.c_void_p
+    _libc.shmdt.argtypes = [ctypes.c_void_p]
+    _libc.shmctl.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_void_p]
+
+    # Erros X são registrados em vez de encerrar o processo (handler padrão do Xlib)
+    _ultimo_erro_x = [0]
+
+    def _registrar_erro_x(_display, evento):
+        _ultimo_erro_x[0] = evento.contents.error_code
+        return 0
+
+    _handler_erro_x = _HANDLER_ERRO(_registrar_erro_x)
+
+
+class CapturaX11:
+    def __init__(self, display=None, usar_shm=True, intervalo_busca_janela=2.0):
+        """
+        Captura de tela no Linux via XShmGetImage em um buffer reutilizado
+
+        O segmento de memória compartilhada e o buffer BGR de saída só são
+        realocados quando o tamanho da região muda. Sem XShm (ex.: servidor X
+        remoto) usa XGetImage, copiando para o mesmo buffer de saída.
+
+        Não é thread-safe: use uma instância por thread.
+
+        Args:
+            display (str): Display X (padrão: variável DISPLAY)
+            usar_shm (bool): Usa a extensão MIT-SHM quando disponível
+            intervalo_busca_janela (float): Espera mínima entre buscas por uma
+                janela não encontrada (evita percorrer a árvore a cada frame)
+        """
+        if not HAS_X11:
+            raise RuntimeError("Bibliotecas X11 não encontradas")
+
+        nome = display or os.environ.get('DISPLAY')
+        self._display = _xlib.XOpenDisplay(nome.encode() if nome else None)
+        if not self._display:
+            raise RuntimeError(f"Não foi possível abrir o display X11 {nome!r}")
+
+        _xlib.XSetErrorHandler(_handler_erro_x)
+
+        tela = _xlib.XDefaultScreen(self._display)
+        self._raiz = _xlib.XRootWindow(self._display, tela)
+        self._visual = _xlib.XDefaultVisual(self._display, tela)
+        self._profundidade = _xlib.XDefaultDepth(self._display, tela)
+        self.largura_tela = _xlib.XDisplayWidth(self._display, tela)
+        self.altura_tela = _xlib.XDisplayHeight(self._display, tela)
+
+        self.usa_shm = bool(usar_shm and _xext.XShmQueryExtension(self._display))
+        self._imagem_shm = None
+        self._info_shm = None
+        self._tamanho_shm = None
+        self._saida_bgr = None
+        self._buffer_bgrx = None
+
+        # Cache da janela localizada por título
+        self.intervalo_busca_janela = intervalo_busca_janela
+        self._cache_janela = {}
+        self._ultima_busca = {}
+
+    def fechar(self):
+        """Libera o segmento XShm e fecha a conexão com o display"""
+        self._liberar_shm()
+        if self._display:
+            _xlib.XCloseDisplay(self._display)
+            self._display = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.fechar()
+
+    def _liberar_shm(self):
+        if self._imagem_shm is not None:
+            _xext.XShmDetach(self._display, ctypes.byref(self._info_shm))
+            _xlib.XSync(self._display, 0)
+            # Dados pertencem ao segmento shm: só a struct é liberada pelo Xlib
+            self._imagem_shm.contents.data = None
+            _xlib.XFree(self._imagem_shm)
+            _libc.shmdt(self._info_shm.shmaddr)
+            self._imagem_shm = None
+            self._info_shm = None
+            self._tamanho_shm = None
+
+    def _preparar_shm(self, largura, altura):
+        """(Re)cria o segmento compartilhado somente quando o tamanho muda"""
+        if self._tamanho_shm == (largura, altura):
+            return True
+        self._liberar_shm()
+
+        info = XShmSegmentInfo()
+        imagem = _xext.XShmCreateImage(self._display, self._visual, self._profundidade, ZPixmap,
+                                       None, ctypes.byref(info), largura, altura)
+        if not imagem:
+            return False
+
+        tamanho = imagem.contents.bytes_per_line * imagem.contents.height
+        info.shmid = _libc.shmget(IPC_PRIVATE, tamanho, IPC_CREAT | 0o600)
+        if info.shmid < 0:
+            _xlib.XFree(imagem)
+            return False
+        endereco = _libc.shmat(info.shmid, None, 0)
+        if endereco in (None, ctypes.c_void_p(-1).value):
+            _libc.shmctl(info.shmid, IPC_RMID, None)
+            _xlib.XFree(imagem)
+            return False
+        info.shmaddr = endereco
+        info.readOnly = 0
+        imagem.contents.data = endereco
+
+        _ultimo_erro_x[0] = 0
+        _xext.XShmAttach(self._display, ctypes.byref(info))
+        _xlib.XSync(self._display, 0)
+        # Marca para remoção: o segmento some quando o último processo desanexar
+        _libc.shmctl(info.shmid, IPC_RMID, None)
+        if _ultimo_erro_x[0]:
+            _libc.shmdt(endereco)
+            imagem.contents.data = None
+            _xlib.XFree(imagem)
+            return False
+
+        self._imagem_shm = imagem
+        self._info_shm = info
+        self._tamanho_shm = (largura, altura)
+        return True
+
+    @staticmethod
+    def _visao_bgrx(imagem):
+        """Visão numpy (sem cópia) dos pixels BGRX 32bpp de um XImage"""
+        img = imagem.contents
+        if img.bits_per_pixel != 32:
+            raise RuntimeError(f"Formato X11 não suportado: {img.bits_per_pixel} bpp")
+
+        bruto = np.ctypeslib.as_array(
+            ctypes.cast(img.data, ctypes.POINTER(ctypes.c_uint8)),
+            shape=(img.height, img.bytes_per_line)
+        )
+        return bruto[:, :img.width * 4].reshape(img.height, img.width, 4)
+
+    def para_bgr(self, bgrx):
+        """Converte BGRX para o buffer BGR reutilizado"""
+        altura, largura = bgrx.shape[:2]
+        if self._saida_bgr is None or self._saida_bgr.shape[:2] != (altura, largura):
+            self._saida_bgr = np.empty((altura, largura, 3), dtype=np.uint8)
+        cv2.cvtColor(bgrx, cv2.COLOR_BGRA2BGR, dst=self._saida_bgr)
+        return self._saida_bgr
+
+    def _limitar_regiao(self, regiao):
+        """Recorta a região (x, y, w, h) aos limites da tela"""
+        if regiao is None:
+            return 0, 0, self.largura_tela, self.altura_tela
+        x, y, w, h = (int(v) for v in regiao)
+        x0, y0 = max(0, x), max(0, y)
+        x1, y1 = min(self.largura_tela, x + w), min(self.altura_tela, y + h)
+        if x1 <= x0 or y1 <= y0:
+            return None
+        return x0, y0, x1 - x0, y1 - y0
+
+    def capturar_bgrx(self, regiao=None):
+        """
+        Captura a tela inteira ou a região (x, y, w, h) sem converter (BGRX)
+
+        Com XShm retorna uma visão direta do segmento compartilhado; o
+        conteúdo é sobrescrito na próxima captura.
+        """
+        regiao = self._limitar_regiao(regiao)
+        if regiao is None:
+            return None
+        x, y, w, h = regiao
+
+        if self.usa_shm and self._preparar_shm(w, h):
+            _ultimo_erro_x[0] = 0
+            ok = _xext.XShmGetImage(self._display, self._raiz, self._imagem_shm, x, y, ALL_PLANES)
+            if ok and not _ultimo_erro_x[0]:
+                return self._visao_bgrx(self._imagem_shm)
+
+        # Fallback sem memória compartilhada: copia para um buffer BGRX reutilizado
+        _ultimo_erro_x[0] = 0
+        imagem = _xlib.XGetImage(self._display, self._raiz, x, y, w, h, ALL_PLANES, ZPixmap)
+        if not imagem:
+            return None
+        try:
+            visao = self._visao_bgrx(imagem)
+            if self._buffer_bgrx is None or self._buffer_bgrx.shape != visao.shape:
+                self._buffer_bgrx = np.empty_like(visao)
+            np.copyto(self._buffer_bgrx, visao)
+            return self._buffer_bgrx
+        finally:
+            # Libera struct e dados pelo destrutor da própria imagem (f.destroy_image)
+            _xlib.XDestroyImage(imagem)
+
+    def capturar(self, regiao=None):
+        """
+        Captura a tela inteira ou a região (x, y, w, h) e retorna BGR
+
+        O array retornado é o buffer interno, sobrescrito na próxima captura;
+        use .copy() se precisar mantê-lo.
+        """
+        bgrx = self.capturar_bgrx(regiao)
+        if bgrx is None:
+            return None
+        return self.para_bgr(bgrx)
+
+    def _nome_janela(self, janela):
+        nome = ctypes.c_char_p()
+        if _xlib.XFetchName(self._display, janela, ctypes.byref(nome)) and nome.value is not None:
+            texto = nome.value.decode('utf-8', errors='replace')
+            _xlib.XFree(nome)
+            return texto
+        return ''
+
+    def _filhas(self, janela):
+        raiz, pai = _Window(), _Window()
+        filhas = ctypes.POINTER(_Window)()
+        quantidade = ctypes.c_uint()
+        if not _xlib.XQueryTree(self._display, janela, ctypes.byref(raiz), ctypes.byref(pai),
+                                ctypes.byref(filhas), ctypes.byref(quantidade)):
+            return []
+        try:
+            return [filhas[i] for i in range(quantidade.value)]
+        finally:
+            if filhas:
+                _xlib.XFree(filhas)
+
+    def localizar_janela(self, titulo='DroidCam Client'):
+        """Procura a janela pelo título (exato ou parcial, sem diferenciar maiúsculas)"""
+        titulo_lower = titulo.lower()
+        parcial = None
+        pendentes = self._filhas(self._raiz)
+        while pendentes:
+            janela = pendentes.pop()
+            nome = self._nome_janela(janela)
+            if nome == titulo:
+                return janela
+            if parcial is None and nome and titulo_lower in nome.lower():
+                parcial = janela
+            pendentes.extend(self._filhas(janela))
+        return parcial
+
+    def regiao_janela(self, janela):
+        """Retorna (x, y, w, h) da janela em coordenadas da tela, ou None"""
+        raiz = _Window()
+        x, y = ctypes.c_int(), ctypes.c_int()
+        w, h = ctypes.c_uint(), ctypes.c_uint()
+        borda, profundidade = ctypes.c_uint(), ctypes.c_uint()
+        _ultimo_erro_x[0] = 0
+        if not _xlib.XGetGeometry(self._display, janela, ctypes.byref(raiz), ctypes.byref(x), ctypes.byref(y),
+                                  ctypes.byref(w), ctypes.byref(h), ctypes.byref(borda),
+                                  ctypes.byref(profundidade)) or _ultimo_erro_x[0]:
+            return None
+
+        tx, ty, filha = ctypes.c_int(), ctypes.c_int(), _Window()
+        _xlib.XTranslateCoordinates(self._display, janela, self._raiz, 0, 0,
+                                    ctypes.byref(tx), ctypes.byref(ty), ctypes.byref(filha))
+        if _ultimo_erro_x[0]:
+            return None
+        return tx.value, ty.value, w.value, h.value
+
+    def capturar_janela(self, titulo='DroidCam Client'):
+        """Captura apenas a área da janela com o título informado (None se não existir)"""
+        janela = self._cache_janela.get(titulo)
+        regiao = self.regiao_janela(janela) if janela else None
+        if regiao is None:
+            # Janela nova ou fechada: refaz a busca (caminho lento só nesse caso)
+            agora = time.monotonic()
+            if agora - self._ultima_busca.get(titulo, float('-inf')) < self.intervalo_busca_janela:
+                return None
+            self._ultima_busca[titulo] = agora
+            janela = self.localizar_janela(titulo)
+            self._cache_janela[titulo] = janela
+            regiao = self.regiao_janela(janela) if janela else None
+            if regiao is None:
+                return None
+        return self.capturar(regiao)
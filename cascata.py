@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Detecção em Cascata
+Estágio 1 barato (movimento ou HOG num quadro reduzido) decide se vale rodar
+o YOLO; um modelo maior opcional só entra em quadros ambíguos
+"""
+
+import cv2
+import numpy as np
+
+from backends_inferencia import criar_backend_modelo, pos_processar
+from preprocessamento import BuffersEntrada
+from regioes_interesse import reduzir_cinza
+
+METODOS_PROPOSTA = ('movimento', 'hog')
+
+
+class Cascata:
+    def __init__(self, metodo='movimento', intervalo_verificacao=15, modelo_grande=None,
+                 limiar_ambiguo=0.3, config=None):
+        """
+        Estado e contadores da cascata de detecção
+
+        Args:
+            metodo (str): 'movimento' (fundo adaptativo) ou 'hog' (detector de pessoas do OpenCV)
+            intervalo_verificacao (int): Roda o YOLO a cada N quadros mesmo sem propostas,
+                para não perder pessoas paradas por muito tempo
+            modelo_grande (str): Modelo maior (.onnx/.pt) para quadros ambíguos (None = desativado)
+            limiar_ambiguo (float): Confiança a partir da qual um candidato abaixo do limiar
+                normal torna o quadro ambíguo
+            config (dict): Configuração do detector (threads, otimização de grafo)
+        """
+        if metodo not in METODOS_PROPOSTA:
+            raise ValueError(f"Método de proposta inválido: {metodo!r} (use {', '.join(METODOS_PROPOSTA)})")
+        self.metodo = metodo
+        self.intervalo_verificacao = intervalo_verificacao
+        self.limiar_ambiguo = limiar_ambiguo
+
+        self.backend_grande = criar_backend_modelo(modelo_grande, config or {}) if modelo_grande else None
+        self._buffers_grande = BuffersEntrada()
+
+        # Estágio 1: fundo adaptativo (movimento) ou HOG
+        self._fundo = None
+        self.taxa_fundo = 0.05
+        self.limiar_movimento = 25
+        self.area_minima = 6
+        self._hog = None
+        if metodo == 'hog' and not hasattr(cv2, 'HOGDescriptor'):
+            # OpenCV 5 moveu o HOG para os módulos extras
+            print("⚠️ cv2.HOGDescriptor indisponível nesta versão do OpenCV, usando propostas por movimento")
+            self.metodo = metodo = 'movimento'
+        if metodo == 'hog':
+            self._hog = cv2.HOGDescriptor()
+            self._hog.setSVMDetector(cv2.HOGDescriptor_getPeopleDetector())
+
+        self._ultimas = None
+        self._quadros_sem_inferencia = 0
+
+        self.estatisticas = {
+            'quadros': 0,
+            'quadros_com_propostas': 0,
+            'inferencias_yolo': 0,
+            'imagens_ambiguas': 0,
+            'inferencias_modelo_grande': 0
+        }
+
+    def _propostas_movimento(self, imagem):
+        cinza, _ = reduzir_cinza(imagem)
+        cinza = cv2.GaussianBlur(cinza, (5, 5), 0)
+        if self._fundo is None or self._fundo.shape != cinza.shape:
+            self._fundo = cinza.astype(np.float32)
+            return 1  # sem fundo ainda: deixa passar
+        diferenca = cv2.absdiff(cinza, cv2.convertScaleAbs(self._fundo))
+        cv2.accumulateWeighted(cinza, self._fundo, self.taxa_fundo)
+        mascara = (diferenca > self.limiar_movimento).astype(np.uint8)
+        n, _, stats, _ = cv2.connectedComponentsWithStats(mascara, connectivity=8)
+        return int((stats[1:n, cv2.CC_STAT_AREA] >= self.area_minima).sum())
+
+    def _propostas_hog(self, imagem):
+        altura, largura = imagem.shape[:2]
+        escala = min(1.0, 400 / largura)
+        reduzida = cv2.resize(imagem, (int(largura * escala), int(altura * escala)), interpolation=cv2.INTER_AREA)
+        caixas, _ = self._hog.detectMultiScale(reduzida, winStride=(8, 8), padding=(8, 8), scale=1.1)
+        return len(caixas)
+
+    def deve_inferir(self, imagem):
+        """Estágio 1: True se o YOLO deve rodar neste quadro"""
+        self.estatisticas['quadros'] += 1
+        propostas = self._propostas_hog(imagem) if self.metodo == 'hog' else self._propostas_movimento(imagem)
+        if propostas:
+            self.estatisticas['quadros_com_propostas'] += 1
+
+        if (propostas or self._ultimas is None
+                or self._quadros_sem_inferencia + 1 >= self.intervalo_verificacao):
+            self._quadros_sem_inferencia = 0
+            self.estatisticas['inferencias_yolo'] += 1
+            return True
+        self._quadros_sem_inferencia += 1
+        return False
+
+    def registrar(self, caixas, confiancas, classes):
+        """Guarda o último resultado do YOLO, repetido enquanto não houver propostas"""
+        self._ultimas = (caixas, confiancas, classes)
+
+    @property
+    def ultimas(self):
+        return self._ultimas
+
+    def resolver_ambiguos(self, imagens, resultados, tamanho, filtro, limiar_nms):
+        """
+        Estágio 3: reinfere com o modelo grande as imagens com candidatos ambíguos
+
+        Args:
+            resultados (list): Por imagem, (caixas, confiancas, classes) obtidos com limiar_ambiguo
+            filtro (FiltroClasses): Classes permitidas e limiares normais por classe
+
+        Returns:
+            list: Por imagem, resultados com os limiares normais aplicados
+        """
+        ambiguas = [i for i, (_, confiancas, classes) in enumerate(resultados)
+                    if ((confiancas >= self.limiar_ambiguo) & (confiancas < filtro.limiar_de(classes))).any()]
+        if ambiguas:
+            self.estatisticas['imagens_ambiguas'] += len(ambiguas)
+            self.estatisticas['inferencias_modelo_grande'] += 1
+            tamanho_grande = self.backend_grande.tamanho_fixo or tamanho
+            canvas, blob, parametros = self._buffers_grande.preparar([imagens[i] for i in ambiguas], tamanho_grande)
+            candidatos = self.backend_grande.inferir(canvas, blob, filtro)
+            for i, resultado in zip(ambiguas, pos_processar(candidatos, parametros, limiar_nms)):
+                resultados[i] = resultado
+
+        return [filtro.filtrar(*resultado) for resultado in resultados]
+
+    def obter_estatisticas(self):
+        quadros = max(1, self.estatisticas['quadros'])
+        inferencias = max(1, self.estatisticas['inferencias_yolo'])
+        return dict(
+            self.estatisticas,
+            metodo_propostas=self.metodo,
+            taxa_estagio1=round(self.estatisticas['quadros_com_propostas'] / quadros, 3),
+            taxa_estagio2=round(self.estatisticas['inferencias_yolo'] / quadros, 3),
+            taxa_estagio3=round(self.estatisticas['inferencias_modelo_grande'] / inferencias, 3),
+            modelo_grande=self.backend_grande is not None
+        )
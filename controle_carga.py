@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Controle de Carga
+Escada de degradação para quando a detecção não acompanha a captura:
+reduz a resolução de entrada, desliga as análises de interação/atividade,
+pula quadros e, por último, troca para um modelo mais leve. Sobe um degrau
+quando a latência ou a fila passam do orçamento e desce quando a carga cai.
+"""
+
+from datetime import datetime
+
+# Degraus, do normal ao mais degradado; cada degrau mantém os anteriores
+NIVEIS_CARGA = ('normal', 'resolucao_reduzida', 'sem_analises', 'pulando_quadros', 'modelo_leve')
+NIVEL_NORMAL = 0
+NIVEL_RESOLUCAO_REDUZIDA = 1
+NIVEL_SEM_ANALISES = 2
+NIVEL_PULAR_QUADROS = 3
+NIVEL_MODELO_LEVE = 4
+
+
+def nivel_carga_maximo(config_detector=None):
+    """
+    Último degrau útil para a configuração do detector
+
+    modelo_leve só existe com carga_modelo_leve configurado; sem ele a
+    escada para em pulando_quadros (a detecção lite não reporta pessoas,
+    então não serve de modelo leve para um monitor de pessoas).
+    """
+    return NIVEL_MODELO_LEVE if (config_detector or {}).get('carga_modelo_leve') else NIVEL_PULAR_QUADROS
+
+
+class ControleCarga:
+    def __init__(self, orcamento, fila_maxima=2, quadros_para_subir=3, quadros_para_descer=20,
+                 fator_recuperacao=0.6, suavizacao=0.3, pular_a_cada=2, nivel_maximo=NIVEL_MODELO_LEVE):
+        """
+        Args:
+            orcamento (float): Latência aceitável por quadro, em segundos (em geral, o intervalo de captura)
+            fila_maxima (int): Quadros esperando processamento acima disso = sobrecarga
+            quadros_para_subir (int): Quadros seguidos em sobrecarga antes de subir um degrau
+            quadros_para_descer (int): Quadros seguidos com folga antes de descer um degrau
+            fator_recuperacao (float): Folga = latência média abaixo desta fração do orçamento do degrau de baixo
+            suavizacao (float): Peso de cada nova latência na média móvel exponencial
+            pular_a_cada (int): A partir de pulando_quadros, processa 1 quadro a cada N
+            nivel_maximo (int): Último degrau usado
+        """
+        self.orcamento = orcamento
+        self.fila_maxima = fila_maxima
+        self.quadros_para_subir = quadros_para_subir
+        self.quadros_para_descer = quadros_para_descer
+        self.fator_recuperacao = fator_recuperacao
+        self.suavizacao = suavizacao
+        self.pular_a_cada = max(2, pular_a_cada)
+        self.nivel_maximo = min(nivel_maximo, len(NIVEIS_CARGA) - 1)
+
+        self.nivel = NIVEL_NORMAL
+        self.latencia_media = None
+        self._acima = 0
+        self._abaixo = 0
+        self._quadros = 0
+        # Degrau que volta a sobrecarregar logo depois de uma descida espera mais para descer de novo
+        self._espera_descer = 1
+        self._quadros_desde_descida = None
+
+        self.transicoes = []
+        self.estatisticas = {'quadros_registrados': 0, 'quadros_pulados': 0,
+                             'quadros_por_nivel': {nome: 0 for nome in NIVEIS_CARGA}}
+
+    @property
+    def nome_nivel(self):
+        return NIVEIS_CARGA[self.nivel]
+
+    def _orcamento_nivel(self, nivel):
+        """Pulando quadros, cada quadro processado tem o tempo de pular_a_cada capturas"""
+        return self.orcamento * (self.pular_a_cada if nivel >= NIVEL_PULAR_QUADROS else 1)
+
+    def deve_processar(self):
+        """Chamado a cada quadro capturado: False para os quadros descartados pelo degrau atual"""
+        self._quadros += 1
+        if self.nivel >= NIVEL_PULAR_QUADROS and self._quadros % self.pular_a_cada:
+            self.estatisticas['quadros_pulados'] += 1
+            return False
+        return True
+
+    def registrar(self, latencia, fila=0):
+        """
+        Registra a latência de um quadro processado e a fila atual
+
+        Returns:
+            int: Novo nível, se houve transição; senão None
+        """
+        self.estatisticas['quadros_registrados'] += 1
+        self.estatisticas['quadros_por_nivel'][self.nome_nivel] += 1
+        if self.latencia_media is None:
+            self.latencia_media = latencia
+        else:
+            self.latencia_media += self.suavizacao * (latencia - self.latencia_media)
+        if self._quadros_desde_descida is not None:
+            self._quadros_desde_descida += 1
+
+        orcamento = self._orcamento_nivel(self.nivel)
+        if self.latencia_media > orcamento or fila > self.fila_maxima:
+            self._acima += 1
+            self._abaixo = 0
+            if self._acima >= self.quadros_para_subir and self.nivel < self.nivel_maximo:
+                if self._quadros_desde_descida is not None and self._quadros_desde_descida <= self.quadros_para_descer:
+                    self._espera_descer = min(16, self._espera_descer * 2)
+                motivo = (f"latência {self.latencia_media:.3f}s > orçamento {orcamento:.3f}s"
+                          if self.latencia_media > orcamento else f"fila {fila} > {self.fila_maxima}")
+                return self._mudar(self.nivel + 1, motivo, fila)
+            return None
+
+        self._acima = 0
+        if self.nivel > NIVEL_NORMAL and fila == 0 and \
+                self.latencia_media < self.fator_recuperacao * self._orcamento_nivel(self.nivel - 1):
+            self._abaixo += 1
+            if self._abaixo >= self.quadros_para_descer * self._espera_descer:
+                if self._quadros_desde_descida is not None and self._quadros_desde_descida > 4 * self.quadros_para_descer:
+                    self._espera_descer = 1
+                self._quadros_desde_descida = 0
+                return self._mudar(self.nivel - 1, f"latência {self.latencia_media:.3f}s com folga", fila)
+        else:
+            self._abaixo = 0
+        return None
+
+    def _mudar(self, nivel, motivo, fila):
+        anterior = self.nome_nivel
+        self.transicoes.append({
+            'timestamp': datetime.now().isoformat(),
+            'de': anterior,
+            'para': NIVEIS_CARGA[nivel],
+            'motivo': motivo,
+            'latencia_media': round(self.latencia_media, 4),
+            'fila': fila
+        })
+        subiu = nivel > self.nivel
+        self.nivel = nivel
+        # A média do degrau anterior não vale para o novo: recomeça com o próximo quadro
+        self.latencia_media = None
+        self._acima = self._abaixo = 0
+        print(f"{'⚠️' if subiu else '✅'} Controle de carga: {anterior} → {self.nome_nivel} ({motivo})")
+        return nivel
+
+    def obter_estatisticas(self):
+        return dict(self.estatisticas, nivel=self.nivel, nome_nivel=self.nome_nivel,
+                    orcamento_segundos=self.orcamento, transicoes=list(self.transicoes))
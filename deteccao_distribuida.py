@@ -0,0 +1,549 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Detecção Distribuída
+O processo de captura divide os quadros entre M trabalhadores (nesta ou em
+outras máquinas) por TCP ou socket Unix: quadros comprimidos, controle de
+fluxo por créditos, batimentos para achar trabalhadores travados, reenvio
+dos quadros de quem cai e resultados na ordem de envio.
+
+Trabalhador:  python deteccao_distribuida.py --escutar 127.0.0.1:9100
+"""
+
+import argparse
+import collections
+import json
+import os
+import queue
+import socket
+import struct
+import threading
+import time
+import zlib
+
+import cv2
+import numpy as np
+
+from controle_carga import NIVEL_PULAR_QUADROS, nivel_carga_maximo
+from deteccoes import serializar_json
+from pool_detectores import MAX_TENTATIVAS
+
+COMPRESSOES = ('jpg', 'png', 'zlib', 'nenhuma')
+
+# Cada mensagem: tamanho do cabeçalho JSON e dos dados binários, cabeçalho, dados
+_TAMANHOS = struct.Struct('!II')
+
+
+def _endereco_socket(endereco):
+    """'unix:///caminho', 'tcp://host:porta' ou 'host:porta' -> (família, endereço do socket)"""
+    if endereco.startswith('unix://'):
+        return socket.AF_UNIX, endereco[len('unix://'):]
+    host, _, porta = endereco.split('://', 1)[-1].rpartition(':')
+    return socket.AF_INET, (host or '127.0.0.1', int(porta))
+
+
+def _enviar_mensagem(conexao, cabecalho, dados=b''):
+    bruto = json.dumps(cabecalho).encode('utf-8')
+    conexao.sendall(_TAMANHOS.pack(len(bruto), len(dados)) + bruto)
+    if dados:
+        conexao.sendall(dados)
+
+
+def _receber_exato(conexao, n):
+    buffer = bytearray(n)
+    visao = memoryview(buffer)
+    lidos = 0
+    while lidos < n:
+        recebidos = conexao.recv_into(visao[lidos:])
+        if not recebidos:
+            raise ConnectionError("conexão fechada")
+        lidos += recebidos
+    return buffer
+
+
+def _receber_mensagem(conexao):
+    tamanho_cabecalho, tamanho_dados = _TAMANHOS.unpack(_receber_exato(conexao, _TAMANHOS.size))
+    cabecalho = json.loads(_receber_exato(conexao, tamanho_cabecalho))
+    return cabecalho, (_receber_exato(conexao, tamanho_dados) if tamanho_dados else b'')
+
+
+def comprimir_quadro(imagem, compressao='jpg', qualidade=90):
+    """
+    Returns:
+        tuple: (bytes, metadados para descomprimir_quadro)
+    """
+    if compressao in ('jpg', 'png'):
+        parametros = [cv2.IMWRITE_JPEG_QUALITY, qualidade] if compressao == 'jpg' else [cv2.IMWRITE_PNG_COMPRESSION, 1]
+        ok, dados = cv2.imencode(f".{compressao}", imagem, parametros)
+        if not ok:
+            raise ValueError(f"falha ao codificar o quadro em {compressao}")
+        return dados.tobytes(), {'compressao': compressao}
+    imagem = np.ascontiguousarray(imagem)
+    dados = zlib.compress(imagem, 1) if compressao == 'zlib' else imagem.tobytes()
+    return dados, {'compressao': compressao, 'formato': list(imagem.shape), 'tipo': imagem.dtype.str}
+
+
+def descomprimir_quadro(dados, metadados):
+    if metadados['compressao'] in ('jpg', 'png'):
+        return cv2.imdecode(np.frombuffer(dados, np.uint8), cv2.IMREAD_COLOR)
+    if metadados['compressao'] == 'zlib':
+        dados = zlib.decompress(dados)
+    return np.frombuffer(dados, dtype=metadados['tipo']).reshape(metadados['formato'])
+
+
+class TrabalhadorDistribuido:
+    def __init__(self, endereco, config=None, creditos=2, intervalo_batimento=1.0, timeout_coordenador=10.0):
+        """
+        Args:
+            endereco (str): Onde escutar: 'host:porta' ou 'unix:///caminho'
+            config (dict): Configuração do DetectorAvancado deste trabalhador
+            creditos (int): Quadros que o coordenador pode mandar sem esperar resultado
+            intervalo_batimento (float): Segundos entre batimentos enviados ao coordenador
+            timeout_coordenador (float): Sem nenhuma mensagem do coordenador por esse tempo, encerra a sessão
+        """
+        from detector_avancado import DetectorAvancado
+
+        self.endereco = endereco
+        self.creditos = creditos
+        self.intervalo_batimento = intervalo_batimento
+        self.timeout_coordenador = timeout_coordenador
+        self.detector = DetectorAvancado(config)
+
+        familia, alvo = _endereco_socket(endereco)
+        if familia == socket.AF_UNIX and os.path.exists(alvo):
+            os.unlink(alvo)
+        self._servidor = socket.socket(familia, socket.SOCK_STREAM)
+        if familia == socket.AF_INET:
+            self._servidor.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._servidor.bind(alvo)
+        self._servidor.listen(1)
+
+    def executar(self):
+        """Atende um coordenador por vez, até Ctrl+C"""
+        print(f"🚀 Trabalhador de detecção em {self.endereco} ({self.creditos} créditos)")
+        try:
+            while True:
+                conexao, _ = self._servidor.accept()
+                self._atender(conexao)
+        except KeyboardInterrupt:
+            print("\n🛑 Trabalhador interrompido pelo usuário")
+        finally:
+            self._servidor.close()
+
+    def _atender(self, conexao):
+        if conexao.family != socket.AF_UNIX:
+            conexao.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        conexao.settimeout(self.timeout_coordenador)
+        trava = threading.Lock()
+        parar = threading.Event()
+        tarefas = queue.Queue()
+
+        def ler():
+            # Lê sempre, para o coordenador nunca ficar preso num sendall enquanto detectamos
+            try:
+                while True:
+                    tarefas.put(_receber_mensagem(conexao))
+            except (OSError, ValueError):
+                tarefas.put(None)
+
+        def bater():
+            while not parar.wait(self.intervalo_batimento):
+                try:
+                    with trava:
+                        _enviar_mensagem(conexao, {'tipo': 'batimento'})
+                except OSError:
+                    return
+
+        try:
+            with trava:
+                _enviar_mensagem(conexao, {'tipo': 'ola', 'creditos': self.creditos,
+                                           'modelo_carregado': self.detector.modelo_carregado,
+                                           'nivel_carga_maximo': nivel_carga_maximo(self.detector.config)})
+            threading.Thread(target=ler, daemon=True).start()
+            threading.Thread(target=bater, daemon=True).start()
+            while True:
+                mensagem = tarefas.get()
+                if mensagem is None:
+                    break
+                cabecalho, dados = mensagem
+                if cabecalho['tipo'] == 'fim':
+                    break
+                if cabecalho['tipo'] == 'carga':
+                    self.detector.aplicar_nivel_carga(cabecalho['nivel'])
+                elif cabecalho['tipo'] == 'quadro':
+                    try:
+                        resultado = self.detector.detectar_frame(descomprimir_quadro(dados, cabecalho))
+                        resposta = {'tipo': 'resultado', 'seq': cabecalho['seq']}
+                        corpo = json.dumps(dict(resultado), ensure_ascii=False, default=serializar_json).encode('utf-8')
+                    except Exception as e:
+                        resposta, corpo = {'tipo': 'erro', 'seq': cabecalho['seq'], 'erro': str(e)}, b''
+                    with trava:
+                        _enviar_mensagem(conexao, resposta, corpo)
+        except OSError:
+            pass
+        finally:
+            parar.set()
+            conexao.close()
+
+
+class _Conexao:
+    """Socket para um trabalhador, com threads de envio e de recepção"""
+
+    def __init__(self, indice, geracao, endereco, eventos, intervalo_batimento, timeout):
+        familia, alvo = _endereco_socket(endereco)
+        self.socket = socket.socket(familia, socket.SOCK_STREAM)
+        self.socket.settimeout(timeout)
+        self.socket.connect(alvo)
+        if familia == socket.AF_INET:
+            self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.socket.settimeout(None)
+        self.indice = indice
+        self.geracao = geracao
+        self.intervalo_batimento = intervalo_batimento
+        self._eventos = eventos
+        self._saida = queue.Queue()
+        self._fechada = False
+        self._thread_envio = threading.Thread(target=self._enviar, daemon=True)
+        self._thread_envio.start()
+        threading.Thread(target=self._receber, daemon=True).start()
+
+    def enviar(self, cabecalho, dados=b''):
+        self._saida.put((cabecalho, dados))
+
+    def _falhar(self, motivo):
+        if not self._fechada:
+            self._eventos.put(('falha', self.indice, self.geracao, motivo))
+
+    def _enviar(self):
+        try:
+            while True:
+                try:
+                    mensagem = self._saida.get(timeout=self.intervalo_batimento)
+                except queue.Empty:
+                    mensagem = ({'tipo': 'batimento'}, b'')  # ocioso: avisa que o coordenador está vivo
+                if mensagem is None:
+                    return
+                _enviar_mensagem(self.socket, *mensagem)
+        except OSError as e:
+            self._falhar(f"envio: {e}")
+
+    def _receber(self):
+        try:
+            while True:
+                cabecalho, dados = _receber_mensagem(self.socket)
+                self._eventos.put(('mensagem', self.indice, self.geracao, (cabecalho, dados)))
+        except (OSError, ValueError) as e:
+            self._falhar(f"recepção: {e}")
+
+    def fechar(self, avisar=True):
+        self._fechada = True
+        if avisar:
+            self.enviar({'tipo': 'fim'})
+        self._saida.put(None)
+        if avisar:
+            self._thread_envio.join(timeout=1)
+        try:
+            self.socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.socket.close()
+
+
+class CoordenadorDistribuido:
+    def __init__(self, enderecos, compressao='jpg', qualidade=90, quadros_em_voo=None,
+                 intervalo_batimento=1.0, timeout_batimento=5.0, intervalo_reconexao=2.0):
+        """
+        Args:
+            enderecos (list): Trabalhadores ('host:porta' ou 'unix:///caminho')
+            compressao (str): 'jpg' (padrão), 'png', 'zlib' (sem perdas) ou 'nenhuma'
+            qualidade (int): Qualidade JPEG
+            quadros_em_voo (int): Quadros enviados sem resultado antes de enviar() bloquear
+                (padrão: 4 por trabalhador)
+            intervalo_batimento (float): Segundos entre batimentos nos dois sentidos
+            timeout_batimento (float): Trabalhador sem mensagem por esse tempo é dado como travado
+            intervalo_reconexao (float): Espera entre tentativas de reconectar a um trabalhador
+
+        Mesma interface do PoolDetectores: enviar, prontos, proximo, detectar_frames, fechar.
+        """
+        if compressao not in COMPRESSOES:
+            raise ValueError(f"compressao inválida: {compressao!r} (use {', '.join(COMPRESSOES)})")
+        self.enderecos = list(enderecos)
+        self.compressao = compressao
+        self.qualidade = qualidade
+        self.intervalo_batimento = intervalo_batimento
+        self.timeout_batimento = timeout_batimento
+        self.intervalo_reconexao = intervalo_reconexao
+        self.max_em_voo = quadros_em_voo or 4 * len(self.enderecos)
+
+        n = len(self.enderecos)
+        self._eventos = queue.Queue()
+        self._conexoes = [None] * n
+        self._geracoes = [0] * n
+        self._creditos = [0] * n
+        self._ultimo_sinal = [0.0] * n
+        self._proxima_reconexao = [0.0] * n
+        self._niveis_maximos = [None] * n  # último degrau útil informado no 'ola' de cada trabalhador
+        self._nivel_carga = 0
+        self._fechado = False
+
+        self._proximo_seq = 0
+        self._proximo_entregar = 0
+        self._aguardando = collections.deque()  # seqs esperando crédito
+        self._pendentes = {}                    # seq -> [trabalhador, dados, metadados, tentativas]
+        self._prontos = {}
+
+        self.estatisticas = {
+            'trabalhadores': n,
+            'quadros_enviados': 0,
+            'quadros_concluidos': 0,
+            'quadros_reenviados': 0,
+            'quadros_descartados': 0,
+            'erros': 0,
+            'falhas_trabalhadores': 0,
+            'reconexoes': 0,
+            'bytes_brutos': 0,
+            'bytes_enviados': 0
+        }
+
+        for i in range(n):
+            self._conectar(i)
+        if not any(self._conexoes):
+            raise ConnectionError(f"Nenhum trabalhador disponível em {', '.join(self.enderecos)}")
+
+    @property
+    def processos(self):
+        return len(self.enderecos)
+
+    @property
+    def em_voo(self):
+        return self._proximo_seq - self._proximo_entregar
+
+    @property
+    def nivel_carga_maximo(self):
+        """
+        Último degrau de carga útil em todos os trabalhadores conectados
+
+        Cada trabalhador roda com a própria configuração do detector; enquanto
+        nenhum informou o seu, a escada para em pulando_quadros.
+        """
+        niveis = [nivel for nivel, conexao in zip(self._niveis_maximos, self._conexoes)
+                  if nivel is not None and conexao is not None]
+        return min(niveis) if niveis else NIVEL_PULAR_QUADROS
+
+    def _conectar(self, i):
+        try:
+            self._geracoes[i] += 1
+            self._conexoes[i] = _Conexao(i, self._geracoes[i], self.enderecos[i], self._eventos,
+                                         self.intervalo_batimento, timeout=min(1.0, self.timeout_batimento))
+        except OSError as e:
+            if self._geracoes[i] == 1:  # nas reconexões, a queda já foi avisada
+                print(f"⚠️ Trabalhador {self.enderecos[i]} indisponível: {e}")
+            self._proxima_reconexao[i] = time.monotonic() + self.intervalo_reconexao
+            return False
+        self._creditos[i] = 0  # chegam no 'ola'
+        self._ultimo_sinal[i] = time.monotonic()
+        if self._nivel_carga:
+            self._conexoes[i].enviar({'tipo': 'carga', 'nivel': self._nivel_carga})
+        return True
+
+    def _derrubar(self, i, motivo):
+        """Fecha a conexão com um trabalhador e devolve os quadros dele à fila"""
+        print(f"⚠️ Trabalhador {self.enderecos[i]} caiu ({motivo}), reenviando os quadros dele")
+        self._conexoes[i].fechar(avisar=False)
+        self._conexoes[i] = None
+        self._creditos[i] = 0
+        self._proxima_reconexao[i] = time.monotonic() + self.intervalo_reconexao
+        self.estatisticas['falhas_trabalhadores'] += 1
+
+        devolvidos = []
+        for seq, pendente in sorted(self._pendentes.items()):
+            if pendente[0] != i:
+                continue
+            pendente[0] = None
+            pendente[3] += 1
+            if pendente[3] > MAX_TENTATIVAS:
+                self.estatisticas['quadros_descartados'] += 1
+                self._concluir(seq, self._resultado_erro(f"trabalhador caiu {MAX_TENTATIVAS}x neste quadro"))
+            else:
+                devolvidos.append(seq)
+        # Os quadros devolvidos são mais antigos que os que esperam crédito: vão na frente
+        self._aguardando.extendleft(reversed(devolvidos))
+        self.estatisticas['quadros_reenviados'] += len(devolvidos)
+
+    def _verificar(self):
+        agora = time.monotonic()
+        for i, conexao in enumerate(self._conexoes):
+            if conexao is not None:
+                if agora - self._ultimo_sinal[i] > self.timeout_batimento:
+                    self._derrubar(i, f"sem batimento há {agora - self._ultimo_sinal[i]:.1f}s")
+            elif not self._fechado and agora >= self._proxima_reconexao[i]:
+                if self._conectar(i):
+                    self.estatisticas['reconexoes'] += 1
+
+    def _despachar(self):
+        """Envia quadros aguardando para os trabalhadores com crédito (o de mais crédito primeiro)"""
+        while self._aguardando:
+            i = max(range(len(self._conexoes)), key=self._creditos.__getitem__)
+            if self._creditos[i] <= 0:
+                return
+            seq = self._aguardando.popleft()
+            pendente = self._pendentes.get(seq)
+            if pendente is None:
+                continue
+            pendente[0] = i
+            self._creditos[i] -= 1
+            self._conexoes[i].enviar(dict(pendente[2], tipo='quadro', seq=seq), pendente[1])
+
+    @staticmethod
+    def _resultado_erro(mensagem):
+        from detector_avancado import DetectorAvancado
+        resultado = DetectorAvancado._resultado_vazio(None)
+        resultado['erro'] = mensagem
+        return resultado
+
+    def _concluir(self, seq, resultado):
+        if self._pendentes.pop(seq, None) is None:
+            return  # resultado atrasado de um quadro já reenviado e concluído
+        self._prontos[seq] = resultado
+        self.estatisticas['quadros_concluidos'] += 1
+
+    def _tratar(self, evento):
+        tipo, i, geracao, valor = evento
+        if geracao != self._geracoes[i] or self._conexoes[i] is None:
+            return  # conexão antiga, já derrubada
+        if tipo == 'falha':
+            self._derrubar(i, valor)
+            return
+        cabecalho, dados = valor
+        self._ultimo_sinal[i] = time.monotonic()
+        if cabecalho['tipo'] == 'ola':
+            self._creditos[i] = cabecalho['creditos']
+            self._niveis_maximos[i] = cabecalho.get('nivel_carga_maximo', NIVEL_PULAR_QUADROS)
+        elif cabecalho['tipo'] == 'resultado':
+            self._creditos[i] += 1
+            self._concluir(cabecalho['seq'], json.loads(dados))
+        elif cabecalho['tipo'] == 'erro':
+            self._creditos[i] += 1
+            self.estatisticas['erros'] += 1
+            self._concluir(cabecalho['seq'], self._resultado_erro(cabecalho['erro']))
+
+    def _coletar(self, timeout):
+        """Trata as mensagens dos trabalhadores; retorna False se nada chegou no tempo"""
+        try:
+            self._tratar(self._eventos.get(timeout=timeout))
+            chegou = True
+        except queue.Empty:
+            chegou = False
+        while True:
+            try:
+                self._tratar(self._eventos.get_nowait())
+            except queue.Empty:
+                break
+        self._verificar()
+        self._despachar()
+        return chegou
+
+    def enviar(self, imagem):
+        """
+        Comprime e envia um quadro BGR; bloqueia só se quadros_em_voo estiverem sem resultado
+
+        Returns:
+            int: Número de sequência do quadro
+        """
+        while self.em_voo >= self.max_em_voo:
+            self._coletar(timeout=0.1)
+        dados, metadados = comprimir_quadro(imagem, self.compressao, self.qualidade)
+        seq = self._proximo_seq
+        self._proximo_seq += 1
+        self._pendentes[seq] = [None, dados, metadados, 0]
+        self._aguardando.append(seq)
+        self.estatisticas['quadros_enviados'] += 1
+        self.estatisticas['bytes_brutos'] += imagem.nbytes
+        self.estatisticas['bytes_enviados'] += len(dados)
+        self._coletar(timeout=0)
+        return seq
+
+    def prontos(self):
+        """Resultados já concluídos, na ordem de envio, sem bloquear: lista de (seq, resultado)"""
+        self._coletar(timeout=0)
+        entregues = []
+        while self._proximo_entregar in self._prontos:
+            entregues.append((self._proximo_entregar, self._prontos.pop(self._proximo_entregar)))
+            self._proximo_entregar += 1
+        return entregues
+
+    def proximo(self, timeout=None):
+        """Próximo resultado na ordem de envio (bloqueia); None se nada foi enviado ou o tempo acabou"""
+        limite = None if timeout is None else time.monotonic() + timeout
+        while self._proximo_entregar not in self._prontos:
+            if self._proximo_entregar >= self._proximo_seq:
+                self.verificar()
+                return None
+            if limite is not None and time.monotonic() >= limite:
+                return None
+            self._coletar(timeout=0.1)
+        resultado = self._prontos.pop(self._proximo_entregar)
+        self._proximo_entregar += 1
+        return resultado
+
+    def verificar(self):
+        """
+        Trata batimentos, quedas e reconexões sem enviar nem esperar nada; chame
+        periodicamente quando o coordenador ficar ocioso (enviar, prontos e
+        proximo já fazem isso)
+        """
+        self._coletar(timeout=0)
+
+    def detectar_frames(self, imagens):
+        """Gera os resultados de uma sequência de quadros, na ordem, mantendo os trabalhadores ocupados"""
+        for imagem in imagens:
+            self.enviar(imagem)
+            for _, resultado in self.prontos():
+                yield resultado
+        while self._proximo_entregar < self._proximo_seq:
+            yield self.proximo()
+
+    def aplicar_nivel_carga(self, nivel):
+        """Repassa um degrau do controle de carga a todos os trabalhadores"""
+        self._nivel_carga = nivel
+        for conexao in self._conexoes:
+            if conexao is not None:
+                conexao.enviar({'tipo': 'carga', 'nivel': nivel})
+
+    def fechar(self):
+        if self._fechado:
+            return
+        self._fechado = True
+        for i, conexao in enumerate(self._conexoes):
+            if conexao is not None:
+                conexao.fechar()
+                self._conexoes[i] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.fechar()
+
+    def obter_estatisticas(self):
+        return dict(self.estatisticas, em_voo=self.em_voo,
+                    trabalhadores_ativos=sum(c is not None for c in self._conexoes),
+                    taxa_compressao=round(self.estatisticas['bytes_brutos'] / max(1, self.estatisticas['bytes_enviados']), 2))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Trabalhador de detecção distribuída")
+    parser.add_argument('--escutar', default='127.0.0.1:9100', help="host:porta ou unix:///caminho")
+    parser.add_argument('--creditos', type=int, default=2, help="Quadros aceitos antes de devolver um resultado")
+    parser.add_argument('--config', default=None, help="JSON com a configuração do DetectorAvancado")
+    args = parser.parse_args(argv)
+
+    config = None
+    if args.config:
+        with open(args.config, encoding='utf-8') as f:
+            config = json.load(f)
+    TrabalhadorDistribuido(args.escutar, config, creditos=args.creditos).executar()
+
+
+if __name__ == "__main__":
+    main()
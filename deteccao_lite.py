@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Detecção Lite (sem modelo)
+Propostas de objetos por componentes conectados das bordas de um quadro
+reduzido, com filtros de área e proporção aplicados sobre os arrays.
+Não inventa pessoas: sem modelo, só reporta regiões com estrutura visível.
+"""
+
+import cv2
+import numpy as np
+
+# 'lite' = propostas por bordas (padrão); 'simulado' = detecção simulada antiga (com pessoa fixa)
+MODOS_SEM_MODELO = ('lite', 'simulado')
+
+TIPO_PROPOSTA = 'unknown_object'
+
+
+class DetectorLite:
+    def __init__(self, largura=320, area_minima=0.002, area_maxima=0.6, lado_minimo=4,
+                 proporcao_minima=0.2, proporcao_maxima=5.0, max_deteccoes=8):
+        """
+        Args:
+            largura (int): Largura do quadro reduzido onde as bordas são calculadas
+            area_minima, area_maxima (float): Fração do quadro ocupada pela caixa de um blob
+            lado_minimo (int): Lado mínimo da caixa, em pixels do quadro reduzido
+            proporcao_minima, proporcao_maxima (float): Limites de altura/largura da caixa
+            max_deteccoes (int): Mantém só os maiores blobs
+        """
+        self.largura = largura
+        self.area_minima = area_minima
+        self.area_maxima = area_maxima
+        self.lado_minimo = lado_minimo
+        self.proporcao_minima = proporcao_minima
+        self.proporcao_maxima = proporcao_maxima
+        self.max_deteccoes = max_deteccoes
+        self._nucleo = np.ones((3, 3), np.uint8)
+
+    def _reduzir(self, imagem):
+        """
+        Cinza reduzido e fator quadro/reduzido
+
+        Amostra por vizinho mais próximo no dobro da largura final antes da
+        média por área: INTER_AREA direto de 1080p custa ~3,5 ms sozinho.
+        """
+        altura_img, largura_img = imagem.shape[:2]
+        largura = min(self.largura, largura_img)
+        fator = largura_img / largura
+        altura = max(1, int(round(altura_img / fator)))
+        if largura_img > 2 * largura:
+            imagem = cv2.resize(imagem, (2 * largura, 2 * altura), interpolation=cv2.INTER_NEAREST)
+        if imagem.ndim == 3:
+            imagem = cv2.cvtColor(imagem, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(imagem, (largura, altura), interpolation=cv2.INTER_AREA), fator
+
+    def detectar(self, imagem):
+        """
+        Returns:
+            tuple: (caixas N x 4 em xywh no espaço do quadro, confiancas,
+                intensidade de bordas em % do quadro reduzido)
+        """
+        cinza, fator = self._reduzir(imagem)
+        bordas = cv2.Canny(cinza, 50, 150)
+        intensidade = 100.0 * cv2.countNonZero(bordas) / bordas.size
+
+        # Bordas próximas viram um só blob
+        mascara = cv2.dilate(bordas, self._nucleo)
+        n, _, stats, _ = cv2.connectedComponentsWithStats(mascara, connectivity=8)
+        stats = stats[1:n]
+        largura, altura = stats[:, cv2.CC_STAT_WIDTH], stats[:, cv2.CC_STAT_HEIGHT]
+
+        area = (largura * altura) / cinza.size
+        proporcao = altura / np.maximum(largura, 1)
+        validos = ((area >= self.area_minima) & (area <= self.area_maxima) &
+                   (largura >= self.lado_minimo) & (altura >= self.lado_minimo) &
+                   (proporcao >= self.proporcao_minima) & (proporcao <= self.proporcao_maxima))
+        stats, area = stats[validos], area[validos]
+        maiores = np.argsort(-area, kind='stable')[:self.max_deteccoes]
+
+        caixas = np.round(stats[maiores, :4] * fator).astype(np.int32).reshape(-1, 4)
+        # Mesma escala de confiança dos objetos da detecção simulada (área em pixels do quadro)
+        confiancas = np.minimum(0.8, 0.4 + caixas[:, 2] * caixas[:, 3] / 15000).astype(np.float32)
+        return caixas, confiancas, intensidade
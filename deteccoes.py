@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Detecções Compactas
+Detecções de um quadro guardadas em arrays (caixas, confianças, classes,
+trilhas), com visões em dicionário criadas só quando alguém as lê e
+conversão para JSON no momento de salvar o relatório
+"""
+
+from datetime import datetime
+
+import numpy as np
+
+from backends_inferencia import CLASSES_COCO, nome_classe
+
+CHAVES_DETECCAO = ('id', 'tipo', 'confianca', 'posicao', 'timestamp')
+
+
+class Deteccao:
+    """Visão de uma detecção de DeteccoesQuadro com a interface do dicionário do relatório"""
+
+    __slots__ = ('_quadro', '_indice')
+
+    def __init__(self, quadro, indice):
+        self._quadro = quadro
+        self._indice = indice
+
+    def keys(self):
+        if self._quadro.trilhas[self._indice] >= 0:
+            return CHAVES_DETECCAO + ('trilha_id',)
+        return CHAVES_DETECCAO
+
+    def __getitem__(self, chave):
+        quadro, i = self._quadro, self._indice
+        if chave == 'posicao':
+            x, y, largura, altura = quadro.caixas[i].tolist()
+            return {'x': x, 'y': y, 'largura': largura, 'altura': altura}
+        if chave == 'tipo':
+            return quadro.tipo(i)
+        if chave == 'confianca':
+            return round(float(quadro.confiancas[i]), 2)
+        if chave == 'id':
+            return f"{quadro.tipo(i)}_{int(quadro.indices[i])}"
+        if chave == 'timestamp':
+            return quadro.timestamp
+        if chave == 'trilha_id' and quadro.trilhas[i] >= 0:
+            return int(quadro.trilhas[i])
+        raise KeyError(chave)
+
+    def get(self, chave, padrao=None):
+        try:
+            return self[chave]
+        except KeyError:
+            return padrao
+
+    def __contains__(self, chave):
+        return chave in self.keys()
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def items(self):
+        return [(chave, self[chave]) for chave in self.keys()]
+
+    def para_dict(self):
+        return dict(self.items())
+
+    def __eq__(self, outro):
+        if isinstance(outro, (Deteccao, dict)):
+            return self.para_dict() == dict(outro.items())
+        return NotImplemented
+
+    def __repr__(self):
+        return f"Deteccao({self.para_dict()!r})"
+
+
+class DeteccoesQuadro:
+    """
+    Detecções de um quadro em arrays paralelos
+
+    Uma captura guarda quatro arrays e um instante, em vez de um dicionário
+    com sub-dicionário de posição e texto ISO por detecção. Iterar ou indexar
+    devolve visões Deteccao, compatíveis com o formato em dicionário.
+    """
+
+    __slots__ = ('caixas', 'confiancas', 'classes', 'indices', 'trilhas', 'nomes', 'instante')
+
+    def __init__(self, caixas, confiancas, classes, indices=None, trilhas=None,
+                 nomes=CLASSES_COCO, instante=None):
+        """
+        Args:
+            caixas: N x 4 (x, y, largura, altura) em pixels do quadro
+            confiancas, classes: N valores cada
+            indices: Posição de cada detecção no quadro (usada no id); padrão 0..N-1
+            trilhas: ID de trilha por detecção (-1 = sem trilha)
+            nomes: Nomes das classes do modelo
+            instante (float): time.time() da detecção (padrão: agora)
+        """
+        self.caixas = np.asarray(caixas, dtype=np.int32).reshape(-1, 4)
+        n = len(self.caixas)
+        self.confiancas = np.asarray(confiancas, dtype=np.float32).reshape(n)
+        self.classes = np.asarray(classes, dtype=np.int16).reshape(n)
+        self.indices = (np.arange(n, dtype=np.int32) if indices is None
+                        else np.asarray(indices, dtype=np.int32).reshape(n))
+        self.trilhas = (np.full(n, -1, dtype=np.int32) if trilhas is None
+                        else np.asarray(trilhas, dtype=np.int32).reshape(n))
+        self.nomes = nomes
+        self.instante = datetime.now().timestamp() if instante is None else instante
+
+    @classmethod
+    def vazio(cls, nomes=CLASSES_COCO):
+        return cls(np.empty((0, 4), np.int32), np.empty(0, np.float32), np.empty(0, np.int16), nomes=nomes)
+
+    def selecionar(self, mascara):
+        """Subconjunto (máscara booleana ou índices), mantendo ids e instante"""
+        return DeteccoesQuadro(self.caixas[mascara], self.confiancas[mascara], self.classes[mascara],
+                               self.indices[mascara], self.trilhas[mascara], self.nomes, self.instante)
+
+    @property
+    def timestamp(self):
+        return datetime.fromtimestamp(self.instante).isoformat()
+
+    def tipo(self, i):
+        return nome_classe(int(self.classes[i]), self.nomes)
+
+    def __len__(self):
+        return len(self.caixas)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self.selecionar(i)
+        n = len(self.caixas)
+        if not -n <= i < n:
+            raise IndexError(i)
+        return Deteccao(self, i % n)
+
+    def __iter__(self):
+        return (Deteccao(self, i) for i in range(len(self.caixas)))
+
+    def para_lista(self):
+        """Lista de dicionários no formato do relatório"""
+        return [deteccao.para_dict() for deteccao in self]
+
+    def __eq__(self, outro):
+        if isinstance(outro, (DeteccoesQuadro, list)):
+            return len(self) == len(outro) and all(a == b for a, b in zip(self, outro))
+        return NotImplemented
+
+    def __repr__(self):
+        return f"DeteccoesQuadro({len(self)} detecções)"
+
+
+def serializar_json(obj):
+    """Para usar como json.dump(..., default=serializar_json)"""
+    if isinstance(obj, DeteccoesQuadro):
+        return obj.para_lista()
+    if isinstance(obj, Deteccao):
+        return obj.para_dict()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Objeto do tipo {type(obj).__name__} não é serializável em JSON")
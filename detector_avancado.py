@@ -10,99 +10,316 @@ import numpy as np
 import os
 from datetime import datetime
 import json
-from functools import lru_cache
 import math
+from preprocessamento import BuffersEntrada, grade_tiles, resolver_tamanho_entrada
+from backends_inferencia import (CLASSES_COCO, FiltroClasses, criar_backend, criar_backend_modelo, nms_entre_tiles,
+                                 nome_classe, pos_processar)
+from regioes_interesse import AtencaoRecortes, TilesAlterados
+from cache_resultados import CacheResultados, dhash
+from cascata import Cascata
+from deteccao_lite import MODOS_SEM_MODELO, TIPO_PROPOSTA, DetectorLite
+from controle_carga import NIVEL_MODELO_LEVE, NIVEL_NORMAL, NIVEL_RESOLUCAO_REDUZIDA, NIVEL_SEM_ANALISES
+from deteccoes import DeteccoesQuadro, serializar_json
+from trilhas import AgendadorAnalises, RastreadorIoU
+from narrativa import (DESCRICAO_NAO_IDENTIFICADA, ResultadoPreguicoso, codigos_acao, descrever_acao,
+                       gerar_narrativa)
+from analise_vetorizada import (ATIVIDADES_PROPORCAO, MOVIMENTOS_CABECA, MOVIMENTOS_MAOS, POSTURAS,
+                                atividades_por_proporcao, caixas_deteccoes, codigos_atividade,
+                                construir_tabela_atividades, pares_interacao)
+
+# Configuração padrão do detector (sobrescrita pelo dicionário passado ao construtor)
+CONFIG_PADRAO = {
+    # Tamanho de entrada do modelo: 320/416/512/608 ou 'rapido'/'equilibrado'/'detalhado'/'preciso'
+    'tamanho_entrada': 416,
+    
+    # Backend de inferência: 'auto', 'onnxruntime', 'ultralytics' ou 'opencv'
+    'backend': 'auto',
+    'modelo_onnx': 'yolov8n.onnx',
+    'modelo_pt': 'yolov8n.pt',
+    # Threads de inferência (0 = padrão da biblioteca)
+    'num_threads': 0,
+    # Otimização de grafo do ONNX Runtime: 'desativado', 'basico', 'estendido' ou 'completo'
+    'otimizacao_grafo': 'completo',
+    # Precisão do modelo: 'fp32' ou 'int8' (modelo quantizado por quantizar_modelo.py, ONNX Runtime)
+    'precisao': 'fp32',
+    'modelo_int8': 'yolov8n_int8.onnx',
+    
+    # Modo em tiles para quadros acima de 1080p (pessoas pequenas/distantes)
+    'modo_tiles': False,
+    'tile_lado_max': 1920,        # lado máximo de cada tile, em pixels do quadro
+    'tile_sobreposicao': 0.2,     # fração de sobreposição entre tiles vizinhos
+    'tile_max': 6,                # limite de tiles por quadro
+    'tile_quadro_inteiro': True,  # inclui o quadro inteiro no lote (objetos grandes)
+    
+    # Recortes de atenção: entre passes completos, infere só em volta das
+    # detecções anteriores e das regiões com movimento
+    'modo_atencao': False,
+    'atencao_intervalo_completo': 10,  # passe no quadro inteiro a cada N quadros
+    'atencao_margem': 0.5,             # margem relativa em volta de cada região
+    'atencao_max_recortes': 8,         # acima disso, passe completo
+    
+    # Detecção incremental: reinfere só os tiles da tela que mudaram e mantém
+    # as detecções em cache dos demais (tem prioridade sobre modo_atencao)
+    'modo_incremental': False,
+    'incremental_grade': (16, 9),          # colunas x linhas de tiles
+    'incremental_margem_tiles': 1,         # tiles vizinhos reinferidos junto
+    'incremental_fracao_completo': 0.6,    # acima disso, passe completo
+    'incremental_intervalo_completo': 30,  # passe completo a cada N quadros
+    
+    # Cache LRU de resultados por assinatura (dHash) do quadro, para cenas repetidas
+    'cache_resultados': False,
+    'cache_capacidade': 64,         # assinaturas guardadas
+    'cache_tolerancia_hamming': 2,  # bits diferentes aceitos (de 64)
+    'cache_ttl': 300.0,             # validade de cada entrada, em segundos
+    
+    # Cascata: estágio barato decide se o YOLO roda; modelo maior opcional em quadros ambíguos
+    'modo_cascata': False,
+    'cascata_propostas': 'movimento',     # 'movimento' ou 'hog'
+    'cascata_intervalo_verificacao': 15,  # YOLO a cada N quadros mesmo sem propostas
+    'cascata_modelo_grande': None,        # ex.: 'yolov8s.onnx' (None = sem estágio 3)
+    'cascata_limiar_ambiguo': 0.3,        # candidatos entre este valor e o limiar normal
+    
+    # Classes mantidas na decodificação (None = todas) e limiares de confiança por classe;
+    # aplicados antes do NMS, então classes ignoradas nem chegam a virar candidatos
+    'classes_permitidas': None,  # ex.: ['person', 'chair', 'laptop', 'cell phone', 'book']
+    'limiares_classe': {},       # ex.: {'person': 0.4, 'cell phone': 0.6}
+    
+    # Interação pessoa-objeto: distância entre centros < fator x (soma das meias-diagonais)
+    'interacao_fator_distancia': 1.0,
+    
+    # Sem modelo: 'lite' (blobs de bordas num quadro reduzido, nunca inventa pessoas)
+    # ou 'simulado' (detecção simulada antiga, com uma pessoa fixa no centro)
+    'modo_sem_modelo': 'lite',
+    
+    # Análises por pessoa (postura, cabeça, mãos) por trilha: só roda de novo quando a
+    # trilha é nova, a caixa mudou ou o resultado venceu; nos demais quadros reaproveita
+    'analise_por_trilha': False,
+    'trilha_limiar_iou': 0.3,       # IoU mínimo para associar a caixa à trilha anterior
+    'trilha_max_perdidos': 15,      # quadros sem a pessoa antes de encerrar a trilha
+    'trilha_limiar_mudanca': 0.7,   # IoU com a caixa analisada abaixo disto = caixa mudou
+    'trilha_ttl': 2.0,              # validade de uma análise, em segundos
+    
+    # Degraus do controle de carga (controle_carga.py) aplicados por aplicar_nivel_carga
+    'carga_tamanho_reduzido': 320,  # tamanho de entrada a partir de resolucao_reduzida
+    'carga_modelo_leve': None,      # modelo de modelo_leve, ex.: 'yolov8n_int8.onnx'; None = a escada
+                                    # para em pulando_quadros e o modelo normal é mantido
+}
+
+# Quadros com mais pixels que isto usam tiles quando modo_tiles está ativo
+PIXELS_1080P = 1920 * 1080
 
 class DetectorAvancado:
-    def __init__(self):
-        """Inicializa o detector avançado - FORMATO TESTE_DETECTOR_AVANCADO"""
+    def __init__(self, config=None):
+        """Inicializa o detector avançado - FORMATO TESTE_DETECTOR_AVANCADO
+
+        Args:
+            config (dict): Sobrescreve chaves de CONFIG_PADRAO
+        """
         print("🔧 Inicializando Detector Avançado - FORMATO TESTE_DETECTOR_AVANCADO")
         
+        self.config = dict(CONFIG_PADRAO)
+        if config:
+            self.config.update(config)
+        
         # Configurações YOLO
         self.confidence_threshold = 0.5
         self.nms_threshold = 0.4
+        self.tamanho_entrada = resolver_tamanho_entrada(self.config['tamanho_entrada'])
+        
+        # Buffers de entrada pré-alocados por tamanho (reutilizados entre chamadas)
+        self._buffers_entrada = BuffersEntrada()
         
         # Cache para otimização
         self._cache_resolucao = None
+        self._tabela_atividades = None
+        
+        # Trilhas de pessoas e agendador das análises por pessoa
+        self._rastreador = None
+        self._agendador = None
+        if self.config['analise_por_trilha']:
+            self._rastreador = RastreadorIoU(limiar_iou=self.config['trilha_limiar_iou'],
+                                             max_perdidos=self.config['trilha_max_perdidos'])
+            self._agendador = AgendadorAnalises([self._analisar_atividades_lote],
+                                                limiar_mudanca=self.config['trilha_limiar_mudanca'],
+                                                ttl=self.config['trilha_ttl'])
+        
+        # Cache de resultados por assinatura do quadro
+        self._cache_resultados = None
+        if self.config['cache_resultados']:
+            self._cache_resultados = CacheResultados(
+                capacidade=self.config['cache_capacidade'],
+                tolerancia_hamming=self.config['cache_tolerancia_hamming'],
+                ttl=self.config['cache_ttl']
+            )
+        
+        # Estado dos recortes de atenção entre quadros
+        self._atencao = None
+        if self.config['modo_atencao']:
+            self._atencao = AtencaoRecortes(
+                intervalo_completo=self.config['atencao_intervalo_completo'],
+                margem=self.config['atencao_margem'],
+                lado_minimo=self.tamanho_entrada // 2,
+                max_recortes=self.config['atencao_max_recortes']
+            )
+        
+        # Grade de hashes para detecção incremental por tiles alterados
+        self._incremental = None
+        if self.config['modo_incremental']:
+            colunas, linhas = self.config['incremental_grade']
+            self._incremental = TilesAlterados(
+                colunas=colunas,
+                linhas=linhas,
+                margem_tiles=self.config['incremental_margem_tiles'],
+                fracao_completo=self.config['incremental_fracao_completo'],
+                intervalo_completo=self.config['incremental_intervalo_completo']
+            )
         
         # Carrega modelo YOLO
         self.carregar_modelo_yolo()
         
+        # Cascata de detecção (só faz sentido com modelo carregado)
+        self._cascata = None
+        if self.config['modo_cascata'] and self.modelo_carregado:
+            self._cascata = Cascata(
+                metodo=self.config['cascata_propostas'],
+                intervalo_verificacao=self.config['cascata_intervalo_verificacao'],
+                modelo_grande=self.config['cascata_modelo_grande'],
+                limiar_ambiguo=self.config['cascata_limiar_ambiguo'],
+                config=self.config
+            )
+            self._filtro_ambiguo = self._filtro_classes.com_limiar_maximo(self.config['cascata_limiar_ambiguo'])
+        
+        # Detecção sem modelo
+        if self.config['modo_sem_modelo'] not in MODOS_SEM_MODELO:
+            raise ValueError(f"modo_sem_modelo inválido: {self.config['modo_sem_modelo']!r} "
+                             f"(use {', '.join(MODOS_SEM_MODELO)})")
+        self._detector_lite = None
+        if not self.modelo_carregado and self.config['modo_sem_modelo'] == 'lite':
+            self._detector_lite = DetectorLite()
+        
+        # Degrau atual do controle de carga
+        self.nivel_carga = NIVEL_NORMAL
+        self._analises_secundarias = True
+        self._tamanho_entrada_normal = self.tamanho_entrada
+        self._backend_normal = None
+        self._backend_leve = None
+        
         print("✅ Detector Avançado inicializado com sucesso!")
 
     def carregar_modelo_yolo(self):
-        """Carrega modelo YOLO - Suporte para YOLOv8"""
+        """Carrega modelo YOLO pelo backend configurado (ONNX Runtime, ultralytics ou OpenCV DNN)"""
         try:
-            # Primeiro tenta YOLOv8 (ultralytics)
-            yolov8_path = "yolov8n.pt"
-            
-            if os.path.exists(yolov8_path):
-                try:
-                    # Tenta importar ultralytics para YOLOv8
-                    from ultralytics import YOLO
-                    self.net = YOLO(yolov8_path)  # Usa self.net em vez de self.yolo_model
-                    self.modelo_carregado = True
-                    self.yolo_version = 8
-                    print("✅ Modelo YOLOv8 carregado com sucesso")
-                    return
-                except ImportError:
-                    print("⚠️ Ultralytics não instalado, tentando OpenCV DNN...")
-                except Exception as e:
-                    print(f"⚠️ Erro ao carregar YOLOv8: {e}, tentando OpenCV DNN...")
-            
-            # Fallback para YOLOv4/v3 com OpenCV DNN
-            weights_path = "yolov4.weights"
-            config_path = "yolov4.cfg"
-            
-            if not os.path.exists(weights_path):
-                weights_path = "yolov3.weights"
-                config_path = "yolov3.cfg"
-            
-            if not os.path.exists(weights_path):
-                print("⚠️ Arquivos YOLO não encontrados, usando detecção simulada MELHORADA")
-                self.net = None
-                self.output_layers = []
-                self.modelo_carregado = False
-                self.yolo_version = 0
-                return
-            
-            # Carrega rede YOLO com OpenCV DNN
-            self.net = cv2.dnn.readNet(weights_path, config_path)
-            layer_names = self.net.getLayerNames()
-            self.output_layers = [layer_names[i[0] - 1] for i in self.net.getUnconnectedOutLayers()]
-            self.modelo_carregado = True
-            self.yolo_version = 4
-            
-            print("✅ Modelo YOLO (OpenCV DNN) carregado com sucesso")
-            
+            self.backend = criar_backend(self.config)
         except Exception as e:
             print(f"⚠️ Erro ao carregar YOLO: {e}")
+            self.backend = None
+        
+        if self.backend is None:
+            if self.config['modo_sem_modelo'] == 'simulado':
+                print("⚠️ Arquivos YOLO não encontrados, usando detecção simulada MELHORADA")
+            else:
+                print("⚠️ Arquivos YOLO não encontrados, usando detecção lite (sem pessoas)")
             self.net = None
             self.output_layers = []
             self.modelo_carregado = False
             self.yolo_version = 0
+            self.precisao = None
+            self.nomes_classes = CLASSES_COCO
+            self._filtro_classes = None
+            return
+        
+        # Atributos mantidos por compatibilidade com código que inspeciona o detector
+        self.net = self.backend.net
+        self.output_layers = getattr(self.backend, 'output_layers', [])
+        self.modelo_carregado = True
+        self.yolo_version = self.backend.yolo_version
+        self.precisao = self.backend.precisao
+        
+        # Tabela de nomes pré-computada e filtro de classes usado na decodificação
+        self.nomes_classes = tuple(self.backend.nomes_classes or CLASSES_COCO)
+        self._filtro_classes = FiltroClasses(self.confidence_threshold, self.config['classes_permitidas'],
+                                             self.config['limiares_classe'], self.nomes_classes)
+        
+        # Modelos exportados com entrada fixa ditam o tamanho de entrada
+        if self.backend.tamanho_fixo and self.backend.tamanho_fixo != self.tamanho_entrada:
+            print(f"⚠️ Modelo com entrada fixa {self.backend.tamanho_fixo}, ignorando tamanho_entrada={self.tamanho_entrada}")
+            self.tamanho_entrada = self.backend.tamanho_fixo
+
+    def definir_tamanho_entrada(self, valor):
+        """
+        Troca o tamanho de entrada do modelo (número ou nome do modo)
+        
+        Raises:
+            ValueError: O modelo foi exportado com outra entrada fixa
+        """
+        fixo = self.backend.tamanho_fixo if self.backend is not None else None
+        tamanho = fixo if fixo and valor == fixo else resolver_tamanho_entrada(valor)
+        if fixo and tamanho != fixo:
+            raise ValueError(f"Modelo com entrada fixa {fixo}: tamanho_entrada={tamanho} não suportado")
+        self.tamanho_entrada = tamanho
+        self.config['tamanho_entrada'] = self.tamanho_entrada
+        if self._atencao is not None:
+            self._atencao.lado_minimo = self.tamanho_entrada // 2
+            self._atencao.reiniciar()
+        if self._incremental is not None:
+            self._incremental.reiniciar()
+
+    def aplicar_nivel_carga(self, nivel):
+        """
+        Aplica um degrau de controle_carga.NIVEIS_CARGA (cada degrau inclui os anteriores)
+        
+        Pular quadros é decidido por quem chama; aqui só mudam resolução,
+        análises secundárias e modelo.
+        """
+        if nivel == self.nivel_carga:
+            return
+        if self.nivel_carga == NIVEL_NORMAL:
+            self._tamanho_entrada_normal = self.tamanho_entrada
+        self.nivel_carga = nivel
+        
+        # Modelo leve: outro backend. Sem ele, continua no modelo normal; a detecção
+        # lite não serve aqui porque nunca reporta pessoas (ver controle_carga.nivel_carga_maximo)
+        if nivel >= NIVEL_MODELO_LEVE and self.modelo_carregado and self._backend_normal is None:
+            if self._backend_leve is None and self.config['carga_modelo_leve']:
+                self._backend_leve = criar_backend_modelo(self.config['carga_modelo_leve'], self.config)
+            if self._backend_leve is not None:
+                self._backend_normal = self.backend
+                self.backend = self._backend_leve
+            else:
+                print("⚠️ Degrau modelo_leve sem carga_modelo_leve carregado: mantendo o modelo normal")
+        elif nivel < NIVEL_MODELO_LEVE and self._backend_normal is not None:
+            self.backend = self._backend_normal
+            self._backend_normal = None
+        
+        tamanho = self.config['carga_tamanho_reduzido'] if nivel >= NIVEL_RESOLUCAO_REDUZIDA else self._tamanho_entrada_normal
+        if self.backend is not None and self.backend.tamanho_fixo:
+            tamanho = self.backend.tamanho_fixo
+        if tamanho != self.tamanho_entrada:
+            self.definir_tamanho_entrada(tamanho)
+        
+        self._analises_secundarias = nivel < NIVEL_SEM_ANALISES
 
-    @lru_cache(maxsize=100)
-    def _get_class_name(self, class_id):
-        """Cache para nomes de classes COCO"""
-        classes = [
-            'person', 'bicycle', 'car', 'motorbike', 'aeroplane', 'bus', 'train', 'truck',
-            'boat', 'traffic light', 'fire hydrant', 'stop sign', 'parking meter', 'bench',
-            'bird', 'cat', 'dog', 'horse', 'sheep', 'cow', 'elephant', 'bear', 'zebra',
-            'giraffe', 'backpack', 'umbrella', 'handbag', 'tie', 'suitcase', 'frisbee',
-            'skis', 'snowboard', 'sports ball', 'kite', 'baseball bat', 'baseball glove',
-            'skateboard', 'surfboard', 'tennis racket', 'bottle', 'wine glass', 'cup',
-            'fork', 'knife', 'spoon', 'bowl', 'banana', 'apple', 'sandwich', 'orange',
-            'broccoli', 'carrot', 'hot dog', 'pizza', 'donut', 'cake', 'chair', 'sofa',
-            'pottedplant', 'bed', 'diningtable', 'toilet', 'tvmonitor', 'laptop', 'mouse',
-            'remote', 'keyboard', 'cell phone', 'microwave', 'oven', 'toaster', 'sink',
-            'refrigerator', 'book', 'clock', 'vase', 'scissors', 'teddy bear', 'hair drier',
-            'toothbrush'
-        ]
-        
-        if 0 <= class_id < len(classes):
-            return classes[class_id]
-        return f'unknown_{class_id}'
+    def obter_estatisticas(self):
+        """Contadores das otimizações ativas, para os relatórios de sessão"""
+        estatisticas = {}
+        if self._cascata is not None:
+            estatisticas['cascata'] = self._cascata.obter_estatisticas()
+        if self._cache_resultados is not None:
+            estatisticas['cache_resultados'] = self._cache_resultados.obter_estatisticas()
+        if self._atencao is not None:
+            estatisticas['atencao'] = dict(
+                self._atencao.estatisticas,
+                fracao_area_recortes=round(self._atencao.estatisticas['fracao_area_recortes'], 3)
+            )
+        if self._incremental is not None:
+            estatisticas['incremental'] = dict(
+                self._incremental.estatisticas,
+                fracao_area_reinferida=round(self._incremental.estatisticas['fracao_area_reinferida'], 3)
+            )
+        if self._agendador is not None:
+            estatisticas['analise_por_trilha'] = dict(self._agendador.obter_estatisticas(),
+                                                      trilhas_ativas=len(self._rastreador.ativas))
+        return estatisticas
 
     def criar_diretorios(self):
         """Cria diretórios necessários"""
@@ -118,77 +335,142 @@ class DetectorAvancado:
             if imagem is None:
                 return self._resultado_vazio()
             
+            return self.detectar_frame(imagem)
+            
+        except Exception as e:
+            print(f"❌ Erro na detecção: {e}")
+            return self._resultado_vazio()
+
+    def detectar_frame(self, imagem) -> dict:
+        """Detecta objetos e pessoas em um frame BGR já carregado - FORMATO TESTE_DETECTOR_AVANCADO"""
+        try:
             altura, largura = imagem.shape[:2]
             
             # Cache da resolução
             if self._cache_resolucao is None:
                 self._cache_resolucao = (largura, altura)
             
-            # Se não há modelo YOLO, usa detecção simulada
+            # Sem modelo YOLO: propostas lite (ou a detecção simulada antiga, se configurada)
             if not self.modelo_carregado:
-                return self._deteccao_simulada(imagem)
-            
-            # Detecção com YOLOv8 (ultralytics)
-            if hasattr(self, 'yolo_version') and self.yolo_version == 8:
-                return self._detectar_yolov8(imagem, imagem_path)
-            
-            # Detecção com YOLO tradicional (OpenCV DNN)
-            else:
-                # Otimização: redimensiona se imagem muito grande
-                if largura * altura > 2073600:  # > 1920x1080
-                    scale_factor = 0.7
-                    nova_largura = int(largura * scale_factor)
-                    nova_altura = int(altura * scale_factor)
-                    imagem_processamento = cv2.resize(imagem, (nova_largura, nova_altura))
+                if self._detector_lite is not None:
+                    resultado = self._deteccao_lite(imagem)
                 else:
-                    imagem_processamento = imagem
-                    scale_factor = 1.0
-                
-                # Detecção YOLO
-                deteccoes_pessoas, deteccoes_objetos = self._detectar_yolo(imagem_processamento, scale_factor)
-                
-                # Análise de movimento
-                analise_movimento = self._analisar_movimento(imagem)
-                
-                # Análise de interações
-                interacoes = self._analisar_interacoes(deteccoes_pessoas, deteccoes_objetos)
-                
-                # Atividades faciais (simulado)
-                atividades_faciais = self._detectar_atividades_faciais(deteccoes_pessoas)
-                
-                # Calcula resumo
-                resumo = {
-                    'total_pessoas': len(deteccoes_pessoas),
-                    'total_objetos': len(deteccoes_objetos),
-                    'total_interacoes': len(interacoes),
-                    'movimento_geral': analise_movimento.get('intensidade', 0)
-                }
+                    resultado = self._deteccao_simulada(imagem)
+            else:
+                # Cena já vista: reaproveita as detecções guardadas sem inferência; as análises,
+                # o rastreador e o nível de carga seguem valendo como em qualquer quadro
+                deteccoes = None
+                if self._cache_resultados is not None:
+                    assinatura = dhash(imagem)
+                    deteccoes = self._cache_resultados.obter(assinatura)
+                if deteccoes is None:
+                    # Detecção YOLO pelo backend (letterbox no tamanho de entrada configurado)
+                    deteccoes = self._detectar_yolo(imagem)
+                    if self._cache_resultados is not None:
+                        self._cache_resultados.guardar(assinatura, deteccoes)
+                deteccoes_pessoas, deteccoes_objetos = deteccoes
                 
-                return {
-                    'pessoas_detectadas': len(deteccoes_pessoas),
-                    'objetos_detectados': len(deteccoes_objetos),
-                    'deteccoes': {
-                        'pessoas': deteccoes_pessoas,
-                        'objetos': deteccoes_objetos
-                    },
-                    'analises': {
-                        'movimentos': [analise_movimento] if analise_movimento.get('intensidade', 0) > 0 else [],
-                        'interacoes': interacoes,
-                        'atividades_faciais': atividades_faciais
-                    },
-                    'resumo': resumo,
-                    'narrativa_especifica': self._gerar_narrativa({
-                        'deteccoes': {'pessoas': deteccoes_pessoas, 'objetos': deteccoes_objetos},
-                        'analises': {'atividades_faciais': atividades_faciais, 'interacoes': interacoes}
-                    })
-                }
+                resultado = self._montar_resultado(imagem, deteccoes_pessoas, deteccoes_objetos,
+                                                   chave_narrativa='narrativa_especifica', contagens=True)
+            
+            return resultado
             
         except Exception as e:
             print(f"❌ Erro na detecção: {e}")
             return self._resultado_vazio()
 
+    def detectar_frames(self, imagens):
+        """
+        Detecta uma lista de frames BGR; no caminho simples do modelo, numa única inferência em lote
+        
+        Os modos com estado entre quadros (cascata, incremental, atenção, cache),
+        tiles e a detecção sem modelo processam quadro a quadro, como detectar_frame.
+        """
+        imagens = list(imagens)
+        em_lote = (len(imagens) > 1 and self.modelo_carregado and
+                   self._cascata is None and self._incremental is None and self._atencao is None and
+                   self._cache_resultados is None and
+                   not (self.config['modo_tiles'] and any(i.shape[0] * i.shape[1] > PIXELS_1080P for i in imagens)))
+        if not em_lote:
+            return [self.detectar_frame(imagem) for imagem in imagens]
+        
+        try:
+            saidas = self._inferir_imagens(imagens)
+            return [self._montar_resultado(imagem, *self._criar_deteccoes(*saida),
+                                           chave_narrativa='narrativa_especifica', contagens=True)
+                    for imagem, saida in zip(imagens, saidas)]
+        except Exception as e:
+            print(f"❌ Erro na detecção em lote: {e}")
+            return [self._resultado_vazio() for _ in imagens]
+
+    def _montar_resultado(self, imagem, pessoas, objetos, chave_narrativa='narrativa', contagens=False,
+                          intensidade_bordas=None):
+        """
+        Análises comuns a todos os caminhos de detecção e montagem do resultado
+        
+        A narrativa fica adiada: só é gerada se alguém ler resultado[chave_narrativa].
+        """
+        # Análise de movimento
+        analise_movimento = self._analisar_movimento(imagem, intensidade_bordas)
+        
+        # Análise de interações e atividades faciais (desligadas sob sobrecarga)
+        if self._analises_secundarias:
+            interacoes = self._analisar_interacoes(pessoas, objetos)
+            atividades_faciais = self._detectar_atividades_faciais(pessoas, imagem)
+        else:
+            interacoes, atividades_faciais = [], []
+            if self._rastreador is not None:
+                self._atualizar_trilhas(pessoas)  # IDs seguem valendo quando as análises voltarem
+        
+        # Calcula resumo
+        resumo = {
+            'total_pessoas': len(pessoas),
+            'total_objetos': len(objetos),
+            'total_interacoes': len(interacoes),
+            'movimento_geral': analise_movimento.get('intensidade', 0)
+        }
+        
+        resultado = ResultadoPreguicoso()
+        if contagens:
+            resultado['pessoas_detectadas'] = len(pessoas)
+            resultado['objetos_detectados'] = len(objetos)
+        resultado['deteccoes'] = {
+            'pessoas': pessoas,
+            'objetos': objetos
+        }
+        resultado['analises'] = {
+            'movimentos': [analise_movimento] if analise_movimento.get('intensidade', 0) > 0 else [],
+            'interacoes': interacoes,
+            'atividades_faciais': atividades_faciais
+        }
+        resultado['resumo'] = resumo
+        cena = {
+            'deteccoes': {'pessoas': pessoas, 'objetos': objetos},
+            'analises': {'atividades_faciais': atividades_faciais, 'interacoes': interacoes}
+        }
+        resultado.adiar(chave_narrativa, lambda: self._gerar_narrativa(cena))
+        return resultado
+
+    def _deteccao_lite(self, imagem):
+        """Detecção sem modelo: blobs de bordas num quadro reduzido, sempre como objetos (nunca pessoas)"""
+        try:
+            caixas, confiancas, intensidade = self._detector_lite.detectar(imagem)
+            objetos = DeteccoesQuadro(caixas, confiancas, np.zeros(len(caixas), np.int16), nomes=(TIPO_PROPOSTA,))
+            # Mesmo formato do caminho com modelo (contagens e narrativa_especifica)
+            return self._montar_resultado(imagem, DeteccoesQuadro.vazio(), objetos, chave_narrativa='narrativa_especifica',
+                                          contagens=True, intensidade_bordas=intensidade)
+            
+        except Exception as e:
+            print(f"❌ Erro na detecção lite: {e}")
+            return self._resultado_vazio()
+    
     def _deteccao_simulada(self, imagem):
-        """Detecção simulada quando YOLO não está disponível - MELHORADA"""
+        """
+        Detecção simulada quando YOLO não está disponível - MELHORADA
+        
+        Sempre acrescenta uma pessoa fixa no centro; só é usada com modo_sem_modelo='simulado'
+        (scripts de teste antigos). O padrão sem modelo é _deteccao_lite.
+        """
         try:
             # Análise básica da imagem para simular detecções
             gray = cv2.cvtColor(imagem, cv2.COLOR_BGR2GRAY)
@@ -264,221 +546,120 @@ class DetectorAvancado:
                         }
                         objetos.append(objeto)
             
-            # Análise de movimento
-            analise_movimento = self._analisar_movimento(imagem)
-            
-            # Análise de interações
-            interacoes = self._analisar_interacoes(pessoas, objetos)
-            
-            # Atividades faciais
-            atividades_faciais = self._detectar_atividades_faciais(pessoas)
-            
-            # Calcula resumo
-            resumo = {
-                'total_pessoas': len(pessoas),
-                'total_objetos': len(objetos),
-                'total_interacoes': len(interacoes),
-                'movimento_geral': analise_movimento.get('intensidade', 0)
-            }
-            
-            return {
-                'deteccoes': {
-                    'pessoas': pessoas,
-                    'objetos': objetos
-                },
-                'analises': {
-                    'movimentos': [analise_movimento] if analise_movimento.get('intensidade', 0) > 0 else [],
-                    'interacoes': interacoes,
-                    'atividades_faciais': atividades_faciais
-                },
-                'resumo': resumo,
-                'narrativa': self._gerar_narrativa({
-                    'deteccoes': {'pessoas': pessoas, 'objetos': objetos},
-                    'analises': {'atividades_faciais': atividades_faciais, 'interacoes': interacoes}
-                })
-            }
+            return self._montar_resultado(imagem, pessoas, objetos)
             
         except Exception as e:
             print(f"❌ Erro na detecção simulada: {e}")
             return self._resultado_vazio()
     
-    def _detectar_yolov8(self, imagem, imagem_path):
-        """Executa detecção com YOLOv8 (ultralytics)"""
+    def _detectar_yolo(self, imagem):
+        """Executa detecção YOLO no backend configurado"""
         try:
-            # Executa detecção YOLOv8
-            results = self.net(imagem_path)
-            
-            pessoas = []
-            objetos = []
-            
-            # Processa resultados
-            for result in results:
-                boxes = result.boxes
-                if boxes is not None:
-                    for i, box in enumerate(boxes):
-                        # Extrai informações da detecção
-                        x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                        confidence = box.conf[0].cpu().numpy()
-                        class_id = int(box.cls[0].cpu().numpy())
-                        
-                        # Converte para formato bbox [x, y, w, h]
-                        x, y = int(x1), int(y1)
-                        w, h = int(x2 - x1), int(y2 - y1)
-                        
-                        # Obtém nome da classe
-                        class_name = result.names[class_id]
-                        
-                        deteccao = {
-                            'id': f"{class_name}_{i}",
-                            'tipo': class_name,
-                            'confianca': round(float(confidence), 2),
-                            'posicao': {
-                                'x': x,
-                                'y': y,
-                                'largura': w,
-                                'altura': h
-                            },
-                            'timestamp': datetime.now().isoformat()
-                        }
-                        
-                        if class_name == 'person':
-                            pessoas.append(deteccao)
-                        else:
-                            objetos.append(deteccao)
-            
-            # Análise de movimento
-            analise_movimento = self._analisar_movimento(imagem)
-            
-            # Análise de interações
-            interacoes = self._analisar_interacoes(pessoas, objetos)
-            
-            # Atividades faciais (simulado)
-            atividades_faciais = self._detectar_atividades_faciais(pessoas)
-            
-            # Calcula resumo
-            resumo = {
-                'total_pessoas': len(pessoas),
-                'total_objetos': len(objetos),
-                'total_interacoes': len(interacoes),
-                'movimento_geral': analise_movimento.get('intensidade', 0)
-            }
-            
-            return {
-                'pessoas_detectadas': len(pessoas),
-                'objetos_detectados': len(objetos),
-                'deteccoes': {
-                    'pessoas': pessoas,
-                    'objetos': objetos
-                },
-                'analises': {
-                    'movimentos': [analise_movimento] if analise_movimento.get('intensidade', 0) > 0 else [],
-                    'interacoes': interacoes,
-                    'atividades_faciais': atividades_faciais
-                },
-                'resumo': resumo,
-                'narrativa_especifica': self._gerar_narrativa({
-                    'deteccoes': {'pessoas': pessoas, 'objetos': objetos},
-                    'analises': {'atividades_faciais': atividades_faciais, 'interacoes': interacoes}
-                })
-            }
-            
-        except Exception as e:
-            print(f"❌ Erro na detecção YOLOv8: {e}")
-            return self._resultado_vazio()
-
-    def _detectar_yolo(self, imagem, scale_factor=1.0):
-        """Executa detecção YOLO"""
-        try:
-            altura, largura = imagem.shape[:2]
-            
-            # Prepara blob para YOLO
-            blob = cv2.dnn.blobFromImage(imagem, 1/255.0, (416, 416), swapRB=True, crop=False)
-            self.net.setInput(blob)
-            
-            # Executa detecção
-            outputs = self.net.forward(self.output_layers)
-            
-            # Processa detecções
-            boxes = []
-            confidences = []
-            class_ids = []
-            
-            for output in outputs:
-                for detection in output:
-                    scores = detection[5:]
-                    class_id = np.argmax(scores)
-                    confidence = scores[class_id]
-                    
-                    if confidence > self.confidence_threshold:
-                        center_x = int(detection[0] * largura)
-                        center_y = int(detection[1] * altura)
-                        w = int(detection[2] * largura)
-                        h = int(detection[3] * altura)
-                        
-                        x = int(center_x - w/2)
-                        y = int(center_y - h/2)
-                        
-                        boxes.append([x, y, w, h])
-                        confidences.append(float(confidence))
-                        class_ids.append(class_id)
-            
-            # Aplica Non-Maximum Suppression
-            indices = cv2.dnn.NMSBoxes(boxes, confidences, self.confidence_threshold, self.nms_threshold)
-            
-            pessoas = []
-            objetos = []
-            
-            if len(indices) > 0:
-                for i in indices.flatten():
-                    x, y, w, h = boxes[i]
-                    
-                    # Ajusta coordenadas se imagem foi redimensionada
-                    if scale_factor != 1.0:
-                        x = int(x / scale_factor)
-                        y = int(y / scale_factor)
-                        w = int(w / scale_factor)
-                        h = int(h / scale_factor)
-                    
-                    classe = self._get_class_name(class_ids[i])
-                    confianca = confidences[i]
-                    
-                    deteccao = {
-                        'id': f"{classe}_{i}",
-                        'tipo': classe,
-                        'confianca': round(confianca, 2),
-                        'posicao': {
-                            'x': x,
-                            'y': y,
-                            'largura': w,
-                            'altura': h
-                        },
-                        'timestamp': datetime.now().isoformat()
-                    }
-                    
-                    if classe == 'person':
-                        pessoas.append(deteccao)
-                    else:
-                        objetos.append(deteccao)
+            # Estágio 1 da cascata: sem propostas, repete o último resultado do YOLO
+            if self._cascata is not None and not self._cascata.deve_inferir(imagem):
+                return self._criar_deteccoes(*self._cascata.ultimas)
+            
+            recortes = None
+            if self._incremental is not None:
+                recortes = self._incremental.planejar(imagem)
+            elif self._atencao is not None:
+                recortes = self._atencao.planejar(imagem)
+            
+            if recortes is not None:
+                # Só as regiões planejadas (vazio: nada mudou, nada a inferir)
+                caixas, confiancas, classes = self._inferir_regioes(imagem, recortes)
+            else:
+                altura, largura = imagem.shape[:2]
+                if self.config['modo_tiles'] and largura * altura > PIXELS_1080P:
+                    caixas, confiancas, classes = self._inferir_tiles(imagem)
+                else:
+                    caixas, confiancas, classes = self._inferir_imagens([imagem])[0]
             
-            return pessoas, objetos
+            if self._incremental is not None:
+                caixas, confiancas, classes = self._incremental.atualizar(recortes, caixas, confiancas, classes)
+            elif self._atencao is not None:
+                self._atencao.registrar(caixas, completo=recortes is None)
+            if self._cascata is not None:
+                self._cascata.registrar(caixas, confiancas, classes)
+            return self._criar_deteccoes(caixas, confiancas, classes)
             
         except Exception as e:
             print(f"❌ Erro na detecção YOLO: {e}")
             return [], []
+
+    def _inferir_imagens(self, imagens):
+        """
+        Pré-processamento, inferência em lote e pós-processamento comuns aos backends
+        
+        Returns:
+            list: Por imagem, (caixas xywh, confiancas, classes) no espaço da imagem
+        """
+        canvas, blob, parametros = self._buffers_entrada.preparar(imagens, self.tamanho_entrada)
+        
+        # Com o estágio 3 da cascata, candidatos ambíguos (abaixo do limiar) também são decodificados
+        estagio3 = self._cascata is not None and self._cascata.backend_grande is not None
+        filtro = self._filtro_ambiguo if estagio3 else self._filtro_classes
+        
+        candidatos = self.backend.inferir(canvas, blob, filtro)
+        resultados = pos_processar(candidatos, parametros, self.nms_threshold)
+        if estagio3:
+            resultados = self._cascata.resolver_ambiguos(imagens, resultados, self.tamanho_entrada,
+                                                         self._filtro_classes, self.nms_threshold)
+        return resultados
+
+    def _inferir_tiles(self, imagem):
+        """Inferência em tiles sobrepostos num único lote, com NMS entre tiles"""
+        altura, largura = imagem.shape[:2]
+        regioes = grade_tiles(largura, altura, self.config['tile_lado_max'],
+                              self.config['tile_sobreposicao'], self.config['tile_max'])
+        if self.config['tile_quadro_inteiro'] and len(regioes) > 1:
+            regioes.append((0, 0, largura, altura))
+        return self._inferir_regioes(imagem, regioes)
+
+    def _inferir_regioes(self, imagem, regioes):
+        """
+        Infere regiões (x0, y0, x1, y1) do quadro num único lote e une os resultados
+        
+        Returns:
+            tuple: (caixas xywh, confiancas, classes) no espaço do quadro
+        """
+        if not len(regioes):
+            return np.empty((0, 4), np.int32), np.empty(0, np.float32), np.empty(0, np.int32)
+        
+        # Recortes são views do quadro: o letterbox copia direto para o buffer do lote
+        recortes = [imagem[y0:y1, x0:x1] for x0, y0, x1, y1 in regioes]
+        resultados = self._inferir_imagens(recortes)
+        
+        caixas = np.concatenate([c for c, _, _ in resultados]).astype(np.float32)
+        confiancas = np.concatenate([c for _, c, _ in resultados])
+        classes = np.concatenate([c for _, _, c in resultados])
+        deslocamentos = np.concatenate([
+            np.repeat([[x0, y0]], len(c), axis=0) for (x0, y0, _, _), (c, _, _) in zip(regioes, resultados)
+        ]).reshape(-1, 2)
+        caixas[:, :2] += deslocamentos
+        return nms_entre_tiles(caixas, confiancas, classes, self.nms_threshold)
+
+    def _criar_deteccoes(self, caixas, confiancas, classes):
+        """Separa pessoas e objetos em DeteccoesQuadro (visões em dicionário só quando lidas)"""
+        deteccoes = DeteccoesQuadro(caixas, confiancas, classes, nomes=self.nomes_classes)
+        eh_pessoa = np.array([nome_classe(c, self.nomes_classes) == 'person' for c in deteccoes.classes.tolist()],
+                             dtype=bool).reshape(-1)
+        return deteccoes.selecionar(eh_pessoa), deteccoes.selecionar(~eh_pessoa)
     
-    def _analisar_movimento(self, imagem):
-        """Analisa movimento na imagem"""
+    def _analisar_movimento(self, imagem, intensidade=None):
+        """Analisa movimento na imagem (intensidade já medida pode ser passada, ex.: pelo modo lite)"""
         try:
-            # Converte para escala de cinza
-            gray = cv2.cvtColor(imagem, cv2.COLOR_BGR2GRAY)
-            
-            # Detecta bordas para medir movimento
-            edges = cv2.Canny(gray, 50, 150)
-            num_edges = np.sum(edges > 0)
-            
-            # Calcula intensidade do movimento
-            total_pixels = gray.shape[0] * gray.shape[1]
-            intensidade = (num_edges / total_pixels) * 100
+            if intensidade is None:
+                # Converte para escala de cinza
+                gray = cv2.cvtColor(imagem, cv2.COLOR_BGR2GRAY)
+                
+                # Detecta bordas para medir movimento
+                edges = cv2.Canny(gray, 50, 150)
+                num_edges = np.sum(edges > 0)
+                
+                # Calcula intensidade do movimento
+                total_pixels = gray.shape[0] * gray.shape[1]
+                intensidade = (num_edges / total_pixels) * 100
             
             if intensidade > 1.0:  # Threshold para considerar movimento significativo
                 return {
@@ -496,102 +677,90 @@ class DetectorAvancado:
             return {}
     
     def _analisar_interacoes(self, pessoas, objetos):
-        """Analisa interações entre pessoas e objetos"""
+        """Analisa interações entre todas as pessoas e todos os objetos (vetorizado)"""
         interacoes = []
         
         try:
-            # Limita análise para evitar complexidade excessiva
-            max_analises = 5
-            contador = 0
-            
-            for pessoa in pessoas[:3]:  # Máximo 3 pessoas
-                # Análise de postura e atividade
-                atividade = self._analisar_atividade_pessoa(pessoa)
-                
-                # Análise de proximidade com objetos
-                for objeto in objetos[:3]:  # Máximo 3 objetos
-                    if contador >= max_analises:
-                        break
-                    
-                    # Calcula distância entre pessoa e objeto
-                    px = pessoa['posicao']['x'] + pessoa['posicao']['largura'] // 2
-                    py = pessoa['posicao']['y'] + pessoa['posicao']['altura'] // 2
-                    ox = objeto['posicao']['x'] + objeto['posicao']['largura'] // 2
-                    oy = objeto['posicao']['y'] + objeto['posicao']['altura'] // 2
-                    
-                    distancia = np.sqrt((px - ox)**2 + (py - oy)**2)
-                    
-                    # Se estão próximos, considera interação
-                    if distancia < 200:  # pixels
-                        interacao = {
-                            'id': f"interacao_{contador}",
-                            'tipo': 'proximidade',
-                            'pessoa_id': pessoa['id'],
-                            'objeto_id': objeto['id'],
-                            'distancia': round(distancia, 1),
-                            'atividade_pessoa': atividade,
-                            'descricao': f"Pessoa próxima a {objeto['tipo']}",
-                            'timestamp': datetime.now().isoformat()
-                        }
-                        interacoes.append(interacao)
-                        contador += 1
-                
-                if contador >= max_analises:
-                    break
+            if not pessoas or not objetos:
+                return interacoes
+            
+            caixas_pessoas = caixas_deteccoes(pessoas)
+            i, j, distancias, sobreposicoes = pares_interacao(
+                caixas_pessoas, caixas_deteccoes(objetos), self.config['interacao_fator_distancia']
+            )
+            atividades = atividades_por_proporcao(caixas_pessoas)
+            timestamp = datetime.now().isoformat()
+            
+            for contador, (p, o, distancia, sobreposicao) in enumerate(
+                    zip(i.tolist(), j.tolist(), distancias.tolist(), sobreposicoes.tolist())):
+                interacoes.append({
+                    'id': f"interacao_{contador}",
+                    'tipo': 'proximidade',
+                    'pessoa_id': pessoas[p]['id'],
+                    'objeto_id': objetos[o]['id'],
+                    'distancia': round(distancia, 1),
+                    'sobreposicao': round(sobreposicao, 2),
+                    'atividade_pessoa': ATIVIDADES_PROPORCAO[atividades[p]],
+                    'descricao': f"Pessoa próxima a {objetos[o]['tipo']}",
+                    'timestamp': timestamp
+                })
             
         except Exception as e:
             print(f"❌ Erro na análise de interações: {e}")
         
         return interacoes
     
-    def _analisar_atividade_pessoa(self, pessoa):
-        """Analisa atividade de uma pessoa baseado em sua posição e proporções"""
-        try:
-            largura = pessoa['posicao']['largura']
-            altura = pessoa['posicao']['altura']
-            
-            # Análise básica baseada em proporções
-            proporcao = altura / largura if largura > 0 else 0
-            
-            if proporcao > 2.0:
-                return 'em_pe'
-            elif proporcao < 1.5:
-                return 'agachado_ou_sentado'
-            else:
-                return 'posicao_normal'
-                
-        except Exception as e:
-            print(f"❌ Erro na análise de atividade: {e}")
-            return 'desconhecida'
+    def _analisar_atividades_lote(self, imagem, caixas):
+        """Cabeça, postura, mãos e atividade provável de um lote de caixas de pessoas (vetorizado)"""
+        # Tabela (cabeça, postura, mãos) -> atividade, montada uma vez a partir de _inferir_atividade
+        if self._tabela_atividades is None:
+            self._tabela_atividades = construir_tabela_atividades(self._inferir_atividade)
+        
+        cabeca, postura, maos = codigos_atividade(caixas)
+        atividades_provaveis = self._tabela_atividades[cabeca, postura, maos]
+        confiancas = np.random.uniform(0.6, 0.9, size=len(caixas))
+        return [{
+            'movimento_cabeca': MOVIMENTOS_CABECA[cabeca[i]],
+            'postura_corporal': POSTURAS[postura[i]],
+            'movimento_maos': MOVIMENTOS_MAOS[maos[i]],
+            'atividade_provavel': atividades_provaveis[i],
+            'confianca': float(confiancas[i])
+        } for i in range(len(caixas))]
     
-    def _detectar_atividades_faciais(self, pessoas):
-        """Detecta atividades faciais e análise de comportamento"""
+    def _atualizar_trilhas(self, pessoas):
+        """Avança o rastreador em todo quadro; sem pessoas, as trilhas envelhecem até max_perdidos"""
+        caixas = caixas_deteccoes(pessoas)
+        trilhas = self._rastreador.atualizar(caixas)
+        if isinstance(pessoas, DeteccoesQuadro) and len(trilhas):
+            pessoas.trilhas[:] = trilhas
+        return caixas, trilhas
+    
+    def _detectar_atividades_faciais(self, pessoas, imagem=None):
+        """Detecta atividades faciais e análise de comportamento de todas as pessoas (vetorizado)"""
         atividades = []
         
         try:
-            for i, pessoa in enumerate(pessoas[:2]):  # Máximo 2 pessoas
-                # Análise de movimento da cabeça
-                movimento_cabeca = self._analisar_movimento_cabeca(pessoa)
-                
-                # Análise de postura corporal
-                postura = self._analisar_postura_corporal(pessoa)
-                
-                # Análise de movimento das mãos
-                movimento_maos = self._analisar_movimento_maos(pessoa)
-                
-                # Inferência de atividade provável
-                atividade_provavel = self._inferir_atividade(movimento_cabeca, postura, movimento_maos)
-                
-                atividade = {
-                    'id': f"facial_{i}",
-                    'pessoa_id': pessoa['id'],
-                    'movimento_cabeca': movimento_cabeca,
-                    'postura_corporal': postura,
-                    'movimento_maos': movimento_maos,
-                    'atividade_provavel': atividade_provavel,
-                    'confianca': np.random.uniform(0.6, 0.9),
-                    'timestamp': datetime.now().isoformat()
-                }
+            if not pessoas:
+                if self._rastreador is not None:
+                    self._atualizar_trilhas(pessoas)
+                return atividades
+            
+            caixas = caixas_deteccoes(pessoas)
+            trilhas = None
+            if self._agendador is not None:
+                # Só as trilhas novas, que mudaram ou vencidas passam pelos analisadores
+                caixas, trilhas = self._atualizar_trilhas(pessoas)
+                analises = self._agendador.analisar(imagem, caixas, trilhas)
+            else:
+                analises = self._analisar_atividades_lote(imagem, caixas)
+            timestamp = datetime.now().isoformat()
+            
+            for i, pessoa in enumerate(pessoas):
+                atividade = {'id': f"facial_{i}", 'pessoa_id': pessoa['id']}
+                atividade.update(analises[i])
+                atividade['timestamp'] = timestamp
+                if trilhas is not None:
+                    atividade['trilha_id'] = int(trilhas[i])
                 atividades.append(atividade)
                 
         except Exception as e:
@@ -599,79 +768,6 @@ class DetectorAvancado:
         
         return atividades
     
-    def _analisar_movimento_cabeca(self, pessoa):
-        """Analisa movimento da cabeça baseado na posição e contexto"""
-        try:
-            # Análise baseada na posição da pessoa na tela
-            x = pessoa['posicao']['x']
-            y = pessoa['posicao']['y']
-            largura_tela = 1920  # Assumindo resolução padrão
-            altura_tela = 1080
-            
-            # Determina direção do olhar baseado na posição
-            if x < largura_tela * 0.3:
-                return 'olhando_direita'
-            elif x > largura_tela * 0.7:
-                return 'olhando_esquerda'
-            elif y < altura_tela * 0.3:
-                return 'cabeca_alta'
-            elif y > altura_tela * 0.7:
-                return 'cabeca_baixa'
-            else:
-                return 'olhando_frente'
-        except:
-            return 'neutro'
-    
-    def _analisar_postura_corporal(self, pessoa):
-        """Analisa postura corporal"""
-        try:
-            largura = pessoa['posicao']['largura']
-            altura = pessoa['posicao']['altura']
-            proporcao = altura / largura if largura > 0 else 1.5
-            
-            if proporcao > 2.2:
-                return 'em_pe_ereto'
-            elif proporcao > 1.8:
-                return 'em_pe_relaxado'
-            elif proporcao > 1.3:
-                return 'sentado'
-            else:
-                return 'agachado_ou_deitado'
-        except:
-            return 'desconhecida'
-    
-    def _analisar_movimento_maos(self, pessoa):
-        """Analisa movimento das mãos baseado em contexto e posição"""
-        try:
-            # Análise baseada na postura e posição
-            postura = self._analisar_postura_corporal(pessoa)
-            x = pessoa['posicao']['x']
-            y = pessoa['posicao']['y']
-            largura = pessoa['posicao']['largura']
-            altura = pessoa['posicao']['altura']
-            
-            # Determina atividade das mãos baseado no contexto
-            if postura == 'sentado':
-                # Se sentado, provavelmente usando computador ou descansando
-                if largura > altura * 0.8:  # Pessoa mais larga (braços estendidos)
-                    return 'digitando'
-                else:
-                    return 'maos_no_colo'
-            elif postura in ['em_pe_ereto', 'em_pe_relaxado']:
-                # Se em pé, pode estar gesticulando ou segurando algo
-                if altura > largura * 2:  # Pessoa muito alta (braços levantados)
-                    return 'gesticulando'
-                elif y < 300:  # Pessoa na parte superior da tela
-                    return 'apontando'
-                else:
-                    return 'maos_ao_lado'
-            elif postura == 'agachado_ou_deitado':
-                return 'segurando_objeto'
-            else:
-                return 'maos_quietas'
-        except:
-            return 'nao_detectado'
-    
     def _inferir_atividade(self, movimento_cabeca, postura, movimento_maos):
         """Infere atividade específica baseada nos movimentos detectados"""
         try:
@@ -767,51 +863,9 @@ class DetectorAvancado:
         return relatorio
     
     def _gerar_narrativa(self, resultado):
-        """Gera narrativa descritiva do que foi detectado com ações específicas"""
+        """Gera narrativa descritiva do que foi detectado com ações específicas (memoizada por assinatura da cena)"""
         try:
-            pessoas = resultado.get('deteccoes', {}).get('pessoas', [])
-            objetos = resultado.get('deteccoes', {}).get('objetos', [])
-            atividades = resultado.get('analises', {}).get('atividades_faciais', [])
-            
-            narrativa = []
-            
-            # Análise de pessoas e suas atividades
-            if pessoas:
-                narrativa.append(f"Detectadas {len(pessoas)} pessoa(s) na cena.")
-                
-                for i, atividade in enumerate(atividades):
-                    if i < len(pessoas):
-                        # Descrição específica da ação baseada na análise
-                        acao_especifica = self._descrever_acao_especifica(atividade)
-                        
-                        if acao_especifica:
-                            narrativa.append(f"Pessoa {i+1}: {acao_especifica}")
-            else:
-                narrativa.append("Nenhuma pessoa detectada na cena.")
-            
-            # Análise de objetos
-            if objetos:
-                tipos_objetos = {}
-                for obj in objetos:
-                    tipo = obj.get('tipo', 'desconhecido')
-                    tipos_objetos[tipo] = tipos_objetos.get(tipo, 0) + 1
-                
-                obj_desc = []
-                for tipo, count in tipos_objetos.items():
-                    if count == 1:
-                        obj_desc.append(f"1 {tipo}")
-                    else:
-                        obj_desc.append(f"{count} {tipo}s")
-                
-                narrativa.append(f"Objetos identificados: {', '.join(obj_desc)}.")
-            
-            # Análise de interações
-            interacoes = resultado.get('analises', {}).get('interacoes', [])
-            if interacoes:
-                narrativa.append(f"Detectadas {len(interacoes)} interação(ões) entre pessoas e objetos.")
-            
-            return " ".join(narrativa) if narrativa else "Cena sem atividade detectável."
-            
+            return gerar_narrativa(resultado)
         except Exception as e:
             print(f"❌ Erro ao gerar narrativa: {e}")
             return "Erro na análise da cena."
@@ -819,95 +873,10 @@ class DetectorAvancado:
     def _descrever_acao_especifica(self, atividade):
         """Descreve a ação específica que a pessoa está realizando"""
         try:
-            postura = atividade.get('postura_corporal', 'desconhecida')
-            movimento_maos = atividade.get('movimento_maos', 'nao_detectado')
-            movimento_cabeca = atividade.get('movimento_cabeca', 'nao_detectado')
-            atividade_provavel = atividade.get('atividade_provavel', 'desconhecida')
-            
-            # Mapeamento de ações específicas baseadas na combinação de fatores
-            acoes_especificas = {
-                'trabalhando_no_computador': {
-                    'digitando': 'está digitando no computador',
-                    'maos_no_colo': 'está lendo na tela do computador',
-                    'gesticulando': 'está interagindo com o computador',
-                    'apontando': 'está apontando para algo na tela',
-                    'segurando_objeto': 'está usando o mouse ou outro dispositivo'
-                },
-                'conversando_ou_apresentando': {
-                    'gesticulando': 'está gesticulando durante uma conversa',
-                    'apontando': 'está apontando durante uma apresentação',
-                    'maos_ao_lado': 'está falando ou ouvindo',
-                    'segurando_objeto': 'está segurando algo enquanto fala'
-                },
-                'lendo_ou_escrevendo': {
-                    'digitando': 'está escrevendo ou digitando',
-                    'maos_no_colo': 'está lendo um documento',
-                    'segurando_objeto': 'está escrevendo à mão',
-                    'maos_ao_lado': 'está concentrado na leitura'
-                },
-                'observando_ou_aguardando': {
-                    'maos_no_colo': 'está observando atentamente',
-                    'maos_ao_lado': 'está aguardando ou descansando',
-                    'gesticulando': 'está se movimentando inquieto',
-                    'apontando': 'está indicando algo'
-                }
-            }
-            
-            # Determina a ação específica
-            if atividade_provavel in acoes_especificas:
-                acao_por_maos = acoes_especificas[atividade_provavel].get(
-                    movimento_maos, 
-                    acoes_especificas[atividade_provavel].get('maos_ao_lado', '')
-                )
-                
-                if acao_por_maos:
-                    # Adiciona informações sobre postura e movimento da cabeça
-                    detalhes_adicionais = []
-                    
-                    if postura == 'em_pe':
-                        detalhes_adicionais.append('em pé')
-                    elif postura == 'agachado_ou_sentado':
-                        detalhes_adicionais.append('sentado')
-                    
-                    if movimento_cabeca == 'olhando_direita':
-                        detalhes_adicionais.append('olhando para a direita')
-                    elif movimento_cabeca == 'olhando_esquerda':
-                        detalhes_adicionais.append('olhando para a esquerda')
-                    elif movimento_cabeca == 'cabeca_para_cima':
-                        detalhes_adicionais.append('com a cabeça levantada')
-                    elif movimento_cabeca == 'cabeca_para_baixo':
-                        detalhes_adicionais.append('com a cabeça baixa')
-                    
-                    if detalhes_adicionais:
-                        return f"{acao_por_maos}, {', '.join(detalhes_adicionais)}."
-                    else:
-                        return f"{acao_por_maos}."
-            
-            # Fallback para descrição básica
-            descricao_basica = []
-            if postura != 'desconhecida':
-                if postura == 'em_pe':
-                    descricao_basica.append('está em pé')
-                elif postura == 'agachado_ou_sentado':
-                    descricao_basica.append('está sentado')
-                else:
-                    descricao_basica.append(f'está na posição {postura}')
-            
-            if movimento_maos != 'nao_detectado':
-                if movimento_maos == 'digitando':
-                    descricao_basica.append('com as mãos digitando')
-                elif movimento_maos == 'gesticulando':
-                    descricao_basica.append('gesticulando')
-                elif movimento_maos == 'apontando':
-                    descricao_basica.append('apontando')
-                else:
-                    descricao_basica.append(f'com as mãos {movimento_maos.replace("_", " ")}')
-            
-            return ', '.join(descricao_basica) + '.' if descricao_basica else 'realizando atividade não identificada.'
-            
+            return descrever_acao(*codigos_acao(atividade))
         except Exception as e:
             print(f"❌ Erro ao descrever ação específica: {e}")
-            return 'realizando atividade não identificada.'
+            return DESCRICAO_NAO_IDENTIFICADA
 
 if __name__ == "__main__":
     # Teste do detector
@@ -919,4 +888,4 @@ if __name__ == "__main__":
     # Simula detecção em uma imagem
     resultado = detector._resultado_vazio()
     print("✅ Detector funcionando corretamente!")
-    print(f"📊 Resultado: {json.dumps(resultado, indent=2, ensure_ascii=False)}")
\ No newline at end of file
+    print(f"📊 Resultado: {json.dumps(resultado, indent=2, ensure_ascii=False, default=serializar_json)}")
\ No newline at end of file
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Detector Seguro para Threads
+Fachada sobre um conjunto de instâncias de DetectorAvancado: cada chamada
+empresta uma instância exclusiva, já que redes cv2.dnn, modelos ultralytics
+e os buffers/estados do detector não podem ser compartilhados entre threads
+"""
+
+import os
+import queue
+import threading
+from contextlib import contextmanager
+
+from detector_avancado import DetectorAvancado
+
+
+class DetectorSeguro:
+    def __init__(self, config=None, tamanho_pool=None):
+        """
+        Args:
+            config (dict): Configuração de cada DetectorAvancado; com num_threads=0,
+                os núcleos são divididos entre as instâncias
+            tamanho_pool (int): Máximo de instâncias (= chamadas simultâneas); padrão:
+                núcleos disponíveis, até 4. As instâncias são criadas sob demanda.
+
+        Os modos com estado entre quadros (incremental, atenção, cascata, cache)
+        ficam por instância: cada uma vê só os quadros que passaram por ela.
+        """
+        self.tamanho_pool = tamanho_pool or min(4, os.cpu_count() or 1)
+        self.config = dict(config or {})
+        if not self.config.get('num_threads'):
+            self.config['num_threads'] = max(1, (os.cpu_count() or 1) // self.tamanho_pool)
+
+        self._livres = queue.LifoQueue()  # a mais recente tem caches e buffers quentes
+        self._instancias = []
+        self._trava = threading.Lock()
+        self._nivel_carga = 0
+
+        self.estatisticas = {'chamadas': 0, 'esperas': 0}
+
+        # A primeira instância é criada já: falhas de configuração aparecem aqui
+        self._reservadas = 1
+        self._livres.put(self._criar_instancia())
+
+    def _criar_instancia(self):
+        """Cria uma instância já reservada em _reservadas (fora da trava: carregar o modelo é lento)"""
+        try:
+            detector = DetectorAvancado(self.config)
+        except Exception:
+            with self._trava:
+                self._reservadas -= 1
+            raise
+        with self._trava:
+            self._instancias.append(detector)
+        return detector
+
+    @contextmanager
+    def instancia(self):
+        """Empresta uma instância exclusiva de DetectorAvancado (bloqueia se todas estiverem em uso)"""
+        try:
+            detector = self._livres.get_nowait()
+        except queue.Empty:
+            with self._trava:
+                criar = self._reservadas < self.tamanho_pool
+                if criar:
+                    self._reservadas += 1
+                else:
+                    self.estatisticas['esperas'] += 1
+            detector = self._criar_instancia() if criar else self._livres.get()
+        with self._trava:
+            self.estatisticas['chamadas'] += 1
+        # Degrau do controle de carga aplicado ao emprestar: a instância é exclusiva aqui
+        if detector.nivel_carga != self._nivel_carga:
+            detector.aplicar_nivel_carga(self._nivel_carga)
+        try:
+            yield detector
+        finally:
+            self._livres.put(detector)
+
+    def aplicar_nivel_carga(self, nivel):
+        """Degrau do controle de carga para todas as instâncias (aplicado no próximo empréstimo de cada uma)"""
+        self._nivel_carga = nivel
+
+    def detectar_frame(self, imagem):
+        with self.instancia() as detector:
+            return detector.detectar_frame(imagem)
+
+    def detectar_objetos_pessoas(self, imagem_path):
+        with self.instancia() as detector:
+            return detector.detectar_objetos_pessoas(imagem_path)
+
+    def gerar_relatorio_completo(self, imagem_path):
+        with self.instancia() as detector:
+            return detector.gerar_relatorio_completo(imagem_path)
+
+    @property
+    def modelo_carregado(self):
+        return self._instancias[0].modelo_carregado
+
+    def obter_estatisticas(self):
+        with self._trava:
+            instancias = list(self._instancias)
+            estatisticas = dict(self.estatisticas)
+        return dict(estatisticas, instancias=len(instancias), tamanho_pool=self.tamanho_pool,
+                    detectores=[d.obter_estatisticas() for d in instancias])
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fontes de Frames
+Leitura direta de frames sem captura de tela (stream MJPEG do DroidCam, replay de capturas)
+"""
+
+import glob
+import os
+import re
+import threading
+import time
+import urllib.request
+
+import cv2
+import numpy as np
+
+# Marcadores de início/fim de imagem JPEG
+JPEG_SOI = b'\xff\xd8'
+JPEG_EOI = b'\xff\xd9'
+
+# Fim dos cabeçalhos de cada parte do multipart e o tamanho declarado nela
+FIM_CABECALHO = b'\r\n\r\n'
+CONTENT_LENGTH = re.compile(rb'content-length:\s*(\d+)', re.IGNORECASE)
+
+
+class FonteDroidCamMJPEG:
+    def __init__(self, url='http://127.0.0.1:4747/video', timeout_conexao=5.0,
+                 tamanho_bloco=65536, espera_reconexao=1.0):
+        """
+        Lê o stream MJPEG-over-HTTP do DroidCam em uma thread de fundo
+
+        Apenas o JPEG mais recente é mantido em memória; a decodificação só
+        acontece em ler_frame(), ou seja, somente para os frames que o
+        pipeline realmente consome.
+
+        Args:
+            url (str): Endereço do stream MJPEG (ex.: http://IP:4747/video)
+            timeout_conexao (float): Timeout de conexão/leitura em segundos
+            tamanho_bloco (int): Bytes lidos por vez do socket
+            espera_reconexao (float): Espera entre tentativas de reconexão
+        """
+        self.url = url
+        self.timeout_conexao = timeout_conexao
+        self.tamanho_bloco = tamanho_bloco
+        self.espera_reconexao = espera_reconexao
+
+        self._condicao = threading.Condition()
+        self._ultimo_jpeg = None
+        self._seq = 0
+        self._seq_consumido = 0
+        self._executando = False
+        self._thread = None
+        self._resposta = None
+
+        self.estatisticas = {
+            'frames_recebidos': 0,
+            'frames_decodificados': 0,
+            'reconexoes': 0,
+            'bytes_recebidos': 0
+        }
+
+    def iniciar(self):
+        """Inicia a thread leitora (idempotente) e retorna a própria fonte"""
+        if not self._executando:
+            # parar() pode ter desistido de esperar uma leitura bloqueada: nunca duas leitoras
+            if self._thread is not None and self._thread.is_alive():
+                self._thread.join()
+            self._executando = True
+            self._thread = threading.Thread(target=self._loop_leitura, daemon=True)
+            self._thread.start()
+        return self
+
+    def parar(self):
+        """Para a thread leitora e fecha a conexão"""
+        self._executando = False
+        resposta = self._resposta
+        if resposta is not None:
+            try:
+                resposta.close()
+            except Exception:
+                pass
+        with self._condicao:
+            self._ultimo_jpeg = None
+            self._condicao.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=self.timeout_conexao)
+            if not self._thread.is_alive():
+                self._thread = None
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *_):
+        self.parar()
+
+    @property
+    def conectado(self):
+        return self._resposta is not None
+
+    def _loop_leitura(self):
+        """Loop da thread de fundo: conecta, extrai JPEGs e reconecta em caso de falha"""
+        while self._executando:
+            try:
+                self._resposta = urllib.request.urlopen(self.url, timeout=self.timeout_conexao)
+                self._ler_stream(self._resposta)
+            except Exception as e:
+                if self._executando:
+                    print(f"⚠️ Stream DroidCam indisponível ({e}), reconectando...")
+            finally:
+                resposta, self._resposta = self._resposta, None
+                if resposta is not None:
+                    try:
+                        resposta.close()
+                    except Exception:
+                        pass
+
+            if self._executando:
+                self.estatisticas['reconexoes'] += 1
+                time.sleep(self.espera_reconexao)
+
+    def _ler_stream(self, resposta):
+        """
+        Extrai JPEGs completos do corpo multipart
+
+        Usa o Content-Length de cada parte; os marcadores SOI/EOI só são
+        procurados em partes sem esse cabeçalho (um JPEG com miniatura EXIF
+        tem um EOI no meio e seria cortado no lugar errado).
+        """
+        ler = getattr(resposta, 'read1', resposta.read)
+        buffer = bytearray()
+        tamanho = None  # None: lendo cabeçalhos; >= 0: bytes da parte; -1: procurar marcadores
+
+        while self._executando:
+            bloco = ler(self.tamanho_bloco)
+            if not bloco:
+                return
+            self.estatisticas['bytes_recebidos'] += len(bloco)
+            buffer += bloco
+
+            while True:
+                if tamanho is None:
+                    fim_cabecalho = buffer.find(FIM_CABECALHO)
+                    inicio = buffer.find(JPEG_SOI)
+                    if 0 <= inicio and (fim_cabecalho < 0 or inicio < fim_cabecalho):
+                        # JPEG sem cabeçalhos antes dele: só os marcadores delimitam o frame
+                        del buffer[:inicio]
+                        tamanho = -1
+                    elif fim_cabecalho < 0:
+                        break
+                    else:
+                        declarado = CONTENT_LENGTH.search(buffer, 0, fim_cabecalho)
+                        tamanho = int(declarado.group(1)) if declarado else -1
+                        del buffer[:fim_cabecalho + len(FIM_CABECALHO)]
+
+                if tamanho >= 0:
+                    if len(buffer) < tamanho:
+                        break
+                    jpeg = bytes(buffer[:tamanho])
+                    del buffer[:tamanho]
+                else:
+                    inicio = buffer.find(JPEG_SOI)
+                    if inicio < 0:
+                        # Mantém só o último byte (pode ser metade do marcador)
+                        del buffer[:-1]
+                        break
+                    del buffer[:inicio]
+                    fim = buffer.find(JPEG_EOI, 2)
+                    if fim < 0:
+                        break
+                    jpeg = bytes(buffer[:fim + 2])
+                    del buffer[:fim + 2]
+                tamanho = None
+
+                if not jpeg.startswith(JPEG_SOI):
+                    continue
+                with self._condicao:
+                    self._ultimo_jpeg = jpeg
+                    self._seq += 1
+                    self.estatisticas['frames_recebidos'] += 1
+                    self._condicao.notify_all()
+
+    def ler_jpeg(self, timeout=1.0, apenas_novo=True):
+        """
+        Retorna os bytes do JPEG mais recente (sem decodificar) ou None
+
+        Args:
+            timeout (float): Tempo máximo de espera por um frame
+            apenas_novo (bool): Se True, espera um frame ainda não consumido
+        """
+        limite = time.time() + timeout
+        with self._condicao:
+            while self._executando:
+                if self._ultimo_jpeg is not None and (not apenas_novo or self._seq > self._seq_consumido):
+                    break
+                restante = limite - time.time()
+                if restante <= 0:
+                    return None
+                self._condicao.wait(restante)
+
+            if self._ultimo_jpeg is None:
+                return None
+            self._seq_consumido = self._seq
+            return self._ultimo_jpeg
+
+    def ler_frame(self, timeout=1.0, apenas_novo=True):
+        """Decodifica e retorna o frame mais recente (BGR) ou None (ver ler_jpeg)"""
+        jpeg = self.ler_jpeg(timeout, apenas_novo)
+        if jpeg is None:
+            return None
+
+        imagem = cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if imagem is not None:
+            self.estatisticas['frames_decodificados'] += 1
+        return imagem
+
+    def obter_estatisticas(self):
+        """Retorna contadores do stream (inclui frames descartados sem decodificar)"""
+        estatisticas = dict(self.estatisticas)
+        estatisticas['frames_descartados'] = max(
+            0, estatisticas['frames_recebidos'] - estatisticas['frames_decodificados']
+        )
+        return estatisticas
+
+
+class FonteReplay:
+    # Pastas onde os sistemas de captura gravam os frames
+    PASTAS_PADRAO = ('capturas_continuas', 'capturas', 'capturas_automaticas')
+    EXTENSOES = ('.jpg', '.jpeg', '.png')
+
+    def __init__(self, pastas=None, repetir=True, fps=None, limite=None):
+        """
+        Reproduz capturas já gravadas como se fossem uma fonte ao vivo
+
+        Útil para benchmarks, calibração e testes sem tela nem câmera.
+
+        Args:
+            pastas (list|str): Pastas (ou arquivos) de imagens; padrão: pastas de captura
+            repetir (bool): Recomeça do início ao chegar no fim
+            fps (float): Limita a taxa de entrega (None = o mais rápido possível)
+            limite (int): Número máximo de arquivos usados
+        """
+        if pastas is None:
+            pastas = self.PASTAS_PADRAO
+        elif isinstance(pastas, str):
+            pastas = [pastas]
+
+        self.arquivos = self.listar_arquivos(pastas)[:limite]
+        self.repetir = repetir
+        self.intervalo = 1.0 / fps if fps else 0.0
+        self._indice = 0
+        self._proximo_instante = 0.0
+
+    @classmethod
+    def listar_arquivos(cls, pastas):
+        """Lista as imagens das pastas em ordem de nome (ordem cronológica das capturas)"""
+        arquivos = []
+        for caminho in pastas:
+            if os.path.isfile(caminho):
+                arquivos.append(caminho)
+            elif os.path.isdir(caminho):
+                arquivos.extend(
+                    a for a in sorted(glob.glob(os.path.join(caminho, '*')))
+                    if a.lower().endswith(cls.EXTENSOES)
+                )
+        return arquivos
+
+    def __len__(self):
+        return len(self.arquivos)
+
+    def ler_jpeg(self, timeout=None, apenas_novo=True):
+        """Retorna os bytes da próxima imagem (sem decodificar) ou None no fim"""
+        if not self.arquivos:
+            return None
+        if self._indice >= len(self.arquivos):
+            if not self.repetir:
+                return None
+            self._indice = 0
+
+        if self.intervalo:
+            espera = self._proximo_instante - time.perf_counter()
+            if espera > 0:
+                time.sleep(espera)
+            self._proximo_instante = time.perf_counter() + self.intervalo
+
+        caminho = self.arquivos[self._indice]
+        self._indice += 1
+        with open(caminho, 'rb') as f:
+            return f.read()
+
+    def ler_frame(self, timeout=None, apenas_novo=True):
+        """Decodifica e retorna a próxima imagem (BGR) ou None no fim"""
+        dados = self.ler_jpeg()
+        if dados is None:
+            return None
+        return cv2.imdecode(np.frombuffer(dados, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+    def __iter__(self):
+        while True:
+            frame = self.ler_frame()
+            if frame is None:
+                return
+            yield frame
@@ -4,7 +4,7 @@ import time
 import threading
 from datetime import datetime, timedelta
 import schedule
-from detector_avancado import DetectorAvancado
+from detector_seguro import DetectorSeguro
 import pyautogui
 import numpy as np
 import cv2
@@ -20,7 +20,8 @@ class GeradorRelatoriosAutomaticos:
         """
         self.intervalo_captura = intervalo_captura
         self.intervalo_relatorio = intervalo_relatorio
-        self.detector = DetectorAvancado()
+        # Detector chamado das threads de captura (uma instância por chamada simultânea)
+        self.detector = DetectorSeguro()
         self.dados_sessao = []
         self.executando = False
         self.thread_captura = None
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Monitor Assíncrono
+Fachada asyncio sobre captura, detecção e gravação: cada chamada bloqueante
+roda num executor limitado (captura, detecção, disco), com limite de
+chamadas simultâneas e cancelamento, e o laço de eventos nunca espera por
+uma inferência ou uma escrita lenta
+"""
+
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+from deteccoes import serializar_json
+from detector_seguro import DetectorSeguro
+
+_FIM = object()
+
+
+class _Executor:
+    """Executor de threads com um semáforo que limita as chamadas em andamento"""
+
+    def __init__(self, nome, limite):
+        self.limite = limite
+        self.executor = ThreadPoolExecutor(max_workers=limite, thread_name_prefix=nome)
+        self.vagas = asyncio.Semaphore(limite)
+
+    async def submeter(self, funcao, *args):
+        """
+        Espera uma vaga (sem bloquear o laço) e envia a chamada
+
+        Returns:
+            asyncio.Future: Resultado da chamada; cancelá-lo cancela a chamada
+                se ela ainda não começou
+        """
+        await self.vagas.acquire()
+        laco = asyncio.get_running_loop()
+        try:
+            futuro = self.executor.submit(funcao, *args)
+        except BaseException:
+            self.vagas.release()
+            raise
+
+        # A vaga só volta quando a thread termina (ou a chamada é cancelada antes de começar),
+        # não quando quem esperava desiste
+        def liberar(_):
+            try:
+                laco.call_soon_threadsafe(self.vagas.release)
+            except RuntimeError:
+                pass  # laço já fechado
+        futuro.add_done_callback(liberar)
+        return asyncio.wrap_future(futuro)
+
+    async def executar(self, funcao, *args):
+        return await (await self.submeter(funcao, *args))
+
+    def fechar(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class MonitorAsync:
+    def __init__(self, captura=None, detector=None, max_deteccoes=None, max_escritas=4):
+        """
+        Args:
+            captura: Fonte de quadros com capturar_tela() e salvar_captura(imagem),
+                ex.: CapturaContinua (só necessária para capturar/salvar pela fachada)
+            detector: DetectorSeguro (padrão) ou DetectorAvancado; um DetectorAvancado
+                não pode ser usado por duas threads, então fica limitado a uma detecção por vez
+            max_deteccoes (int): Detecções simultâneas (padrão: tamanho_pool do DetectorSeguro)
+            max_escritas (int): Escritas em disco simultâneas (capturas e JSON)
+
+        Crie dentro do laço de eventos (os semáforos pertencem a ele).
+        """
+        self.captura = captura
+        self.detector = detector if detector is not None else DetectorSeguro()
+        if max_deteccoes is None:
+            max_deteccoes = getattr(self.detector, 'tamanho_pool', 1)
+        if not isinstance(self.detector, DetectorSeguro):
+            max_deteccoes = 1
+
+        # Captura de tela/janela não é segura entre threads: uma de cada vez
+        self._captura = _Executor('captura', 1)
+        self._deteccao = _Executor('deteccao', max_deteccoes)
+        self._disco = _Executor('disco', max_escritas)
+
+        self.estatisticas = {'capturas': 0, 'deteccoes': 0, 'escritas': 0, 'canceladas': 0}
+
+    def _exigir_captura(self):
+        if self.captura is None:
+            raise RuntimeError("MonitorAsync sem fonte de captura (passe captura=CapturaContinua(...))")
+
+    def _capturar_copia(self):
+        # No Linux a captura XShm devolve o próprio buffer, que a próxima captura
+        # sobrescreve; aqui várias detecções ainda leem o quadro anterior
+        imagem = self.captura.capturar_tela()
+        return None if imagem is None else imagem.copy()
+
+    async def capturar_tela(self):
+        """Versão assíncrona de CapturaContinua.capturar_tela (quadro BGR próprio, ou None)"""
+        self._exigir_captura()
+        imagem = await self._captura.executar(self._capturar_copia)
+        self.estatisticas['capturas'] += 1
+        return imagem
+
+    async def salvar_captura(self, imagem, caminho=None):
+        """Grava o quadro em caminho, ou pelo salvar_captura da fonte se caminho não for informado"""
+        if caminho is None:
+            self._exigir_captura()
+            resultado = await self._disco.executar(self.captura.salvar_captura, imagem)
+        else:
+            resultado = caminho if await self._disco.executar(cv2.imwrite, caminho, imagem) else None
+        self.estatisticas['escritas'] += 1
+        return resultado
+
+    async def detectar_frame(self, imagem):
+        resultado = await self._deteccao.executar(self.detector.detectar_frame, imagem)
+        self.estatisticas['deteccoes'] += 1
+        return resultado
+
+    async def detectar_objetos_pessoas(self, imagem_path):
+        resultado = await self._deteccao.executar(self.detector.detectar_objetos_pessoas, imagem_path)
+        self.estatisticas['deteccoes'] += 1
+        return resultado
+
+    async def salvar_json(self, caminho, dados):
+        """json.dump num thread de disco (resultados com detecções compactas incluídos)"""
+        def escrever():
+            with open(caminho, 'w', encoding='utf-8') as f:
+                json.dump(dados, f, indent=2, ensure_ascii=False, default=serializar_json)
+            return caminho
+        resultado = await self._disco.executar(escrever)
+        self.estatisticas['escritas'] += 1
+        return resultado
+
+    async def _quadros(self, quadros, intervalo):
+        """Quadros de um iterável (síncrono ou assíncrono) ou, sem iterável, da tela a cada intervalo"""
+        if quadros is None:
+            while True:
+                inicio = time.monotonic()
+                imagem = await self.capturar_tela()
+                if imagem is not None:
+                    yield imagem
+                await asyncio.sleep(max(0.0, intervalo - (time.monotonic() - inicio)))
+        elif hasattr(quadros, '__aiter__'):
+            async for imagem in quadros:
+                yield imagem
+        else:
+            for imagem in quadros:
+                yield imagem
+
+    async def resultados(self, quadros=None, intervalo=0.5):
+        """
+        Iterador assíncrono de resultados de detecção, na ordem em que ficam prontos
+
+        Args:
+            quadros: Iterável (ou iterável assíncrono) de quadros BGR; None = captura da tela
+            intervalo (float): Intervalo entre capturas quando quadros é None
+
+        Com todas as vagas de detecção ocupadas, a captura espera: o próximo
+        quadro é sempre o mais recente, em vez de uma fila que só cresce.
+        Sair do laço (break) ou cancelar a tarefa cancela as detecções pendentes.
+        """
+        concluidos = asyncio.Queue()
+        pendentes = set()
+
+        def concluido(futuro):
+            pendentes.discard(futuro)
+            concluidos.put_nowait(futuro)
+
+        async def produzir():
+            try:
+                async for imagem in self._quadros(quadros, intervalo):
+                    futuro = await self._deteccao.submeter(self.detector.detectar_frame, imagem)
+                    pendentes.add(futuro)
+                    futuro.add_done_callback(concluido)
+                if pendentes:
+                    await asyncio.wait(list(pendentes))
+            finally:
+                concluidos.put_nowait(_FIM)
+
+        produtor = asyncio.ensure_future(produzir())
+        try:
+            while True:
+                futuro = await concluidos.get()
+                if futuro is _FIM:
+                    if not produtor.cancelled():
+                        produtor.result()  # repassa erros da fonte de quadros
+                    return
+                if futuro.cancelled():
+                    continue
+                self.estatisticas['deteccoes'] += 1
+                yield futuro.result()
+        finally:
+            produtor.cancel()
+            for futuro in list(pendentes):
+                if futuro.cancel():
+                    self.estatisticas['canceladas'] += 1
+
+    def fechar(self):
+        """Encerra os executores; chamadas que ainda não começaram são canceladas"""
+        for executor in (self._captura, self._deteccao, self._disco):
+            executor.fechar()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        self.fechar()
+
+    def obter_estatisticas(self):
+        return dict(self.estatisticas, max_deteccoes=self._deteccao.limite, max_escritas=self._disco.limite,
+                    detector=self.detector.obter_estatisticas())
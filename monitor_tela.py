@@ -24,18 +24,37 @@ try:
     HAS_WIN32 = True
 except Exception:
     HAS_WIN32 = False
+import sys
 import pyautogui
-from functools import lru_cache
 from detector_avancado import DetectorAvancado
+from deteccoes import serializar_json
+from fontes_frames import FonteDroidCamMJPEG
+from captura_x11 import CapturaX11, HAS_X11
 
 class MonitorTela:
-    def __init__(self, duracao=60, intervalo=0.1):
-        """Inicializa o monitor de tela - FORMATO TESTE_DETECTOR_AVANCADO"""
+    def __init__(self, duracao=60, intervalo=0.1, url_droidcam=None, config_detector=None):
+        """Inicializa o monitor de tela - FORMATO TESTE_DETECTOR_AVANCADO
+
+        Se url_droidcam for informado (ex.: http://IP:4747/video), os frames são
+        lidos direto do stream MJPEG do DroidCam, sem capturar a janela.
+        config_detector sobrescreve chaves de CONFIG_PADRAO do DetectorAvancado.
+        """
         self.duracao = duracao
         self.intervalo = intervalo
-        self.detector = DetectorAvancado()
+        self.detector = DetectorAvancado(config_detector)
         self.criar_diretorios()
         
+        # Stream MJPEG do DroidCam (dispensa captura de janela)
+        self.fonte_droidcam = FonteDroidCamMJPEG(url_droidcam).iniciar() if url_droidcam else None
+        
+        # Captura XShm no Linux (buffer reutilizado, sem alocar imagem PIL por frame)
+        self._captura_x11 = None
+        if HAS_X11 and sys.platform.startswith('linux') and os.environ.get('DISPLAY'):
+            try:
+                self._captura_x11 = CapturaX11()
+            except Exception as e:
+                print(f"⚠️ Captura X11 indisponível: {e}")
+        
         # Configurações otimizadas para alta frequência
         self._cache_resolucao = None
         self._contador_frames = 0
@@ -60,10 +79,16 @@ class MonitorTela:
         """Cria a pasta para armazenar as capturas se não existir"""
         os.makedirs(self.pasta_capturas, exist_ok=True)
     
-    @lru_cache(maxsize=1)
     def capturar_tela(self):
-        """Captura apenas a janela 'DroidCam Client' se encontrada, incluindo casos cobertos/minimizados (via PrintWindow), senão captura a tela inteira."""
+        """Lê o stream do DroidCam se configurado; senão captura apenas a janela 'DroidCam Client' se encontrada, incluindo casos cobertos/minimizados (via PrintWindow), senão captura a tela inteira."""
         try:
+            # Preferência máxima: frame direto do stream MJPEG (sem captura de tela)
+            if self.fonte_droidcam is not None:
+                frame = self.fonte_droidcam.ler_frame(timeout=max(1.0, self.intervalo * 10))
+                if frame is not None:
+                    self._cache_resolucao = (frame.shape[1], frame.shape[0])
+                    return frame
+            
             # Preferência: tentar PrintWindow (funciona coberta/minimizada em muitos casos)
             def _capture_droidcam_printwindow(title='DroidCam Client'):
                 if not HAS_WIN32:
@@ -113,6 +138,15 @@ class MonitorTela:
             if im is not None:
                 screenshot = im
                 self._cache_resolucao = screenshot.size
+            elif self._captura_x11 is not None:
+                # Linux: janela DroidCam via XShm, senão tela inteira (já em BGR)
+                imagem_bgr = self._captura_x11.capturar_janela('DroidCam Client')
+                if imagem_bgr is None:
+                    imagem_bgr = self._captura_x11.capturar()
+                if imagem_bgr is not None:
+                    self._cache_resolucao = (imagem_bgr.shape[1], imagem_bgr.shape[0])
+                    return imagem_bgr
+                screenshot = ImageGrab.grab()
             else:
                 # Fallback: tentar achar bbox e capturar via ImageGrab
                 try:
@@ -463,6 +497,9 @@ class MonitorTela:
         print(f"🚀 Frequência máxima: {1/intervalo_segundos:.1f} capturas/segundo")
         print("=" * 60)
         
+        if self.fonte_droidcam is not None:
+            self.fonte_droidcam.iniciar()
+        
         inicio = time.time()
         capturas = []
         contador = 0
@@ -475,6 +512,9 @@ class MonitorTela:
                 
                 # Captura tela
                 imagem = self.capturar_tela()
+                if imagem is None:
+                    time.sleep(intervalo_segundos)
+                    continue
                 imagem_path, _ = self.salvar_captura(imagem, datetime.now())
                 if not imagem_path:
                     time.sleep(intervalo_segundos)
@@ -499,6 +539,9 @@ class MonitorTela:
         except KeyboardInterrupt:
             print("\n⏹️ Monitoramento interrompido pelo usuário")
         
+        if self.fonte_droidcam is not None:
+            self.fonte_droidcam.parar()
+        
         fim = time.time()
         duracao_real = fim - inicio
         
@@ -534,6 +577,7 @@ class MonitorTela:
             },
             'capturas': capturas,
             'narrativa': narrativa,
+            'otimizacoes_detector': self.detector.obter_estatisticas(),
             'status': 'sucesso'
         }
         
@@ -563,7 +607,7 @@ class MonitorTela:
         caminho_relatorio = os.path.join("relatorios", nome_relatorio)
         
         with open(caminho_relatorio, 'w', encoding='utf-8') as f:
-            json.dump(relatorio_final, f, indent=2, ensure_ascii=False)
+            json.dump(relatorio_final, f, indent=2, ensure_ascii=False, default=serializar_json)
         
         # Gera gráficos
         nome_grafico = f"graficos_{timestamp_relatorio}.png"
@@ -587,5 +631,7 @@ class MonitorTela:
         print("="*60)
 
 if __name__ == "__main__":
-    monitor = MonitorTela()
+    # Defina DROIDCAM_URL (ex.: http://192.168.0.10:4747/video) para ler o stream direto
+    monitor = MonitorTela(url_droidcam=os.environ.get('DROIDCAM_URL'),
+                          config_detector={'cache_resultados': True})
     monitor.monitorar(duracao_segundos=60, intervalo_segundos=0.1)
\ No newline at end of file
@@ -8,7 +8,9 @@ from datetime import datetime
 import numpy as np
 from PIL import Image, ImageTk
 import cv2
-from detector_avancado import DetectorAvancado
+from detector_seguro import DetectorSeguro
+from deteccoes import serializar_json
+from controle_carga import ControleCarga, nivel_carga_maximo
 import pyautogui
 import queue
 
@@ -20,8 +22,10 @@ class MonitorTempoReal:
         
         # Variáveis de controle
         self.monitorando = False
-        self.detector = DetectorAvancado()
+        # Detector chamado da thread de monitoramento (uma instância por chamada simultânea)
+        self.detector = DetectorSeguro()
         self.thread_monitor = None
+        self.controle_carga = None
         self.dados_sessao = []
         self.contador_capturas = 0
         self.inicio_sessao = None
@@ -128,6 +132,9 @@ class MonitorTempoReal:
             self.inicio_sessao = datetime.now()
             self.dados_sessao = []
             self.contador_capturas = 0
+            # Degrada a detecção quando ela não cabe no intervalo de captura
+            self.controle_carga = ControleCarga(orcamento=int(self.intervalo_var.get()),
+                                                nivel_maximo=nivel_carga_maximo(self.detector.config))
             
             # Atualizar interface
             self.btn_iniciar.config(state='disabled')
@@ -161,14 +168,25 @@ class MonitorTempoReal:
         intervalo = int(self.intervalo_var.get())
         
         while self.monitorando:
+            inicio = time.monotonic()
             try:
+                # Sob sobrecarga, o controle de carga descarta parte dos quadros
+                if not self.controle_carga.deve_processar():
+                    time.sleep(max(0.0, intervalo - (time.monotonic() - inicio)))
+                    continue
+                
                 # Capturar tela
                 screenshot = pyautogui.screenshot()
                 imagem = np.array(screenshot)
                 imagem = cv2.cvtColor(imagem, cv2.COLOR_RGB2BGR)
                 
                 # Processar com detector
-                resultado = self.detector.detectar_atividades(imagem)
+                inicio_deteccao = time.monotonic()
+                resultado = self.detector.detectar_frame(imagem)
+                nivel = self.controle_carga.registrar(time.monotonic() - inicio_deteccao)
+                if nivel is not None:
+                    self.detector.aplicar_nivel_carga(nivel)
+                resultado['narrativa'] = resultado.get('narrativa_especifica', 'Nenhuma atividade detectada')
                 
                 # Adicionar timestamp
                 resultado['timestamp'] = datetime.now().isoformat()
@@ -181,8 +199,8 @@ class MonitorTempoReal:
                 # Enviar resultado para interface
                 self.queue_resultados.put(resultado)
                 
-                # Aguardar próxima captura
-                time.sleep(intervalo)
+                # Aguardar próxima captura (descontando o tempo já gasto neste quadro)
+                time.sleep(max(0.0, intervalo - (time.monotonic() - inicio)))
                 
             except Exception as e:
                 print(f"Erro no monitoramento: {e}")
@@ -216,27 +234,27 @@ class MonitorTempoReal:
         self.atualizar_narrativa(resultado, timestamp)
         
         # Atualizar barra de status
-        pessoas = len(resultado.get('pessoas', []))
-        objetos = len(resultado.get('objetos', []))
+        pessoas = len(resultado.get('deteccoes', {}).get('pessoas', []))
+        objetos = len(resultado.get('deteccoes', {}).get('objetos', []))
         self.status_bar.config(text=f"Última captura: {timestamp.strftime('%H:%M:%S')} - "
                                    f"Pessoas: {pessoas}, Objetos: {objetos}")
         
     def atualizar_estatisticas(self, resultado, timestamp):
         """Atualiza a área de estatísticas"""
-        pessoas = len(resultado.get('pessoas', []))
-        objetos = len(resultado.get('objetos', []))
+        pessoas = len(resultado.get('deteccoes', {}).get('pessoas', []))
+        objetos = len(resultado.get('deteccoes', {}).get('objetos', []))
         
         # Calcular estatísticas da sessão
         if self.dados_sessao:
-            total_pessoas = sum(len(r.get('pessoas', [])) for r in self.dados_sessao)
-            total_objetos = sum(len(r.get('objetos', [])) for r in self.dados_sessao)
+            total_pessoas = sum(len(r.get('deteccoes', {}).get('pessoas', [])) for r in self.dados_sessao)
+            total_objetos = sum(len(r.get('deteccoes', {}).get('objetos', [])) for r in self.dados_sessao)
             media_pessoas = total_pessoas / len(self.dados_sessao)
             media_objetos = total_objetos / len(self.dados_sessao)
             
             # Atividades mais frequentes
             atividades = []
             for r in self.dados_sessao:
-                for pessoa in r.get('pessoas', []):
+                for pessoa in r.get('deteccoes', {}).get('pessoas', []):
                     if 'atividade_provavel' in pessoa:
                         atividades.append(pessoa['atividade_provavel'])
             
@@ -307,7 +325,7 @@ ATIVIDADES MAIS FREQUENTES
             
             # Salvar relatório
             with open(nome_arquivo, 'w', encoding='utf-8') as f:
-                json.dump(relatorio, f, indent=2, ensure_ascii=False)
+                json.dump(relatorio, f, indent=2, ensure_ascii=False, default=serializar_json)
                 
             messagebox.showinfo("Sucesso", f"Relatório salvo em: {nome_arquivo}")
             
@@ -321,8 +339,8 @@ ATIVIDADES MAIS FREQUENTES
             
         # Estatísticas básicas
         total_capturas = len(self.dados_sessao)
-        total_pessoas = sum(len(r.get('pessoas', [])) for r in self.dados_sessao)
-        total_objetos = sum(len(r.get('objetos', [])) for r in self.dados_sessao)
+        total_pessoas = sum(len(r.get('deteccoes', {}).get('pessoas', [])) for r in self.dados_sessao)
+        total_objetos = sum(len(r.get('deteccoes', {}).get('objetos', [])) for r in self.dados_sessao)
         
         # Atividades detectadas
         atividades = []
@@ -330,7 +348,7 @@ ATIVIDADES MAIS FREQUENTES
         movimentos_mao = []
         
         for resultado in self.dados_sessao:
-            for pessoa in resultado.get('pessoas', []):
+            for pessoa in resultado.get('deteccoes', {}).get('pessoas', []):
                 if 'atividade_provavel' in pessoa:
                     atividades.append(pessoa['atividade_provavel'])
                 if 'postura' in pessoa:
@@ -361,6 +379,7 @@ ATIVIDADES MAIS FREQUENTES
             'atividades_frequentes': contar_frequencias(atividades),
             'posturas_frequentes': contar_frequencias(posturas),
             'movimentos_mao_frequentes': contar_frequencias(movimentos_mao),
+            'controle_carga': self.controle_carga.obter_estatisticas() if self.controle_carga else None,
             'dados_brutos': self.dados_sessao
         }
         
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Narrativa da Cena
+Tabelas de frases montadas uma vez no módulo, texto memoizado pela
+assinatura da cena (contagem de classes e códigos de atividade) e
+resultado com campos preguiçosos, calculados só quando lidos
+"""
+
+import copy
+from functools import lru_cache
+
+from backends_inferencia import nome_classe
+
+# Ação específica por atividade provável e movimento das mãos
+ACOES_ESPECIFICAS = {
+    'trabalhando_no_computador': {
+        'digitando': 'está digitando no computador',
+        'maos_no_colo': 'está lendo na tela do computador',
+        'gesticulando': 'está interagindo com o computador',
+        'apontando': 'está apontando para algo na tela',
+        'segurando_objeto': 'está usando o mouse ou outro dispositivo'
+    },
+    'conversando_ou_apresentando': {
+        'gesticulando': 'está gesticulando durante uma conversa',
+        'apontando': 'está apontando durante uma apresentação',
+        'maos_ao_lado': 'está falando ou ouvindo',
+        'segurando_objeto': 'está segurando algo enquanto fala'
+    },
+    'lendo_ou_escrevendo': {
+        'digitando': 'está escrevendo ou digitando',
+        'maos_no_colo': 'está lendo um documento',
+        'segurando_objeto': 'está escrevendo à mão',
+        'maos_ao_lado': 'está concentrado na leitura'
+    },
+    'observando_ou_aguardando': {
+        'maos_no_colo': 'está observando atentamente',
+        'maos_ao_lado': 'está aguardando ou descansando',
+        'gesticulando': 'está se movimentando inquieto',
+        'apontando': 'está indicando algo'
+    }
+}
+
+DETALHES_POSTURA = {'em_pe': 'em pé', 'agachado_ou_sentado': 'sentado'}
+DETALHES_CABECA = {
+    'olhando_direita': 'olhando para a direita',
+    'olhando_esquerda': 'olhando para a esquerda',
+    'cabeca_para_cima': 'com a cabeça levantada',
+    'cabeca_para_baixo': 'com a cabeça baixa'
+}
+DESCRICAO_POSTURA = {'em_pe': 'está em pé', 'agachado_ou_sentado': 'está sentado'}
+DESCRICAO_MAOS = {'digitando': 'com as mãos digitando', 'gesticulando': 'gesticulando', 'apontando': 'apontando'}
+
+DESCRICAO_NAO_IDENTIFICADA = 'realizando atividade não identificada.'
+
+
+@lru_cache(maxsize=1024)
+def descrever_acao(postura, movimento_maos, movimento_cabeca, atividade_provavel):
+    """Frase da ação específica de uma pessoa (memoizada pelos quatro códigos)"""
+    acoes = ACOES_ESPECIFICAS.get(atividade_provavel)
+    if acoes is not None:
+        acao_por_maos = acoes.get(movimento_maos, acoes.get('maos_ao_lado', ''))
+        if acao_por_maos:
+            detalhes = [d for d in (DETALHES_POSTURA.get(postura), DETALHES_CABECA.get(movimento_cabeca)) if d]
+            return f"{acao_por_maos}, {', '.join(detalhes)}." if detalhes else f"{acao_por_maos}."
+
+    # Descrição básica
+    descricao = []
+    if postura != 'desconhecida':
+        descricao.append(DESCRICAO_POSTURA.get(postura, f'está na posição {postura}'))
+    if movimento_maos != 'nao_detectado':
+        descricao.append(DESCRICAO_MAOS.get(movimento_maos, f'com as mãos {movimento_maos.replace("_", " ")}'))
+    return ', '.join(descricao) + '.' if descricao else DESCRICAO_NAO_IDENTIFICADA
+
+
+def codigos_acao(atividade):
+    """(postura, mãos, cabeça, atividade provável) de uma atividade facial"""
+    return (atividade.get('postura_corporal', 'desconhecida'),
+            atividade.get('movimento_maos', 'nao_detectado'),
+            atividade.get('movimento_cabeca', 'nao_detectado'),
+            atividade.get('atividade_provavel', 'desconhecida'))
+
+
+def _tipos_objetos(objetos):
+    if hasattr(objetos, 'classes'):  # DeteccoesQuadro: lê as classes sem montar os dicionários
+        return [nome_classe(c, objetos.nomes) for c in objetos.classes.tolist()]
+    return [obj.get('tipo', 'desconhecido') for obj in objetos]
+
+
+def assinatura_cena(resultado):
+    """
+    Tudo o que a narrativa usa: número de pessoas, códigos de atividade,
+    contagem por classe de objeto (na ordem de aparição) e número de interações
+    """
+    deteccoes = resultado.get('deteccoes', {})
+    analises = resultado.get('analises', {})
+    pessoas = deteccoes.get('pessoas', [])
+    atividades = analises.get('atividades_faciais', [])[:len(pessoas)]
+
+    contagem = {}
+    for tipo in _tipos_objetos(deteccoes.get('objetos', [])):
+        contagem[tipo] = contagem.get(tipo, 0) + 1
+
+    return (len(pessoas), tuple(codigos_acao(a) for a in atividades),
+            tuple(contagem.items()), len(analises.get('interacoes', [])))
+
+
+@lru_cache(maxsize=256)
+def narrativa_por_assinatura(assinatura):
+    num_pessoas, acoes, contagem_objetos, num_interacoes = assinatura
+    narrativa = []
+
+    if num_pessoas:
+        narrativa.append(f"Detectadas {num_pessoas} pessoa(s) na cena.")
+        for i, codigos in enumerate(acoes):
+            narrativa.append(f"Pessoa {i+1}: {descrever_acao(*codigos)}")
+    else:
+        narrativa.append("Nenhuma pessoa detectada na cena.")
+
+    if contagem_objetos:
+        obj_desc = [f"1 {tipo}" if n == 1 else f"{n} {tipo}s" for tipo, n in contagem_objetos]
+        narrativa.append(f"Objetos identificados: {', '.join(obj_desc)}.")
+
+    if num_interacoes:
+        narrativa.append(f"Detectadas {num_interacoes} interação(ões) entre pessoas e objetos.")
+
+    return " ".join(narrativa)
+
+
+def gerar_narrativa(resultado):
+    """Narrativa descritiva de um resultado de detecção"""
+    return narrativa_por_assinatura(assinatura_cena(resultado))
+
+
+class ResultadoPreguicoso(dict):
+    """
+    Dicionário com campos adiados: a função de um campo só roda na primeira
+    leitura (indexação, get, items, json.dump, cópia) e o valor fica guardado
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._adiados = {}
+
+    def adiar(self, chave, funcao):
+        super().pop(chave, None)
+        self._adiados[chave] = funcao
+
+    def _resolver(self, chave):
+        valor = self._adiados.pop(chave)()
+        super().__setitem__(chave, valor)
+        return valor
+
+    def _resolver_todos(self):
+        for chave in list(self._adiados):
+            self._resolver(chave)
+
+    def __missing__(self, chave):
+        if chave in self._adiados:
+            return self._resolver(chave)
+        raise KeyError(chave)
+
+    def get(self, chave, padrao=None):
+        return self[chave] if chave in self else padrao
+
+    def __setitem__(self, chave, valor):
+        self._adiados.pop(chave, None)
+        super().__setitem__(chave, valor)
+
+    def __delitem__(self, chave):
+        if self._adiados.pop(chave, None) is None:
+            super().__delitem__(chave)
+
+    def pop(self, chave, *padrao):
+        if chave in self._adiados:
+            self._resolver(chave)
+        return super().pop(chave, *padrao)
+
+    def __contains__(self, chave):
+        return super().__contains__(chave) or chave in self._adiados
+
+    def __len__(self):
+        return super().__len__() + len(self._adiados)
+
+    def __iter__(self):
+        yield from super().keys()
+        yield from list(self._adiados)
+
+    def keys(self):
+        return list(self)
+
+    def items(self):
+        self._resolver_todos()
+        return super().items()
+
+    def values(self):
+        self._resolver_todos()
+        return super().values()
+
+    def copy(self):
+        self._resolver_todos()
+        return dict(super().items())
+
+    def __deepcopy__(self, memo):
+        # Campos ainda não lidos continuam adiados na cópia
+        copia = ResultadoPreguicoso(copy.deepcopy(dict(super().items()), memo))
+        copia._adiados = dict(self._adiados)
+        return copia
+
+    def __reduce__(self):
+        self._resolver_todos()
+        return (ResultadoPreguicoso, (dict(super().items()),))
+
+    def __eq__(self, outro):
+        if isinstance(outro, dict):
+            self._resolver_todos()
+            return dict(super().items()) == dict(outro.items())
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        self._resolver_todos()
+        return super().__repr__()
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pool de Detectores em Processos
+N processos, cada um com o seu DetectorAvancado (e o seu modelo); os
+quadros passam por memória compartilhada em vez de serem serializados,
+os resultados saem na ordem de envio e processos que morrem são reiniciados.
+Cada processo devolve os resultados por um Pipe próprio: um processo que
+morre no meio de um envio não trava os outros (como travaria uma Queue
+compartilhada, cujo lock de escrita ficaria preso com o processo morto)
+"""
+
+import multiprocessing as mp
+import os
+import time
+from multiprocessing import resource_tracker, shared_memory
+from multiprocessing.connection import wait
+
+import numpy as np
+
+# Tentativas por quadro antes de desistir dele (um quadro que derruba o processo duas vezes)
+MAX_TENTATIVAS = 2
+
+# Processos que morrem antes de carregar o detector, seguidos, antes de desistir do pool
+MAX_FALHAS_INICIO = 3
+
+
+def _abrir_memoria(nome):
+    """Abre um segmento criado pelo processo principal sem registrá-lo no resource_tracker"""
+    try:
+        return shared_memory.SharedMemory(name=nome, track=False)  # Python 3.13+
+    except TypeError:
+        # Antes do 3.13, quem só abre o segmento também o registra, e o
+        # resource_tracker o apagaria quando este processo terminasse
+        registrar = resource_tracker.register
+        resource_tracker.register = lambda *args, **kwargs: None
+        try:
+            return shared_memory.SharedMemory(name=nome)
+        finally:
+            resource_tracker.register = registrar
+
+
+def _trabalhador(indice, config, tarefas, resultados):
+    """Laço de um processo do pool: lê quadros da memória compartilhada e devolve os resultados pelo Pipe"""
+    from detector_avancado import DetectorAvancado
+
+    detector = DetectorAvancado(config)
+    segmentos = {}
+    resultados.send(('pronto', indice, None))
+
+    while True:
+        tarefa = tarefas.get()
+        if tarefa is None:
+            break
+        if tarefa[0] == 'carga':
+            detector.aplicar_nivel_carga(tarefa[1])
+            continue
+        seq, nome, formato, tipo = tarefa
+        try:
+            if nome not in segmentos:
+                segmentos[nome] = _abrir_memoria(nome)
+            imagem = np.ndarray(formato, dtype=tipo, buffer=segmentos[nome].buf)
+            resultado = detector.detectar_frame(imagem)
+            del imagem
+            resultados.send(('resultado', seq, resultado))
+        except Exception as e:
+            resultados.send(('erro', seq, str(e)))
+
+    resultados.send(('estatisticas', indice, detector.obter_estatisticas()))
+    resultados.close()
+    for segmento in segmentos.values():
+        segmento.close()
+
+
+class _Slot:
+    """Segmento de memória compartilhada para um quadro em voo"""
+
+    def __init__(self, tamanho):
+        self.memoria = shared_memory.SharedMemory(create=True, size=max(1, tamanho))
+
+    def copiar(self, imagem):
+        if imagem.nbytes > self.memoria.size:
+            # Quadro maior que o segmento: troca por um novo (os processos abrem pelo nome)
+            self.liberar()
+            self.memoria = shared_memory.SharedMemory(create=True, size=imagem.nbytes)
+        destino = np.ndarray(imagem.shape, dtype=imagem.dtype, buffer=self.memoria.buf)
+        np.copyto(destino, imagem)
+        return self.memoria.name
+
+    def liberar(self):
+        self.memoria.close()
+        self.memoria.unlink()
+
+
+class PoolDetectores:
+    def __init__(self, processos=None, config=None, quadros_por_processo=2, timeout_envio=60.0):
+        """
+        Args:
+            processos (int): Número de processos (padrão: núcleos disponíveis)
+            config (dict): Configuração de cada DetectorAvancado; com num_threads=0,
+                os núcleos são divididos entre os processos
+            quadros_por_processo (int): Quadros em voo por processo (slots de memória)
+            timeout_envio (float): Tempo máximo que enviar() espera por um slot livre
+
+        Os modos com estado entre quadros (incremental, atenção, cascata, cache)
+        continuam por processo: cada um vê só a sua parte da sequência.
+        """
+        self.processos = processos or os.cpu_count() or 1
+        self.config = dict(config or {})
+        if not self.config.get('num_threads'):
+            self.config['num_threads'] = max(1, (os.cpu_count() or 1) // self.processos)
+
+        self.timeout_envio = timeout_envio
+        self._contexto = mp.get_context('spawn')  # cada processo carrega o próprio modelo
+        self._fechado = False
+        self._nivel_carga = 0
+        self._iniciados = set()
+        self._falhas_inicio = 0
+        self._trabalhadores = [None] * self.processos
+        self._filas = [None] * self.processos
+        self._conexoes = [None] * self.processos  # ponta de leitura do Pipe de cada processo
+        for i in range(self.processos):
+            self._iniciar_trabalhador(i)
+
+        self._slots_livres = []
+        self._max_slots = self.processos * quadros_por_processo
+        self._num_slots = 0
+
+        self._proximo_seq = 0
+        self._proximo_entregar = 0
+        self._pendentes = {}   # seq -> [trabalhador, slot, formato, tipo, tentativas]
+        self._prontos = {}     # seq -> resultado
+        self._estatisticas_trabalhadores = []
+
+        self.estatisticas = {
+            'processos': self.processos,
+            'quadros_enviados': 0,
+            'quadros_concluidos': 0,
+            'erros': 0,
+            'reinicios': 0,
+            'quadros_descartados': 0
+        }
+
+    def _iniciar_trabalhador(self, i):
+        fila = self._contexto.Queue()
+        leitura, escrita = self._contexto.Pipe(duplex=False)
+        processo = self._contexto.Process(target=_trabalhador, args=(i, self.config, fila, escrita),
+                                          name=f"detector-{i}", daemon=True)
+        processo.start()
+        # Só o processo fica com a ponta de escrita: quando ele morre, a leitura recebe EOF
+        escrita.close()
+        if self._conexoes[i] is not None:
+            self._conexoes[i].close()
+        self._trabalhadores[i] = processo
+        self._filas[i] = fila
+        self._conexoes[i] = leitura
+        if self._nivel_carga:
+            fila.put(('carga', self._nivel_carga))
+
+    def aplicar_nivel_carga(self, nivel):
+        """Repassa um degrau do controle de carga a todos os processos (vale a partir do próximo quadro)"""
+        self._nivel_carga = nivel
+        for fila in self._filas:
+            fila.put(('carga', nivel))
+
+    def _despachar(self, seq):
+        pendente = self._pendentes[seq]
+        carga = [0] * self.processos
+        for outro in self._pendentes.values():
+            if outro[0] is not None:
+                carga[outro[0]] += 1
+        i = min(range(self.processos), key=carga.__getitem__)
+        pendente[0] = i
+        self._filas[i].put((seq, pendente[1].memoria.name, pendente[2], pendente[3]))
+
+    def _verificar_trabalhadores(self):
+        """Reinicia processos mortos e reenvia os quadros que estavam com eles"""
+        for i, processo in enumerate(self._trabalhadores):
+            if processo.is_alive():
+                continue
+            if i not in self._iniciados:
+                # Morreu antes de carregar o detector: configuração ou modelo com problema
+                self._falhas_inicio += 1
+                if self._falhas_inicio >= MAX_FALHAS_INICIO:
+                    self.fechar()
+                    raise RuntimeError(f"Processos do pool terminam ao iniciar (código {processo.exitcode})")
+            self._iniciados.discard(i)
+            print(f"⚠️ Processo detector-{i} terminou (código {processo.exitcode}), reiniciando")
+            self.estatisticas['reinicios'] += 1
+            self._iniciar_trabalhador(i)
+            for seq, pendente in sorted(self._pendentes.items()):
+                if pendente[0] != i:
+                    continue
+                pendente[4] += 1
+                if pendente[4] > MAX_TENTATIVAS:
+                    self.estatisticas['quadros_descartados'] += 1
+                    self._concluir(seq, self._resultado_erro(f"processo terminou {MAX_TENTATIVAS}x neste quadro"))
+                else:
+                    self._despachar(seq)
+
+    @staticmethod
+    def _resultado_erro(mensagem):
+        from detector_avancado import DetectorAvancado
+        resultado = DetectorAvancado._resultado_vazio(None)
+        resultado['erro'] = mensagem
+        return resultado
+
+    def _concluir(self, seq, resultado):
+        pendente = self._pendentes.pop(seq, None)
+        if pendente is None:
+            return  # resultado atrasado de um quadro já reenviado
+        self._slots_livres.append(pendente[1])
+        self._prontos[seq] = resultado
+        self.estatisticas['quadros_concluidos'] += 1
+
+    def _tratar(self, mensagem):
+        tipo, chave, valor = mensagem
+        if tipo == 'resultado':
+            self._concluir(chave, valor)
+        elif tipo == 'erro':
+            self.estatisticas['erros'] += 1
+            self._concluir(chave, self._resultado_erro(valor))
+        elif tipo == 'estatisticas':
+            self._estatisticas_trabalhadores.append(valor)
+        elif tipo == 'pronto':
+            self._iniciados.add(chave)
+            self._falhas_inicio = 0
+
+    def _coletar(self, timeout):
+        """Lê as mensagens dos processos; retorna False se nada chegou no tempo"""
+        abertas = [c for c in self._conexoes if c is not None]
+        prontas = wait(abertas, timeout) if abertas else []
+        recebeu = False
+        for i, conexao in enumerate(self._conexoes):
+            if conexao is None or conexao not in prontas:
+                continue
+            try:
+                while conexao.poll():
+                    self._tratar(conexao.recv())
+                    recebeu = True
+            except (EOFError, OSError):
+                # Processo terminou (ou morreu no meio de um envio)
+                conexao.close()
+                self._conexoes[i] = None
+        if not abertas and timeout:
+            time.sleep(timeout)
+        if (not recebeu or None in self._conexoes) and not self._fechado:
+            self._verificar_trabalhadores()
+        return recebeu
+
+    def enviar(self, imagem):
+        """
+        Envia um quadro BGR para detecção; bloqueia só se todos os slots estiverem em uso
+
+        Returns:
+            int: Número de sequência do quadro
+
+        Raises:
+            TimeoutError: Nenhum slot liberado em timeout_envio segundos
+        """
+        imagem = np.ascontiguousarray(imagem)
+        limite = time.monotonic() + self.timeout_envio
+        while not self._slots_livres and self._num_slots >= self._max_slots:
+            if time.monotonic() >= limite:
+                raise TimeoutError(f"Nenhum quadro concluído em {self.timeout_envio}s ({self.em_voo} em voo)")
+            self._coletar(timeout=0.1)
+        if self._slots_livres:
+            slot = self._slots_livres.pop()
+        else:
+            slot = _Slot(imagem.nbytes)
+            self._num_slots += 1
+        slot.copiar(imagem)
+
+        seq = self._proximo_seq
+        self._proximo_seq += 1
+        self._pendentes[seq] = [None, slot, imagem.shape, imagem.dtype.str, 0]
+        self._despachar(seq)
+        self.estatisticas['quadros_enviados'] += 1
+        return seq
+
+    def prontos(self):
+        """Resultados já concluídos, na ordem de envio, sem bloquear: lista de (seq, resultado)"""
+        self._coletar(timeout=0)
+        entregues = []
+        while self._proximo_entregar in self._prontos:
+            entregues.append((self._proximo_entregar, self._prontos.pop(self._proximo_entregar)))
+            self._proximo_entregar += 1
+        return entregues
+
+    def proximo(self, timeout=None):
+        """Próximo resultado na ordem de envio (bloqueia); None se nada foi enviado ou o tempo acabou"""
+        limite = None if timeout is None else time.monotonic() + timeout
+        while self._proximo_entregar not in self._prontos:
+            if self._proximo_entregar >= self._proximo_seq:
+                return None
+            if limite is not None and time.monotonic() >= limite:
+                return None
+            self._coletar(timeout=0.1)
+        resultado = self._prontos.pop(self._proximo_entregar)
+        self._proximo_entregar += 1
+        return resultado
+
+    def detectar_frames(self, imagens):
+        """Gera os resultados de uma sequência de quadros, na ordem, mantendo os processos ocupados"""
+        for imagem in imagens:
+            self.enviar(imagem)
+            for _, resultado in self.prontos():
+                yield resultado
+        while self._proximo_entregar < self._proximo_seq:
+            yield self.proximo()
+
+    @property
+    def em_voo(self):
+        return self._proximo_seq - self._proximo_entregar
+
+    def fechar(self):
+        """Encerra os processos e libera a memória compartilhada"""
+        if self._fechado:
+            return
+        self._fechado = True
+        for i, fila in enumerate(self._filas):
+            if self._trabalhadores[i].is_alive():
+                fila.put(None)
+        limite = time.monotonic() + 5
+        while any(p.is_alive() for p in self._trabalhadores) and time.monotonic() < limite:
+            self._coletar(timeout=0.1)  # esvazia os Pipes: nenhum processo fica preso no send()
+        for processo in self._trabalhadores:
+            if processo.is_alive():
+                processo.terminate()
+            processo.join(timeout=1)
+        while self._coletar(timeout=0.2):
+            pass
+        for conexao in self._conexoes:
+            if conexao is not None:
+                conexao.close()
+        self._conexoes = [None] * self.processos
+        for pendente in self._pendentes.values():
+            self._slots_livres.append(pendente[1])
+        self._pendentes.clear()
+        for slot in self._slots_livres:
+            slot.liberar()
+        self._slots_livres = []
+        self._num_slots = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.fechar()
+
+    def obter_estatisticas(self):
+        return dict(self.estatisticas, em_voo=self.em_voo, detectores=list(self._estatisticas_trabalhadores))
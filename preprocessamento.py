@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pré-processamento de Entrada dos Modelos
+Letterbox para tamanhos de entrada configuráveis e buffers de blob pré-alocados
+"""
+
+import cv2
+import numpy as np
+
+# Tamanhos de entrada suportados (múltiplos de 32, exigidos pelas redes YOLO)
+TAMANHOS_ENTRADA = (320, 416, 512, 608)
+
+# Modos nomeados: rápido para máquinas fracas, preciso onde a acurácia importa
+MODOS_ENTRADA = {
+    'rapido': 320,
+    'equilibrado': 416,
+    'detalhado': 512,
+    'preciso': 608
+}
+
+# Cor de preenchimento do letterbox (mesma usada no treino dos modelos YOLO)
+COR_PREENCHIMENTO = 114
+
+
+def resolver_tamanho_entrada(valor):
+    """Converte nome de modo ou número em um tamanho de entrada suportado"""
+    tamanho = MODOS_ENTRADA.get(valor, valor)
+    try:
+        tamanho = int(tamanho)
+    except (TypeError, ValueError):
+        tamanho = None
+    if tamanho not in TAMANHOS_ENTRADA:
+        raise ValueError(
+            f"Tamanho de entrada inválido: {valor!r} "
+            f"(use {', '.join(map(str, TAMANHOS_ENTRADA))} ou {', '.join(MODOS_ENTRADA)})"
+        )
+    return tamanho
+
+
+def grade_tiles(largura, altura, lado_max=1920, sobreposicao=0.2, max_tiles=6):
+    """
+    Divide o quadro em tiles sobrepostos que cobrem toda a imagem
+
+    O número de colunas e linhas cresce com o tamanho do quadro, de modo que
+    cada tile tenha no máximo ~lado_max pixels por lado (a escala de um quadro
+    1080p inteiro); max_tiles limita o custo em telas muito grandes.
+
+    Returns:
+        list: Regiões (x0, y0, x1, y1) dos tiles
+    """
+    colunas = max(1, int(np.ceil(largura / lado_max)))
+    linhas = max(1, int(np.ceil(altura / lado_max)))
+    while colunas * linhas > max_tiles:
+        # Junta na direção em que os tiles estão mais estreitos
+        if largura / colunas <= altura / linhas:
+            colunas -= 1
+        else:
+            linhas -= 1
+
+    def _intervalos(total, partes):
+        if partes == 1:
+            return [(0, total)]
+        passo = total / partes
+        margem = int(passo * sobreposicao / 2)
+        return [(max(0, int(i * passo) - margem), min(total, int((i + 1) * passo) + margem))
+                for i in range(partes)]
+
+    return [(x0, y0, x1, y1)
+            for y0, y1 in _intervalos(altura, linhas)
+            for x0, x1 in _intervalos(largura, colunas)]
+
+
+def desfazer_letterbox(caixas_xyxy, escala, pad_x, pad_y):
+    """Converte caixas (N x 4, xyxy) do espaço da entrada para a imagem original (in-place)"""
+    caixas_xyxy[:, [0, 2]] -= pad_x
+    caixas_xyxy[:, [1, 3]] -= pad_y
+    caixas_xyxy /= escala
+    return caixas_xyxy
+
+
+class BuffersEntrada:
+    def __init__(self):
+        """
+        Buffers de entrada pré-alocados por tamanho e reutilizados entre chamadas
+
+        Para cada tamanho de entrada são mantidos um canvas uint8 (N x S x S x 3)
+        e um blob float32 (N x 3 x S x S); a capacidade N só cresce quando um
+        lote maior é pedido, então o caminho quente não aloca memória.
+        """
+        self._buffers = {}
+
+    def obter(self, tamanho, n=1):
+        """Retorna (canvas, blob) com capacidade para n imagens do tamanho pedido"""
+        canvas, blob = self._buffers.get(tamanho, (None, None))
+        if canvas is None or canvas.shape[0] < n:
+            canvas = np.full((n, tamanho, tamanho, 3), COR_PREENCHIMENTO, dtype=np.uint8)
+            blob = np.empty((n, 3, tamanho, tamanho), dtype=np.float32)
+            self._buffers[tamanho] = (canvas, blob)
+        return canvas[:n], blob[:n]
+
+    @staticmethod
+    def letterbox(imagem, destino):
+        """
+        Redimensiona mantendo a proporção para dentro do canvas quadrado destino
+
+        Retorna (escala, pad_x, pad_y) para desfazer a transformação.
+        """
+        tamanho = destino.shape[0]
+        altura, largura = imagem.shape[:2]
+        escala = min(tamanho / largura, tamanho / altura)
+        nova_largura = max(1, min(tamanho, int(round(largura * escala))))
+        nova_altura = max(1, min(tamanho, int(round(altura * escala))))
+        pad_x = (tamanho - nova_largura) // 2
+        pad_y = (tamanho - nova_altura) // 2
+
+        # Preenche só as faixas de borda; o miolo é sobrescrito pelo resize
+        destino[:pad_y] = COR_PREENCHIMENTO
+        destino[pad_y + nova_altura:] = COR_PREENCHIMENTO
+        destino[:, :pad_x] = COR_PREENCHIMENTO
+        destino[:, pad_x + nova_largura:] = COR_PREENCHIMENTO
+
+        regiao = destino[pad_y:pad_y + nova_altura, pad_x:pad_x + nova_largura]
+        interpolacao = cv2.INTER_AREA if escala < 1 else cv2.INTER_LINEAR
+        if (nova_largura, nova_altura) == (largura, altura):
+            regiao[...] = imagem
+        else:
+            cv2.resize(imagem, (nova_largura, nova_altura), dst=regiao, interpolation=interpolacao)
+        return escala, pad_x, pad_y
+
+    def preparar(self, imagens, tamanho):
+        """
+        Aplica letterbox e monta o blob NCHW (RGB, 0..1) nos buffers reutilizados
+
+        Args:
+            imagens (list): Imagens BGR (ou recortes) a processar em lote
+            tamanho (int): Tamanho de entrada do modelo
+
+        Returns:
+            tuple: (canvas N x S x S x 3 BGR, blob N x 3 x S x S, [(escala, pad_x, pad_y), ...])
+        """
+        canvas, blob = self.obter(tamanho, len(imagens))
+        parametros = []
+        for i, imagem in enumerate(imagens):
+            parametros.append(self.letterbox(imagem, canvas[i]))
+            # BGR -> RGB, HWC -> CHW e normalização direto no blob pré-alocado
+            np.multiply(canvas[i].transpose(2, 0, 1)[::-1], np.float32(1 / 255.0),
+                        out=blob[i], casting='unsafe')
+        return canvas, blob, parametros
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Quantização INT8 do Modelo
+Quantização estática do YOLOv8 ONNX calibrada com as nossas próprias capturas
+gravadas (replay), usando o mesmo letterbox do detector
+"""
+
+import argparse
+import json
+import os
+import tempfile
+from datetime import datetime
+
+from fontes_frames import FonteReplay
+from preprocessamento import BuffersEntrada, resolver_tamanho_entrada
+
+try:
+    from onnxruntime.quantization import (CalibrationDataReader, CalibrationMethod, QuantFormat,
+                                          QuantType, quant_pre_process, quantize_static)
+    HAS_ORT_QUANTIZACAO = True
+except ImportError:
+    CalibrationDataReader = object
+    HAS_ORT_QUANTIZACAO = False
+
+METODOS_CALIBRACAO = ('minmax', 'entropia', 'percentil')
+
+
+class LeitorCalibracao(CalibrationDataReader):
+    def __init__(self, nome_entrada, frames, tamanho):
+        """
+        Entrega ao calibrador os frames de replay já em letterbox
+
+        Args:
+            nome_entrada (str): Nome da entrada do modelo ONNX
+            frames (list): Frames BGR usados na calibração
+            tamanho (int): Tamanho de entrada do modelo
+        """
+        self.nome_entrada = nome_entrada
+        self.frames = frames
+        self.tamanho = tamanho
+        self._buffers = BuffersEntrada()
+        self._indice = 0
+
+    def get_next(self):
+        if self._indice >= len(self.frames):
+            return None
+        _, blob, _ = self._buffers.preparar([self.frames[self._indice]], self.tamanho)
+        self._indice += 1
+        # Cópia: o calibrador pode guardar a entrada e o blob é reutilizado
+        return {self.nome_entrada: blob.copy()}
+
+    def rewind(self):
+        self._indice = 0
+
+
+def _entrada_modelo(caminho_modelo):
+    """Nome e tamanho fixo (ou None) da entrada do modelo"""
+    import onnx
+    modelo = onnx.load(caminho_modelo, load_external_data=False)
+    entrada = modelo.graph.input[0]
+    dimensoes = entrada.type.tensor_type.shape.dim
+    tamanho = dimensoes[2].dim_value if len(dimensoes) == 4 and dimensoes[2].dim_value else None
+    return entrada.name, tamanho
+
+
+def quantizar_modelo(modelo_float, modelo_int8, frames, tamanho_entrada=416, metodo='minmax', por_canal=True):
+    """
+    Gera o modelo INT8 (formato QDQ) a partir do modelo float
+
+    Pesos em INT8 simétrico por canal e ativações em UINT8; as faixas das
+    ativações vêm dos frames de calibração.
+
+    Returns:
+        dict: Resumo da quantização (tamanhos de arquivo, frames usados)
+    """
+    if not HAS_ORT_QUANTIZACAO:
+        raise RuntimeError("onnxruntime não instalado (pip install onnxruntime onnx)")
+    if metodo not in METODOS_CALIBRACAO:
+        raise ValueError(f"Método de calibração inválido: {metodo!r} (use {', '.join(METODOS_CALIBRACAO)})")
+    if not frames:
+        raise ValueError("Nenhum frame de calibração")
+
+    nome_entrada, tamanho_fixo = _entrada_modelo(modelo_float)
+    tamanho = tamanho_fixo or resolver_tamanho_entrada(tamanho_entrada)
+
+    metodos = {
+        'minmax': CalibrationMethod.MinMax,
+        'entropia': CalibrationMethod.Entropy,
+        'percentil': CalibrationMethod.Percentile,
+    }
+    with tempfile.TemporaryDirectory() as pasta_temp:
+        # Inferência de formas e fusões antes de quantizar (recomendado pelo ONNX Runtime)
+        modelo_preparado = os.path.join(pasta_temp, 'preparado.onnx')
+        try:
+            quant_pre_process(modelo_float, modelo_preparado)
+        except Exception as e:
+            print(f"⚠️ Pré-processamento do modelo falhou ({e}), quantizando o original")
+            modelo_preparado = modelo_float
+
+        print(f"🔧 Calibrando {os.path.basename(modelo_float)} com {len(frames)} frames "
+              f"({tamanho}x{tamanho}, {metodo})...")
+        quantize_static(
+            modelo_preparado,
+            modelo_int8,
+            LeitorCalibracao(nome_entrada, frames, tamanho),
+            quant_format=QuantFormat.QDQ,
+            per_channel=por_canal,
+            weight_type=QuantType.QInt8,
+            activation_type=QuantType.QUInt8,
+            calibrate_method=metodos[metodo]
+        )
+
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'modelo_float': modelo_float,
+        'modelo_int8': modelo_int8,
+        'tamanho_entrada': tamanho,
+        'entrada_fixa': tamanho_fixo is not None,
+        'frames_calibracao': len(frames),
+        'metodo_calibracao': metodo,
+        'por_canal': por_canal,
+        'tamanho_arquivo_float_mb': round(os.path.getsize(modelo_float) / 1e6, 2),
+        'tamanho_arquivo_int8_mb': round(os.path.getsize(modelo_int8) / 1e6, 2)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Quantização INT8 do modelo YOLOv8 ONNX com calibração por replay")
+    parser.add_argument('--modelo', default='yolov8n.onnx', help="Modelo float (.onnx)")
+    parser.add_argument('--saida', default='yolov8n_int8.onnx', help="Modelo INT8 gerado")
+    parser.add_argument('--replay', nargs='+', default=None, help="Pastas/arquivos de capturas para calibração")
+    parser.add_argument('--amostras', type=int, default=100, help="Máximo de frames de calibração")
+    parser.add_argument('--tamanho', type=int, default=416, help="Tamanho de entrada (modelos com entrada dinâmica)")
+    parser.add_argument('--metodo', choices=METODOS_CALIBRACAO, default='minmax')
+    parser.add_argument('--sem-comparacao', action='store_true', help="Não gera o relatório float x INT8")
+    args = parser.parse_args(argv)
+
+    frames = list(FonteReplay(args.replay, repetir=False, limite=args.amostras))
+    if not frames:
+        print("❌ Nenhuma captura encontrada para calibração")
+        return None
+
+    resumo = quantizar_modelo(args.modelo, args.saida, frames, args.tamanho, args.metodo)
+    print(f"✅ Modelo INT8 salvo: {args.saida} "
+          f"({resumo['tamanho_arquivo_float_mb']} MB -> {resumo['tamanho_arquivo_int8_mb']} MB)")
+    if args.sem_comparacao:
+        return resumo
+
+    # Comparação de velocidade e concordância com o modelo float nos mesmos frames
+    from avaliacao_deteccao import avaliar_precisao_int8
+
+    config = {'modelo_onnx': args.modelo, 'modelo_int8': args.saida}
+    if not resumo['entrada_fixa']:
+        # Entrada fixa (ex.: 640) fica a cargo do backend, que já usa o tamanho do modelo
+        config['tamanho_entrada'] = resumo['tamanho_entrada']
+    relatorio = avaliar_precisao_int8(frames, config)
+    relatorio['quantizacao'] = resumo
+
+    for precisao, metricas in relatorio['precisoes'].items():
+        print(f"   {precisao}: {metricas['latencia_media_ms']} ms | "
+              f"{metricas['fps_estimado']} FPS | recall {metricas['recall_vs_referencia']}")
+
+    os.makedirs('relatorios', exist_ok=True)
+    caminho = os.path.join('relatorios', f"comparacao_int8_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(relatorio, f, indent=2, ensure_ascii=False)
+    print(f"📄 Relatório salvo: {caminho}")
+    return relatorio
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Regiões de Interesse
+Recortes de atenção em volta das detecções anteriores e das regiões com
+movimento, e grade de tiles alterados, para reinferir só onde algo pode
+ter mudado
+"""
+
+import zlib
+
+import cv2
+import numpy as np
+
+# Largura do quadro reduzido usado para medir movimento
+LARGURA_REDUZIDA = 160
+
+
+def reduzir_cinza(imagem, largura=LARGURA_REDUZIDA):
+    """Versão em cinza e reduzida do quadro; retorna (cinza, fator quadro/reduzido)"""
+    altura_img, largura_img = imagem.shape[:2]
+    fator = largura_img / largura
+    altura = max(1, int(round(altura_img / fator)))
+    reduzida = cv2.resize(imagem, (largura, altura), interpolation=cv2.INTER_AREA)
+    cinza = cv2.cvtColor(reduzida, cv2.COLOR_BGR2GRAY) if reduzida.ndim == 3 else reduzida
+    return cinza, fator
+
+
+def regioes_movimento(cinza, cinza_anterior, fator, limiar=25, area_minima=4):
+    """
+    Regiões que mudaram entre dois quadros reduzidos
+
+    Returns:
+        ndarray: N x 4 em xyxy no espaço do quadro original
+    """
+    diferenca = cv2.absdiff(cinza, cinza_anterior)
+    _, mascara = cv2.threshold(diferenca, limiar, 255, cv2.THRESH_BINARY)
+    mascara = cv2.dilate(mascara, None, iterations=1)
+    n, _, stats, _ = cv2.connectedComponentsWithStats(mascara, connectivity=8)
+    stats = stats[1:n]
+    stats = stats[stats[:, cv2.CC_STAT_AREA] >= area_minima]
+    x, y, w, h = stats[:, 0], stats[:, 1], stats[:, 2], stats[:, 3]
+    return (np.stack([x, y, x + w, y + h], axis=1) * fator).astype(np.float32).reshape(-1, 4)
+
+
+def expandir_regioes(regioes, margem, lado_minimo, largura, altura):
+    """Aumenta cada região (xyxy) pela margem relativa e garante um lado mínimo, dentro do quadro"""
+    regioes = np.asarray(regioes, dtype=np.float32).reshape(-1, 4)
+    centro = (regioes[:, :2] + regioes[:, 2:]) / 2
+    lados = np.maximum((regioes[:, 2:] - regioes[:, :2]) * (1 + 2 * margem), lado_minimo)
+    lados = np.minimum(lados, [largura, altura])
+    inicio = np.minimum(np.maximum(centro - lados / 2, 0), np.array([largura, altura]) - lados)
+    return np.concatenate([inicio, inicio + lados], axis=1).astype(np.int32)
+
+
+def unir_regioes(regioes):
+    """Une regiões (xyxy) que se sobrepõem até não sobrar sobreposição"""
+    regioes = [list(r) for r in np.asarray(regioes).reshape(-1, 4)]
+    unidas = True
+    while unidas and len(regioes) > 1:
+        unidas = False
+        resultado = []
+        while regioes:
+            atual = regioes.pop()
+            i = 0
+            while i < len(regioes):
+                r = regioes[i]
+                if r[0] < atual[2] and atual[0] < r[2] and r[1] < atual[3] and atual[1] < r[3]:
+                    atual = [min(atual[0], r[0]), min(atual[1], r[1]), max(atual[2], r[2]), max(atual[3], r[3])]
+                    regioes.pop(i)
+                    unidas = True
+                else:
+                    i += 1
+            resultado.append(atual)
+        regioes = resultado
+    return np.array(regioes, dtype=np.int32).reshape(-1, 4)
+
+
+class AtencaoRecortes:
+    def __init__(self, intervalo_completo=10, margem=0.5, lado_minimo=208, max_recortes=8, area_maxima=0.5):
+        """
+        Decide, a cada quadro, entre passe completo e recortes de atenção
+
+        Args:
+            intervalo_completo (int): Passe no quadro inteiro a cada N quadros
+            margem (float): Margem em volta de cada região, relativa ao tamanho dela
+            lado_minimo (int): Lado mínimo de um recorte, em pixels do quadro
+            max_recortes (int): Acima disso, faz passe completo
+            area_maxima (float): Fração do quadro coberta pelos recortes acima da qual
+                o passe completo sai mais barato
+        """
+        self.intervalo_completo = intervalo_completo
+        self.margem = margem
+        self.lado_minimo = lado_minimo
+        self.max_recortes = max_recortes
+        self.area_maxima = area_maxima
+
+        self._cinza_anterior = None
+        self._caixas_anteriores = np.empty((0, 4), np.float32)
+        self._quadros_desde_completo = None
+
+        self.estatisticas = {
+            'passes_completos': 0,
+            'passes_recortes': 0,
+            'quadros_sem_inferencia': 0,
+            'recortes': 0,
+            'fracao_area_recortes': 0.0
+        }
+
+    def reiniciar(self):
+        """Descarta o estado; o próximo quadro terá passe completo"""
+        self._cinza_anterior = None
+        self._caixas_anteriores = np.empty((0, 4), np.float32)
+        self._quadros_desde_completo = None
+
+    def planejar(self, imagem):
+        """
+        Returns:
+            ndarray | None: Recortes N x 4 (xyxy) a inferir, ou None para passe completo
+        """
+        altura, largura = imagem.shape[:2]
+        cinza, fator = reduzir_cinza(imagem)
+        anterior, self._cinza_anterior = self._cinza_anterior, cinza
+
+        if (anterior is None or anterior.shape != cinza.shape
+                or self._quadros_desde_completo is None
+                or self._quadros_desde_completo + 1 >= self.intervalo_completo):
+            return None
+
+        movimento = regioes_movimento(cinza, anterior, fator)
+        regioes = np.concatenate([self._caixas_anteriores, movimento])
+        if not len(regioes):
+            self._quadros_desde_completo += 1
+            self.estatisticas['quadros_sem_inferencia'] += 1
+            return regioes.astype(np.int32)
+
+        recortes = unir_regioes(expandir_regioes(regioes, self.margem, self.lado_minimo, largura, altura))
+        area = float(np.prod(recortes[:, 2:] - recortes[:, :2], axis=1).sum()) / (largura * altura)
+        if len(recortes) > self.max_recortes or area > self.area_maxima:
+            return None
+
+        self._quadros_desde_completo += 1
+        self.estatisticas['passes_recortes'] += 1
+        self.estatisticas['recortes'] += len(recortes)
+        n = self.estatisticas['passes_recortes']
+        self.estatisticas['fracao_area_recortes'] += (area - self.estatisticas['fracao_area_recortes']) / n
+        return recortes
+
+    def registrar(self, caixas_xywh, completo):
+        """Guarda as detecções do quadro atual para os próximos recortes"""
+        caixas = np.asarray(caixas_xywh, dtype=np.float32).reshape(-1, 4)
+        self._caixas_anteriores = np.concatenate([caixas[:, :2], caixas[:, :2] + caixas[:, 2:]], axis=1)
+        if completo:
+            self._quadros_desde_completo = 0
+            self.estatisticas['passes_completos'] += 1
+
+
+class TilesAlterados:
+    def __init__(self, colunas=16, linhas=9, largura_reduzida=320, margem_tiles=1,
+                 fracao_completo=0.6, intervalo_completo=30):
+        """
+        Detecção incremental: reinfere só os tiles que mudaram desde o último quadro
+
+        A tela capturada costuma ser quase idêntica entre capturas; uma grade de
+        hashes (CRC32) sobre o quadro reduzido aponta os tiles alterados, e as
+        detecções em cache dos tiles intocados são mantidas.
+
+        Args:
+            colunas, linhas (int): Grade de tiles
+            largura_reduzida (int): Largura do quadro reduzido onde os hashes são calculados
+            margem_tiles (int): Tiles vizinhos incluídos em volta de cada tile alterado
+            fracao_completo (float): Fração de tiles alterados acima da qual faz passe completo
+            intervalo_completo (int): Passe completo a cada N quadros, mesmo sem mudanças
+        """
+        self.colunas = colunas
+        self.linhas = linhas
+        self.largura_reduzida = largura_reduzida
+        self.margem_tiles = margem_tiles
+        self.fracao_completo = fracao_completo
+        self.intervalo_completo = intervalo_completo
+
+        self._hashes = None
+        self._formato = None
+        self._quadros_desde_completo = 0
+        self._cache = (np.empty((0, 4), np.int32), np.empty(0, np.float32), np.empty(0, np.int32))
+
+        self.estatisticas = {
+            'passes_completos': 0,
+            'passes_incrementais': 0,
+            'quadros_sem_mudanca': 0,
+            'fracao_area_reinferida': 0.0
+        }
+
+    def reiniciar(self):
+        """Descarta hashes e cache; o próximo quadro terá passe completo"""
+        self._hashes = None
+        self._formato = None
+
+    def _calcular_hashes(self, imagem):
+        cinza, _ = reduzir_cinza(imagem, self.largura_reduzida)
+        altura, largura = cinza.shape
+        ys = np.linspace(0, altura, self.linhas + 1).astype(int)
+        xs = np.linspace(0, largura, self.colunas + 1).astype(int)
+        return np.array([
+            [zlib.crc32(cinza[ys[i]:ys[i + 1], xs[j]:xs[j + 1]].tobytes()) for j in range(self.colunas)]
+            for i in range(self.linhas)
+        ], dtype=np.uint32)
+
+    def planejar(self, imagem):
+        """
+        Returns:
+            ndarray | None: Regiões N x 4 (xyxy) a reinferir, ou None para passe completo
+        """
+        altura, largura = imagem.shape[:2]
+        hashes = self._calcular_hashes(imagem)
+        anteriores, self._hashes = self._hashes, hashes
+
+        if (anteriores is None or self._formato != (altura, largura)
+                or self._quadros_desde_completo + 1 >= self.intervalo_completo):
+            self._formato = (altura, largura)
+            return None
+
+        alterados = (hashes != anteriores).astype(np.uint8)
+        if self.margem_tiles and alterados.any():
+            lado = 2 * self.margem_tiles + 1
+            alterados = cv2.dilate(alterados, np.ones((lado, lado), np.uint8))
+        fracao = float(alterados.mean())
+        if fracao > self.fracao_completo:
+            return None
+
+        self._quadros_desde_completo += 1
+        if not alterados.any():
+            self.estatisticas['quadros_sem_mudanca'] += 1
+            return np.empty((0, 4), np.int32)
+
+        # Cada grupo conectado de tiles alterados vira uma região do quadro
+        n, _, stats, _ = cv2.connectedComponentsWithStats(alterados, connectivity=8)
+        ys = np.linspace(0, altura, self.linhas + 1).astype(int)
+        xs = np.linspace(0, largura, self.colunas + 1).astype(int)
+        regioes = np.array([
+            [xs[x], ys[y], xs[x + w], ys[y + h]] for x, y, w, h, _ in stats[1:n]
+        ], dtype=np.int32).reshape(-1, 4)
+        regioes = self._cobrir_caixas_cache(regioes, largura, altura)
+
+        self.estatisticas['passes_incrementais'] += 1
+        k = self.estatisticas['passes_incrementais']
+        self.estatisticas['fracao_area_reinferida'] += (fracao - self.estatisticas['fracao_area_reinferida']) / k
+        return regioes
+
+    def _cobrir_caixas_cache(self, regioes, largura, altura):
+        """
+        Expande as regiões até conterem inteiras as caixas do cache que tocam
+
+        Uma caixa que cruza a borda da região sai do cache em atualizar(); sem
+        a expansão, a pessoa voltaria só com o pedaço que caiu dentro do recorte.
+        """
+        caixas = self._cache[0]
+        if not len(caixas) or not len(regioes):
+            return regioes
+        xyxy = np.concatenate([caixas[:, :2], caixas[:, :2] + caixas[:, 2:]], axis=1)
+        xyxy = np.clip(xyxy, 0, [largura, altura, largura, altura])
+        while True:
+            tocadas = ((xyxy[:, 0:1] < regioes[:, 2]) & (regioes[:, 0] < xyxy[:, 2:3]) &
+                       (xyxy[:, 1:2] < regioes[:, 3]) & (regioes[:, 1] < xyxy[:, 3:4]))
+            inicio = np.where(tocadas[..., None], xyxy[:, None, :2], np.iinfo(np.int32).max).min(axis=0)
+            fim = np.where(tocadas[..., None], xyxy[:, None, 2:], 0).max(axis=0)
+            expandidas = unir_regioes(np.concatenate(
+                [np.minimum(regioes[:, :2], inicio), np.maximum(regioes[:, 2:], fim)], axis=1))
+            if set(map(tuple, expandidas.tolist())) == set(map(tuple, regioes.tolist())):
+                return expandidas
+            regioes = expandidas
+
+    def atualizar(self, regioes, caixas, confiancas, classes):
+        """
+        Junta as detecções novas com as do cache que estão fora das regiões reinferidas
+
+        Args:
+            regioes (ndarray | None): Regiões reinferidas (None = passe completo)
+            caixas, confiancas, classes: Detecções novas (xywh) no espaço do quadro
+
+        Returns:
+            tuple: (caixas xywh, confiancas, classes) do quadro inteiro
+        """
+        if regioes is None:
+            self._quadros_desde_completo = 0
+            self.estatisticas['passes_completos'] += 1
+        else:
+            caixas_cache, confiancas_cache, classes_cache = self._cache
+            x1, y1 = caixas_cache[:, 0:1], caixas_cache[:, 1:2]
+            x2, y2 = x1 + caixas_cache[:, 2:3], y1 + caixas_cache[:, 3:4]
+            regioes = np.asarray(regioes).reshape(-1, 4)
+            tocadas = ((x1 < regioes[:, 2]) & (regioes[:, 0] < x2) &
+                       (y1 < regioes[:, 3]) & (regioes[:, 1] < y2)).any(axis=1)
+            mantidas = ~tocadas
+            caixas = np.concatenate([caixas_cache[mantidas], np.asarray(caixas, np.int32).reshape(-1, 4)])
+            confiancas = np.concatenate([confiancas_cache[mantidas], np.asarray(confiancas, np.float32)])
+            classes = np.concatenate([classes_cache[mantidas], np.asarray(classes, np.int32)])
+
+        self._cache = (np.asarray(caixas, np.int32).reshape(-1, 4),
+                       np.asarray(confiancas, np.float32), np.asarray(classes, np.int32))
+        return self._cache
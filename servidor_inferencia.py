@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Servidor Local de Inferência
+Um processo carrega o detector uma vez e atende vários clientes (monitores,
+GUI, scripts em lote) por socket Unix ou HTTP em localhost. Pedidos
+simultâneos são juntados em lotes dinâmicos, limitados por tamanho máximo
+e tempo máximo de espera. ClienteInferencia substitui o DetectorAvancado.
+O degrau de carga do detector é decidido pelo servidor, pela latência dos
+pedidos e pela fila, e vale igualmente para todos os clientes.
+"""
+
+import argparse
+import http.client
+import json
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+
+from controle_carga import NIVEL_MODELO_LEVE, NIVEL_SEM_ANALISES, ControleCarga, nivel_carga_maximo
+from deteccoes import serializar_json
+from narrativa import gerar_narrativa
+
+TIPO_QUADRO = 'application/x-quadro'  # bytes do array, com X-Formato e X-Tipo nos cabeçalhos
+PORTA_PADRAO = 8765
+
+_PARAR = ('parar', None, None, None)
+
+
+class LoteDinamico:
+    """Fila de quadros atendida por uma thread que roda o detector em lotes"""
+
+    def __init__(self, detector, max_lote=8, espera_maxima=0.01, controle_carga=None):
+        """
+        Args:
+            detector: DetectorAvancado (usado só pela thread do lote)
+            max_lote (int): Quadros por inferência
+            espera_maxima (float): Quanto o primeiro quadro de um lote espera por companhia, em segundos
+            controle_carga (ControleCarga): Recebe a latência de cada lote (espera do pedido
+                mais antigo + inferência) e a fila; as transições vão para o detector
+        """
+        self.detector = detector
+        self.max_lote = max_lote
+        self.espera_maxima = espera_maxima
+        self.controle_carga = controle_carga
+        self._fila = queue.Queue()
+        self._trava = threading.Lock()
+        self.estatisticas = {'lotes': 0, 'quadros': 0, 'maior_lote': 0, 'espera_total': 0.0, 'inferencia_total': 0.0}
+        self._thread = threading.Thread(target=self._executar, name='lote-dinamico', daemon=True)
+        self._thread.start()
+
+    def enviar(self, imagem):
+        """Enfileira um quadro; retorna um Future com o resultado"""
+        futuro = Future()
+        self._fila.put(('quadro', imagem, futuro, time.monotonic()))
+        return futuro
+
+    def executar_exclusivo(self, funcao, *args):
+        """Roda funcao(detector, *args) na thread do lote, entre dois lotes (ex.: reconfigurar o detector)"""
+        futuro = Future()
+        self._fila.put(('exclusivo', (funcao, args), futuro, None))
+        return futuro.result()
+
+    def _executar(self):
+        adiado = None
+        while True:
+            if adiado is not None:
+                pedido, adiado = adiado, None
+            else:
+                pedido = self._fila.get()
+            if pedido is _PARAR:
+                return
+            if pedido[0] == 'exclusivo':
+                self._rodar_exclusivo(pedido)
+                continue
+
+            # Junta os quadros que chegarem até o lote encher ou a espera do primeiro acabar
+            lote = [pedido]
+            limite = pedido[3] + self.espera_maxima
+            while len(lote) < self.max_lote:
+                try:
+                    proximo = self._fila.get(timeout=max(0.0, limite - time.monotonic()))
+                except queue.Empty:
+                    break
+                if proximo is _PARAR or proximo[0] == 'exclusivo':
+                    adiado = proximo
+                    break
+                lote.append(proximo)
+
+            # Pedidos cancelados enquanto esperavam saem do lote
+            lote = [p for p in lote if p[2].set_running_or_notify_cancel()]
+            if lote:
+                self._rodar_lote(lote)
+
+    def _rodar_exclusivo(self, pedido):
+        _, (funcao, args), futuro, _ = pedido
+        try:
+            futuro.set_result(funcao(self.detector, *args))
+        except Exception as e:
+            futuro.set_exception(e)
+
+    def _rodar_lote(self, lote):
+        inicio = time.monotonic()
+        try:
+            resultados = self.detector.detectar_frames([p[1] for p in lote])
+        except Exception as e:
+            for p in lote:
+                p[2].set_exception(e)
+            return
+        fim = time.monotonic()
+        for p, resultado in zip(lote, resultados):
+            p[2].set_result(resultado)
+        with self._trava:
+            self.estatisticas['lotes'] += 1
+            self.estatisticas['quadros'] += len(lote)
+            self.estatisticas['maior_lote'] = max(self.estatisticas['maior_lote'], len(lote))
+            self.estatisticas['espera_total'] += sum(inicio - p[3] for p in lote)
+            self.estatisticas['inferencia_total'] += fim - inicio
+        if self.controle_carga is not None:
+            nivel = self.controle_carga.registrar(fim - min(p[3] for p in lote), fila=self._fila.qsize())
+            if nivel is not None:
+                self.detector.aplicar_nivel_carga(nivel)
+
+    def fechar(self):
+        self._fila.put(_PARAR)
+        self._thread.join(timeout=5)
+        # Quadros que chegaram depois do pedido de parada não serão atendidos
+        while True:
+            try:
+                pedido = self._fila.get_nowait()
+            except queue.Empty:
+                break
+            if pedido is not _PARAR:
+                pedido[2].cancel()
+
+    def obter_estatisticas(self):
+        with self._trava:
+            e = dict(self.estatisticas)
+        quadros = max(1, e['quadros'])
+        return {
+            'lotes': e['lotes'],
+            'quadros': e['quadros'],
+            'maior_lote': e['maior_lote'],
+            'tamanho_medio_lote': round(e['quadros'] / max(1, e['lotes']), 2),
+            'espera_media_ms': round(1000 * e['espera_total'] / quadros, 2),
+            'inferencia_media_por_quadro_ms': round(1000 * e['inferencia_total'] / quadros, 2),
+            'max_lote': self.max_lote,
+            'espera_maxima_ms': round(1000 * self.espera_maxima, 2)
+        }
+
+
+class _ManipuladorHTTP(BaseHTTPRequestHandler):
+    """Rotas: POST /detectar (quadro), GET /estatisticas, GET /saude"""
+
+    protocol_version = 'HTTP/1.1'  # conexões persistentes: um cliente reaproveita o socket
+
+    def log_message(self, formato, *args):
+        pass
+
+    def _responder(self, status, dados):
+        corpo = json.dumps(dados, ensure_ascii=False, default=serializar_json).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def _ler_corpo(self):
+        return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+    def _ler_quadro(self):
+        corpo = self._ler_corpo()
+        if self.headers.get('Content-Type') == TIPO_QUADRO:
+            formato = tuple(int(v) for v in self.headers['X-Formato'].split(','))
+            return np.frombuffer(corpo, dtype=self.headers.get('X-Tipo', '|u1')).reshape(formato)
+        # JPEG/PNG e demais formatos que o OpenCV decodifica
+        return cv2.imdecode(np.frombuffer(corpo, np.uint8), cv2.IMREAD_COLOR)
+
+    def do_GET(self):
+        servidor = self.server.inferencia
+        if self.path == '/saude':
+            self._responder(200, {'modelo_carregado': servidor.detector.modelo_carregado})
+        elif self.path == '/estatisticas':
+            self._responder(200, servidor.obter_estatisticas())
+        else:
+            self._responder(404, {'erro': f"rota desconhecida: {self.path}"})
+
+    def do_POST(self):
+        servidor = self.server.inferencia
+        try:
+            if self.path == '/detectar':
+                imagem = self._ler_quadro()
+                if imagem is None:
+                    self._responder(400, {'erro': 'quadro não decodificado'})
+                    return
+                resultado = servidor.lote.enviar(imagem).result(timeout=servidor.timeout)
+                self._responder(200, dict(resultado))  # dict() resolve a narrativa adiada
+            else:
+                self._ler_corpo()
+                self._responder(404, {'erro': f"rota desconhecida: {self.path}"})
+        except Exception as e:
+            self._responder(500, {'erro': str(e)})
+
+
+class _ServidorHTTP(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class _ServidorUnix(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def get_request(self):
+        requisicao, _ = super().get_request()
+        return requisicao, ('unix', 0)  # BaseHTTPRequestHandler espera (host, porta)
+
+
+class ServidorInferencia:
+    def __init__(self, config=None, unix=None, porta=PORTA_PADRAO, max_lote=8, espera_maxima=0.01, timeout=60,
+                 orcamento_carga=0.5):
+        """
+        Args:
+            config (dict): Configuração do DetectorAvancado hospedado
+            unix (str): Caminho do socket Unix; se None, HTTP em 127.0.0.1:porta
+            porta (int): Porta HTTP em localhost (0 = escolhida pelo sistema)
+            max_lote (int): Quadros por inferência em lote
+            espera_maxima (float): Espera máxima do primeiro quadro de um lote, em segundos
+            timeout (float): Tempo máximo de um pedido de detecção
+            orcamento_carga (float): Latência aceitável por pedido (espera + inferência), em
+                segundos; acima dela o servidor degrada o detector (None = sem controle de carga)
+        """
+        from detector_avancado import DetectorAvancado
+
+        self.detector = DetectorAvancado(config)
+        controle = None
+        if orcamento_carga:
+            # Pular quadros é decisão de cada cliente: o servidor responde a todos os pedidos,
+            # então sem modelo leve a escada para em sem_analises
+            maximo = nivel_carga_maximo(config)
+            controle = ControleCarga(orcamento_carga, fila_maxima=max_lote,
+                                     nivel_maximo=maximo if maximo == NIVEL_MODELO_LEVE else NIVEL_SEM_ANALISES)
+        self.lote = LoteDinamico(self.detector, max_lote, espera_maxima, controle)
+        self.timeout = timeout
+        self.unix = unix
+        if unix:
+            if os.path.exists(unix):
+                os.unlink(unix)  # socket de uma execução anterior
+            self._servidor = _ServidorUnix(unix, _ManipuladorHTTP)
+            self.endereco = f"unix://{unix}"
+        else:
+            # Só localhost: o servidor não é exposto na rede
+            self._servidor = _ServidorHTTP(('127.0.0.1', porta), _ManipuladorHTTP)
+            self.endereco = f"http://127.0.0.1:{self._servidor.server_address[1]}"
+        self._servidor.inferencia = self
+        self._thread = None
+
+    def iniciar(self):
+        """Atende em segundo plano; retorna o próprio servidor"""
+        self._thread = threading.Thread(target=self._servidor.serve_forever, name='servidor-inferencia', daemon=True)
+        self._thread.start()
+        return self
+
+    def executar(self):
+        """Atende até Ctrl+C"""
+        print(f"🚀 Servidor de inferência em {self.endereco} (lotes de até {self.lote.max_lote}, "
+              f"espera máxima {self.lote.espera_maxima * 1000:.0f} ms)")
+        try:
+            self._servidor.serve_forever()
+        except KeyboardInterrupt:
+            print("\n🛑 Servidor interrompido pelo usuário")
+        finally:
+            self.fechar()
+
+    def fechar(self):
+        if self._thread is not None:
+            self._servidor.shutdown()
+        self._servidor.server_close()
+        self.lote.fechar()
+        if self.unix and os.path.exists(self.unix):
+            os.unlink(self.unix)
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *args):
+        self.fechar()
+
+    def obter_estatisticas(self):
+        controle = self.lote.controle_carga
+        return {'endereco': self.endereco, 'lotes': self.lote.obter_estatisticas(),
+                'controle_carga': controle.obter_estatisticas() if controle is not None else None,
+                'detector': self.detector.obter_estatisticas()}
+
+
+class _ConexaoUnix(http.client.HTTPConnection):
+    def __init__(self, caminho, timeout):
+        super().__init__('localhost', timeout=timeout)
+        self.caminho = caminho
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.caminho)
+
+
+class ClienteInferencia:
+    def __init__(self, endereco=f"http://127.0.0.1:{PORTA_PADRAO}", codificacao='bruto', timeout=60):
+        """
+        Substituto do DetectorAvancado que usa um ServidorInferencia
+
+        Args:
+            endereco (str): 'http://127.0.0.1:porta' ou 'unix:///caminho/do.sock'
+            codificacao (str): 'bruto' (bytes do array, sem perdas), 'png' ou 'jpg'
+            timeout (float): Tempo máximo de cada pedido, em segundos
+
+        Os resultados chegam como dicionários comuns (detecções em listas de
+        dicionários, narrativa já resolvida). Pode ser usado por várias threads.
+        """
+        self.endereco = endereco
+        self.codificacao = codificacao
+        self.timeout = timeout
+        self._local = threading.local()  # uma conexão persistente por thread
+
+    def _conexao(self):
+        conexao = getattr(self._local, 'conexao', None)
+        if conexao is None:
+            if self.endereco.startswith('unix://'):
+                conexao = _ConexaoUnix(self.endereco[len('unix://'):], self.timeout)
+            else:
+                host, _, porta = self.endereco.split('://', 1)[-1].rstrip('/').partition(':')
+                conexao = http.client.HTTPConnection(host, int(porta or PORTA_PADRAO), timeout=self.timeout)
+            self._local.conexao = conexao
+        return conexao
+
+    def _pedir(self, metodo, rota, corpo=None, cabecalhos=None):
+        for tentativa in range(2):
+            conexao = self._conexao()
+            try:
+                conexao.request(metodo, rota, body=corpo, headers=cabecalhos or {})
+                resposta = conexao.getresponse()
+                dados = json.loads(resposta.read())
+                break
+            except (ConnectionError, http.client.HTTPException):
+                # Conexão persistente fechada pelo servidor: reconecta uma vez
+                conexao.close()
+                self._local.conexao = None
+                if tentativa:
+                    raise
+        if resposta.status != 200:
+            raise RuntimeError(dados.get('erro', f"HTTP {resposta.status}"))
+        return dados
+
+    def detectar_frame(self, imagem):
+        """Detecta objetos e pessoas em um frame BGR pelo servidor - FORMATO TESTE_DETECTOR_AVANCADO"""
+        try:
+            if self.codificacao == 'bruto':
+                imagem = np.ascontiguousarray(imagem)
+                corpo = imagem.tobytes()
+                cabecalhos = {'Content-Type': TIPO_QUADRO, 'X-Formato': ','.join(map(str, imagem.shape)),
+                              'X-Tipo': imagem.dtype.str}
+            else:
+                ok, codificada = cv2.imencode(f".{self.codificacao}", imagem)
+                if not ok:
+                    raise ValueError(f"falha ao codificar o quadro em {self.codificacao}")
+                corpo = codificada.tobytes()
+                cabecalhos = {'Content-Type': f"image/{'jpeg' if self.codificacao == 'jpg' else self.codificacao}"}
+            return self._pedir('POST', '/detectar', corpo, cabecalhos)
+        except Exception as e:
+            print(f"❌ Erro na detecção pelo servidor: {e}")
+            return self._resultado_vazio()
+
+    def detectar_objetos_pessoas(self, imagem_path: str) -> dict:
+        imagem = cv2.imread(imagem_path)
+        if imagem is None:
+            return self._resultado_vazio()
+        return self.detectar_frame(imagem)
+
+    def gerar_relatorio_completo(self, imagem_path: str) -> dict:
+        """Gera relatório completo no formato teste_detector_avancado"""
+        resultado = self.detectar_objetos_pessoas(imagem_path)
+        resumo = resultado['resumo']
+        return {
+            'timestamp': datetime.now().isoformat(),
+            'resumo': resumo,
+            'deteccoes': resultado['deteccoes'],
+            'analises': resultado['analises'],
+            'narrativa': gerar_narrativa(resultado),
+            'status': 'sucesso' if resumo['total_pessoas'] > 0 or resumo['total_objetos'] > 0 else 'sem_deteccoes'
+        }
+
+    def aplicar_nivel_carga(self, nivel):
+        """
+        Sem efeito: o degrau do detector compartilhado é decidido pelo servidor
+        (orcamento_carga), senão os controles de carga dos clientes brigariam por ele.
+        Pular quadros continua valendo no cliente, que decide o que enviar.
+        """
+
+    @property
+    def modelo_carregado(self):
+        try:
+            return self._pedir('GET', '/saude')['modelo_carregado']
+        except Exception as e:
+            print(f"⚠️ Servidor de inferência indisponível: {e}")
+            return False
+
+    def obter_estatisticas(self):
+        try:
+            return self._pedir('GET', '/estatisticas')
+        except Exception as e:
+            print(f"⚠️ Estatísticas do servidor indisponíveis: {e}")
+            return {'endereco': self.endereco, 'erro': str(e)}
+
+    @staticmethod
+    def _resultado_vazio():
+        from detector_avancado import DetectorAvancado
+        return DetectorAvancado._resultado_vazio(None)
+
+    def fechar(self):
+        conexao = getattr(self._local, 'conexao', None)
+        if conexao is not None:
+            conexao.close()
+            self._local.conexao = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor local de inferência com lotes dinâmicos")
+    parser.add_argument('--unix', default=None, help="Caminho do socket Unix (padrão: HTTP em localhost)")
+    parser.add_argument('--porta', type=int, default=PORTA_PADRAO, help="Porta HTTP em 127.0.0.1")
+    parser.add_argument('--max-lote', type=int, default=8, help="Quadros por inferência")
+    parser.add_argument('--espera-ms', type=float, default=10, help="Espera máxima para formar um lote")
+    parser.add_argument('--orcamento-ms', type=float, default=500,
+                        help="Latência por pedido acima da qual o detector é degradado (0 = nunca)")
+    parser.add_argument('--config', default=None, help="JSON com a configuração do DetectorAvancado")
+    args = parser.parse_args(argv)
+
+    config = None
+    if args.config:
+        with open(args.config, encoding='utf-8') as f:
+            config = json.load(f)
+    ServidorInferencia(config, unix=args.unix, porta=args.porta, max_lote=args.max_lote,
+                       espera_maxima=args.espera_ms / 1000, orcamento_carga=args.orcamento_ms / 1000).executar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste do rastreador por IoU e do agendador de análises por trilha
+"""
+
+import numpy as np
+
+from deteccoes import DeteccoesQuadro
+from detector_avancado import DetectorAvancado
+from trilhas import AgendadorAnalises, RastreadorIoU
+
+
+def testar_rastreador():
+    print("=== TESTE DO RASTREADOR IOU ===")
+    rastreador = RastreadorIoU(limiar_iou=0.3, max_perdidos=2)
+    a = rastreador.atualizar([[100, 100, 200, 400], [1000, 200, 200, 400]])
+    b = rastreador.atualizar([[1005, 205, 200, 400], [104, 98, 200, 400]])
+    assert list(b) == [a[1], a[0]], f"trilhas trocadas: {a} -> {b}"
+
+    # Pessoa nova ganha ID novo; a que sumiu some depois de max_perdidos quadros
+    c = rastreador.atualizar([[1010, 205, 200, 400], [1500, 500, 100, 200]])
+    assert c[0] == a[1] and c[1] not in (a[0], a[1])
+    for _ in range(3):
+        rastreador.atualizar([[1010, 205, 200, 400], [1500, 500, 100, 200]])
+    assert int(a[0]) not in rastreador.ativas
+    print(f"✅ IDs estáveis: {a.tolist()} -> {b.tolist()} -> {c.tolist()}")
+
+
+def testar_agendador():
+    print("\n=== TESTE DO AGENDADOR ===")
+    lotes = []
+
+    def analisador(imagem, caixas):
+        lotes.append(len(caixas))
+        return [{'largura': float(c[2])} for c in caixas]
+
+    agendador = AgendadorAnalises([analisador], limiar_mudanca=0.7, ttl=2.0)
+    caixas = np.array([[100, 100, 200, 400], [600, 100, 200, 400], [1100, 100, 200, 400]])
+    ids = [1, 2, 3]
+
+    agendador.analisar(None, caixas, ids, agora=0.0)
+    assert lotes == [3], "trilhas novas são analisadas juntas"
+    agendador.analisar(None, caixas + 2, ids, agora=0.5)
+    assert lotes == [3], "caixas quase iguais reaproveitam a análise"
+
+    movidas = caixas.copy()
+    movidas[1, 2] = 100
+    resultado = agendador.analisar(None, movidas, ids, agora=1.0)
+    assert lotes == [3, 1] and resultado[1] == {'largura': 100.0}, "só a caixa alterada é reanalisada"
+
+    agendador.analisar(None, movidas, ids, agora=2.5)
+    assert lotes == [3, 1, 2], "análises vencidas (ttl) rodam de novo"
+
+    agendador.analisar(None, movidas[:1], ids[:1], agora=2.6)
+    assert agendador.obter_estatisticas()['trilhas_em_cache'] == 1
+    print(f"✅ Lotes analisados: {lotes} - {agendador.obter_estatisticas()}")
+
+
+def testar_detector():
+    print("\n=== TESTE NO DETECTOR ===")
+    detector = DetectorAvancado({'analise_por_trilha': True})
+    referencia = DetectorAvancado()
+    caixas = np.array([[300, 200, 150, 400], [1200, 600, 300, 150]], dtype=np.int32)
+
+    for passo in range(5):
+        pessoas = DeteccoesQuadro(caixas + passo, np.full(2, 0.9), np.zeros(2))
+        atividades = detector._detectar_atividades_faciais(pessoas)
+        esperadas = referencia._detectar_atividades_faciais(pessoas)
+        for obtida, esperada in zip(atividades, esperadas):
+            for chave in ('movimento_cabeca', 'postura_corporal', 'movimento_maos', 'atividade_provavel'):
+                assert obtida[chave] == esperada[chave]
+        assert [a['trilha_id'] for a in atividades] == [1, 2]
+        assert pessoas[0]['trilha_id'] == 1
+
+    estatisticas = detector.obter_estatisticas()['analise_por_trilha']
+    assert estatisticas['analises_executadas'] == 2 and estatisticas['analises_reaproveitadas'] == 8
+    print(f"✅ 5 quadros, 2 pessoas: {estatisticas['analises_executadas']} análises executadas")
+
+
+def testar_envelhecimento():
+    """Quadros sem pessoas ou sem análises também envelhecem as trilhas: ninguém herda um ID velho"""
+    print("\n=== TESTE DO ENVELHECIMENTO DAS TRILHAS ===")
+    detector = DetectorAvancado({'analise_por_trilha': True, 'trilha_max_perdidos': 2})
+    imagem = np.zeros((1080, 1920, 3), np.uint8)
+    caixa = np.array([[300, 200, 150, 400]], dtype=np.int32)
+
+    def pessoa():
+        return DeteccoesQuadro(caixa, np.full(1, 0.9), np.zeros(1))
+
+    assert detector._detectar_atividades_faciais(pessoa())[0]['trilha_id'] == 1
+    for _ in range(3):
+        detector._montar_resultado(imagem, DeteccoesQuadro.vazio(), DeteccoesQuadro.vazio())
+    assert not detector._rastreador.ativas, "quadros vazios deveriam encerrar a trilha"
+    assert detector._detectar_atividades_faciais(pessoa())[0]['trilha_id'] == 2
+
+    # Degrau sem_analises: o rastreador continua acompanhando as pessoas
+    detector.aplicar_nivel_carga(2)
+    pessoas = pessoa()
+    detector._montar_resultado(imagem, pessoas, DeteccoesQuadro.vazio())
+    assert pessoas[0]['trilha_id'] == 2
+    for _ in range(3):
+        detector._montar_resultado(imagem, DeteccoesQuadro.vazio(), DeteccoesQuadro.vazio())
+    detector.aplicar_nivel_carga(0)
+    assert detector._detectar_atividades_faciais(pessoa())[0]['trilha_id'] == 3
+    print("✅ Trilhas envelhecem em quadros vazios e no degrau sem_analises")
+
+
+if __name__ == "__main__":
+    testar_rastreador()
+    testar_agendador()
+    testar_detector()
+    testar_envelhecimento()
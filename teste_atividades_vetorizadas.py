@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste das atividades vetorizadas: códigos de cabeça, postura e mãos nas
+fronteiras das regras e atividade provável pela tabela pré-computada
+"""
+
+import numpy as np
+
+from analise_vetorizada import MOVIMENTOS_CABECA, MOVIMENTOS_MAOS, POSTURAS, codigos_atividade
+from detector_avancado import DetectorAvancado
+
+# (x, y, largura, altura) -> (cabeça, postura, mãos, atividade)
+CASOS = [
+    # Cabeça: x < 576 e x > 1344 vencem y < 324 e y > 756
+    ((575, 100, 100, 300), ('olhando_direita', 'em_pe_ereto', 'gesticulando', 'conversando_ou_apresentando')),
+    ((576, 500, 100, 300), ('olhando_frente', 'em_pe_ereto', 'gesticulando', 'conversando_ou_apresentando')),
+    ((1345, 900, 100, 300), ('olhando_esquerda', 'em_pe_ereto', 'gesticulando', 'conversando_ou_apresentando')),
+    ((800, 323, 100, 300), ('cabeca_alta', 'em_pe_ereto', 'gesticulando', 'explicando_algo')),
+    ((800, 757, 100, 300), ('cabeca_baixa', 'em_pe_ereto', 'gesticulando', 'explicando_algo')),
+    # Postura pela proporção: > 2.2, > 1.8, > 1.3; largura zero conta como 1.5
+    ((800, 500, 100, 221), ('olhando_frente', 'em_pe_ereto', 'gesticulando', 'conversando_ou_apresentando')),
+    ((800, 500, 100, 200), ('olhando_frente', 'em_pe_relaxado', 'maos_ao_lado', 'observando_ou_aguardando')),
+    ((800, 299, 100, 200), ('cabeca_alta', 'em_pe_relaxado', 'apontando', 'indicando_ou_ensinando')),
+    ((800, 500, 100, 180), ('olhando_frente', 'sentado', 'maos_no_colo', 'assistindo_tela')),
+    ((800, 757, 100, 131), ('cabeca_baixa', 'sentado', 'maos_no_colo', 'lendo_ou_escrevendo')),
+    ((800, 323, 0, 50), ('cabeca_alta', 'sentado', 'maos_no_colo', 'ouvindo_ou_pensando')),
+    ((800, 500, 100, 130), ('olhando_frente', 'agachado_ou_deitado', 'segurando_objeto', 'manipulando_objeto_no_chao')),
+    ((800, 500, 50, 0), ('olhando_frente', 'agachado_ou_deitado', 'segurando_objeto', 'manipulando_objeto_no_chao')),
+]
+
+
+def pessoas_dos_casos():
+    return [{'id': f"pessoa_{i}", 'posicao': {'x': x, 'y': y, 'largura': w, 'altura': h}}
+            for i, ((x, y, w, h), _) in enumerate(CASOS)]
+
+
+def testar_codigos_nas_fronteiras():
+    caixas = np.array([caixa for caixa, _ in CASOS], dtype=np.float64)
+    cabeca, postura, maos = codigos_atividade(caixas)
+    obtidos = [(MOVIMENTOS_CABECA[c], POSTURAS[p], MOVIMENTOS_MAOS[m]) for c, p, m in zip(cabeca, postura, maos)]
+    for (caixa, esperado), obtido in zip(CASOS, obtidos):
+        assert obtido == esperado[:3], f"{caixa}: {obtido} != {esperado[:3]}"
+    print(f"✅ {len(CASOS)} casos de fronteira de cabeça, postura e mãos")
+
+
+def testar_atividades_no_detector():
+    print("=== TESTE DE ATIVIDADES VETORIZADAS ===")
+    detector = DetectorAvancado()
+    pessoas = pessoas_dos_casos()
+
+    atividades = detector._detectar_atividades_faciais(pessoas)
+    assert len(atividades) == len(pessoas), "todas as pessoas devem ser analisadas"
+    for pessoa, atividade, (caixa, esperado) in zip(pessoas, atividades, CASOS):
+        obtido = (atividade['movimento_cabeca'], atividade['postura_corporal'],
+                  atividade['movimento_maos'], atividade['atividade_provavel'])
+        assert obtido == esperado, f"{caixa}: {obtido} != {esperado}"
+        assert atividade['pessoa_id'] == pessoa['id']
+        assert 0.6 <= atividade['confianca'] <= 0.9
+
+    # A tabela cobre todas as combinações com a mesma regra de _inferir_atividade
+    tabela = detector._tabela_atividades
+    assert tabela.shape == (len(MOVIMENTOS_CABECA), len(POSTURAS), len(MOVIMENTOS_MAOS))
+    assert tabela[4, 2, 0] == detector._inferir_atividade('olhando_frente', 'sentado', 'digitando')
+
+    # Muitas pessoas de uma vez: uma linha por pessoa, atividades sempre da tabela
+    rng = np.random.default_rng(0)
+    multidao = [{'id': f"pessoa_{i}", 'posicao': {'x': int(x), 'y': int(y), 'largura': int(w), 'altura': int(h)}}
+                for i, (x, y, w, h) in enumerate(zip(rng.integers(0, 1920, 2000), rng.integers(0, 1080, 2000),
+                                                     rng.integers(0, 400, 2000), rng.integers(0, 800, 2000)))]
+    atividades = detector._detectar_atividades_faciais(multidao)
+    assert len(atividades) == 2000 and {a['atividade_provavel'] for a in atividades} <= set(tabela.flat)
+
+    print(f"✅ {len(pessoas)} casos com a atividade esperada e 2000 pessoas num lote")
+    assert detector._detectar_atividades_faciais([]) == []
+
+
+if __name__ == "__main__":
+    testar_codigos_nas_fronteiras()
+    testar_atividades_no_detector()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste dos backends de inferência: decodificação YOLOv8, pós-processamento
+comum (letterbox reverso + NMS) e escolha do backend em criar_backend
+"""
+
+import os
+import unittest
+
+import numpy as np
+
+from backends_inferencia import (BackendONNXRuntime, BackendOpenCVDNN, criar_backend,
+                                 decodificar_yolov8, pos_processar)
+from preprocessamento import BuffersEntrada
+
+MODELO = os.environ.get('MODELO_ONNX', 'yolov8n.onnx')
+SEM_MODELO = {'modelo_onnx': 'inexistente.onnx', 'modelo_pt': 'inexistente.pt'}
+
+
+def saida_yolov8(ancoras):
+    """Saída 84 x A a partir de (cx, cy, w, h, classe, score) por âncora"""
+    saida = np.zeros((84, len(ancoras)), dtype=np.float32)
+    for a, (cx, cy, w, h, classe, score) in enumerate(ancoras):
+        saida[:4, a] = cx, cy, w, h
+        saida[4 + classe, a] = score
+    return saida
+
+
+def testar_decodificacao_e_pos_processamento():
+    saida = saida_yolov8([
+        (100, 100, 40, 80, 0, 0.9),   # pessoa
+        (300, 200, 50, 50, 2, 0.3),   # carro abaixo do limiar
+        (102, 101, 40, 80, 0, 0.8),   # duplicata da pessoa, cai no NMS
+    ])
+    caixas, confiancas, classes = decodificar_yolov8(saida, 0.5)
+    assert len(caixas) == 2 and list(classes) == [0, 0]
+    assert np.allclose(caixas[0], [80, 60, 120, 140])
+
+    # Letterbox com escala 0.5 e faixa de 10 px em cima: caixa volta ao espaço da imagem
+    (xywh, conf, cls), = pos_processar([(caixas, confiancas, classes)], [(0.5, 0, 10)], 0.45)
+    assert xywh.dtype == np.int32 and conf.dtype == np.float32 and cls.dtype == np.int32
+    assert len(xywh) == 1 and np.isclose(conf[0], 0.9)
+    assert list(xywh[0]) == [160, 100, 80, 160], xywh
+
+    vazio = pos_processar([decodificar_yolov8(saida, 0.95)], [(1.0, 0, 0)], 0.45)[0]
+    assert all(len(a) == 0 for a in vazio)
+    print("✅ Decodificação YOLOv8, letterbox reverso e NMS")
+
+
+def testar_criar_backend_sem_modelo():
+    assert criar_backend(SEM_MODELO) is None
+    assert criar_backend(dict(SEM_MODELO, backend='onnxruntime')) is None
+    print("✅ Sem modelo: nenhum backend")
+
+
+def testar_backends_com_modelo():
+    if not os.path.exists(MODELO):
+        raise unittest.SkipTest(f"modelo {MODELO} não encontrado")
+    try:
+        import onnxruntime  # noqa: F401
+    except ImportError:
+        raise unittest.SkipTest("onnxruntime não instalado")
+
+    backend = criar_backend({'modelo_onnx': MODELO})
+    assert isinstance(backend, BackendONNXRuntime), "auto deveria preferir o ONNX Runtime para .onnx"
+    assert backend.suporta_lote and backend.tamanho_fixo is None
+
+    rng = np.random.default_rng(0)
+    imagens = [rng.integers(0, 255, (480, 640, 3), dtype=np.uint8) for _ in range(3)]
+    canvas, blob, _ = BuffersEntrada().preparar(imagens, 320)
+    assert len(backend.inferir(canvas, blob, 0.25)) == 3
+
+    opencv = criar_backend({'modelo_onnx': MODELO, 'backend': 'opencv'})
+    assert isinstance(opencv, BackendOpenCVDNN) and opencv.yolo_version == 8
+    # Mesmo modelo nos dois backends: mesmos candidatos
+    for (c1, p1, k1), (c2, p2, k2) in zip(backend.inferir(canvas, blob, 0.25), opencv.inferir(canvas, blob, 0.25)):
+        assert np.array_equal(k1, k2) and np.allclose(c1, c2, atol=1e-2) and np.allclose(p1, p2, atol=1e-4)
+
+    try:
+        BackendONNXRuntime(MODELO, otimizacao_grafo='maximo')
+        raise AssertionError("nível de otimização inválido deveria ser recusado")
+    except ValueError:
+        pass
+    print("✅ ONNX Runtime com lote dinâmico e OpenCV DNN concordam")
+
+
+if __name__ == "__main__":
+    print("=== TESTE DOS BACKENDS DE INFERÊNCIA ===")
+    for teste in (testar_decodificacao_e_pos_processamento, testar_criar_backend_sem_modelo,
+                  testar_backends_com_modelo):
+        try:
+            teste()
+        except unittest.SkipTest as e:
+            print(f"⏭️ {teste.__name__} ignorado: {e}")
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste do barramento de quadros: leitura sem cópia, assinante em outro
+processo, assinante lento perdendo quadros e publicador que nunca espera
+"""
+
+import multiprocessing as mp
+import os
+import time
+
+import numpy as np
+
+from barramento_quadros import Assinante, BarramentoQuadros
+
+FORMATO = (480, 640, 3)
+
+
+def quadro(seq):
+    return np.full(FORMATO, seq % 251, dtype=np.uint8)
+
+
+def assinante_remoto(nome, total, saida):
+    """Lê todos os quadros em outro processo e devolve (seq, valor) de cada um"""
+    lidos = []
+    with Assinante(nome) as assinante:
+        saida.put('pronto')
+        while len(lidos) < total:
+            q = assinante.proximo(timeout=10)
+            if q is None:
+                break
+            with q:
+                lidos.append((q.seq, int(q.imagem[0, 0, 0]), int(q.imagem[-1, -1, -1])))
+        saida.put((lidos, assinante.perdidos))
+
+
+def reservar_linha(nome, barreira, saida):
+    """Espera os outros processos e assina ao mesmo tempo que eles"""
+    barreira.wait()
+    with Assinante(nome) as assinante:
+        saida.put(assinante.indice)
+        barreira.wait()  # segura a linha até todos terem reservado
+
+
+def testar_mesmo_processo():
+    with BarramentoQuadros(slots=4, tamanho_slot=int(np.prod(FORMATO))) as barramento:
+        assinante = barramento.assinar()
+        assert assinante.proximo(timeout=0.05) is None, "sem quadros publicados"
+
+        seq = barramento.publicar(quadro(7))
+        with assinante.proximo(timeout=1) as q:
+            assert q.seq == seq and q.imagem.shape == FORMATO and q.imagem[0, 0, 0] == 7
+            assert not q.imagem.flags.writeable
+            # Sem cópia: a visão aponta para o próprio segmento compartilhado
+            assert np.shares_memory(q.imagem, barramento._mapa['dados'])
+            assert q.valido()
+
+        # Outros formatos e tipos
+        cinza = np.arange(100 * 200, dtype=np.float32).reshape(100, 200)
+        barramento.publicar(cinza)
+        with assinante.proximo(timeout=1) as q:
+            assert q.imagem.dtype == np.float32 and np.array_equal(q.imagem, cinza)
+
+        try:
+            barramento.publicar(np.zeros((1000, 1000, 3), dtype=np.uint8))
+            raise AssertionError("quadro maior que o slot deveria falhar")
+        except ValueError:
+            pass
+        assinante.fechar()
+    print("✅ Mesmo processo: leitura sem cópia, somente leitura, formatos variados")
+
+
+def testar_assinante_lento():
+    with BarramentoQuadros(slots=4, tamanho_slot=int(np.prod(FORMATO))) as barramento:
+        lento = barramento.assinar()
+        preview = barramento.assinar(mais_recente=True)
+
+        # O lento segura um quadro e não lê mais nada: o publicador continua nos outros slots
+        barramento.publicar(quadro(0))
+        segurado = lento.proximo(timeout=1)
+        inicio = time.perf_counter()
+        for i in range(1, 50):
+            assert barramento.publicar(quadro(i)) == i
+        duracao = time.perf_counter() - inicio
+        assert segurado.valido() and segurado.imagem[0, 0, 0] == 0, "slot pinado foi sobrescrito"
+
+        with preview.proximo(timeout=1) as q:
+            assert q.seq == 49, "prévia deveria pular para o mais recente"
+        segurado.liberar()
+
+        # O lento retoma do mais antigo ainda no anel e contabiliza o que perdeu
+        with lento.proximo(timeout=1) as q:
+            assert q.seq > 1 and q.imagem[0, 0, 0] == q.seq % 251
+        assert lento.perdidos == q.seq - 1
+
+        estatisticas = barramento.obter_estatisticas()
+        lento.fechar()
+        preview.fechar()
+
+        # Todos os slots presos: o quadro é descartado, sem bloquear
+        assinantes = [barramento.assinar(mais_recente=True) for _ in range(barramento.slots)]
+        presos = []
+        for a in assinantes:
+            barramento.publicar(quadro(0))
+            presos.append(a.proximo(timeout=1))
+        assert barramento.publicar(quadro(0)) is None
+        cheio = barramento.obter_estatisticas()
+        assert cheio['descartados'] == 1 and cheio['slots_em_leitura'] == barramento.slots
+        for q in presos:
+            q.liberar()
+        assert barramento.publicar(quadro(0)) is not None
+        for a in assinantes:
+            a.fechar()
+        print(f"✅ Assinante lento: 49 publicações em {duracao * 1000:.1f} ms sem esperar, "
+              f"{estatisticas['assinantes'][0]['perdidos']} quadros perdidos pelo lento")
+
+
+def testar_outro_processo():
+    contexto = mp.get_context('spawn')
+    total = 200
+    with BarramentoQuadros(slots=8, tamanho_slot=int(np.prod(FORMATO))) as barramento:
+        saida = contexto.Queue()
+        processo = contexto.Process(target=assinante_remoto, args=(barramento.nome, total, saida))
+        processo.start()
+        assert saida.get(timeout=30) == 'pronto'
+        for i in range(total):
+            barramento.publicar(quadro(i))
+            time.sleep(0.001)
+        lidos, perdidos = saida.get(timeout=30)
+        processo.join(timeout=10)
+
+        seqs = [s for s, _, _ in lidos]
+        assert seqs == sorted(seqs) and len(set(seqs)) == len(seqs), "fora de ordem"
+        assert all(a == b == s % 251 for s, a, b in lidos), "quadro rasgado ou misturado"
+        assert len(lidos) + perdidos == total or seqs[-1] == total - 1
+        assert barramento.obter_estatisticas()['assinantes'] == [], "vaga do assinante não liberada"
+        nome = barramento.nome
+    assert not os.path.exists(f'/dev/shm/{nome}')
+    print(f"✅ Outro processo: {len(lidos)} quadros lidos em ordem, {perdidos} perdidos")
+
+
+def testar_reservas_simultaneas():
+    """Assinantes iniciando juntos nunca ficam com a mesma linha da tabela de pinos"""
+    contexto = mp.get_context('spawn')
+    n = 6
+    with BarramentoQuadros(slots=2, tamanho_slot=64, max_assinantes=n) as barramento:
+        for _ in range(3):
+            barreira, saida = contexto.Barrier(n), contexto.Queue()
+            processos = [contexto.Process(target=reservar_linha, args=(barramento.nome, barreira, saida))
+                         for _ in range(n)]
+            for processo in processos:
+                processo.start()
+            indices = sorted(saida.get(timeout=30) for _ in range(n))
+            for processo in processos:
+                processo.join(timeout=10)
+            assert indices == list(range(n)), f"linhas repetidas: {indices}"
+        # Também entre assinantes do mesmo processo
+        assinantes = [barramento.assinar() for _ in range(n)]
+        assert sorted(a.indice for a in assinantes) == list(range(n))
+        try:
+            barramento.assinar()
+            raise AssertionError("sem vagas deveria falhar")
+        except RuntimeError:
+            pass
+        for a in assinantes:
+            a.fechar()
+    print(f"✅ {n} assinantes simultâneos, cada um na sua linha")
+
+
+if __name__ == "__main__":
+    print("=== TESTE DO BARRAMENTO DE QUADROS ===")
+    testar_mesmo_processo()
+    testar_assinante_lento()
+    testar_outro_processo()
+    testar_reservas_simultaneas()
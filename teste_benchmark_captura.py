@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste do benchmark de captura: backend de replay sem tela e Xvfb temporário
+quando DISPLAY não está definido
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import cv2
+import numpy as np
+
+import benchmark_captura
+
+ARGUMENTOS_RAPIDOS = ['--iteracoes', '5', '--duracao', '0.2']
+
+
+def gravar_capturas(pasta, quantidade=3):
+    rng = np.random.default_rng(0)
+    for i in range(quantidade):
+        quadro = rng.integers(0, 255, (480, 640, 3), dtype=np.uint8)
+        cv2.imwrite(os.path.join(pasta, f'captura_{i:03d}.jpg'), quadro)
+
+
+def testar_replay_sem_tela():
+    display = os.environ.get('DISPLAY')
+    with tempfile.TemporaryDirectory() as pasta:
+        gravar_capturas(pasta)
+        saida = os.path.join(pasta, 'relatorio.json')
+        relatorio = benchmark_captura.main(['--backends', 'replay', '--replay', pasta,
+                                            '--saida', saida] + ARGUMENTOS_RAPIDOS)
+        with open(saida, encoding='utf-8') as f:
+            assert json.load(f)['backends'].keys() == {'replay'}
+
+    replay = relatorio['backends']['replay']
+    assert replay['disponivel'], replay
+    assert replay['resolucao'] == '640x480' and replay['fps_sustentado'] > 0
+    assert replay['latencia_captura']['p50_ms'] >= 0 and replay['alocacoes_por_frame']['amostras'] == 5
+    assert not relatorio['host']['xvfb'], "replay não precisa de Xvfb"
+    assert os.environ.get('DISPLAY') == display
+    print(f"✅ Replay medido sem tela: {replay['fps_sustentado']} FPS")
+
+
+def testar_xvfb_sem_display():
+    if os.environ.get('DISPLAY'):
+        raise unittest.SkipTest("DISPLAY já definido")
+    if not shutil.which('Xvfb'):
+        raise unittest.SkipTest("Xvfb não instalado")
+    with tempfile.TemporaryDirectory() as pasta:
+        relatorio = benchmark_captura.main(['--backends', 'x11_shm', '--saida',
+                                            os.path.join(pasta, 'relatorio.json')] + ARGUMENTOS_RAPIDOS)
+
+    assert relatorio['host']['xvfb'] and relatorio['host']['display']
+    assert relatorio['backends']['x11_shm']['disponivel'], relatorio['backends']['x11_shm']
+    assert 'DISPLAY' not in os.environ, "o Xvfb temporário deve ser encerrado"
+    print("✅ Sem DISPLAY: benchmark inicia e encerra o próprio Xvfb")
+
+
+if __name__ == "__main__":
+    print("=== TESTE DO BENCHMARK DE CAPTURA ===")
+    for teste in (testar_replay_sem_tela, testar_xvfb_sem_display):
+        try:
+            teste()
+        except unittest.SkipTest as e:
+            print(f"⏭️ {teste.__name__} ignorado: {e}")
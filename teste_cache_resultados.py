@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste do cache de resultados: assinatura dHash, busca por distância de
+Hamming, validade (TTL), descarte LRU e uso no detector
+"""
+
+import os
+import unittest
+
+import cv2
+import numpy as np
+
+from cache_resultados import CacheResultados, dhash, distancia_hamming
+from controle_carga import NIVEL_SEM_ANALISES
+from detector_avancado import DetectorAvancado
+
+MODELO = os.environ.get('MODELO_ONNX', 'yolov8n.onnx')
+
+
+def gerar_cena(variante=0):
+    """Sala 1080p com gradiente e móveis; a variante muda a disposição"""
+    cena = np.tile(np.linspace(40, 200, 1920, dtype=np.uint8), (1080, 1))
+    cena = cv2.cvtColor(cena, cv2.COLOR_GRAY2BGR)
+    rng = np.random.default_rng(variante)
+    for _ in range(6):
+        x, y = int(rng.integers(0, 1700)), int(rng.integers(0, 900))
+        cv2.rectangle(cena, (x, y), (x + 200, y + 150), [int(c) for c in rng.integers(0, 255, 3)], -1)
+    return cena
+
+
+def testar_dhash():
+    cena = gerar_cena()
+    assinatura = dhash(cena)
+    assert 0 <= assinatura < 2 ** 64 and dhash(cena.copy()) == assinatura
+
+    # Ruído de sensor fica dentro da tolerância padrão (2 bits); outra disposição bem fora
+    ruido = np.random.default_rng(1).integers(-3, 4, cena.shape)
+    com_ruido = np.clip(cena.astype(np.int16) + ruido, 0, 255).astype(np.uint8)
+    assert distancia_hamming(dhash(com_ruido), assinatura) <= 2
+    assert distancia_hamming(dhash(gerar_cena(variante=5)), assinatura) > 4
+    assert distancia_hamming(0b1011, 0b0001) == 2
+    print("✅ dHash estável com ruído e distante em outra cena")
+
+
+def testar_busca_hamming():
+    cache = CacheResultados(tolerancia_hamming=2)
+    cache.guardar(0b0000, {'id': 'a'})
+    cache.guardar(0b0111, {'id': 'b'})
+
+    assert cache.obter(0b0000)['id'] == 'a'
+    assert cache.obter(0b0011)['id'] == 'b', "mais próxima (1 bit) vence a de 2 bits"
+    assert cache.obter(0b1000)['id'] == 'a'
+    assert cache.obter(0b11111000) is None, "acima da tolerância é falha"
+
+    exato = CacheResultados(tolerancia_hamming=0)
+    exato.guardar(0b0000, {'id': 'a'})
+    assert exato.obter(0b0001) is None and exato.obter(0b0000)['id'] == 'a'
+
+    # Cópias: quem altera o resultado devolvido não altera o cache
+    cache.obter(0b0000)['id'] = 'alterado'
+    assert cache.obter(0b0000)['id'] == 'a'
+    estatisticas = cache.obter_estatisticas()
+    assert estatisticas['acertos'] == 5 and estatisticas['falhas'] == 1 and estatisticas['entradas'] == 2
+    print("✅ Busca por Hamming: assinatura mais próxima dentro da tolerância")
+
+
+def testar_ttl_e_lru():
+    cache = CacheResultados(capacidade=2, tolerancia_hamming=0, ttl=5.0)
+    cache.guardar(1, {'id': 1})
+    assert cache.obter(1) is not None
+
+    # Entrada guardada há mais que o TTL: expira e sai do cache
+    instante, resultado = cache._entradas[1]
+    cache._entradas[1] = (instante - 6.0, resultado)
+    assert cache.obter(1) is None
+    assert cache.expirados == 1 and cache.obter_estatisticas()['entradas'] == 0
+
+    # LRU: a menos usada sai quando a capacidade estoura
+    cache.guardar(1, {'id': 1})
+    cache.guardar(2, {'id': 2})
+    cache.obter(1)
+    cache.guardar(3, {'id': 3})
+    assert cache.obter(2) is None and cache.obter(1) is not None and cache.obter(3) is not None
+    cache.limpar()
+    assert cache.obter_estatisticas()['entradas'] == 0
+    print("✅ Entradas expiram pelo TTL e a menos usada sai primeiro")
+
+
+def testar_cache_no_detector():
+    if not os.path.exists(MODELO):
+        raise unittest.SkipTest(f"modelo {MODELO} não encontrado")
+    detector = DetectorAvancado({'modelo_onnx': MODELO, 'cache_resultados': True})
+    if not detector.modelo_carregado:
+        raise unittest.SkipTest("nenhum backend carregou o modelo")
+    chamadas = []
+    detectar = detector._detectar_yolo
+
+    def espiao(imagem):
+        chamadas.append(imagem.shape)
+        return detectar(imagem)
+
+    detector._detectar_yolo = espiao
+    sala = gerar_cena()
+    primeiro = detector.detectar_frame(sala)
+    repetido = detector.detectar_frame(sala.copy())
+    assert len(chamadas) == 1, "cena repetida deveria vir do cache"
+    assert repetido['resumo'] == primeiro['resumo']
+
+    detector.detectar_frame(gerar_cena(variante=5))
+    assert len(chamadas) == 2, "cena nova deveria ser detectada"
+    estatisticas = detector.obter_estatisticas()['cache_resultados']
+    assert estatisticas['acertos'] == 1 and estatisticas['falhas'] == 2
+    print("✅ Detector devolve cenas repetidas do cache sem inferir de novo")
+
+
+def testar_cache_com_rastreador():
+    """Acerto no cache pula só a inferência: trilhas e nível de carga continuam valendo"""
+    if not os.path.exists(MODELO):
+        raise unittest.SkipTest(f"modelo {MODELO} não encontrado")
+    detector = DetectorAvancado({'modelo_onnx': MODELO, 'cache_resultados': True, 'analise_por_trilha': True})
+    if not detector.modelo_carregado:
+        raise unittest.SkipTest("nenhum backend carregou o modelo")
+    chamadas = []
+    detectar = detector._detectar_yolo
+
+    def espiao(imagem):
+        chamadas.append(imagem.shape)
+        return detectar(imagem)
+
+    detector._detectar_yolo = espiao
+    sala = gerar_cena()
+    trilhas = []
+    for _ in range(3):
+        resultado = detector.detectar_frame(sala.copy())
+        trilhas.append([a['trilha_id'] for a in resultado['analises']['atividades_faciais']])
+    assert len(chamadas) == 1 and trilhas[0], trilhas
+    assert trilhas[1] == trilhas[2] == trilhas[0], "a mesma pessoa mantém a trilha nos acertos"
+    estatisticas = detector.obter_estatisticas()['analise_por_trilha']
+    assert estatisticas['analises_reaproveitadas'] == 2 * len(trilhas[0]), estatisticas
+
+    detector.aplicar_nivel_carga(NIVEL_SEM_ANALISES)
+    resultado = detector.detectar_frame(sala.copy())
+    assert len(chamadas) == 1 and resultado['resumo']['total_pessoas'] == len(trilhas[0])
+    assert resultado['analises']['atividades_faciais'] == [] and resultado['analises']['interacoes'] == []
+    print("✅ Acerto no cache atualiza as trilhas e respeita o nível de carga")
+
+if __name__ == "__main__":
+    print("=== TESTE DO CACHE DE RESULTADOS ===")
+    for teste in (testar_dhash, testar_busca_hamming, testar_ttl_e_lru, testar_cache_no_detector,
+                  testar_cache_com_rastreador):
+        try:
+            teste()
+        except unittest.SkipTest as e:
+            print(f"⏭️ {teste.__name__} ignorado: {e}")
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste da detecção em cascata: estágio 1 pula o YOLO sem propostas,
+verificação periódica a cada N quadros e modelo grande só nos ambíguos
+"""
+
+import os
+import unittest
+
+import cv2
+import numpy as np
+
+from backends_inferencia import FiltroClasses
+from cascata import Cascata
+from detector_avancado import DetectorAvancado
+
+MODELO = os.environ.get('MODELO_ONNX', 'yolov8n.onnx')
+
+
+def gerar_sala(semente=0):
+    return np.random.default_rng(semente).integers(0, 255, (720, 1280, 3), dtype=np.uint8)
+
+
+class _BackendGrandeFalso:
+    """Modelo grande que confirma uma pessoa com confiança alta em cada imagem recebida"""
+    tamanho_fixo = None
+
+    def __init__(self):
+        self.lotes = []
+
+    def inferir(self, canvas, blob, filtro):
+        self.lotes.append(len(blob))
+        return [(np.array([[10, 10, 60, 110]], np.float32), np.array([0.8], np.float32), np.array([0]))
+                for _ in range(len(blob))]
+
+
+def testar_intervalo_verificacao():
+    try:
+        Cascata(metodo='sift')
+        raise AssertionError("método de proposta inválido deveria ser recusado")
+    except ValueError:
+        pass
+
+    cascata = Cascata(intervalo_verificacao=4)
+    sala = gerar_sala()
+    inferidos = []
+    for i in range(9):
+        if cascata.deve_inferir(sala):
+            inferidos.append(i)
+            cascata.registrar(np.empty((0, 4)), np.empty(0), np.empty(0))
+    assert inferidos == [0, 4, 8], inferidos
+
+    # Movimento gera propostas: o YOLO roda no mesmo quadro, sem esperar a verificação
+    com_pessoa = sala.copy()
+    cv2.rectangle(com_pessoa, (600, 200), (700, 500), (255, 255, 255), -1)
+    assert cascata.deve_inferir(com_pessoa)
+    estatisticas = cascata.obter_estatisticas()
+    assert estatisticas['quadros'] == 10 and estatisticas['inferencias_yolo'] == 4
+    assert estatisticas['quadros_com_propostas'] == 2 and estatisticas['taxa_estagio2'] == 0.4
+    print("✅ Sala parada: YOLO só a cada 4 quadros; movimento dispara o YOLO na hora")
+
+
+def testar_sem_resultado_anterior():
+    cascata = Cascata(intervalo_verificacao=100)
+    sala = gerar_sala()
+    # Enquanto nada foi registrado, não há resultado para repetir
+    assert all(cascata.deve_inferir(sala) for _ in range(3))
+    print("✅ Sem resultado registrado, o estágio 1 nunca pula o YOLO")
+
+
+def testar_ambiguos_no_modelo_grande():
+    cascata = Cascata()
+    grande = cascata.backend_grande = _BackendGrandeFalso()
+    filtro = FiltroClasses(0.5)
+    imagens = [np.zeros((416, 416, 3), np.uint8) for _ in range(3)]
+    caixa = np.array([[100, 100, 50, 100]], np.int32)
+    resultados = [
+        (caixa, np.array([0.4], np.float32), np.array([0], np.int32)),   # ambígua: 0.3 <= 0.4 < 0.5
+        (caixa, np.array([0.9], np.float32), np.array([0], np.int32)),   # segura
+        (caixa, np.array([0.2], np.float32), np.array([0], np.int32)),   # abaixo do limiar ambíguo
+    ]
+    finais = cascata.resolver_ambiguos(imagens, resultados, 416, filtro, 0.45)
+
+    assert grande.lotes == [1], "só a imagem ambígua vai ao modelo grande, num lote"
+    assert finais[0][0].tolist() == [[10, 10, 50, 100]] and np.isclose(finais[0][1][0], 0.8)
+    assert finais[1][0].tolist() == caixa.tolist()
+    assert len(finais[2][0]) == 0, "candidato fraco descartado pelo limiar normal"
+    assert cascata.obter_estatisticas()['imagens_ambiguas'] == 1
+    print("✅ Modelo grande só reinfere as imagens ambíguas")
+
+
+def testar_cascata_no_detector():
+    if not os.path.exists(MODELO):
+        raise unittest.SkipTest(f"modelo {MODELO} não encontrado")
+    detector = DetectorAvancado({'modelo_onnx': MODELO, 'modo_cascata': True, 'cascata_intervalo_verificacao': 3})
+    if not detector.modelo_carregado:
+        raise unittest.SkipTest("nenhum backend carregou o modelo")
+
+    chamadas = []
+    inferir = detector._inferir_imagens
+
+    def espiao(imagens):
+        chamadas.append(len(imagens))
+        return inferir(imagens)
+
+    detector._inferir_imagens = espiao
+    sala = gerar_sala()
+    resultados = [detector.detectar_frame(sala) for _ in range(7)]
+    assert len(chamadas) == 3, "quadros 0, 3 e 6"
+    assert all(r['resumo']['total_pessoas'] == resultados[0]['resumo']['total_pessoas'] for r in resultados)
+    assert detector.obter_estatisticas()['cascata']['inferencias_yolo'] == 3
+    print("✅ Detector com modo_cascata repete o último resultado entre verificações")
+
+
+if __name__ == "__main__":
+    print("=== TESTE DA DETECÇÃO EM CASCATA ===")
+    for teste in (testar_intervalo_verificacao, testar_sem_resultado_anterior,
+                  testar_ambiguos_no_modelo_grande, testar_cascata_no_detector):
+        try:
+            teste()
+        except unittest.SkipTest as e:
+            print(f"⏭️ {teste.__name__} ignorado: {e}")
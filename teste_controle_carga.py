@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste da escada de degradação do controle de carga
+"""
+
+import glob
+import os
+
+import cv2
+import numpy as np
+
+from controle_carga import NIVEIS_CARGA, NIVEL_MODELO_LEVE, NIVEL_PULAR_QUADROS, ControleCarga, nivel_carga_maximo
+from detector_avancado import DetectorAvancado
+
+
+def testar_escada():
+    print("=== TESTE DA ESCADA DE CARGA ===")
+    controle = ControleCarga(orcamento=0.5, quadros_para_subir=3, quadros_para_descer=5)
+
+    # Sobrecarga contínua: sobe um degrau a cada 3 quadros até o modelo leve
+    niveis = []
+    for _ in range(30):
+        if controle.deve_processar():
+            nivel = controle.registrar(1.5)
+            if nivel is not None:
+                niveis.append(nivel)
+    assert niveis == [1, 2, 3, 4], niveis
+    assert controle.estatisticas['quadros_pulados'] > 0, "a partir de pulando_quadros, parte dos quadros é descartada"
+
+    # Fila acima do limite também é sobrecarga, mesmo com latência baixa
+    fila = ControleCarga(orcamento=0.5, fila_maxima=2, quadros_para_subir=2)
+    assert fila.registrar(0.1, fila=5) is None and fila.registrar(0.1, fila=5) == 1
+
+    # Carga cai: desce um degrau por vez até o normal
+    for _ in range(200):
+        if controle.deve_processar():
+            nivel = controle.registrar(0.05)
+            if nivel is not None:
+                niveis.append(nivel)
+    assert niveis == [1, 2, 3, 4, 3, 2, 1, 0], niveis
+    assert controle.nome_nivel == 'normal'
+
+    transicoes = controle.obter_estatisticas()['transicoes']
+    assert len(transicoes) == 8 and all(t['motivo'] for t in transicoes)
+    print(f"✅ {' → '.join(NIVEIS_CARGA[n] for n in [0] + niveis)}")
+
+    # Latência logo acima do orçamento de um degrau, mas abaixo do de pular quadros: estabiliza
+    estavel = ControleCarga(orcamento=0.5, quadros_para_subir=3, quadros_para_descer=5, nivel_maximo=4)
+    for _ in range(100):
+        if estavel.deve_processar():
+            estavel.registrar(0.8)
+    assert estavel.nome_nivel == 'pulando_quadros', estavel.nome_nivel
+    print(f"✅ Latência 0.8s com orçamento 0.5s estabiliza em {estavel.nome_nivel}")
+
+
+def testar_nivel_maximo():
+    assert nivel_carga_maximo({}) == NIVEL_PULAR_QUADROS
+    assert nivel_carga_maximo({'carga_modelo_leve': 'yolov8n_int8.onnx'}) == NIVEL_MODELO_LEVE
+
+    # Sem modelo leve, sobrecarga contínua para em pulando_quadros
+    controle = ControleCarga(orcamento=0.5, quadros_para_subir=2, nivel_maximo=nivel_carga_maximo({}))
+    for _ in range(50):
+        controle.registrar(5.0)
+    assert controle.nivel == NIVEL_PULAR_QUADROS
+    print("✅ Sem carga_modelo_leve a escada para em pulando_quadros")
+
+
+def testar_detector():
+    print("\n=== TESTE DOS DEGRAUS NO DETECTOR ===")
+    modelo = os.environ.get('MODELO_ONNX', 'yolov8n.onnx')
+    detector = DetectorAvancado({'modelo_onnx': modelo})
+    imagens = [cv2.imread(f) for f in sorted(glob.glob('capturas/*.jpg'))[:1]]
+    imagem = imagens[0] if imagens else np.random.default_rng(0).integers(0, 255, (720, 1280, 3), dtype=np.uint8)
+    tamanho_normal = detector.tamanho_entrada
+
+    detector.aplicar_nivel_carga(1)
+    assert detector.tamanho_entrada == 320 or (detector.backend and detector.backend.tamanho_fixo)
+    detector.aplicar_nivel_carga(2)
+    resultado = detector.detectar_frame(imagem)
+    assert resultado['analises']['interacoes'] == [] and resultado['analises']['atividades_faciais'] == []
+
+    detector.aplicar_nivel_carga(3)
+    pessoas = detector.detectar_frame(imagem)['pessoas_detectadas']
+    detector.aplicar_nivel_carga(4)
+    resultado = detector.detectar_frame(imagem)
+    if detector.modelo_carregado and not detector.config['carga_modelo_leve']:
+        # Sem modelo leve configurado, o modelo normal continua (a lite zeraria as pessoas)
+        assert detector._backend_normal is None and resultado['pessoas_detectadas'] == pessoas
+
+    detector.aplicar_nivel_carga(0)
+    assert detector.tamanho_entrada == tamanho_normal and detector._analises_secundarias
+    assert 'narrativa_especifica' in detector.detectar_frame(imagem)
+    print(f"✅ Degraus aplicados e revertidos (entrada {tamanho_normal} → 320 → {detector.tamanho_entrada})")
+
+
+if __name__ == "__main__":
+    testar_escada()
+    testar_nivel_maximo()
+    testar_detector()
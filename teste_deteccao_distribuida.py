@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste da detecção distribuída com todos os trabalhadores em localhost:
+ordem dos resultados, trabalhador morto, trabalhador travado e reconexão
+"""
+
+import glob
+import multiprocessing as mp
+import os
+import shutil
+import signal
+import socket
+import tempfile
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from controle_carga import NIVEL_MODELO_LEVE, NIVEL_PULAR_QUADROS
+from deteccao_distribuida import CoordenadorDistribuido, TrabalhadorDistribuido
+from detector_avancado import DetectorAvancado
+
+CONFIG = {'modelo_onnx': os.environ.get('MODELO_ONNX', 'yolov8n.onnx'), 'num_threads': 1}
+
+
+def executar_trabalhador(endereco):
+    TrabalhadorDistribuido(endereco, CONFIG, creditos=2, intervalo_batimento=0.3).executar()
+
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def iniciar(contexto, endereco):
+    processo = contexto.Process(target=executar_trabalhador, args=(endereco,), daemon=True)
+    processo.start()
+    return processo
+
+
+def carregar_quadros(n):
+    quadros = [cv2.imread(f) for f in sorted(glob.glob('capturas/*.jpg'))[:8]]
+    if not quadros:
+        rng = np.random.default_rng(0)
+        quadros = [rng.integers(0, 255, (720, 1280, 3), dtype=np.uint8) for _ in range(8)]
+    return [quadros[i % len(quadros)] for i in range(n)]
+
+
+def caixas(resultado):
+    return [[tuple(d['posicao'].values()) for d in resultado['deteccoes'][chave]] for chave in ('pessoas', 'objetos')]
+
+
+def testar_distribuicao():
+    print("=== TESTE DA DETECÇÃO DISTRIBUÍDA ===")
+    contexto = mp.get_context('spawn')
+    pasta = tempfile.mkdtemp()
+    enderecos = [f"127.0.0.1:{porta_livre()}", f"127.0.0.1:{porta_livre()}", f"unix://{pasta}/trabalhador.sock"]
+    processos = [iniciar(contexto, e) for e in enderecos]
+    time.sleep(4)  # carregar os detectores
+
+    quadros = carregar_quadros(24)
+    detector = DetectorAvancado(CONFIG)
+    referencia = [caixas(dict(detector.detectar_frame(q))) for q in quadros]
+
+    try:
+        with CoordenadorDistribuido(enderecos, compressao='png', timeout_batimento=1.5,
+                                    intervalo_reconexao=0.5) as coordenador:
+            resultados = []
+            for i, quadro in enumerate(quadros):
+                coordenador.enviar(quadro)
+                if i == 6:
+                    processos[0].kill()                        # trabalhador morto
+                if i == 12:
+                    os.kill(processos[1].pid, signal.SIGSTOP)  # trabalhador travado: só o batimento acusa
+                resultados += [r for _, r in coordenador.prontos()]
+            while coordenador.em_voo:
+                resultado = coordenador.proximo(timeout=30)
+                assert resultado is not None, "quadro perdido"
+                resultados.append(resultado)
+
+            assert len(resultados) == len(quadros)
+            assert [caixas(r) for r in resultados] == referencia, "resultados fora de ordem ou diferentes do local"
+            estatisticas = coordenador.obter_estatisticas()
+            assert estatisticas['falhas_trabalhadores'] >= 2, estatisticas
+            print(f"✅ {len(quadros)} quadros na ordem com 1 trabalhador morto e 1 travado | "
+                  f"reenviados: {estatisticas['quadros_reenviados']} | compressão {estatisticas['taxa_compressao']}x")
+
+            # Trabalhador de volta no mesmo endereço: o coordenador reconecta sozinho
+            processos[0] = iniciar(contexto, enderecos[0])
+            limite = time.monotonic() + 20
+            while coordenador.obter_estatisticas()['reconexoes'] == 0 and time.monotonic() < limite:
+                coordenador.verificar()  # ocioso: nada em voo
+                time.sleep(0.1)
+            assert coordenador.obter_estatisticas()['reconexoes'] >= 1
+            assert len(list(coordenador.detectar_frames(quadros[:6]))) == 6
+            print(f"✅ Reconexão: {coordenador.obter_estatisticas()['trabalhadores_ativos']} trabalhadores ativos")
+    finally:
+        os.kill(processos[1].pid, signal.SIGCONT)
+        for processo in processos:
+            processo.kill()
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+def testar_nivel_maximo_dos_trabalhadores():
+    """O degrau modelo_leve só vale se todos os trabalhadores conectados têm carga_modelo_leve"""
+    configs = [dict(CONFIG, carga_modelo_leve='yolov8n_int8.onnx'), CONFIG]
+    enderecos = [f"127.0.0.1:{porta_livre()}" for _ in configs]
+    for endereco, config in zip(enderecos, configs):
+        trabalhador = TrabalhadorDistribuido(endereco, config, intervalo_batimento=0.3)
+        threading.Thread(target=trabalhador.executar, daemon=True).start()
+
+    def esperar_ola(coordenador, n):
+        limite = time.monotonic() + 10
+        while sum(nivel is not None for nivel in coordenador._niveis_maximos) < n and time.monotonic() < limite:
+            coordenador.verificar()
+            time.sleep(0.05)
+
+    with CoordenadorDistribuido(enderecos[:1]) as coordenador:
+        assert coordenador.nivel_carga_maximo == NIVEL_PULAR_QUADROS, "sem 'ola', a escada para em pulando_quadros"
+        esperar_ola(coordenador, 1)
+        assert coordenador.nivel_carga_maximo == NIVEL_MODELO_LEVE
+    with CoordenadorDistribuido(enderecos) as coordenador:
+        esperar_ola(coordenador, 2)
+        assert coordenador.nivel_carga_maximo == NIVEL_PULAR_QUADROS
+    print("✅ Degrau máximo vem da configuração informada pelos trabalhadores")
+
+
+if __name__ == "__main__":
+    testar_distribuicao()
+    testar_nivel_maximo_dos_trabalhadores()
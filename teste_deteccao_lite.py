@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste da detecção lite (sem modelo): nunca inventa pessoas e fica abaixo de um teto folgado por quadro 1080p
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+from deteccao_lite import DetectorLite
+from detector_avancado import DetectorAvancado
+
+# Mediana máxima aceita por quadro 1080p no modo lite
+TETO_MS_POR_QUADRO = 25.0
+
+
+def testar_deteccao_lite():
+    print("=== TESTE DA DETECÇÃO LITE ===")
+    detector = DetectorAvancado({'modo_sem_modelo': 'lite', 'modelo_onnx': 'inexistente.onnx',
+                                 'modelo_pt': 'inexistente.pt'})
+
+    vazio = detector.detectar_frame(np.zeros((1080, 1920, 3), np.uint8))
+    assert vazio['resumo']['total_pessoas'] == 0 and vazio['resumo']['total_objetos'] == 0
+
+    cena = np.zeros((1080, 1920, 3), np.uint8)
+    cv2.rectangle(cena, (300, 300), (600, 900), (255, 255, 255), -1)
+    resultado = detector.detectar_frame(cena)
+    assert resultado['resumo']['total_pessoas'] == 0, "modo lite não pode inventar pessoas"
+    objeto = resultado['deteccoes']['objetos'][0]
+    pos = objeto['posicao']
+    assert objeto['tipo'] == 'unknown_object'
+    assert abs(pos['x'] - 300) <= 12 and abs(pos['largura'] - 300) <= 24 and abs(pos['altura'] - 600) <= 24, pos
+    print(f"✅ Objeto: {pos} | {resultado['narrativa_especifica']}")
+
+
+def testar_tempo():
+    print("\n=== TEMPO POR QUADRO 1080p ===")
+    lite = DetectorLite()
+    rng = np.random.default_rng(0)
+    quadros = [rng.integers(0, 255, (1080, 1920, 3), dtype=np.uint8) for _ in range(5)]
+    lite.detectar(quadros[0])
+    tempos = []
+    for _ in range(10):
+        for quadro in quadros:
+            inicio = time.perf_counter()
+            lite.detectar(quadro)
+            tempos.append((time.perf_counter() - inicio) * 1000)
+    ms = float(np.median(tempos))
+    print(f"⏱️ {ms:.2f} ms/quadro (mediana; ruído, pior caso de bordas)")
+    # Teto folgado (~7x o custo esperado de 1 a 3,5 ms) contra regressões, não contra ruído da máquina
+    assert ms < TETO_MS_POR_QUADRO, f"detecção lite levou {ms:.1f} ms/quadro (teto {TETO_MS_POR_QUADRO} ms)"
+
+if __name__ == "__main__":
+    testar_deteccao_lite()
+    testar_tempo()
@@ -44,7 +44,7 @@ def main():
         for i, obj in enumerate(resultado['deteccoes']['objetos'], 1):
             print(f"  Objeto {i}: ID={obj['id']}, Tipo={obj['tipo']}, Confiança={obj['confianca']:.2f}")
     
-    print(f"\nNarrativa: {resultado.get('narrativa', 'Não disponível')}")
+    print(f"\nNarrativa: {resultado.get('narrativa_especifica', resultado.get('narrativa', 'Não disponível'))}")
     
     # Remove arquivo temporário
     import os
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste das detecções compactas: formato em dicionário idêntico e memória por captura
+"""
+
+import json
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+from backends_inferencia import nome_classe
+from deteccoes import DeteccoesQuadro, serializar_json
+
+
+def deteccoes_dict(caixas, confiancas, classes):
+    """Formato antigo: um dicionário por detecção"""
+    return [{
+        'id': f"{nome_classe(c)}_{i}",
+        'tipo': nome_classe(c),
+        'confianca': round(p, 2),
+        'posicao': {'x': x, 'y': y, 'largura': w, 'altura': h},
+        'timestamp': datetime.now().isoformat()
+    } for i, ((x, y, w, h), p, c) in enumerate(zip(caixas.tolist(), confiancas.tolist(), classes.tolist()))]
+
+
+def gerar(rng, n):
+    caixas = rng.integers(0, 1900, (n, 4)).astype(np.int32)
+    confiancas = rng.uniform(0.3, 1.0, n).astype(np.float32)
+    classes = rng.integers(0, 80, n).astype(np.int32)
+    return caixas, confiancas, classes
+
+
+def testar_formato():
+    print("=== TESTE DE FORMATO ===")
+    rng = np.random.default_rng(0)
+    caixas, confiancas, classes = gerar(rng, 50)
+    compactas = DeteccoesQuadro(caixas, confiancas, classes)
+    antigas = deteccoes_dict(caixas, confiancas, classes)
+
+    sem_instante = lambda lista: [{k: v for k, v in d.items() if k != 'timestamp'} for d in lista]
+    assert sem_instante(compactas.para_lista()) == sem_instante(antigas)
+    assert compactas[3]['posicao'] == antigas[3]['posicao'] and compactas[-1]['id'] == antigas[-1]['id']
+    assert 'timestamp' in compactas[0] and 'trilha_id' not in compactas[0]
+
+    pessoas = compactas.selecionar(compactas.classes == 0)
+    assert all(p['tipo'] == 'person' for p in pessoas)
+
+    texto = json.dumps({'pessoas': pessoas, 'todas': list(compactas)}, default=serializar_json)
+    assert len(json.loads(texto)['todas']) == 50
+    print("✅ Visões e JSON idênticos ao formato em dicionário")
+
+
+def medir(criar, capturas=2000, por_captura=10):
+    rng = np.random.default_rng(1)
+    dados = [gerar(rng, por_captura) for _ in range(capturas)]
+    tracemalloc.start()
+    guardadas = [criar(*d) for d in dados]
+    atual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del guardadas
+    return atual / capturas
+
+
+def testar_memoria():
+    print("\n=== TESTE DE MEMÓRIA ===")
+    por_dict = medir(deteccoes_dict)
+    por_array = medir(DeteccoesQuadro)
+    print(f"📊 Dicionários: {por_dict:.0f} bytes/captura | Arrays: {por_array:.0f} bytes/captura "
+          f"({por_dict / por_array:.1f}x menor)")
+    assert por_array < por_dict / 2
+
+
+if __name__ == "__main__":
+    testar_formato()
+    testar_memoria()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste de estresse do DetectorSeguro: muitas threads chamando o mesmo detector
+"""
+
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from detector_avancado import DetectorAvancado
+from detector_seguro import DetectorSeguro
+
+THREADS = 16
+CHAMADAS_POR_THREAD = 25
+
+
+def gerar_quadros(n):
+    quadros = []
+    for i in range(n):
+        quadro = np.zeros((720, 1280, 3), np.uint8)
+        cv2.rectangle(quadro, (20 + 40 * i, 80), (220 + 40 * i, 520), (255, 255, 255), -1)
+        cv2.circle(quadro, (1000, 200 + 20 * i), 60, (0, 0, 255), -1)
+        quadros.append(quadro)
+    return quadros
+
+
+def testar_estresse():
+    print("=== TESTE DE ESTRESSE COM THREADS ===")
+    quadros = gerar_quadros(8)
+    referencia = DetectorAvancado()
+    esperado = [referencia.detectar_frame(q)['deteccoes']['objetos'].caixas for q in quadros]
+
+    detector = DetectorSeguro(tamanho_pool=3)
+    erros = []
+
+    def trabalhar(indice):
+        try:
+            for k in range(CHAMADAS_POR_THREAD):
+                i = (indice + k) % len(quadros)
+                resultado = detector.detectar_frame(quadros[i])
+                if not np.array_equal(resultado['deteccoes']['objetos'].caixas, esperado[i]):
+                    erros.append(f"thread {indice}, quadro {i}: resultado diferente")
+                resultado['narrativa_especifica']  # narrativa preguiçosa lida fora da trava
+        except Exception as e:
+            erros.append(f"thread {indice}: {e}")
+
+    inicio = time.perf_counter()
+    threads = [threading.Thread(target=trabalhar, args=(i,)) for i in range(THREADS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    duracao = time.perf_counter() - inicio
+
+    estatisticas = detector.obter_estatisticas()
+    print(f"⏱️ {THREADS * CHAMADAS_POR_THREAD} chamadas em {duracao:.2f}s | instâncias: "
+          f"{estatisticas['instancias']} | esperas: {estatisticas['esperas']}")
+    assert not erros, erros[:5]
+    assert estatisticas['chamadas'] == THREADS * CHAMADAS_POR_THREAD
+    assert estatisticas['instancias'] <= 3
+    print("✅ Nenhum erro e resultados iguais ao detector de uma thread")
+
+
+if __name__ == "__main__":
+    testar_estresse()
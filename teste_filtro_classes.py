@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste do filtro de classes: lista de permitidas e limiares por classe
+aplicados na decodificação, antes do NMS
+"""
+
+import os
+import unittest
+
+import numpy as np
+
+from backends_inferencia import CLASSES_COCO, FiltroClasses, decodificar_yolov8, pos_processar
+from detector_avancado import DetectorAvancado
+
+MODELO = os.environ.get('MODELO_ONNX', 'yolov8n.onnx')
+PESSOA, CARRO, CADEIRA = CLASSES_COCO.index('person'), CLASSES_COCO.index('car'), CLASSES_COCO.index('chair')
+
+
+def linha_scores(**scores):
+    linha = np.zeros(len(CLASSES_COCO), np.float32)
+    for nome, score in scores.items():
+        linha[CLASSES_COCO.index(nome)] = score
+    return linha
+
+
+def testar_mascara_de_classes():
+    filtro = FiltroClasses(0.5, ['person', 'chair', 'dragao'], {'chair': 0.8})
+    scores = np.stack([
+        linha_scores(car=0.95, person=0.6),   # carro bloqueado: a melhor permitida é a pessoa
+        linha_scores(car=0.95),               # só classe bloqueada
+        linha_scores(chair=0.7),              # abaixo do limiar próprio da cadeira
+        linha_scores(chair=0.85, person=0.3),
+    ])
+    classes, confiancas, mascara = filtro.selecionar(scores)
+    assert classes[0] == PESSOA and np.isclose(confiancas[0], 0.6)
+    assert mascara.tolist() == [True, False, False, True]
+    assert classes[3] == CADEIRA
+
+    # Sem lista de permitidas: argmax em todas, limiar padrão
+    classes, _, mascara = FiltroClasses(0.5).selecionar(scores)
+    assert classes[0] == CARRO and mascara.tolist() == [True, True, True, True]
+    print("✅ Argmax só nas classes permitidas, com limiar por classe")
+
+
+def testar_limiares_derivados():
+    filtro = FiltroClasses(0.5, ['person', 'chair'], {'chair': 0.8})
+    assert filtro.limiar_minimo == 0.5
+    # Modelo com mais classes que a tabela: índice fora só passa sem lista de permitidas
+    assert np.isinf(filtro.limiar_de([100])[0]) and FiltroClasses(0.5).limiar_de([100])[0] == np.float32(0.5)
+
+    ambiguo = filtro.com_limiar_maximo(0.3)
+    assert ambiguo.limiar_de([PESSOA, CADEIRA]).tolist() == [np.float32(0.3)] * 2
+    assert np.isinf(ambiguo.limiar_de([CARRO])[0]), "classe bloqueada continua bloqueada"
+    assert filtro.limiar_de([CADEIRA])[0] == np.float32(0.8), "o filtro original não muda"
+
+    caixas = np.zeros((3, 4), np.float32)
+    _, confiancas, classes = filtro.filtrar(caixas, np.array([0.6, 0.7, 0.9], np.float32),
+                                            np.array([PESSOA, CADEIRA, CARRO]))
+    assert classes.tolist() == [PESSOA] and np.isclose(confiancas[0], 0.6)
+    assert FiltroClasses.como_filtro(filtro) is filtro and FiltroClasses.como_filtro(0.4).limiar_padrao == 0.4
+    print("✅ Limiar ambíguo, classes fora da tabela e filtro pós-decodificação")
+
+
+def testar_filtro_antes_do_nms():
+    """Carro confiante sobre a pessoa: filtrado depois do NMS, a pessoa já teria sumido"""
+    saida = np.zeros((84, 2), np.float32)
+    saida[:4, :] = [[200], [200], [100], [200]]
+    saida[4 + CARRO, 0] = 0.95
+    saida[4 + PESSOA, 1] = 0.6
+
+    (_, _, sem_filtro), = pos_processar([decodificar_yolov8(saida, 0.5)], [(1.0, 0, 0)], 0.45)
+    assert sem_filtro.tolist() == [CARRO]
+
+    filtro = FiltroClasses(0.5, ['person'])
+    (caixas, confiancas, classes), = pos_processar([decodificar_yolov8(saida, filtro)], [(1.0, 0, 0)], 0.45)
+    assert classes.tolist() == [PESSOA] and np.isclose(confiancas[0], 0.6)
+    assert caixas.tolist() == [[150, 100, 100, 200]]
+    print("✅ Classe bloqueada não suprime a pessoa no NMS")
+
+
+def testar_filtro_no_detector():
+    if not os.path.exists(MODELO):
+        raise unittest.SkipTest(f"modelo {MODELO} não encontrado")
+    quadro = np.random.default_rng(0).integers(0, 255, (480, 640, 3), dtype=np.uint8)
+    contagens = {}
+    for permitidas in (None, ['person'], ['laptop', 'book']):
+        detector = DetectorAvancado({'modelo_onnx': MODELO, 'classes_permitidas': permitidas})
+        if not detector.modelo_carregado:
+            raise unittest.SkipTest("nenhum backend carregou o modelo")
+        resumo = detector.detectar_frame(quadro)['resumo']
+        contagens[str(permitidas)] = (resumo['total_pessoas'], resumo['total_objetos'])
+
+    pessoas = contagens['None'][0]
+    assert contagens["['person']"] == (pessoas, 0), contagens
+    assert contagens["['laptop', 'book']"][0] == 0, contagens
+    print(f"✅ Detector respeita classes_permitidas: {contagens}")
+
+
+if __name__ == "__main__":
+    print("=== TESTE DO FILTRO DE CLASSES ===")
+    for teste in (testar_mascara_de_classes, testar_limiares_derivados,
+                  testar_filtro_antes_do_nms, testar_filtro_no_detector):
+        try:
+            teste()
+        except unittest.SkipTest as e:
+            print(f"⏭️ {teste.__name__} ignorado: {e}")
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste da leitura direta do stream MJPEG do DroidCam
+Usa um servidor MJPEG local que imita o endpoint /video do DroidCam
+"""
+
+import sys
+import os
+import socket
+import struct
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+
+# Adiciona o diretório atual ao path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fontes_frames import FonteDroidCamMJPEG
+
+FPS_SERVIDOR = 60
+
+
+def _com_miniatura_exif(jpeg):
+    """JPEG com um segmento APP1 (EXIF) contendo uma miniatura: há um EOI antes do fim real"""
+    ok, miniatura = cv2.imencode('.jpg', np.full((40, 40, 3), 200, np.uint8))
+    dados = b'Exif\x00\x00' + miniatura.tobytes()
+    return jpeg[:2] + b'\xff\xe1' + struct.pack('>H', len(dados) + 2) + dados + jpeg[2:]
+
+
+class _ServidorMJPEG(BaseHTTPRequestHandler):
+    """Imita o DroidCam: multipart/x-mixed-replace com um JPEG por parte"""
+    miniatura_exif = False
+    content_length = True
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'multipart/x-mixed-replace; boundary=--dcmjpeg')
+        self.end_headers()
+        contador = 0
+        try:
+            while True:
+                frame = np.zeros((480, 640, 3), dtype=np.uint8)
+                cv2.putText(frame, str(contador), (50, 240), cv2.FONT_HERSHEY_SIMPLEX, 3, (255, 255, 255), 5)
+                ok, jpeg = cv2.imencode('.jpg', frame)
+                jpeg = jpeg.tobytes()
+                if self.miniatura_exif:
+                    jpeg = _com_miniatura_exif(jpeg)
+                self.wfile.write(b'--dcmjpeg\r\nContent-Type: image/jpeg\r\n')
+                if self.content_length:
+                    self.wfile.write(f'Content-Length: {len(jpeg)}\r\n'.encode())
+                self.wfile.write(b'\r\n')
+                self.wfile.write(jpeg)
+                self.wfile.write(b'\r\n')
+                contador += 1
+                time.sleep(1 / FPS_SERVIDOR)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+def _iniciar_servidor(tratador=_ServidorMJPEG):
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), tratador)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f"http://127.0.0.1:{servidor.server_address[1]}/video"
+
+
+def testar_fonte_droidcam():
+    print("=== TESTE DA FONTE MJPEG DROIDCAM ===")
+
+    servidor, url = _iniciar_servidor()
+
+    try:
+        with FonteDroidCamMJPEG(url) as fonte:
+            frame = fonte.ler_frame(timeout=5.0)
+            assert frame is not None, "nenhum frame recebido do stream"
+            assert frame.shape == (480, 640, 3), frame.shape
+            print(f"✓ Frame recebido: {frame.shape[1]}x{frame.shape[0]}")
+
+            # Consumidor lento: o leitor deve manter só o último frame
+            for _ in range(5):
+                time.sleep(0.2)
+                assert fonte.ler_frame(timeout=2.0) is not None, "stream parou de entregar frames"
+
+            estatisticas = fonte.obter_estatisticas()
+            print(f"✓ Estatísticas: {estatisticas}")
+            assert estatisticas['frames_decodificados'] == 6, "deveria decodificar apenas os 6 frames consumidos"
+            assert estatisticas['frames_descartados'] > 0, "frames intermediários deveriam ser descartados sem decodificar"
+    finally:
+        servidor.shutdown()
+    print("✅ Teste concluído!")
+
+
+def testar_partes_com_miniatura_exif():
+    """O Content-Length delimita o frame; sem ele, os marcadores continuam funcionando"""
+    class _ComMiniatura(_ServidorMJPEG):
+        miniatura_exif = True
+
+    class _SemContentLength(_ServidorMJPEG):
+        content_length = False
+
+    for tratador in (_ComMiniatura, _SemContentLength):
+        servidor, url = _iniciar_servidor(tratador)
+        try:
+            with FonteDroidCamMJPEG(url) as fonte:
+                for _ in range(3):
+                    frame = fonte.ler_frame(timeout=5.0)
+                    assert frame is not None and frame.shape == (480, 640, 3), tratador.__name__
+        finally:
+            servidor.shutdown()
+    print("✅ JPEG com miniatura EXIF inteiro; partes sem Content-Length pelos marcadores")
+
+
+def testar_reinicio_com_leitura_bloqueada():
+    """parar() desiste de esperar uma leitura presa; iniciar() não pode abrir uma segunda leitora"""
+    mudo = socket.socket()
+    mudo.bind(('127.0.0.1', 0))
+    mudo.listen(4)  # aceita a conexão no kernel e nunca responde
+    fonte = FonteDroidCamMJPEG(f"http://127.0.0.1:{mudo.getsockname()[1]}/video", timeout_conexao=1.0)
+    try:
+        fonte.iniciar()
+        time.sleep(0.1)
+        fonte.timeout_conexao = 0.05
+        fonte.parar()
+        assert fonte._thread is not None and fonte._thread.is_alive(), "leitora presa deve continuar registrada"
+
+        fonte.timeout_conexao = 1.0
+        fonte.iniciar()
+        leitoras = [t for t in threading.enumerate() if getattr(t, '_target', None) == fonte._loop_leitura]
+        assert len(leitoras) == 1, f"{len(leitoras)} threads leitoras"
+    finally:
+        fonte.parar()
+        mudo.close()
+    print("✅ Reinício espera a leitora anterior terminar")
+
+
+if __name__ == "__main__":
+    testar_fonte_droidcam()
+    testar_partes_com_miniatura_exif()
+    testar_reinicio_com_leitura_bloqueada()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste das interações pessoa-objeto vetorizadas: mesmos pares que o laço
+por par, grade uniforme igual à matriz completa e todas as pessoas analisadas
+"""
+
+import numpy as np
+
+import analise_vetorizada
+from analise_vetorizada import atividades_por_proporcao, pares_interacao
+from detector_avancado import DetectorAvancado
+
+
+def gerar_caixas(n, semente, lado_max=300):
+    rng = np.random.default_rng(semente)
+    return np.column_stack([rng.integers(0, 1920, n), rng.integers(0, 1080, n),
+                            rng.integers(1, lado_max, n), rng.integers(1, lado_max, n)]).astype(np.float64)
+
+
+def pares_referencia(caixas_p, caixas_o, fator):
+    """Critério de interação avaliado par a par, sem NumPy vetorizado"""
+    pares = []
+    for i, (px, py, pw, ph) in enumerate(caixas_p):
+        for j, (ox, oy, ow, oh) in enumerate(caixas_o):
+            distancia = np.hypot(px + pw // 2 - (ox + ow // 2), py + ph // 2 - (oy + oh // 2))
+            if distancia < fator * (np.hypot(pw, ph) / 2 + np.hypot(ow, oh) / 2):
+                pares.append((i, j))
+    return pares
+
+
+def testar_pares_iguais_ao_laco():
+    caixas_p, caixas_o = gerar_caixas(60, 0), gerar_caixas(80, 1)
+    for fator in (0.5, 1.0, 1.5):
+        i, j, distancias, sobreposicoes = pares_interacao(caixas_p, caixas_o, fator)
+        assert list(zip(i.tolist(), j.tolist())) == pares_referencia(caixas_p, caixas_o, fator)
+        assert (distancias >= 0).all() and ((sobreposicoes >= 0) & (sobreposicoes <= 1)).all()
+
+    vazio = pares_interacao(np.empty((0, 4)), caixas_o)
+    assert all(len(a) == 0 for a in vazio)
+    print("✅ Pares vetorizados iguais ao laço por par, ordenados por pessoa e objeto")
+
+
+def testar_grade_igual_a_matriz():
+    caixas_p, caixas_o = gerar_caixas(400, 2, lado_max=120), gerar_caixas(700, 3, lado_max=120)
+    assert len(caixas_p) * len(caixas_o) > analise_vetorizada.LIMITE_MATRIZ_COMPLETA, "cena grande usa a grade"
+    limite = analise_vetorizada.LIMITE_MATRIZ_COMPLETA
+    # Também com caixas em coordenadas negativas (janelas parcialmente fora da tela)
+    for deslocamento in ([0, 0, 0, 0], [-1000, -600, 0, 0]):
+        pessoas, objetos = caixas_p + deslocamento, caixas_o + deslocamento
+        pela_grade = pares_interacao(pessoas, objetos)
+
+        analise_vetorizada.LIMITE_MATRIZ_COMPLETA = len(caixas_p) * len(caixas_o)
+        try:
+            pela_matriz = pares_interacao(pessoas, objetos)
+        finally:
+            analise_vetorizada.LIMITE_MATRIZ_COMPLETA = limite
+
+        assert len(pela_matriz[0]) > 0
+        for a, b in zip(pela_grade, pela_matriz):
+            assert np.array_equal(a, b) if a.dtype.kind == 'i' else np.allclose(a, b)
+    print(f"✅ Grade uniforme e matriz completa: mesmos {len(pela_grade[0])} pares em 400 x 700 caixas")
+
+
+def testar_sobreposicao_e_atividade():
+    pessoa = np.array([[100, 100, 100, 300]], np.float64)
+    objetos = np.array([[120, 150, 40, 40], [180, 380, 40, 40]], np.float64)
+    _, j, _, sobreposicoes = pares_interacao(pessoa, objetos)
+    assert j.tolist() == [0, 1] and np.allclose(sobreposicoes, [1.0, 0.25])
+
+    caixas = np.array([[0, 0, 100, 201], [0, 0, 100, 200], [0, 0, 100, 150], [0, 0, 100, 149], [0, 0, 0, 50]])
+    assert atividades_por_proporcao(caixas.astype(np.float64)).tolist() == [2, 1, 1, 0, 0]
+    print("✅ Sobreposição relativa à área do objeto e atividade pela proporção")
+
+
+def testar_todas_as_pessoas_no_detector():
+    """O laço antigo parava em 3 pessoas x 3 objetos e 5 interações"""
+    detector = DetectorAvancado()
+
+    def deteccao(prefixo, i, x, y, largura, altura, tipo):
+        return {'id': f"{prefixo}_{i}", 'tipo': tipo,
+                'posicao': {'x': x, 'y': y, 'largura': largura, 'altura': altura}}
+
+    pessoas = [deteccao('pessoa', i, 300 * i, 100, 100, 250, 'person') for i in range(6)]
+    objetos = [deteccao('objeto', i, 300 * i + 20, 200, 50, 50, 'laptop') for i in range(6)]
+    objetos.append(deteccao('objeto', 6, 1800, 1000, 20, 20, 'book'))
+
+    interacoes = detector._analisar_interacoes(pessoas, objetos)
+    assert [(x['pessoa_id'], x['objeto_id']) for x in interacoes] == [
+        (f"pessoa_{i}", f"objeto_{i}") for i in range(6)]
+    assert [x['id'] for x in interacoes] == [f"interacao_{i}" for i in range(6)]
+    assert all(x['atividade_pessoa'] == 'em_pe' and x['sobreposicao'] == 1.0 for x in interacoes)
+    assert interacoes[0]['descricao'] == "Pessoa próxima a laptop"
+    assert detector._analisar_interacoes(pessoas, []) == []
+    print(f"✅ Detector analisa as {len(pessoas)} pessoas: {len(interacoes)} interações")
+
+
+if __name__ == "__main__":
+    print("=== TESTE DAS INTERAÇÕES VETORIZADAS ===")
+    testar_pares_iguais_ao_laco()
+    testar_grade_igual_a_matriz()
+    testar_sobreposicao_e_atividade()
+    testar_todas_as_pessoas_no_detector()
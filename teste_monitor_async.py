@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste da fachada asyncio: laço de eventos livre, limites e cancelamento
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from detector_seguro import DetectorSeguro
+from monitor_async import MonitorAsync
+
+
+def gerar_quadros(n, semente=0):
+    rng = np.random.default_rng(semente)
+    return [rng.integers(0, 255, (1080, 1920, 3), dtype=np.uint8) for _ in range(n)]
+
+
+async def medir_travamentos(parar):
+    """Maior atraso de um timer de 5 ms enquanto o resto roda"""
+    maior = 0.0
+    while not parar.is_set():
+        inicio = time.perf_counter()
+        await asyncio.sleep(0.005)
+        maior = max(maior, time.perf_counter() - inicio - 0.005)
+    return maior
+
+
+async def _testar_fachada():
+    print("=== TESTE DO MONITOR ASSÍNCRONO ===")
+    config = {'modelo_onnx': os.environ.get('MODELO_ONNX', 'yolov8n.onnx')}
+    quadros = gerar_quadros(12)
+
+    async with MonitorAsync(detector=DetectorSeguro(config, tamanho_pool=2)) as monitor:
+        parar = asyncio.Event()
+        timer = asyncio.ensure_future(medir_travamentos(parar))
+
+        resultados = [r async for r in monitor.resultados(quadros)]
+        assert len(resultados) == len(quadros)
+        assert all('narrativa_especifica' in r for r in resultados)
+
+        with tempfile.TemporaryDirectory() as pasta:
+            caminho = await monitor.salvar_json(os.path.join(pasta, 'sessao.json'), resultados)
+            assert os.path.getsize(caminho) > 0
+            assert await monitor.salvar_captura(quadros[0], os.path.join(pasta, 'q.jpg'))
+
+        parar.set()
+        travamento = await timer
+        assert travamento < 0.05, f"laço de eventos travou {travamento * 1000:.0f} ms"
+        estatisticas = monitor.obter_estatisticas()
+        assert estatisticas['detector']['instancias'] <= 2, "limite de detecções simultâneas"
+        print(f"✅ {len(resultados)} quadros 1080p, maior atraso do laço: {travamento * 1000:.1f} ms")
+
+        # Sair do laço cedo cancela as detecções que ainda não começaram
+        recebidos = 0
+        async for _ in monitor.resultados(gerar_quadros(30, semente=1)):
+            recebidos += 1
+            if recebidos == 2:
+                break
+        await asyncio.sleep(0.5)
+        assert monitor.obter_estatisticas()['canceladas'] > 0
+        print(f"✅ Cancelamento: {monitor.obter_estatisticas()['canceladas']} detecções canceladas")
+
+        try:
+            await monitor.capturar_tela()
+            raise AssertionError("sem fonte de captura deveria falhar")
+        except RuntimeError:
+            pass
+
+
+class _CapturaReutilizandoBuffer:
+    """Como a CapturaX11: devolve sempre o mesmo buffer, sobrescrito a cada captura"""
+
+    def __init__(self):
+        self.buffer = np.zeros((8, 8, 3), np.uint8)
+        self.contador = 0
+
+    def capturar_tela(self):
+        self.contador += 1
+        self.buffer[:] = self.contador
+        return self.buffer
+
+
+async def _testar_captura_propria():
+    captura = _CapturaReutilizandoBuffer()
+    async with MonitorAsync(captura=captura, detector=DetectorSeguro({'modo_sem_modelo': 'lite'})) as monitor:
+        primeira = await monitor.capturar_tela()
+        await monitor.capturar_tela()
+        assert primeira is not captura.buffer and (primeira == 1).all(), "quadro sobrescrito pela captura seguinte"
+    print("✅ Quadros capturados não são sobrescritos pela captura seguinte")
+
+
+def testar_fachada():
+    asyncio.run(_testar_fachada())
+
+
+def testar_captura_propria():
+    asyncio.run(_testar_captura_propria())
+
+
+if __name__ == "__main__":
+    testar_fachada()
+    testar_captura_propria()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste da narrativa preguiçosa e memoizada
+"""
+
+import copy
+import json
+
+import numpy as np
+
+from detector_avancado import DetectorAvancado
+from deteccoes import serializar_json
+from narrativa import narrativa_por_assinatura
+
+
+def testar_narrativa_preguicosa():
+    print("=== TESTE DA NARRATIVA PREGUIÇOSA ===")
+    detector = DetectorAvancado()
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    narrativa_por_assinatura.cache_clear()
+
+    resultado = detector._deteccao_simulada(frame)
+    assert 'narrativa' in resultado
+    assert narrativa_por_assinatura.cache_info().currsize == 0, "narrativa gerada sem ser lida"
+
+    # Cópias não forçam a geração
+    copia = copy.deepcopy(resultado)
+    assert narrativa_por_assinatura.cache_info().currsize == 0
+
+    texto = resultado['narrativa']
+    assert texto.startswith("Detectadas 1 pessoa(s) na cena.")
+    assert resultado.get('narrativa') == texto and copia['narrativa'] == texto
+
+    # Cena idêntica: a mesma assinatura sai do cache
+    antes = narrativa_por_assinatura.cache_info().hits
+    assert detector._deteccao_simulada(frame)['narrativa'] == texto
+    assert narrativa_por_assinatura.cache_info().hits > antes
+
+    # O JSON inclui a narrativa
+    salvo = json.loads(json.dumps(detector._deteccao_simulada(frame), indent=2, default=serializar_json))
+    assert salvo['narrativa'] == texto
+    print(f"✅ {texto}")
+
+
+if __name__ == "__main__":
+    testar_narrativa_preguicosa()
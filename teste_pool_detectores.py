@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste do pool de detectores em processos: ordem dos resultados, igualdade com
+o detector local e reinício de um processo que morre no meio da sequência
+"""
+
+import os
+import signal
+import time
+
+import cv2
+import numpy as np
+
+from detector_avancado import DetectorAvancado
+from pool_detectores import PoolDetectores
+
+CONFIG = {'modo_sem_modelo': 'lite'}
+
+
+def gerar_quadros(n):
+    quadros = []
+    for i in range(n):
+        quadro = np.zeros((720, 1280, 3), np.uint8)
+        cv2.rectangle(quadro, (40 + 30 * i, 100), (240 + 30 * i, 500), (255, 255, 255), -1)
+        quadros.append(quadro)
+    return quadros
+
+
+def testar_pool():
+    print("=== TESTE DO POOL DE DETECTORES ===")
+    quadros = gerar_quadros(16)
+    detector = DetectorAvancado(CONFIG)
+    referencia = [detector.detectar_frame(q)['deteccoes']['objetos'].caixas for q in quadros]
+
+    with PoolDetectores(processos=2, config=CONFIG) as pool:
+        inicio = time.perf_counter()
+        caixas = []
+        for i, quadro in enumerate(quadros):
+            pool.enviar(quadro)
+            if i == 4:
+                pool._trabalhadores[0].kill()  # simula um processo que cai
+            caixas += [r['deteccoes']['objetos'].caixas for _, r in pool.prontos()]
+        while pool.em_voo:
+            caixas.append(pool.proximo(timeout=60)['deteccoes']['objetos'].caixas)
+        estatisticas = pool.obter_estatisticas()
+        print(f"⏱️ {len(quadros)} quadros em {time.perf_counter() - inicio:.2f}s | {estatisticas}")
+
+    assert len(caixas) == len(referencia)
+    assert all(np.array_equal(a, b) for a, b in zip(caixas, referencia)), "resultados fora de ordem ou diferentes"
+    assert estatisticas['reinicios'] >= 1 and estatisticas['quadros_descartados'] == 0
+    print("✅ Resultados na ordem de envio e iguais ao detector local, com reinício de processo")
+
+
+def testar_timeout_envio():
+    quadros = gerar_quadros(4)
+    with PoolDetectores(processos=1, config=CONFIG, quadros_por_processo=1, timeout_envio=1.0) as pool:
+        pool.enviar(quadros[0])
+        pool.proximo(timeout=60)
+        processo = pool._trabalhadores[0]
+        os.kill(processo.pid, signal.SIGSTOP)  # processo travado: vivo, mas sem devolver nada
+        try:
+            pool.enviar(quadros[1])
+            inicio = time.monotonic()
+            try:
+                pool.enviar(quadros[2])
+                raise AssertionError("enviar deveria desistir com todos os slots presos")
+            except TimeoutError:
+                assert time.monotonic() - inicio < 5
+        finally:
+            os.kill(processo.pid, signal.SIGCONT)
+    print("✅ enviar desiste com TimeoutError quando nenhum processo devolve quadros")
+
+
+if __name__ == "__main__":
+    testar_pool()
+    testar_timeout_envio()
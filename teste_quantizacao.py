@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste do modo INT8: leitor de calibração, quantização estática do modelo
+e volta ao modelo float quando o INT8 não está disponível
+"""
+
+import os
+import tempfile
+import unittest
+
+import cv2
+import numpy as np
+
+from avaliacao_deteccao import avaliar_precisao_int8
+from backends_inferencia import BackendOpenCVDNN, criar_backend
+from detector_avancado import DetectorAvancado
+from quantizar_modelo import HAS_ORT_QUANTIZACAO, LeitorCalibracao, main, quantizar_modelo
+
+MODELO = os.environ.get('MODELO_ONNX', 'yolov8n.onnx')
+
+
+def gerar_frames(n, semente=0):
+    rng = np.random.default_rng(semente)
+    return [rng.integers(0, 255, (480, 640, 3), dtype=np.uint8) for _ in range(n)]
+
+
+def testar_leitor_calibracao():
+    leitor = LeitorCalibracao('images', gerar_frames(3), 320)
+    entradas = []
+    while (entrada := leitor.get_next()) is not None:
+        entradas.append(entrada['images'])
+    assert len(entradas) == 3 and entradas[0].shape == (1, 3, 320, 320)
+    # Cada entrada é uma cópia: o blob reutilizado não sobrescreve as anteriores
+    assert not np.shares_memory(entradas[0], entradas[1]) and not np.array_equal(entradas[0], entradas[1])
+    leitor.rewind()
+    assert np.array_equal(leitor.get_next()['images'], entradas[0])
+    print("✅ Leitor de calibração entrega cópias em letterbox e volta ao início")
+
+
+def testar_precisao_invalida():
+    try:
+        criar_backend({'modelo_onnx': 'inexistente.onnx', 'modelo_pt': 'inexistente.pt', 'precisao': 'fp16'})
+        raise AssertionError("precisão inválida deveria ser recusada")
+    except ValueError:
+        pass
+    print("✅ Precisão fora de fp32/int8 recusada")
+
+
+def testar_quantizacao():
+    if not HAS_ORT_QUANTIZACAO:
+        raise unittest.SkipTest("onnxruntime.quantization não instalado")
+    if not os.path.exists(MODELO):
+        raise unittest.SkipTest(f"modelo {MODELO} não encontrado")
+
+    frames = gerar_frames(4)
+    with tempfile.TemporaryDirectory() as pasta:
+        modelo_int8 = os.path.join(pasta, 'int8.onnx')
+        for argumentos in ((frames, 320, 'turbo'), ([], 320, 'minmax')):
+            try:
+                quantizar_modelo(MODELO, modelo_int8, *argumentos)
+                raise AssertionError(f"{argumentos[1:]} deveria ser recusado")
+            except ValueError:
+                pass
+
+        resumo = quantizar_modelo(MODELO, modelo_int8, frames, 'rapido')
+        assert os.path.exists(modelo_int8) and resumo['tamanho_entrada'] == 320 and resumo['frames_calibracao'] == 4
+
+        config = {'modelo_onnx': MODELO, 'modelo_int8': modelo_int8, 'precisao': 'int8'}
+        backend = criar_backend(config)
+        assert backend.precisao == 'int8'
+        # Só o ONNX Runtime roda o INT8: outro backend usa o modelo float
+        opencv = criar_backend(dict(config, backend='opencv'))
+        assert isinstance(opencv, BackendOpenCVDNN) and opencv.precisao == 'fp32'
+
+        relatorio = avaliar_precisao_int8(frames, dict(config, tamanho_entrada=320))
+        assert set(relatorio['precisoes']) == {'fp32', 'int8'}
+        assert relatorio['precisoes']['fp32']['recall_vs_referencia'] == 1.0
+    print(f"✅ Modelo INT8 gerado ({resumo['tamanho_arquivo_int8_mb']} MB) e carregado pelo ONNX Runtime")
+
+
+def testar_main_entrada_fixa():
+    """Modelo exportado com entrada 640 fixa: a comparação usa o tamanho do modelo, não --tamanho"""
+    if not HAS_ORT_QUANTIZACAO:
+        raise unittest.SkipTest("onnxruntime.quantization não instalado")
+    if not os.path.exists(MODELO):
+        raise unittest.SkipTest(f"modelo {MODELO} não encontrado")
+    import onnx
+
+    modelo = onnx.load(MODELO)
+    for dimensao in modelo.graph.input[0].type.tensor_type.shape.dim[2:]:
+        dimensao.dim_value = 640
+    diretorio_original = os.getcwd()
+    with tempfile.TemporaryDirectory() as pasta:
+        fixo = os.path.join(pasta, 'fixo.onnx')
+        onnx.save(modelo, fixo)
+        capturas = os.path.join(pasta, 'capturas')
+        os.makedirs(capturas)
+        for i, frame in enumerate(gerar_frames(3)):
+            cv2.imwrite(os.path.join(capturas, f'captura_{i:03d}.png'), frame)
+
+        os.chdir(pasta)  # main() grava o relatório em ./relatorios
+        try:
+            relatorio = main(['--modelo', fixo, '--saida', os.path.join(pasta, 'int8.onnx'),
+                              '--replay', capturas, '--tamanho', '320'])
+        finally:
+            os.chdir(diretorio_original)
+
+    assert relatorio['quantizacao']['tamanho_entrada'] == 640 and relatorio['quantizacao']['entrada_fixa']
+    assert set(relatorio['precisoes']) == {'fp32', 'int8'} and relatorio['frames_avaliados'] == 3
+    print("✅ Quantização e comparação de um modelo com entrada 640 fixa")
+
+
+def testar_sem_modelo_int8():
+    if not os.path.exists(MODELO):
+        raise unittest.SkipTest(f"modelo {MODELO} não encontrado")
+    detector = DetectorAvancado({'modelo_onnx': MODELO, 'precisao': 'int8', 'modelo_int8': 'inexistente.onnx'})
+    assert detector.modelo_carregado and detector.precisao == 'fp32', "sem o INT8 deveria usar o modelo float"
+    print("✅ Sem o arquivo INT8, o detector volta ao modelo float")
+
+
+if __name__ == "__main__":
+    print("=== TESTE DO MODO INT8 ===")
+    for teste in (testar_leitor_calibracao, testar_precisao_invalida, testar_quantizacao,
+                  testar_main_entrada_fixa, testar_sem_modelo_int8):
+        try:
+            teste()
+        except unittest.SkipTest as e:
+            print(f"⏭️ {teste.__name__} ignorado: {e}")
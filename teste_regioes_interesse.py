@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste das regiões de interesse: recortes de atenção em volta das detecções
+anteriores e do movimento, com passe completo a cada N quadros, e detecção
+incremental que junta o cache dos tiles intocados com os tiles reinferidos
+"""
+
+import os
+import unittest
+
+import cv2
+import numpy as np
+
+from detector_avancado import DetectorAvancado
+from regioes_interesse import AtencaoRecortes, TilesAlterados, expandir_regioes, unir_regioes
+
+MODELO = os.environ.get('MODELO_ONNX', 'yolov8n.onnx')
+
+
+def gerar_tela(semente=0, altura=720, largura=1280):
+    return np.random.default_rng(semente).integers(0, 255, (altura, largura, 3), dtype=np.uint8)
+
+
+def contem(recortes, caixa_xyxy):
+    x0, y0, x1, y1 = caixa_xyxy
+    return any(r[0] <= x0 and r[1] <= y0 and r[2] >= x1 and r[3] >= y1 for r in recortes)
+
+
+def testar_expandir_e_unir():
+    regioes = expandir_regioes([[100, 100, 160, 220], [1250, 700, 1270, 715]], 0.5, 208, 1280, 720)
+    lados = regioes[:, 2:] - regioes[:, :2]
+    assert (lados >= 208).all(), "lado mínimo garantido"
+    assert (regioes[:, :2] >= 0).all() and (regioes[:, 2] <= 1280).all() and (regioes[:, 3] <= 720).all()
+    assert contem(regioes, (100, 100, 160, 220))
+
+    unidas = unir_regioes([[0, 0, 100, 100], [50, 50, 150, 150], [140, 140, 200, 200], [500, 500, 600, 600]])
+    assert sorted(map(tuple, unidas.tolist())) == [(0, 0, 200, 200), (500, 500, 600, 600)]
+    print("✅ Regiões expandidas dentro do quadro e unidas em cadeia")
+
+
+def testar_intervalo_passe_completo():
+    atencao = AtencaoRecortes(intervalo_completo=4)
+    tela = gerar_tela()
+    pessoa = [[100, 100, 60, 120]]
+
+    planos = []
+    for _ in range(9):
+        recortes = atencao.planejar(tela)
+        planos.append(recortes)
+        atencao.registrar(pessoa, completo=recortes is None)
+
+    completos = [i for i, r in enumerate(planos) if r is None]
+    assert completos == [0, 4, 8], completos
+    for recortes in planos[1:4]:
+        assert len(recortes) == 1 and contem(recortes, (100, 100, 160, 220)), "recorte em volta da detecção anterior"
+    assert atencao.estatisticas['passes_completos'] == 3 and atencao.estatisticas['passes_recortes'] == 6
+    assert atencao.estatisticas['fracao_area_recortes'] < 0.1
+
+    atencao.reiniciar()
+    assert atencao.planejar(tela) is None, "depois de reiniciar, passe completo"
+    print("✅ Passe completo a cada 4 quadros, recortes em volta da detecção nos demais")
+
+
+def testar_movimento_e_quadro_parado():
+    atencao = AtencaoRecortes(intervalo_completo=100)
+    tela = gerar_tela()
+    assert atencao.planejar(tela) is None
+    atencao.registrar([], completo=True)
+
+    # Sem detecções anteriores e sem movimento: nada a inferir
+    vazio = atencao.planejar(tela)
+    assert vazio is not None and len(vazio) == 0 and atencao.estatisticas['quadros_sem_inferencia'] == 1
+    atencao.registrar([], completo=False)
+
+    # Algo aparece: o recorte cobre a região que mudou
+    com_janela = tela.copy()
+    cv2.rectangle(com_janela, (900, 500), (1000, 600), (255, 255, 255), -1)
+    recortes = atencao.planejar(com_janela)
+    assert recortes is not None and contem(recortes, (900, 500, 1000, 600)), recortes
+    atencao.registrar([], completo=False)
+
+    # Tela inteira mudou: recortes cobririam mais que area_maxima, passe completo
+    assert atencao.planejar(gerar_tela(semente=1)) is None
+    print("✅ Recortes seguem o movimento; quadro parado não infere; mudança grande faz passe completo")
+
+
+def testar_atencao_no_detector():
+    if not os.path.exists(MODELO):
+        raise unittest.SkipTest(f"modelo {MODELO} não encontrado")
+    detector = DetectorAvancado({'modelo_onnx': MODELO, 'modo_atencao': True,
+                                 'atencao_intervalo_completo': 3, 'atencao_margem': 0.0})
+    if not detector.modelo_carregado:
+        raise unittest.SkipTest("nenhum backend carregou o modelo")
+
+    chamadas = []
+    inferir = detector._inferir_imagens
+
+    def espiao(imagens):
+        chamadas.append([imagem.shape[:2] for imagem in imagens])
+        return inferir(imagens)
+
+    detector._inferir_imagens = espiao
+    tela = gerar_tela()
+    completos = []
+    for i in range(7):
+        antes = len(chamadas)
+        assert 'erro' not in detector.detectar_frame(tela)
+        if any(formatos == [tela.shape[:2]] for formatos in chamadas[antes:]):
+            completos.append(i)
+    assert completos == [0, 3, 6], completos
+    assert detector.obter_estatisticas()['atencao']['passes_completos'] == 3
+    print("✅ Detector com modo_atencao: quadro inteiro só a cada 3 quadros")
+
+
+def testar_tiles_alterados():
+    incremental = TilesAlterados(intervalo_completo=100)
+    tela = gerar_tela()
+    assert incremental.planejar(tela) is None
+    caixas = np.array([[100, 100, 50, 50], [880, 480, 40, 40]], np.int32)
+    incremental.atualizar(None, caixas, np.array([0.9, 0.8], np.float32), np.array([0, 0], np.int32))
+
+    # Tela idêntica: nada a reinferir, cache devolvido como está
+    regioes = incremental.planejar(tela)
+    assert regioes is not None and len(regioes) == 0 and incremental.estatisticas['quadros_sem_mudanca'] == 1
+    mesmas, _, _ = incremental.atualizar(regioes, np.empty((0, 4)), np.empty(0), np.empty(0))
+    assert np.array_equal(mesmas, caixas)
+
+    # Um tile de 80x80 muda (grade 16x9 em 1280x720): ele e os vizinhos são reinferidos
+    alterada = tela.copy()
+    alterada[500:540, 900:940] = 255
+    regioes = incremental.planejar(alterada)
+    assert regioes.tolist() == [[800, 400, 1040, 640]], regioes
+
+    # Caixa do cache fora da região fica; a que toca a região é trocada pela nova
+    caixas, confiancas, classes = incremental.atualizar(
+        regioes, np.array([[905, 505, 30, 30]]), np.array([0.7]), np.array([63]))
+    assert caixas.tolist() == [[100, 100, 50, 50], [905, 505, 30, 30]], caixas
+    assert np.allclose(confiancas, [0.9, 0.7]) and classes.tolist() == [0, 63]
+    assert caixas.dtype == np.int32 and confiancas.dtype == np.float32 and classes.dtype == np.int32
+
+    # Mudança em mais de fracao_completo dos tiles, ou outra resolução: passe completo
+    assert incremental.planejar(gerar_tela(semente=1)) is None
+    incremental.atualizar(None, caixas, confiancas, classes)
+    assert incremental.planejar(gerar_tela(semente=1, altura=1080, largura=1920)) is None
+    assert incremental.estatisticas['passes_incrementais'] == 1
+    print("✅ Tiles alterados reinferidos e unidos ao cache dos tiles intocados")
+
+
+def testar_pessoa_na_borda_do_tile():
+    """Pessoa em cache cruzando a borda da região alterada: a região cresce até cobri-la inteira"""
+    incremental = TilesAlterados(intervalo_completo=100)
+    tela = gerar_tela()
+    incremental.planejar(tela)
+    pessoa, longe = [760, 300, 80, 200], [100, 100, 50, 50]
+    incremental.atualizar(None, np.array([pessoa, longe]), np.array([0.9, 0.8]), np.array([0, 0]))
+
+    # O tile alterado e os vizinhos cobrem só x >= 800 e y >= 400 da pessoa
+    alterada = tela.copy()
+    alterada[500:540, 900:940] = 255
+    regioes = incremental.planejar(alterada)
+    assert regioes.tolist() == [[760, 300, 1040, 640]], regioes
+    assert contem(regioes, (760, 300, 840, 500))
+
+    # Reinferida no recorte inteiro, a pessoa volta completa, sem fragmento
+    caixas, _, _ = incremental.atualizar(regioes, np.array([[761, 301, 79, 199]]), np.array([0.9]), np.array([0]))
+    assert caixas.tolist() == [longe, [761, 301, 79, 199]], caixas
+
+    # Expansões em cadeia: a região ampliada toca outra caixa, que também entra
+    incremental.atualizar(None, np.array([pessoa, [700, 250, 80, 60]]), np.array([0.9, 0.8]), np.array([0, 0]))
+    incremental.planejar(tela)
+    regioes = incremental.planejar(alterada)
+    assert regioes.tolist() == [[700, 250, 1040, 640]], regioes
+    print("✅ Região reinferida cresce até conter as caixas do cache que cruzam a borda")
+
+
+def testar_intervalo_incremental():
+    incremental = TilesAlterados(intervalo_completo=3)
+    tela = gerar_tela()
+    completos = []
+    for i in range(7):
+        regioes = incremental.planejar(tela)
+        if regioes is None:
+            completos.append(i)
+        incremental.atualizar(regioes, np.empty((0, 4)), np.empty(0), np.empty(0))
+    assert completos == [0, 3, 6], completos
+    print("✅ Passe completo a cada 3 quadros mesmo sem mudanças na tela")
+
+
+def testar_incremental_no_detector():
+    if not os.path.exists(MODELO):
+        raise unittest.SkipTest(f"modelo {MODELO} não encontrado")
+    detector = DetectorAvancado({'modelo_onnx': MODELO, 'modo_incremental': True})
+    if not detector.modelo_carregado:
+        raise unittest.SkipTest("nenhum backend carregou o modelo")
+
+    chamadas = []
+    inferir = detector._inferir_imagens
+
+    def espiao(imagens):
+        chamadas.append(len(imagens))
+        return inferir(imagens)
+
+    detector._inferir_imagens = espiao
+    tela = gerar_tela()
+    primeiro = detector.detectar_frame(tela)
+    repetido = detector.detectar_frame(tela)
+    assert len(chamadas) == 1, "tela idêntica não deve chegar ao modelo"
+    assert repetido['resumo']['total_pessoas'] == primeiro['resumo']['total_pessoas']
+    assert repetido['resumo']['total_objetos'] == primeiro['resumo']['total_objetos']
+    assert detector.obter_estatisticas()['incremental']['quadros_sem_mudanca'] == 1
+    print("✅ Detector com modo_incremental repete o cache sem inferir em tela parada")
+
+
+if __name__ == "__main__":
+    print("=== TESTE DAS REGIÕES DE INTERESSE ===")
+    for teste in (testar_expandir_e_unir, testar_intervalo_passe_completo,
+                  testar_movimento_e_quadro_parado, testar_atencao_no_detector,
+                  testar_tiles_alterados, testar_pessoa_na_borda_do_tile,
+                  testar_intervalo_incremental, testar_incremental_no_detector):
+        try:
+            teste()
+        except unittest.SkipTest as e:
+            print(f"⏭️ {teste.__name__} ignorado: {e}")
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste do servidor local de inferência: lotes dinâmicos, socket Unix e HTTP
+"""
+
+import glob
+import os
+import tempfile
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from detector_avancado import DetectorAvancado
+from servidor_inferencia import ClienteInferencia, ServidorInferencia
+
+CONFIG = {'modelo_onnx': os.environ.get('MODELO_ONNX', 'yolov8n.onnx')}
+
+
+def carregar_quadros():
+    quadros = [cv2.imread(f) for f in sorted(glob.glob('capturas/*.jpg'))[:8]]
+    if not quadros:
+        rng = np.random.default_rng(0)
+        quadros = [rng.integers(0, 255, (720, 1280, 3), dtype=np.uint8) for _ in range(8)]
+    return quadros
+
+
+def caixas(deteccoes):
+    return [tuple(d['posicao'].values()) for d in deteccoes]
+
+
+def _testar_servidor(config, unix=None):
+    quadros = carregar_quadros()
+    referencia = [DetectorAvancado(config).detectar_frame(q) for q in quadros]
+
+    with ServidorInferencia(config, unix=unix, porta=0, max_lote=4, espera_maxima=0.02) as servidor:
+        cliente = ClienteInferencia(servidor.endereco)
+        assert cliente.modelo_carregado == servidor.detector.modelo_carregado
+
+        # 8 threads enviando ao mesmo tempo: os pedidos viram lotes
+        resultados = [None] * len(quadros)
+
+        def enviar(i):
+            resultados[i] = cliente.detectar_frame(quadros[i])
+
+        inicio = time.perf_counter()
+        threads = [threading.Thread(target=enviar, args=(i,)) for i in range(len(quadros))]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        duracao = time.perf_counter() - inicio
+
+        for obtido, esperado in zip(resultados, referencia):
+            assert 'erro' not in obtido
+            assert caixas(obtido['deteccoes']['pessoas']) == caixas(esperado['deteccoes']['pessoas'])
+            assert caixas(obtido['deteccoes']['objetos']) == caixas(esperado['deteccoes']['objetos'])
+            assert obtido['narrativa_especifica'] == esperado['narrativa_especifica']
+
+        # Codificação JPEG e relatório completo pelo cliente
+        assert 'narrativa_especifica' in ClienteInferencia(servidor.endereco, codificacao='jpg').detectar_frame(quadros[0])
+        with tempfile.TemporaryDirectory() as pasta:
+            caminho = os.path.join(pasta, 'q.png')
+            cv2.imwrite(caminho, quadros[0])
+            assert cliente.gerar_relatorio_completo(caminho)['narrativa']
+
+        lotes = cliente.obter_estatisticas()['lotes']
+        if servidor.detector.modelo_carregado:
+            assert lotes['maior_lote'] > 1, f"pedidos simultâneos deveriam formar lotes: {lotes}"
+        print(f"✅ {servidor.endereco}: {len(quadros)} pedidos em {duracao:.2f}s | "
+              f"lote médio {lotes['tamanho_medio_lote']} | maior {lotes['maior_lote']}")
+        cliente.fechar()
+
+    # Servidor fora do ar: resultado vazio e nenhuma exceção (o laço de captura continua)
+    fora = ClienteInferencia(servidor.endereco, timeout=1)
+    assert fora.detectar_frame(quadros[0])['resumo']['total_pessoas'] == 0
+    fora.aplicar_nivel_carga(2)
+    assert 'erro' in fora.obter_estatisticas() and fora.modelo_carregado is False
+
+
+def testar_servidor_http():
+    print("=== TESTE DO SERVIDOR DE INFERÊNCIA ===")
+    _testar_servidor(CONFIG)
+
+
+def testar_servidor_unix():
+    with tempfile.TemporaryDirectory() as pasta:
+        _testar_servidor(CONFIG, unix=os.path.join(pasta, 'inferencia.sock'))
+
+
+def testar_carga_no_servidor():
+    """O degrau é decidido pelo servidor; os clientes não mexem no detector compartilhado"""
+    quadro = carregar_quadros()[0]
+    with ServidorInferencia(CONFIG, porta=0, max_lote=2, orcamento_carga=1e-6) as servidor:
+        cliente = ClienteInferencia(servidor.endereco)
+        cliente.aplicar_nivel_carga(4)
+        for _ in range(8):
+            cliente.detectar_frame(quadro)
+        controle = cliente.obter_estatisticas()['controle_carga']
+        assert controle['nivel'] == servidor.detector.nivel_carga > 0, controle
+        assert servidor.detector.nivel_carga <= 2, "sem modelo leve o servidor para em sem_analises"
+        cliente.fechar()
+    print(f"✅ Servidor degradou o próprio detector até {controle['nome_nivel']}")
+
+
+if __name__ == "__main__":
+    testar_servidor_http()
+    testar_servidor_unix()
+    testar_carga_no_servidor()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste do tamanho de entrada configurável: modos nomeados, buffers de blob
+reutilizados, letterbox reversível e modelos exportados com entrada fixa
+"""
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from avaliacao_deteccao import avaliar_tamanhos_entrada
+from detector_avancado import DetectorAvancado
+from preprocessamento import BuffersEntrada, desfazer_letterbox, resolver_tamanho_entrada
+
+MODELO = os.environ.get('MODELO_ONNX', 'yolov8n.onnx')
+
+
+def testar_resolver_tamanho():
+    assert resolver_tamanho_entrada('rapido') == 320
+    assert resolver_tamanho_entrada('preciso') == 608
+    assert resolver_tamanho_entrada('416') == 416
+    for invalido in (400, 'turbo', None):
+        try:
+            resolver_tamanho_entrada(invalido)
+            raise AssertionError(f"{invalido!r} deveria ser recusado")
+        except ValueError:
+            pass
+    print("✅ Modos nomeados e tamanhos inválidos")
+
+
+def testar_buffers_reutilizados():
+    buffers = BuffersEntrada()
+    rng = np.random.default_rng(0)
+    imagens = [rng.integers(0, 255, (720, 1280, 3), dtype=np.uint8) for _ in range(2)]
+
+    canvas, blob, parametros = buffers.preparar(imagens, 416)
+    assert canvas.shape == (2, 416, 416, 3) and blob.shape == (2, 3, 416, 416) and blob.dtype == np.float32
+    # Mesmo tamanho e lote menor ou igual: mesma memória, sem alocar
+    canvas2, blob2, _ = buffers.preparar(imagens[:1], 416)
+    assert np.shares_memory(canvas, canvas2) and np.shares_memory(blob, blob2)
+    # Blob = canvas em RGB, 0..1
+    assert np.allclose(blob2[0], canvas2[0].transpose(2, 0, 1)[::-1] / 255.0)
+
+    # Faixas de preenchimento com 114 e caixa que volta ao espaço original
+    escala, pad_x, pad_y = parametros[0]
+    assert pad_x == 0 and pad_y > 0 and (canvas[0, :pad_y] == 114).all()
+    caixa = np.array([[100, 50, 300, 250]], dtype=np.float32)
+    na_entrada = caixa * escala + [pad_x, pad_y, pad_x, pad_y]
+    assert np.allclose(desfazer_letterbox(na_entrada, escala, pad_x, pad_y), caixa, atol=1e-3)
+    print("✅ Buffers reutilizados entre chamadas e letterbox reversível")
+
+
+def testar_tamanhos_no_detector():
+    if not os.path.exists(MODELO):
+        raise unittest.SkipTest(f"modelo {MODELO} não encontrado")
+    quadro = np.random.default_rng(1).integers(0, 255, (720, 1280, 3), dtype=np.uint8)
+    detector = DetectorAvancado({'modelo_onnx': MODELO, 'tamanho_entrada': 'rapido'})
+    assert detector.tamanho_entrada == 320
+    for tamanho in (320, 416, 608):
+        detector.definir_tamanho_entrada(tamanho)
+        assert 'erro' not in detector.detectar_frame(quadro)
+    print("✅ Detector troca de tamanho de entrada em execução")
+
+
+def testar_modelo_entrada_fixa():
+    """Modelo exportado com entrada 640 fixa: outros tamanhos são recusados, não viram detecções vazias"""
+    if not os.path.exists(MODELO):
+        raise unittest.SkipTest(f"modelo {MODELO} não encontrado")
+    import onnx
+
+    modelo = onnx.load(MODELO)
+    for dimensao in modelo.graph.input[0].type.tensor_type.shape.dim[2:]:
+        dimensao.dim_value = 640
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'fixo.onnx')
+        onnx.save(modelo, caminho)
+        config = {'modelo_onnx': caminho, 'backend': 'onnxruntime'}
+        detector = DetectorAvancado(config)
+        if not detector.modelo_carregado:
+            raise unittest.SkipTest("onnxruntime indisponível")
+        assert detector.tamanho_entrada == 640
+        try:
+            detector.definir_tamanho_entrada(416)
+            raise AssertionError("tamanho diferente da entrada fixa deveria ser recusado")
+        except ValueError:
+            pass
+        assert detector.tamanho_entrada == 640
+        detector.definir_tamanho_entrada(640)
+
+        quadros = [np.random.default_rng(i).integers(0, 255, (480, 640, 3), dtype=np.uint8) for i in range(3)]
+        relatorio = avaliar_tamanhos_entrada(quadros, (320, 416), config)
+        assert list(relatorio['tamanhos']) == ['640'] and relatorio['tamanhos_ignorados'] == [320, 416]
+    print("✅ Modelo de entrada fixa: tamanhos incompatíveis recusados e ignorados na avaliação")
+
+
+if __name__ == "__main__":
+    print("=== TESTE DO TAMANHO DE ENTRADA ===")
+    for teste in (testar_resolver_tamanho, testar_buffers_reutilizados,
+                  testar_tamanhos_no_detector, testar_modelo_entrada_fixa):
+        try:
+            teste()
+        except unittest.SkipTest as e:
+            print(f"⏭️ {teste.__name__} ignorado: {e}")
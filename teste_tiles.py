@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste do modo em tiles: grade que cobre o quadro, NMS entre tiles com
+descarte de fragmentos e um único lote por quadro acima de 1080p
+"""
+
+import os
+import unittest
+
+import numpy as np
+
+from backends_inferencia import nms_entre_tiles
+from detector_avancado import DetectorAvancado
+from preprocessamento import grade_tiles
+
+MODELO = os.environ.get('MODELO_ONNX', 'yolov8n.onnx')
+
+
+def testar_grade_tiles():
+    for (largura, altura), esperado in (((1920, 1080), 1), ((2560, 1440), 2), ((3840, 2160), 4), ((7680, 4320), 6)):
+        regioes = grade_tiles(largura, altura)
+        assert len(regioes) == esperado, (largura, altura, regioes)
+
+        coberto = np.zeros((altura, largura), dtype=bool)
+        for x0, y0, x1, y1 in regioes:
+            assert 0 <= x0 < x1 <= largura and 0 <= y0 < y1 <= altura
+            coberto[y0:y1, x0:x1] = True
+        assert coberto.all(), "os tiles devem cobrir o quadro inteiro"
+
+    # Tiles vizinhos se sobrepõem: objeto na divisa aparece inteiro em pelo menos um
+    (a_x0, _, a_x1, _), (b_x0, _, b_x1, _) = grade_tiles(2560, 1440, sobreposicao=0.2)
+    assert a_x1 - b_x0 == 2 * int(1280 * 0.1)
+    assert len(grade_tiles(3840, 2160, max_tiles=2)) == 2
+    print("✅ Grade de tiles cresce com o quadro, cobre tudo e respeita tile_max")
+
+
+def testar_nms_entre_tiles():
+    caixas = np.array([
+        [0, 0, 100, 200],      # pessoa inteira (quadro inteiro)
+        [0, 0, 100, 80],       # fragmento cortado na borda de um tile (IoU 0.4)
+        [0, 0, 100, 80],       # mesmo recorte, outra classe
+        [500, 500, 50, 50],
+    ], dtype=np.float32)
+    confiancas = np.array([0.9, 0.7, 0.6, 0.5], dtype=np.float32)
+    classes = np.array([0, 0, 56, 0], dtype=np.int32)
+
+    xywh, conf, cls = nms_entre_tiles(caixas, confiancas, classes, 0.45)
+    assert xywh.dtype == np.int32 and conf.dtype == np.float32 and cls.dtype == np.int32
+    assert list(conf) == [np.float32(0.9), np.float32(0.6), np.float32(0.5)], conf
+    assert list(cls) == [0, 56, 0], "fragmento contido removido, outra classe mantida"
+
+    vazio = nms_entre_tiles(np.empty((0, 4), np.float32), np.empty(0, np.float32), np.empty(0, np.int32), 0.45)
+    assert all(len(a) == 0 for a in vazio)
+    print("✅ NMS entre tiles descarta fragmentos contidos da mesma classe")
+
+
+def testar_lote_de_tiles():
+    if not os.path.exists(MODELO):
+        raise unittest.SkipTest(f"modelo {MODELO} não encontrado")
+    detector = DetectorAvancado({'modelo_onnx': MODELO, 'modo_tiles': True})
+    if not detector.modelo_carregado:
+        raise unittest.SkipTest("nenhum backend carregou o modelo")
+
+    lotes = []
+    inferir = detector._inferir_imagens
+
+    def espiao(imagens):
+        lotes.append([imagem.shape[:2] for imagem in imagens])
+        return inferir(imagens)
+
+    detector._inferir_imagens = espiao
+    rng = np.random.default_rng(0)
+    assert 'erro' not in detector.detectar_frame(rng.integers(0, 255, (2160, 3840, 3), dtype=np.uint8))
+    assert len(lotes) == 1 and len(lotes[0]) == 5, "4 tiles + quadro inteiro num único lote"
+    assert lotes[0][-1] == (2160, 3840)
+
+    lotes.clear()
+    detector.detectar_frame(rng.integers(0, 255, (1080, 1920, 3), dtype=np.uint8))
+    assert lotes == [[(1080, 1920)]], "até 1080p o quadro vai inteiro"
+    print("✅ Quadro 4K processado em um lote de 4 tiles + quadro inteiro")
+
+
+if __name__ == "__main__":
+    print("=== TESTE DO MODO EM TILES ===")
+    for teste in (testar_grade_tiles, testar_nms_entre_tiles, testar_lote_de_tiles):
+        try:
+            teste()
+        except unittest.SkipTest as e:
+            print(f"⏭️ {teste.__name__} ignorado: {e}")
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Trilhas de Pessoas e Análises por Trilha
+Rastreador por IoU que dá um ID estável a cada pessoa entre quadros, e
+agendador que só roda as análises secundárias (postura, cabeça, mãos ou
+modelos mais pesados) nas trilhas novas, que mudaram ou com cache vencido
+"""
+
+import time
+
+import numpy as np
+
+
+def iou_xywh(a, b):
+    """Matriz de IoU entre caixas N x 4 e M x 4 em (x, y, largura, altura)"""
+    a = np.asarray(a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float64).reshape(-1, 4)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 0] + a[:, None, 2], b[None, :, 0] + b[None, :, 2])
+    y2 = np.minimum(a[:, None, 1] + a[:, None, 3], b[None, :, 1] + b[None, :, 3])
+    intersecao = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    uniao = (a[:, 2] * a[:, 3])[:, None] + (b[:, 2] * b[:, 3])[None, :] - intersecao
+    return intersecao / np.maximum(uniao, 1e-9)
+
+
+def recortes(imagem, caixas):
+    """Recortes (visões, sem cópia) da imagem para cada caixa xywh, limitados ao quadro"""
+    altura, largura = imagem.shape[:2]
+    resultado = []
+    for x, y, w, h in np.asarray(caixas, dtype=np.int64).reshape(-1, 4).tolist():
+        x1, y1 = min(max(x, 0), largura), min(max(y, 0), altura)
+        x2, y2 = min(max(x + w, x1), largura), min(max(y + h, y1), altura)
+        resultado.append(imagem[y1:y2, x1:x2])
+    return resultado
+
+
+class RastreadorIoU:
+    def __init__(self, limiar_iou=0.3, max_perdidos=15):
+        """
+        Args:
+            limiar_iou (float): IoU mínimo para uma caixa continuar a trilha anterior
+            max_perdidos (int): Quadros sem a pessoa antes de encerrar a trilha
+        """
+        self.limiar_iou = limiar_iou
+        self.max_perdidos = max_perdidos
+        self._ids = np.empty(0, np.int64)
+        self._caixas = np.empty((0, 4), np.float64)
+        self._perdidos = np.empty(0, np.int64)
+        self._proximo_id = 1
+
+    @property
+    def ativas(self):
+        return set(self._ids.tolist())
+
+    def atualizar(self, caixas):
+        """
+        Associa as caixas do quadro às trilhas (guloso por maior IoU)
+
+        Returns:
+            ndarray: ID de trilha de cada caixa
+        """
+        caixas = np.asarray(caixas, dtype=np.float64).reshape(-1, 4)
+        ids = np.zeros(len(caixas), np.int64)
+        usadas = np.zeros(len(self._ids), bool)
+        associadas = np.zeros(len(caixas), bool)
+
+        if len(self._ids) and len(caixas):
+            iou = iou_xywh(self._caixas, caixas)
+            t, d = np.nonzero(iou >= self.limiar_iou)
+            for k in np.argsort(-iou[t, d], kind='stable'):
+                if not usadas[t[k]] and not associadas[d[k]]:
+                    usadas[t[k]] = associadas[d[k]] = True
+                    ids[d[k]] = self._ids[t[k]]
+                    self._caixas[t[k]] = caixas[d[k]]
+                    self._perdidos[t[k]] = 0
+
+        # Trilhas sem caixa neste quadro envelhecem; as antigas demais saem
+        self._perdidos[~usadas] += 1
+        mantidas = self._perdidos <= self.max_perdidos
+        self._ids, self._caixas, self._perdidos = self._ids[mantidas], self._caixas[mantidas], self._perdidos[mantidas]
+
+        novas = np.flatnonzero(~associadas)
+        ids[novas] = np.arange(self._proximo_id, self._proximo_id + len(novas))
+        self._proximo_id += len(novas)
+        self._ids = np.concatenate([self._ids, ids[novas]])
+        self._caixas = np.concatenate([self._caixas, caixas[novas]])
+        self._perdidos = np.concatenate([self._perdidos, np.zeros(len(novas), np.int64)])
+        return ids
+
+
+class AgendadorAnalises:
+    def __init__(self, analisadores, limiar_mudanca=0.7, ttl=2.0):
+        """
+        Args:
+            analisadores (list): Funções analisador(imagem, caixas) -> lista de dicts, uma
+                por caixa, chamadas em lote só com as caixas que precisam de análise
+            limiar_mudanca (float): IoU mínimo com a caixa da última análise para reaproveitá-la
+            ttl (float): Segundos de validade de uma análise
+        """
+        self.analisadores = list(analisadores)
+        self.limiar_mudanca = limiar_mudanca
+        self.ttl = ttl
+        self._cache = {}  # id da trilha -> (caixa analisada, instante, resultado)
+
+        self.estatisticas = {'analises_executadas': 0, 'analises_reaproveitadas': 0,
+                             'trilhas_novas': 0, 'caixas_alteradas': 0, 'expiradas': 0}
+
+    def analisar(self, imagem, caixas, ids, agora=None):
+        """
+        Returns:
+            list: Por caixa, o dict com os campos de todos os analisadores
+        """
+        agora = time.monotonic() if agora is None else agora
+        caixas = np.asarray(caixas, dtype=np.float64).reshape(-1, 4)
+        ids = np.asarray(ids).tolist()
+
+        pendentes = []
+        for i, trilha in enumerate(ids):
+            anterior = self._cache.get(trilha)
+            if anterior is None:
+                self.estatisticas['trilhas_novas'] += 1
+            elif agora - anterior[1] > self.ttl:
+                self.estatisticas['expiradas'] += 1
+            elif iou_xywh(anterior[0], caixas[i])[0, 0] < self.limiar_mudanca:
+                self.estatisticas['caixas_alteradas'] += 1
+            else:
+                continue
+            pendentes.append(i)
+
+        if pendentes:
+            resultados = [{} for _ in pendentes]
+            for analisador in self.analisadores:
+                for resultado, campos in zip(resultados, analisador(imagem, caixas[pendentes])):
+                    resultado.update(campos)
+            for i, resultado in zip(pendentes, resultados):
+                self._cache[ids[i]] = (caixas[i].copy(), agora, resultado)
+
+        self.estatisticas['analises_executadas'] += len(pendentes)
+        self.estatisticas['analises_reaproveitadas'] += len(ids) - len(pendentes)
+
+        # Só as trilhas do quadro atual continuam no cache
+        self._cache = {trilha: self._cache[trilha] for trilha in ids}
+        return [self._cache[trilha][2] for trilha in ids]
+
+    def obter_estatisticas(self):
+        total = self.estatisticas['analises_executadas'] + self.estatisticas['analises_reaproveitadas']
+        return dict(self.estatisticas, trilhas_em_cache=len(self._cache),
+                    taxa_reaproveitamento=round(self.estatisticas['analises_reaproveitadas'] / total, 3) if total else 0.0)